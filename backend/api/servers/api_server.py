@@ -27,6 +27,7 @@ from backend.core.analytics.performance import PerformanceAnalytics
 from backend.core.risk.manager import RiskManager
 from backend.services.market_data.downloader import StockDownloader, OptionDownloader, FuturesDownloader
 from backend.services.market_data.options_chain import OptionsChainService
+from backend.services.market_data.chain_snapshots import get_chain_snapshot_store
 
 app = Flask(__name__)
 
@@ -707,6 +708,19 @@ def get_signals():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/signals/live', methods=['GET'])
+def get_live_signals():
+    """Indicator values and recent signals persisted by the feed process's live signal engine"""
+    try:
+        from backend.services.streaming.live_signals import read_live_signals
+
+        keys = request.args.get('instruments')
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify(read_live_signals(DB_PATH, keys.split(',') if keys else None, limit))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/signals/<strategy>', methods=['GET'])
 def get_signals_by_strategy(strategy):
     """Get signals for specific strategy"""
@@ -1046,6 +1060,123 @@ def get_options_chain():
         }), 500
 
 
+@app.route('/api/options/chain/multi-expiry', methods=['GET'])
+def get_options_chain_multi_expiry():
+    """
+    Get option chains for several expiries with OI/PCR/max pain/IV skew analytics
+    Query params:
+        symbol: Underlying symbol (NIFTY, BANKNIFTY, etc.)
+        expiries: Optional comma-separated expiry dates (YYYY-MM-DD)
+        count: Number of nearest expiries when none given (default 3)
+        include_strikes: 'false' to return analytics only
+    """
+    try:
+        symbol = request.args.get('symbol')
+        expiries = request.args.get('expiries')
+        count = request.args.get('count', 3, type=int)
+        include_strikes = request.args.get('include_strikes', 'true').lower() != 'false'
+        
+        if not symbol:
+            logger.warning(f"[TraceID: {g.trace_id}] Missing symbol parameter")
+            return jsonify({'error': 'Symbol parameter required'}), 400
+        
+        expiry_dates = [e.strip() for e in expiries.split(',') if e.strip()] if expiries else None
+        
+        logger.info(f"[TraceID: {g.trace_id}] Multi-expiry chain requested: symbol={symbol}, expiries={expiry_dates or count}")
+        
+        service = OptionsChainService(db_path=DB_PATH)
+        chain_data = service.get_multi_expiry_chain(
+            symbol=symbol,
+            expiry_dates=expiry_dates,
+            num_expiries=count,
+            include_strikes=include_strikes
+        )
+        
+        if not chain_data:
+            return jsonify({'error': f'No option chain data for {symbol}', 'trace_id': g.trace_id}), 404
+        
+        return jsonify(chain_data)
+        
+    except Exception as e:
+        logger.error(f"[TraceID: {g.trace_id}] Multi-expiry chain fetch failed: {e}", exc_info=True)
+        return jsonify({
+            'error': str(e),
+            'trace_id': g.trace_id
+        }), 500
+
+
+@app.route('/api/options/snapshots/chain', methods=['GET'])
+def get_options_snapshot_chain():
+    """
+    Get a recorded option chain as of a point in time
+    Query params:
+        symbol: Underlying symbol
+        expiry_date: Expiry date (YYYY-MM-DD)
+        ts: ISO timestamp (defaults to now)
+    """
+    try:
+        symbol = request.args.get('symbol')
+        expiry_date = request.args.get('expiry_date')
+        ts = request.args.get('ts')
+        
+        if not symbol or not expiry_date:
+            return jsonify({'error': 'symbol and expiry_date parameters required'}), 400
+        
+        as_of = datetime.fromisoformat(ts) if ts else datetime.now()
+        chain_data = get_chain_snapshot_store().get_chain_at(symbol, expiry_date, as_of)
+        
+        if not chain_data:
+            return jsonify({'error': f'No snapshot for {symbol} {expiry_date} at {as_of.isoformat()}'}), 404
+        
+        return jsonify(chain_data)
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid timestamp: {e}'}), 400
+    except Exception as e:
+        logger.error(f"[TraceID: {g.trace_id}] Snapshot chain fetch failed: {e}", exc_info=True)
+        return jsonify({'error': str(e), 'trace_id': g.trace_id}), 500
+
+
+@app.route('/api/options/snapshots/oi-series', methods=['GET'])
+def get_options_snapshot_oi_series():
+    """
+    Get intraday call/put OI series for one strike from recorded snapshots
+    Query params:
+        symbol: Underlying symbol
+        expiry_date: Expiry date (YYYY-MM-DD)
+        strike: Strike price
+        date: Trading date (YYYY-MM-DD, defaults to today)
+        start, end: Optional ISO timestamps within the day
+    """
+    try:
+        symbol = request.args.get('symbol')
+        expiry_date = request.args.get('expiry_date')
+        strike = request.args.get('strike', type=float)
+        
+        if not symbol or not expiry_date or strike is None:
+            return jsonify({'error': 'symbol, expiry_date and strike parameters required'}), 400
+        
+        day = request.args.get('date')
+        start = request.args.get('start')
+        end = request.args.get('end')
+        
+        series = get_chain_snapshot_store().get_oi_series(
+            symbol,
+            expiry_date,
+            strike,
+            day=datetime.strptime(day, '%Y-%m-%d').date() if day else None,
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None
+        )
+        return jsonify(series)
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    except Exception as e:
+        logger.error(f"[TraceID: {g.trace_id}] OI series fetch failed: {e}", exc_info=True)
+        return jsonify({'error': str(e), 'trace_id': g.trace_id}), 500
+
+
 @app.route('/api/options/market-status', methods=['GET'])
 def get_market_status():
     """Check if market is currently open"""
@@ -1229,11 +1360,44 @@ def get_order_status(order_id):
 
 from backend.core.analytics.backtesting_engine import Backtester, BacktestStrategy, create_iron_condor, create_bull_call_spread
 
+_backtest_cache = None
+
+
+def _run_symbol_backtests(data):
+    """SMA/RSI backtests on stored candles, served from the result cache when unchanged"""
+    from backend.core.analytics.backtest_engine import BacktestEngine
+    from backend.core.analytics.parameter_sweep import STRATEGIES
+    from backend.core.analytics.result_cache import BacktestCache
+
+    global _backtest_cache
+    strategy_cls = STRATEGIES.get(str(data.get('strategy', 'SMA')).upper())
+    if strategy_cls is None:
+        return jsonify({'error': f"Unknown strategy, expected one of {sorted(STRATEGIES)}"}), 400
+    if _backtest_cache is None:
+        _backtest_cache = BacktestCache()
+
+    symbols = data.get('symbols') or [data['symbol']]
+    engine = BacktestEngine(data.get('engine_params'), cache=_backtest_cache)
+    strategy = strategy_cls(data.get('params'))
+    results, cached = [], []
+    for symbol in symbols:
+        result = engine.run_backtest(
+            symbol.upper(), strategy, data.get('timeframe', '1d'), data.get('start_date'), data.get('end_date')
+        )
+        if result is not None:
+            results.append(result.to_dict())
+            if engine.last_cache_hit:
+                cached.append(result.symbol)
+    return jsonify({'results': results, 'cached': cached, 'recomputed': len(results) - len(cached)})
+
+
 @app.route('/api/backtest/run', methods=['POST'])
 def run_backtest():
-    """Run strategy backtest"""
+    """Run strategy backtest (options strategy on spot data, or SMA/RSI on stored candles with 'symbol')"""
     try:
         data = request.json
+        if data.get('symbol') or data.get('symbols'):
+            return _run_symbol_backtests(data)
         strategy_name = data.get('strategy')
         entry_date = data.get('entry_date')
         exit_date = data.get('exit_date')
@@ -1673,7 +1837,7 @@ def backtest_multi_expiry():
         })
         
         # Run backtest
-        backtester = MultiExpiryBacktester()
+        backtester = MultiExpiryBacktester(db_path=DB_PATH)
         result = backtester.backtest_with_rolling(
             strategy,
             historical_data,
@@ -1705,6 +1869,7 @@ if __name__ == '__main__':
     print("   GET  /api/performance")
     print("   GET  /api/alerts")
     print("   GET  /api/signals")
+    print("   GET  /api/signals/live")
     print("   GET  /api/health")
     print("\n   📥 Data Download:")
     print("   POST /api/download/stocks")
@@ -1712,6 +1877,9 @@ if __name__ == '__main__':
     print("   GET  /api/download/logs")
     print("\n   📊 Options Chain:")
     print("   GET  /api/options/chain?symbol=NIFTY")
+    print("   GET  /api/options/chain/multi-expiry?symbol=NIFTY&count=3")
+    print("   GET  /api/options/snapshots/chain?symbol=NIFTY&expiry_date=YYYY-MM-DD&ts=...")
+    print("   GET  /api/options/snapshots/oi-series?symbol=NIFTY&expiry_date=YYYY-MM-DD&strike=...")
     print("   GET  /api/options/market-status")
     print("\n   🔴 PHASE 3 - Live Upstox API:")
     print("   GET  /api/upstox/profile")
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 """
-Backtest Engine - VectorBT-based backtesting for stocks and options
+Backtest Engine - Vectorized backtesting for stocks and options
 Supports multiple strategies with portfolio management and comprehensive metrics
+
+Portfolios are simulated by a built-in NumPy engine (simulate_from_signals).
+vectorbt is an optional accelerator, imported only when requested with
+params {"engine": "vectorbt"} or {"engine": "auto"}.
 """
 
 import sqlite3
@@ -9,18 +13,14 @@ import logging
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import json
 
-try:
-    import vectorbt as vbt
-except ImportError:
-    logger = logging.getLogger(__name__)
-    logger.warning(
-        "vectorbt not installed. Backtesting functionality will be limited. Install with: pip install vectorbt[full]"
-    )
-    vbt = None
+from backend.core.analytics.indicators import rolling_means, rsi, sma
+
+# vectorbt is heavy to import and optional: loaded lazily by _load_vectorbt()
+vbt = None
 
 # Configure logging
 logging.basicConfig(
@@ -37,8 +37,28 @@ DEFAULT_BACKTEST_PARAMS = {
     "slippage": 0.001,  # 0.1% slippage
     "use_log_returns": False,  # Use arithmetic vs log returns
     "freq": "D",  # Daily frequency
+    "fill_price": "close",  # 'close' (signal bar close) or 'next_open'
+    "engine": "native",  # 'native', 'vectorbt' or 'auto' (vectorbt if installed)
 }
 
+FILL_PRICES = ("close", "next_open")
+YEAR_DAYS = 365  # Annualization year, as vectorbt's default year_freq
+
+
+def _load_vectorbt():
+    """Import vectorbt on first use (None if not installed)"""
+    global vbt
+    if vbt is None:
+        try:
+            import vectorbt
+
+            vbt = vectorbt
+        except ImportError:
+            logger.warning(
+                "vectorbt not installed, using the native engine. Install with: pip install vectorbt[full]"
+            )
+    return vbt
+
 
 @dataclass
 class BacktestResult:
@@ -80,6 +100,171 @@ class BacktestResult:
         }
 
 
+@dataclass
+class SimulationResult:
+    """Equity curve, trades and metrics of one simulated portfolio"""
+
+    equity: np.ndarray  # Portfolio value at each bar close
+    returns: np.ndarray  # Per-bar returns (first bar vs init_cash)
+    position: np.ndarray  # True where a position is held at the bar close
+    trades: Dict[str, np.ndarray]  # Column arrays, one entry per trade
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+    def trades_frame(self, index: Optional[pd.Index] = None) -> pd.DataFrame:
+        """Trades as a DataFrame (entry/exit bars mapped to index if given)"""
+        df = pd.DataFrame(self.trades)
+        if index is not None and not df.empty:
+            df["entry_time"] = index[df["entry_idx"]]
+            exit_idx = df["exit_idx"].to_numpy()
+            df["exit_time"] = pd.Series(index[np.maximum(exit_idx, 0)]).where(exit_idx >= 0)
+        return df
+
+
+def signal_state(entries: np.ndarray, exits: np.ndarray) -> np.ndarray:
+    """
+    Long/flat state after each bar from entry and exit signals.
+
+    The latest signal wins; a bar with both an entry and an exit is ignored,
+    and repeated entries while long (or exits while flat) change nothing.
+    """
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    event = np.full(len(entries), -1, dtype=np.int8)
+    event[entries & ~exits] = 1
+    event[exits & ~entries] = 0
+    has_event = event >= 0
+    last = np.maximum.accumulate(np.where(has_event, np.arange(len(event)), 0))
+    return np.where(np.maximum.accumulate(has_event), event[last] == 1, False)
+
+
+def annualization_factor(freq: str) -> float:
+    """Bars per year for a pandas frequency string ('D', '1h', '5min', ...)"""
+    bar = pd.Timedelta(freq if freq[:1].isdigit() else f"1{freq}")
+    return pd.Timedelta(days=YEAR_DAYS) / bar
+
+
+def portfolio_metrics(
+    equity: np.ndarray, init_cash: float, ann_factor: float, trade_pnl: Optional[np.ndarray] = None
+) -> Dict[str, float]:
+    """Return, risk and trade metrics of an equity curve (vectorbt conventions)"""
+    equity = np.asarray(equity, dtype=np.float64)
+    prev = np.concatenate(([init_cash], equity[:-1]))
+    returns = np.divide(equity - prev, prev, out=np.zeros_like(equity), where=prev != 0)
+    total_return = equity[-1] / init_cash - 1 if len(equity) else 0.0
+
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    mean = returns.mean() if len(returns) else 0.0
+    sharpe = mean / std * np.sqrt(ann_factor) if std > 0 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2)) if len(returns) else 0.0
+    sortino = mean / downside * np.sqrt(ann_factor) if downside > 0 else 0.0
+
+    peak = np.maximum.accumulate(np.concatenate(([init_cash], equity)))[1:]
+    max_drawdown = float((equity / peak - 1).min()) if len(equity) else 0.0
+    annual_return = (1 + total_return) ** (ann_factor / len(equity)) - 1 if len(equity) else 0.0
+    calmar = annual_return / abs(max_drawdown) if max_drawdown < 0 else 0.0
+
+    closed = trade_pnl[~np.isnan(trade_pnl)] if trade_pnl is not None else np.empty(0)
+    return {
+        "final_value": float(equity[-1]) if len(equity) else float(init_cash),
+        "total_return": float(total_return),
+        "annual_return": float(annual_return),
+        "sharpe_ratio": float(sharpe),
+        "sortino_ratio": float(sortino),
+        "calmar_ratio": float(calmar),
+        "max_drawdown": max_drawdown,
+        "win_rate": float((closed > 0).mean()) if len(closed) else 0.0,
+        "closed_trades": int(len(closed)),
+    }
+
+
+def simulate_from_signals(
+    open_: Optional[np.ndarray],
+    close: np.ndarray,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    init_cash: float = DEFAULT_BACKTEST_PARAMS["init_cash"],
+    commission: float = DEFAULT_BACKTEST_PARAMS["commission"],
+    slippage: float = DEFAULT_BACKTEST_PARAMS["slippage"],
+    fill_price: str = DEFAULT_BACKTEST_PARAMS["fill_price"],
+    freq: str = DEFAULT_BACKTEST_PARAMS["freq"],
+) -> SimulationResult:
+    """
+    Simulate a long-only, all-in portfolio from entry/exit signals.
+
+    Signals are evaluated at the bar close and filled at that close
+    (fill_price='close') or at the next bar's open ('next_open'). Buys pay
+    price * (1 + slippage), sells receive price * (1 - slippage), and the
+    commission is charged as a fraction of traded value on both sides.
+    Each trade invests all available cash (fractional quantities), so
+    equity compounds across trades. A position still open at the end is
+    marked to the last close and counted as an open trade.
+
+    Everything is computed with array operations: O(bars + trades).
+    """
+    if fill_price not in FILL_PRICES:
+        raise ValueError(f"fill_price must be one of {FILL_PRICES}, got {fill_price!r}")
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    state = signal_state(entries, exits)
+
+    if fill_price == "next_open":
+        if open_ is None:
+            raise ValueError("next_open fills need open prices")
+        fill = np.asarray(open_, dtype=np.float64)
+        held = np.concatenate(([False], state[:-1]))  # Signal at t fills at open t+1
+    else:
+        fill = close
+        held = state
+
+    prev_held = np.concatenate(([False], held[:-1]))
+    entry_idx = np.flatnonzero(held & ~prev_held)
+    exit_idx = np.flatnonzero(~held & prev_held)
+    n_trades, n_closed = len(entry_idx), len(exit_idx)
+
+    buy_px = fill[entry_idx] * (1 + slippage)
+    sell_px = fill[exit_idx] * (1 - slippage)
+    # Cash multiplier of each closed round trip, compounded into the next one
+    growth = sell_px * (1 - commission) / (buy_px[:n_closed] * (1 + commission))
+    cash_levels = init_cash * np.concatenate(([1.0], np.cumprod(growth)))
+    size = cash_levels[:n_trades] / (buy_px * (1 + commission))
+
+    trade_id = np.cumsum(held & ~prev_held) - 1
+    closed_so_far = np.cumsum(~held & prev_held)
+    equity = np.where(held, size[np.maximum(trade_id, 0)] * close if n_trades else 0.0,
+                      cash_levels[closed_so_far])
+
+    exit_value = np.full(n_trades, np.nan)
+    exit_value[:n_closed] = size[:n_closed] * sell_px * (1 - commission)
+    pnl = exit_value - cash_levels[:n_trades]
+    exit_price = np.full(n_trades, np.nan)
+    exit_price[:n_closed] = sell_px
+    exit_bar = np.full(n_trades, -1, dtype=np.int64)
+    exit_bar[:n_closed] = exit_idx
+    fees = size * buy_px * commission
+    fees[:n_closed] += size[:n_closed] * sell_px * commission
+    trades = {
+        "entry_idx": entry_idx,
+        "exit_idx": exit_bar,
+        "size": size,
+        "entry_price": buy_px,
+        "exit_price": exit_price,
+        "fees": fees,
+        "pnl": pnl,
+        "return": pnl / cash_levels[:n_trades],
+    }
+
+    metrics = portfolio_metrics(equity, init_cash, annualization_factor(freq), pnl)
+    metrics["total_trades"] = n_trades
+    prev = np.concatenate(([init_cash], equity[:-1]))
+    return SimulationResult(
+        equity=equity,
+        returns=equity / prev - 1 if n else equity,
+        position=held,
+        trades=trades,
+        metrics=metrics,
+    )
+
+
 @dataclass
 class Signal:
     """Buy/sell signal container"""
@@ -110,6 +295,36 @@ class BaseStrategy:
         required = ["open", "high", "low", "close", "volume"]
         return all(col in ohlcv_data.columns for col in required)
 
+    @classmethod
+    def generate_signal_batch(
+        cls, arrays: Dict[str, np.ndarray], param_sets: List[Dict]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Entry/exit matrices (one row per parameter set) for a parameter sweep.
+
+        The default runs generate_signals once per parameter set; strategies
+        whose indicators vectorize across parameters override this.
+        """
+        ohlcv = pd.DataFrame(arrays)
+        n = len(ohlcv)
+        entries = np.zeros((len(param_sets), n), dtype=bool)
+        exits = np.zeros((len(param_sets), n), dtype=bool)
+        for row, params in enumerate(param_sets):
+            signals = cls(params).generate_signals(ohlcv)
+            if signals is None:
+                continue
+            trade_signal = signals["trade_signal"].to_numpy()
+            entries[row] = trade_signal > 0
+            exits[row] = trade_signal < 0
+        return entries, exits
+
+
+def _crossings(signal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Entries/exits where a (params x bars) -1/0/1 signal steps up/down"""
+    step = np.zeros(signal.shape, dtype=np.int8)
+    step[:, 1:] = np.diff(signal, axis=1)
+    return step > 0, step < 0
+
 
 class SMAStrategy(BaseStrategy):
     """Simple Moving Average crossover strategy"""
@@ -132,8 +347,9 @@ class SMAStrategy(BaseStrategy):
         fast_period = self.params["fast_period"]
         slow_period = self.params["slow_period"]
 
-        df["sma_fast"] = df["close"].rolling(window=fast_period).mean()
-        df["sma_slow"] = df["close"].rolling(window=slow_period).mean()
+        close = df["close"].to_numpy(dtype=np.float64)
+        df["sma_fast"] = sma(close, fast_period)
+        df["sma_slow"] = sma(close, slow_period)
 
         # Generate signals: 1 (buy) when fast > slow, -1 (sell) when fast < slow
         df["signal"] = 0
@@ -146,6 +362,20 @@ class SMAStrategy(BaseStrategy):
 
         return df[["close", "signal", "trade_signal"]]
 
+    @classmethod
+    def generate_signal_batch(
+        cls, arrays: Dict[str, np.ndarray], param_sets: List[Dict]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Crossovers for all (fast, slow) pairs, each SMA computed once"""
+        merged = [{**cls().params, **p} for p in param_sets]
+        fast = [p["fast_period"] for p in merged]
+        slow = [p["slow_period"] for p in merged]
+        means = rolling_means(arrays["close"], fast + slow)
+        fast_sma = np.stack([means[w] for w in fast])
+        slow_sma = np.stack([means[w] for w in slow])
+        signal = np.nan_to_num(np.sign(fast_sma - slow_sma)).astype(np.int8)
+        return _crossings(signal)
+
 
 class RSIStrategy(BaseStrategy):
     """RSI (Relative Strength Index) mean-reversion strategy"""
@@ -155,6 +385,7 @@ class RSIStrategy(BaseStrategy):
             "rsi_period": 14,
             "oversold_threshold": 30,
             "overbought_threshold": 70,
+            "rsi_smoothing": "sma",  # 'sma' (rolling mean of gains/losses) or 'wilder'
         }
         merged_params = {**defaults, **(params or {})}
         super().__init__("RSI Mean Reversion", merged_params)
@@ -170,12 +401,7 @@ class RSIStrategy(BaseStrategy):
         oversold = self.params["oversold_threshold"]
         overbought = self.params["overbought_threshold"]
 
-        # Calculate RSI
-        delta = df["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
-        rs = gain / loss
-        df["rsi"] = 100 - (100 / (1 + rs))
+        df["rsi"] = rsi(df["close"].to_numpy(dtype=np.float64), rsi_period, self.params["rsi_smoothing"])
 
         # Generate signals
         df["signal"] = 0
@@ -188,6 +414,20 @@ class RSIStrategy(BaseStrategy):
 
         return df[["close", "signal", "trade_signal", "rsi"]]
 
+    @classmethod
+    def generate_signal_batch(
+        cls, arrays: Dict[str, np.ndarray], param_sets: List[Dict]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """RSI once per (period, smoothing), thresholds broadcast across parameter sets"""
+        merged = [{**cls().params, **p} for p in param_sets]
+        keys = [(p["rsi_period"], p["rsi_smoothing"]) for p in merged]
+        series = {key: rsi(arrays["close"], *key) for key in set(keys)}
+        values = np.stack([series[key] for key in keys])
+        oversold = np.array([p["oversold_threshold"] for p in merged], dtype=np.float64)[:, None]
+        overbought = np.array([p["overbought_threshold"] for p in merged], dtype=np.float64)[:, None]
+        signal = np.where(values < oversold, 1, np.where(values > overbought, -1, 0)).astype(np.int8)
+        return _crossings(signal)
+
 
 class SimpleOptionSpreadStrategy(BaseStrategy):
     """Bull call spread strategy for options"""
@@ -210,12 +450,115 @@ class SimpleOptionSpreadStrategy(BaseStrategy):
         return None
 
 
+def candle_filter(
+    symbol: str,
+    timeframe: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Tuple[str, List]:
+    """WHERE clause and parameters selecting a symbol's candles_new rows in a date range"""
+    where = "symbol = ? AND timeframe = ?"
+    params: List = [symbol, timeframe]
+    if start_date:
+        where += " AND timestamp >= ?"
+        params.append(int(datetime.strptime(start_date, "%Y-%m-%d").timestamp()))
+    if end_date:
+        where += " AND timestamp <= ?"
+        params.append(int(datetime.strptime(end_date, "%Y-%m-%d").timestamp()))
+    return where, params
+
+
+def _finite(value: float) -> float:
+    return value if np.isfinite(value) else 0
+
+
 class BacktestEngine:
-    """Main backtesting engine"""
+    """
+    Main backtesting engine
 
-    def __init__(self, params: Dict = None):
+    With a cache (result_cache.BacktestCache), run_backtest returns the
+    stored result when the candles, strategy and params are unchanged.
+    """
+
+    def __init__(self, params: Dict = None, cache=None):
         self.params = {**DEFAULT_BACKTEST_PARAMS, **(params or {})}
         self.results = []
+        self.last_simulation: Optional[SimulationResult] = None
+        self.cache = cache
+        self.last_cache_hit = False
+
+    def simulate(
+        self, data: pd.DataFrame, entries: np.ndarray, exits: np.ndarray
+    ) -> SimulationResult:
+        """Simulate a portfolio on OHLCV data with the configured engine"""
+        engine = self.params["engine"]
+        if engine in ("vectorbt", "auto") and _load_vectorbt() is not None:
+            return self._simulate_vectorbt(data, entries, exits)
+        if engine == "vectorbt":
+            logger.warning("vectorbt requested but unavailable, falling back to native engine")
+
+        return simulate_from_signals(
+            data["open"].to_numpy() if "open" in data else None,
+            data["close"].to_numpy(),
+            entries,
+            exits,
+            init_cash=self.params["init_cash"],
+            commission=self.params["commission"],
+            slippage=self.params["slippage"],
+            fill_price=self.params["fill_price"],
+            freq=self.params["freq"],
+        )
+
+    def _simulate_vectorbt(
+        self, data: pd.DataFrame, entries: np.ndarray, exits: np.ndarray
+    ) -> SimulationResult:
+        """Same simulation through vbt.Portfolio.from_signals"""
+        entries = pd.Series(entries, index=data.index)
+        exits = pd.Series(exits, index=data.index)
+        price = data["close"]
+        if self.params["fill_price"] == "next_open":
+            # Signal at bar t fills at the open of bar t+1
+            entries = entries.shift(1, fill_value=False)
+            exits = exits.shift(1, fill_value=False)
+            price = data["open"]
+
+        pf = vbt.Portfolio.from_signals(
+            close=data["close"],
+            entries=entries,
+            exits=exits,
+            price=price,
+            init_cash=self.params["init_cash"],
+            fees=self.params["commission"],
+            slippage=self.params["slippage"],
+            freq=self.params["freq"],
+        )
+        records = pf.trades.records_readable
+        trades = {
+            "entry_idx": data.index.get_indexer(records["Entry Timestamp"]),
+            "exit_idx": np.where(
+                records["Status"] == "Closed",
+                data.index.get_indexer(records["Exit Timestamp"]),
+                -1,
+            ),
+            "size": records["Size"].to_numpy(),
+            "entry_price": records["Avg Entry Price"].to_numpy(),
+            "exit_price": np.where(records["Status"] == "Closed", records["Avg Exit Price"], np.nan),
+            "fees": (records["Entry Fees"] + records["Exit Fees"]).to_numpy(),
+            "pnl": np.where(records["Status"] == "Closed", records["PnL"], np.nan),
+            "return": records["Return"].to_numpy(),
+        }
+        equity = pf.value().to_numpy()
+        metrics = portfolio_metrics(
+            equity, self.params["init_cash"], annualization_factor(self.params["freq"]), trades["pnl"]
+        )
+        metrics["total_trades"] = len(records)
+        return SimulationResult(
+            equity=equity,
+            returns=pf.returns().to_numpy(),
+            position=pf.assets().to_numpy() > 0,
+            trades=trades,
+            metrics=metrics,
+        )
 
     def load_candle_data(
         self,
@@ -228,24 +571,13 @@ class BacktestEngine:
         try:
             conn = sqlite3.connect(DB_PATH)
 
-            query = """
+            where, params = candle_filter(symbol, timeframe, start_date, end_date)
+            query = f"""
                 SELECT timestamp, open, high, low, close, volume
                 FROM candles_new
-                WHERE symbol = ? AND timeframe = ?
+                WHERE {where}
+                ORDER BY timestamp ASC
             """
-            params = [symbol, timeframe]
-
-            if start_date:
-                start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
-                query += " AND timestamp >= ?"
-                params.append(start_ts)
-
-            if end_date:
-                end_ts = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp())
-                query += " AND timestamp <= ?"
-                params.append(end_ts)
-
-            query += " ORDER BY timestamp ASC"
 
             df = pd.read_sql_query(query, conn, params=params)
             conn.close()
@@ -279,6 +611,18 @@ class BacktestEngine:
         Run backtest for a single symbol with given strategy
         Returns BacktestResult with comprehensive metrics
         """
+        self.last_cache_hit = False
+        cache_entry = None
+        if self.cache is not None:
+            cache_entry = self.cache.key_for(symbol, strategy, self.params, timeframe, start_date, end_date)
+            cached = self.cache.get(cache_entry[0]) if cache_entry else None
+            if cached is not None:
+                result, self.last_simulation = cached
+                self.last_cache_hit = True
+                self.results.append(result)
+                logger.info(f"✓ {strategy.name} backtest for {symbol} served from cache")
+                return result
+
         # Load data
         data = self.load_candle_data(symbol, timeframe, start_date, end_date)
         if data is None or data.empty:
@@ -297,63 +641,47 @@ class BacktestEngine:
         backtest_data["signal"] = signals_df["signal"]
         backtest_data["trade_signal"] = signals_df["trade_signal"]
 
-        # Use vectorbt for portfolio simulation
         try:
-            # Create entries and exits based on signals
-            entries = backtest_data["trade_signal"] == 1
-            exits = backtest_data["trade_signal"] == -1
-
-            # Run portfolio
-            pf = vbt.Portfolio.from_signals(
-                close=backtest_data["close"],
-                entries=entries,
-                exits=exits,
-                init_cash=self.params["init_cash"],
-                fees=self.params["commission"],
-                freq=self.params["freq"],
-            )
+            # Create entries and exits based on signals (crossovers diff by +-2)
+            entries = (backtest_data["trade_signal"] > 0).to_numpy()
+            exits = (backtest_data["trade_signal"] < 0).to_numpy()
 
-            # Extract metrics
-            total_return = pf.total_return()
-            sharpe_ratio = pf.sharpe_ratio()
-            sortino_ratio = pf.sortino_ratio()
-            calmar_ratio = pf.calmar_ratio()
-            max_drawdown = pf.max_drawdown()
-            win_rate = pf.win_rate if hasattr(pf, "win_rate") else 0
+            sim = self.simulate(backtest_data, entries, exits)
+            self.last_simulation = sim
+            metrics = sim.metrics
 
             # Calculate CAGR
             duration_years = (
                 backtest_data.index[-1] - backtest_data.index[0]
             ).days / 365.25
             if duration_years > 0:
-                cagr = (pf.final_value() / self.params["init_cash"]) ** (
+                cagr = (metrics["final_value"] / self.params["init_cash"]) ** (
                     1 / duration_years
                 ) - 1
             else:
                 cagr = 0
 
-            # Count trades
-            total_trades = int(entries.sum() + exits.sum())
-
             result = BacktestResult(
                 strategy_name=strategy.name,
                 symbol=symbol,
                 start_date=backtest_data.index[0].strftime("%Y-%m-%d"),
                 end_date=backtest_data.index[-1].strftime("%Y-%m-%d"),
                 init_cash=self.params["init_cash"],
-                final_value=pf.final_value(),
-                total_return=total_return,
+                final_value=metrics["final_value"],
+                total_return=metrics["total_return"],
                 cagr=cagr,
-                sharpe_ratio=sharpe_ratio if not np.isnan(sharpe_ratio) else 0,
-                sortino_ratio=sortino_ratio if not np.isnan(sortino_ratio) else 0,
-                calmar_ratio=calmar_ratio if not np.isnan(calmar_ratio) else 0,
-                max_drawdown=max_drawdown,
-                win_rate=win_rate,
-                total_trades=total_trades,
+                sharpe_ratio=_finite(metrics["sharpe_ratio"]),
+                sortino_ratio=_finite(metrics["sortino_ratio"]),
+                calmar_ratio=_finite(metrics["calmar_ratio"]),
+                max_drawdown=metrics["max_drawdown"],
+                win_rate=metrics["win_rate"],
+                total_trades=metrics["total_trades"],
                 duration_days=(backtest_data.index[-1] - backtest_data.index[0]).days,
             )
 
             self.results.append(result)
+            if cache_entry:
+                self.cache.put(cache_entry[0], cache_entry[1], timeframe, result, sim)
 
             logger.info(f"✓ Backtest complete:")
             logger.info(
@@ -380,8 +708,9 @@ class BacktestEngine:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
     ) -> List[BacktestResult]:
-        """Run backtest for multiple symbols"""
+        """Run backtest for multiple symbols (with a cache, only symbols whose data changed are recomputed)"""
         results = []
+        cache_hits = 0
 
         for symbol in symbols:
             result = self.run_backtest(
@@ -389,7 +718,10 @@ class BacktestEngine:
             )
             if result:
                 results.append(result)
+                cache_hits += self.last_cache_hit
 
+        if self.cache is not None:
+            logger.info(f"Batch: {cache_hits} cached, {len(results) - cache_hits} recomputed")
         return results
 
     def print_results_summary(self):
@@ -10,9 +10,12 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from backend.core.analytics.payoff import analyze_expiry, expiry_pnl, range_extremes, strategy_legs
+
 # Setup logger
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -62,44 +65,23 @@ class BacktestStrategy:
         """Calculate total P&L at exit"""
         return sum(leg.calculate_pnl(exit_price) for leg in self.legs)
 
-    def get_max_profit(self, price_range: tuple) -> tuple:
-        """Find max profit and price"""
-        max_pnl = -float("inf")
-        max_price = 0
-
-        for price in np.linspace(price_range[0], price_range[1], 1000):
-            pnl = self.calculate_pnl(price)
-            if pnl > max_pnl:
-                max_pnl = pnl
-                max_price = price
+    def expiry_pnl(self, prices) -> np.ndarray:
+        """P&L at expiry for an array of prices"""
+        return expiry_pnl(strategy_legs(self.legs), prices)
 
-        return max_pnl, max_price
+    def get_max_profit(self, price_range: tuple) -> tuple:
+        """Find max profit and price (exact, from the payoff kinks)"""
+        result = analyze_expiry(strategy_legs(self.legs), price_range)
+        return result["max_profit"], result["max_profit_price"]
 
     def get_max_loss(self, price_range: tuple) -> tuple:
-        """Find max loss and price"""
-        max_loss = float("inf")
-        loss_price = 0
-
-        for price in np.linspace(price_range[0], price_range[1], 1000):
-            pnl = self.calculate_pnl(price)
-            if pnl < max_loss:
-                max_loss = pnl
-                loss_price = price
-
-        return max_loss, loss_price
+        """Find max loss and price (exact, from the payoff kinks)"""
+        result = analyze_expiry(strategy_legs(self.legs), price_range)
+        return result["max_loss"], result["max_loss_price"]
 
     def find_breakevens(self, price_range: tuple) -> List[float]:
-        """Find breakeven points"""
-        breakevens = []
-
-        prices = np.linspace(price_range[0], price_range[1], 10000)
-        pnls = [self.calculate_pnl(p) for p in prices]
-
-        for i in range(len(pnls) - 1):
-            if (pnls[i] < 0 and pnls[i + 1] >= 0) or (pnls[i] >= 0 and pnls[i + 1] < 0):
-                breakevens.append(prices[i])
-
-        return breakevens
+        """Find breakeven points (exact roots of the expiry payoff)"""
+        return analyze_expiry(strategy_legs(self.legs), price_range)["breakevens"]
 
 
 class Backtester:
@@ -152,19 +134,18 @@ class Backtester:
             )
 
             # Track daily P&L
-            daily_pnl = []
-            for _, row in backtest_data.iterrows():
-                daily_pnl.append(
-                    {
-                        "date": row["date"].strftime("%Y-%m-%d"),
-                        "price": row["close"],
-                        "pnl": strategy.calculate_pnl(row["close"]),
-                    }
+            closes = backtest_data["close"].to_numpy(dtype=float)
+            pnls = strategy.expiry_pnl(closes)
+            daily_pnl = [
+                {"date": date, "price": price, "pnl": value}
+                for date, price, value in zip(
+                    backtest_data["date"].dt.strftime("%Y-%m-%d"), closes.tolist(), pnls.tolist()
                 )
+            ]
 
             # Calculate statistics
-            min_pnl = min(d["pnl"] for d in daily_pnl)
-            max_pnl = max(d["pnl"] for d in daily_pnl)
+            min_pnl = float(pnls.min())
+            max_pnl = float(pnls.max())
 
             # Price range for analysis
             price_range = (
@@ -208,6 +189,94 @@ class Backtester:
             logger.error(f"Error in backtest: {e}", exc_info=True)
             return {"error": str(e)}
 
+    def run_rolling_backtest(
+        self,
+        strategy: BacktestStrategy,
+        historical_data: pd.DataFrame,
+        start_date: str,
+        end_date: str,
+        hold_days: int = 7,
+        step: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Evaluate every rolling window in one pass
+
+        The series is indexed once; entries start every `step` bars (default
+        hold_days) and exit hold_days bars later. Window P&L paths, extremes
+        and payoff ranges come from array slices of one P&L series.
+
+        Args:
+            strategy: Strategy to test
+            historical_data: DataFrame with columns ['date', 'open', 'high', 'low', 'close']
+            start_date: Overall start date
+            end_date: Overall end date
+            hold_days: Bars to hold each position
+            step: Bars between entries
+
+        Returns:
+            DataFrame with one row per window and the run_backtest statistics as columns
+        """
+        series = self._window_series(historical_data, start_date, end_date)
+        return self._rolling_windows(strategy, series, hold_days, step or hold_days)
+
+    @staticmethod
+    def _window_series(
+        historical_data: pd.DataFrame, start_date: str, end_date: str
+    ) -> Dict[str, np.ndarray]:
+        """Date strings and price columns inside [start_date, end_date], indexed once"""
+        dates = pd.to_datetime(historical_data["date"])
+        in_range = ((dates >= start_date) & (dates <= end_date)).to_numpy()
+        series = {"date": dates[in_range].dt.strftime("%Y-%m-%d").to_numpy()}
+        for column in ("close", "low", "high"):
+            series[column] = historical_data[column].to_numpy(dtype=float)[in_range]
+        return series
+
+    @staticmethod
+    def _rolling_windows(
+        strategy: BacktestStrategy, series: Dict[str, np.ndarray], hold_days: int, step: int
+    ) -> pd.DataFrame:
+        dates, close, low, high = series["date"], series["close"], series["low"], series["high"]
+        entry = np.arange(0, max(len(close) - hold_days, 0), step)
+        if len(entry) == 0:
+            return pd.DataFrame()
+        exit_ = entry + hold_days
+
+        legs = strategy_legs(strategy.legs)
+        pnl = expiry_pnl(legs, close)
+        window = hold_days + 1
+        path = sliding_window_view(pnl, window)[entry]
+        lows = sliding_window_view(low, window)[entry].min(axis=1) * 0.95
+        highs = sliding_window_view(high, window)[entry].max(axis=1) * 1.05
+        extremes = range_extremes(legs, lows, highs)
+
+        final_pnl = pnl[exit_]
+        entry_cost = legs.entry_cost
+        breakevens = np.array(analyze_expiry(legs)["breakevens"])
+
+        return pd.DataFrame(
+            {
+                "entry_date": dates[entry],
+                "exit_date": dates[exit_],
+                "entry_price": close[entry],
+                "exit_price": close[exit_],
+                "final_pnl": final_pnl,
+                "pnl_percent": final_pnl / abs(entry_cost) * 100 if entry_cost != 0 else 0.0,
+                "min_pnl_during_period": path.min(axis=1),
+                "max_pnl_during_period": path.max(axis=1),
+                "max_profit_possible": extremes["max_profit"],
+                "max_profit_at_price": extremes["max_profit_price"],
+                "max_loss_possible": extremes["max_loss"],
+                "max_loss_at_price": extremes["max_loss_price"],
+                "breakeven_points": [
+                    breakevens[(breakevens >= lo) & (breakevens <= hi)].tolist()
+                    for lo, hi in zip(lows, highs)
+                ],
+                "days_held": window,
+                "win": final_pnl > 0,
+                "entry_index": entry,
+            }
+        )
+
     def run_multiple_backtests(
         self,
         strategy: BacktestStrategy,
@@ -215,6 +284,7 @@ class Backtester:
         start_date: str,
         end_date: str,
         hold_days: int = 7,
+        step: Optional[int] = None,
     ) -> List[Dict]:
         """
         Run multiple backtests with rolling window
@@ -225,33 +295,33 @@ class Backtester:
             start_date: Overall start date
             end_date: Overall end date
             hold_days: Days to hold each position
+            step: Days between entries (default hold_days)
 
         Returns:
             List of backtest results
         """
-        results = []
-
-        historical_data["date"] = pd.to_datetime(historical_data["date"])
-        data = (
-            historical_data[
-                (historical_data["date"] >= start_date)
-                & (historical_data["date"] <= end_date)
-            ]
-            .copy()
-            .reset_index(drop=True)
-        )
+        series = self._window_series(historical_data, start_date, end_date)
+        windows = self._rolling_windows(strategy, series, hold_days, step or hold_days)
 
-        # Rolling window backtests
-        for i in range(0, len(data) - hold_days, hold_days):
-            entry_idx = i
-            exit_idx = min(i + hold_days, len(data) - 1)
-
-            entry_date = data.iloc[entry_idx]["date"].strftime("%Y-%m-%d")
-            exit_date = data.iloc[exit_idx]["date"].strftime("%Y-%m-%d")
-
-            result = self.run_backtest(strategy, historical_data, entry_date, exit_date)
-            if "error" not in result:
-                results.append(result)
+        results = []
+        if not windows.empty:
+            days = series["date"].tolist()
+            closes = series["close"].tolist()
+            pnls = strategy.expiry_pnl(series["close"]).tolist()
+
+            for window in windows.to_dict("records"):
+                start = window.pop("entry_index")
+                path = slice(start, start + hold_days + 1)
+                window.update(
+                    strategy_name=strategy.name,
+                    entry_cost=strategy.entry_cost,
+                    daily_pnl=[
+                        {"date": d, "price": p, "pnl": v}
+                        for d, p, v in zip(days[path], closes[path], pnls[path])
+                    ],
+                )
+                results.append(window)
+            self.results.extend(results)
 
         # Calculate aggregate statistics
         if results:
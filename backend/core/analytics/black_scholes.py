@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Black-Scholes - Vectorized European option pricing, Greeks and implied volatility
+
+Every function broadcasts its arguments with NumPy, so a whole price x date
+grid or a full option chain is priced in one call:
+
+    price = bs_price(spot[:, None], strikes[None, :], years, 0.18, is_call=True)
+    greeks = bs_greeks(spot, strikes, years, ivs, is_call=is_call)
+    ivs = implied_volatility(premiums, spot, strikes, years, is_call=is_call)
+
+Time is in years (days / 365). At or past expiry (T <= 0) options are worth
+their intrinsic value. Greeks follow the conventions of the strategy engine:
+vega per 1 vol point, theta per calendar day.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from scipy.special import ndtr as _ndtr
+except ImportError:  # scipy is optional: fall back to math.erf
+    _erf = np.frompyfunc(math.erf, 1, 1)
+
+    def _ndtr(x):
+        return 0.5 * (1.0 + _erf(np.asarray(x) / math.sqrt(2.0)).astype(np.float64))
+
+
+RISK_FREE_RATE = 0.06
+DEFAULT_VOLATILITY = 0.20
+_SQRT_2PI = math.sqrt(2.0 * math.pi)
+
+
+def norm_cdf(x):
+    return _ndtr(x)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / _SQRT_2PI
+
+
+def _d1_d2(S, K, T, sigma, r, q):
+    sqrt_t = np.sqrt(T)
+    vol_t = sigma * sqrt_t
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / vol_t
+    return d1, d1 - vol_t, sqrt_t
+
+
+def bs_price(S, K, T, sigma, r=RISK_FREE_RATE, is_call=True, q=0.0) -> np.ndarray:
+    """European option value; intrinsic where T <= 0 or sigma <= 0"""
+    S, K, T, sigma, is_call = np.broadcast_arrays(
+        np.asarray(S, dtype=np.float64), np.asarray(K, dtype=np.float64),
+        np.asarray(T, dtype=np.float64), np.asarray(sigma, dtype=np.float64), np.asarray(is_call, dtype=bool),
+    )
+    intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+    live = (T > 0) & (sigma > 0) & (S > 0)
+    if not live.any():
+        return intrinsic
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Tl = np.where(live, T, 1.0)
+        d1, d2, _ = _d1_d2(np.where(live, S, 1.0), K, Tl, np.where(live, sigma, 1.0), r, q)
+        disc_s = S * np.exp(-q * Tl)
+        disc_k = K * np.exp(-r * Tl)
+        call = disc_s * norm_cdf(d1) - disc_k * norm_cdf(d2)
+        value = np.where(is_call, call, call - disc_s + disc_k)  # Puts by put-call parity
+    return np.where(live, np.maximum(value, 0.0), intrinsic)
+
+
+def bs_greeks(S, K, T, sigma, r=RISK_FREE_RATE, is_call=True, q=0.0) -> dict:
+    """price, delta, gamma, vega (per 1%) and theta (per day); expiry values where T <= 0"""
+    S, K, T, sigma, is_call = np.broadcast_arrays(
+        np.asarray(S, dtype=np.float64), np.asarray(K, dtype=np.float64),
+        np.asarray(T, dtype=np.float64), np.asarray(sigma, dtype=np.float64), np.asarray(is_call, dtype=bool),
+    )
+    live = (T > 0) & (sigma > 0) & (S > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Tl = np.where(live, T, 1.0)
+        sig = np.where(live, sigma, 1.0)
+        d1, d2, sqrt_t = _d1_d2(np.where(live, S, 1.0), K, Tl, sig, r, q)
+        pdf = norm_pdf(d1)
+        growth = np.exp(-q * Tl)
+        disc_k = K * np.exp(-r * Tl)
+
+        delta = np.where(is_call, growth * norm_cdf(d1), -growth * norm_cdf(-d1))
+        gamma = growth * pdf / (S * sig * sqrt_t)
+        vega = S * growth * pdf * sqrt_t / 100
+        decay = -S * growth * pdf * sig / (2 * sqrt_t)
+        theta_call = decay - r * disc_k * norm_cdf(d2) + q * S * growth * norm_cdf(d1)
+        theta_put = decay + r * disc_k * norm_cdf(-d2) - q * S * growth * norm_cdf(-d1)
+        theta = np.where(is_call, theta_call, theta_put) / 365
+
+    expired_delta = np.where(is_call, (S > K).astype(np.float64), -(S < K).astype(np.float64))
+    return {
+        "price": bs_price(S, K, T, sigma, r, is_call, q),
+        "delta": np.where(live, delta, expired_delta),
+        "gamma": np.where(live, gamma, 0.0),
+        "vega": np.where(live, vega, 0.0),
+        "theta": np.where(live, theta, 0.0),
+    }
+
+
+def implied_volatility(
+    price, S, K, T, r=RISK_FREE_RATE, is_call=True, q=0.0,
+    low: float = 1e-4, high: float = 5.0, tol: float = 1e-6, max_iter: int = 100,
+) -> np.ndarray:
+    """
+    Volatility matching each option price, by vectorized bisection.
+
+    NaN where the price is outside the no-arbitrage range for [low, high]
+    volatility (below intrinsic, above the high-vol value) or T <= 0.
+    """
+    price, S, K, T, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=np.float64), np.asarray(S, dtype=np.float64),
+        np.asarray(K, dtype=np.float64), np.asarray(T, dtype=np.float64), np.asarray(is_call, dtype=bool),
+    )
+    lo = np.full(price.shape, low)
+    hi = np.full(price.shape, high)
+    valid = (T > 0) & (price > 0)
+    valid &= (bs_price(S, K, T, lo, r, is_call, q) <= price) & (price <= bs_price(S, K, T, hi, r, is_call, q))
+
+    for _ in range(max_iter):
+        mid = 0.5 * (lo + hi)
+        above = bs_price(S, K, T, mid, r, is_call, q) > price
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+        if np.all(hi - lo < tol):
+            break
+    return np.where(valid, 0.5 * (lo + hi), np.nan)
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Event Backtest - Event-driven intraday backtests with paper-trading semantics
+
+Feeds historical 1-minute bars or journaled ticks, one event at a time,
+through an in-memory broker that follows PaperTradingSystem: the same
+place_order/get_portfolio_summary API, order types (MARKET, LIMIT, SL,
+SL-M), funds/shares checks and rejection messages, and the same cost model
+(paper_trading.calculate_commission / market_fill_price). Nothing touches
+SQLite per event, so strategies written against the paper-trading API
+replay a day of ticks in seconds and behave as they would live.
+
+Fill rules:
+- MARKET orders fill immediately at the latest price +/- slippage, as live
+- Orders left open are matched from the next event of their symbol:
+  LIMIT buy fills when low <= limit at min(open, limit) (sell: mirrored);
+  SL-M triggers when the stop is crossed and fills at the worse of open and
+  stop +/- slippage; SL triggers the same way, then rests as a LIMIT order
+- Stops are matched before limits within a bar (pessimistic when both hit)
+- Ticks are events with open = high = low = close = ltp
+
+Risk limits mirror RiskManager: a per-symbol position value cap and a daily
+realized-loss circuit breaker that rejects new buys until the next day.
+
+    events = EventStream.from_candles(["INFY", "TCS"], timeframe="1m", start_date="2024-01-01")
+    result = EventBacktester(starting_capital=100000).run(events, MyStrategy())
+    result.equity, result.fills, result.metrics
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.core.analytics.backtest_engine import BacktestEngine, annualization_factor, portfolio_metrics
+from backend.core.trading.paper_trading import (
+    COMMISSION_PER_TRADE,
+    COMMISSION_PERCENTAGE,
+    SLIPPAGE,
+    OrderStatus,
+    calculate_commission,
+    market_fill_price,
+)
+
+logger = logging.getLogger(__name__)
+
+ORDER_TYPES = ("MARKET", "LIMIT", "SL", "SL-M")
+IST_OFFSET_SECONDS = 19800  # Trading days roll over at IST midnight
+
+
+def _epoch_seconds(index: pd.Index) -> np.ndarray:
+    if not isinstance(index, pd.DatetimeIndex):
+        return np.asarray(index, dtype=np.float64)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.to_numpy("datetime64[ns]").astype(np.int64) / 1e9
+
+
+@dataclass
+class EventStream:
+    """Time-ordered market events as parallel arrays (symbol_id indexes symbols)"""
+
+    symbols: List[str]
+    symbol_id: np.ndarray
+    ts: np.ndarray  # Epoch seconds
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @classmethod
+    def from_bars(cls, frames: Dict[str, pd.DataFrame]) -> "EventStream":
+        """Merge per-symbol OHLCV frames (DatetimeIndex) into one event stream"""
+        symbols = list(frames)
+        parts = []
+        for sid, symbol in enumerate(symbols):
+            df = frames[symbol]
+            ts = _epoch_seconds(df.index)
+            volume = df["volume"].to_numpy(dtype=np.float64) if "volume" in df else np.zeros(len(df))
+            parts.append((
+                np.full(len(df), sid, dtype=np.int32), ts,
+                *(df[col].to_numpy(dtype=np.float64) for col in ("open", "high", "low", "close")), volume,
+            ))
+        if not parts:
+            return cls(symbols, np.empty(0, dtype=np.int32), *[np.empty(0)] * 6)
+        columns = [np.concatenate(col) for col in zip(*parts)]
+        # Stable sort keeps symbol order within a timestamp
+        order = np.argsort(columns[1], kind="stable")
+        return cls(symbols, *(col[order] for col in columns))
+
+    @classmethod
+    def from_candles(
+        cls,
+        symbols: List[str],
+        timeframe: str = "1m",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> "EventStream":
+        """Bars from the candle database (BacktestEngine.load_candle_data)"""
+        engine = BacktestEngine()
+        frames = {}
+        for symbol in symbols:
+            df = engine.load_candle_data(symbol, timeframe, start_date, end_date)
+            if df is not None and not df.empty:
+                frames[symbol] = df
+        return cls.from_bars(frames)
+
+    @classmethod
+    def from_journal(
+        cls,
+        journal,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        instruments: Optional[List[str]] = None,
+    ) -> "EventStream":
+        """Ticks with a last price from a TickJournal, read as columns"""
+        from backend.services.streaming.tick_journal import field_bit
+
+        start = journal.seek(start_ts) if start_ts is not None else 0
+        end = journal.seek(end_ts) if end_ts is not None else None
+        records = journal.records(start, end)
+        keep = (records["mask"] & field_bit("ltp")) != 0
+        if instruments is not None:
+            wanted = [journal.keys.index(k) for k in instruments if k in journal.keys]
+            keep &= np.isin(records["key_id"], wanted)
+        records = records[keep]
+
+        # Dense symbol ids over the instruments present
+        used, symbol_id = np.unique(records["key_id"], return_inverse=True)
+        ltp = records["ltp"]
+        return cls(
+            symbols=[journal.keys[k] for k in used],
+            symbol_id=symbol_id.astype(np.int32),
+            ts=records["received_ts"],
+            open=ltp, high=ltp, low=ltp, close=ltp,
+            volume=records["volume"].astype(np.float64),
+        )
+
+
+class Bar:
+    """
+    The current event passed to strategies.
+
+    One instance is reused for the whole run (fields are overwritten per
+    event), so copy values out rather than keeping the object.
+    """
+
+    __slots__ = ("index", "symbol", "ts", "open", "high", "low", "close", "volume")
+
+    def __repr__(self) -> str:
+        return f"Bar({self.symbol} @ {self.ts}: {self.open}/{self.high}/{self.low}/{self.close})"
+
+
+class Order:
+    """An order held by the backtest broker"""
+
+    __slots__ = (
+        "order_id", "symbol", "transaction_type", "order_type", "quantity", "price", "stop_price",
+        "status", "triggered", "placed_ts", "filled_ts", "average_fill_price", "commission", "error",
+    )
+
+    def __init__(self, order_id, symbol, transaction_type, order_type, quantity, price, stop_price, ts):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.transaction_type = transaction_type
+        self.order_type = order_type
+        self.quantity = quantity
+        self.price = price
+        self.stop_price = stop_price
+        self.status = OrderStatus.PENDING
+        self.triggered = order_type in ("MARKET", "LIMIT")
+        self.placed_ts = ts
+        self.filled_ts = None
+        self.average_fill_price = None
+        self.commission = 0.0
+        self.error = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BacktestBroker:
+    """
+    In-memory PaperTradingSystem: orders, fills, cash and positions.
+
+    Args:
+        starting_capital, commission_per_trade, commission_percentage, slippage:
+            As PaperTradingSystem
+        max_position_value: Reject buys taking a symbol's position value above this
+        max_daily_loss: Reject buys for the rest of the day once realized P&L is below -this
+    """
+
+    def __init__(
+        self,
+        starting_capital: float = 100000,
+        commission_per_trade: float = COMMISSION_PER_TRADE,
+        commission_percentage: float = COMMISSION_PERCENTAGE,
+        slippage: float = SLIPPAGE,
+        max_position_value: Optional[float] = None,
+        max_daily_loss: Optional[float] = None,
+    ):
+        self.starting_capital = starting_capital
+        self.commission_per_trade = commission_per_trade
+        self.commission_percentage = commission_percentage
+        self.slippage = slippage
+        self.max_position_value = max_position_value
+        self.max_daily_loss = max_daily_loss
+
+        self.cash = float(starting_capital)
+        self.positions: Dict[str, List[float]] = {}  # symbol -> [quantity, average_price]
+        self.last_prices: Dict[str, float] = {}
+        self.position_value = 0.0
+        self.realized_pnl = 0.0
+        self.daily_pnl = 0.0
+        self.circuit_breaker_triggered = False
+        self.orders: Dict[str, Order] = {}
+        self.open_orders: Dict[str, List[Order]] = {}
+        self.fills: List[tuple] = []
+        self.now = 0.0
+        self._ids = count(1)
+        self.on_fill: Optional[Callable[[Order], None]] = None
+
+    # ------------------------------------------------------------ order API
+
+    def place_order(
+        self,
+        symbol: str,
+        transaction_type: str,
+        order_type: str,
+        quantity: int,
+        price: Optional[float] = None,
+        stop_price: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Place an order (same arguments and response shape as PaperTradingSystem)"""
+        error = self._validate(symbol, transaction_type, order_type, quantity, price, stop_price)
+        if error:
+            return {"status": "REJECTED", "error": error}
+
+        order_id = f"BT_{next(self._ids):08d}"
+        order = Order(order_id, symbol, transaction_type, order_type, int(quantity), price, stop_price, self.now)
+        self.orders[order_id] = order
+        if order_type == "MARKET":
+            self._fill(order, market_fill_price(self.last_prices[symbol], transaction_type, self.slippage))
+        else:
+            self.open_orders.setdefault(symbol, []).append(order)
+
+        return {
+            "status": "SUCCESS",
+            "order_id": order_id,
+            "symbol": symbol,
+            "transaction_type": transaction_type,
+            "quantity": quantity,
+            "order_type": order_type,
+        }
+
+    def _validate(self, symbol, transaction_type, order_type, quantity, price, stop_price) -> Optional[str]:
+        if transaction_type not in ("BUY", "SELL"):
+            return "Transaction type must be one of: BUY, SELL"
+        if order_type not in ORDER_TYPES:
+            return f"Order type must be one of: {', '.join(ORDER_TYPES)}"
+        if not isinstance(quantity, (int, np.integer)) or quantity <= 0:
+            return "Quantity must be positive"
+        if order_type in ("LIMIT", "SL") and not (price and price > 0):
+            return "Price must be positive"
+        if order_type in ("SL", "SL-M") and not (stop_price and stop_price > 0):
+            return "Stop price must be positive"
+        current_price = self.last_prices.get(symbol)
+        if current_price is None:
+            return f"No market data for {symbol}"
+
+        if transaction_type == "BUY":
+            if self.circuit_breaker_triggered:
+                return "Circuit breaker active: daily loss limit exceeded"
+            if order_type == "MARKET":
+                required_funds = quantity * market_fill_price(current_price, "BUY", self.slippage)
+            else:
+                required_funds = quantity * (price or stop_price)
+            required_funds += self._commission(required_funds)
+            if required_funds > self.cash:
+                return f"Insufficient funds. Required: ₹{required_funds:,.2f}, Available: ₹{self.cash:,.2f}"
+            if self.max_position_value is not None:
+                held = self.positions.get(symbol, (0, 0))[0]
+                if (held + quantity) * current_price > self.max_position_value:
+                    return f"Position limit exceeded for {symbol}: max ₹{self.max_position_value:,.2f}"
+        else:
+            available = self.positions.get(symbol, (0, 0))[0]
+            if available < quantity:
+                return f"Insufficient shares. Required: {quantity}, Available: {available}"
+        return None
+
+    def cancel_order(self, order_id: str) -> bool:
+        order = self.orders.get(order_id)
+        if order is None or order.status != OrderStatus.PENDING:
+            return False
+        order.status = OrderStatus.CANCELLED
+        self.open_orders[order.symbol].remove(order)
+        return True
+
+    def set_stop_loss(self, symbol: str, stop_loss_price: float, quantity: Optional[int] = None) -> Dict[str, Any]:
+        """Protective SL-M sell for a held position (RiskManager.set_stop_loss equivalent)"""
+        quantity = quantity or int(self.positions.get(symbol, (0, 0))[0])
+        return self.place_order(symbol, "SELL", "SL-M", quantity, stop_price=stop_loss_price)
+
+    # ---------------------------------------------------------- portfolio API
+
+    def get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
+        position = self.positions.get(symbol)
+        if position is None:
+            return None
+        return {"symbol": symbol, "quantity": int(position[0]), "average_price": position[1]}
+
+    def get_portfolio_summary(self) -> Dict[str, Any]:
+        positions = []
+        unrealized = 0.0
+        for symbol, (quantity, average_price) in self.positions.items():
+            current_price = self.last_prices.get(symbol, average_price)
+            pnl = (current_price - average_price) * quantity
+            unrealized += pnl
+            positions.append({
+                "symbol": symbol,
+                "quantity": int(quantity),
+                "average_price": average_price,
+                "current_price": current_price,
+                "position_value": quantity * current_price,
+                "unrealized_pnl": pnl,
+            })
+        total_value = self.cash + self.position_value
+        return {
+            "cash_balance": self.cash,
+            "total_value": total_value,
+            "position_value": self.position_value,
+            "unrealized_pnl": unrealized,
+            "realized_pnl": self.realized_pnl,
+            "total_pnl": self.realized_pnl + unrealized,
+            "return_pct": (total_value - self.starting_capital) / self.starting_capital * 100,
+            "positions": positions,
+        }
+
+    def get_order_history(self) -> List[Dict[str, Any]]:
+        return [order.to_dict() for order in self.orders.values()]
+
+    # -------------------------------------------------------------- matching
+
+    def _commission(self, trade_value: float) -> float:
+        return calculate_commission(trade_value, self.commission_per_trade, self.commission_percentage)
+
+    def _reject(self, order: Order, error: str) -> None:
+        order.status = OrderStatus.REJECTED
+        order.error = error
+
+    def _fill(self, order: Order, execution_price: float) -> bool:
+        quantity = order.quantity
+        trade_value = quantity * execution_price
+        commission = self._commission(trade_value)
+        symbol = order.symbol
+        position = self.positions.get(symbol)
+        mark = self.last_prices.get(symbol, execution_price)
+
+        if order.transaction_type == "BUY":
+            if trade_value + commission > self.cash:
+                self._reject(order, "Insufficient funds at fill")
+                return False
+            self.cash -= trade_value + commission
+            if position:
+                new_qty = position[0] + quantity
+                position[1] = (position[0] * position[1] + quantity * execution_price) / new_qty
+                position[0] = new_qty
+            else:
+                self.positions[symbol] = [quantity, execution_price]
+            self.position_value += quantity * mark
+        else:
+            if not position or position[0] < quantity:
+                self._reject(order, "Insufficient shares at fill")
+                return False
+            self.cash += trade_value - commission
+            pnl = (execution_price - position[1]) * quantity - commission
+            self.realized_pnl += pnl
+            self.daily_pnl += pnl
+            position[0] -= quantity
+            if position[0] <= 0:
+                del self.positions[symbol]
+            self.position_value -= quantity * mark
+            if (self.max_daily_loss is not None and not self.circuit_breaker_triggered
+                    and self.daily_pnl < -self.max_daily_loss):
+                self.circuit_breaker_triggered = True
+                logger.warning(f"[EventBacktest] Circuit breaker: daily P&L {self.daily_pnl:,.2f}")
+
+        order.status = OrderStatus.COMPLETE
+        order.filled_ts = self.now
+        order.average_fill_price = execution_price
+        order.commission = commission
+        self.fills.append((
+            self.now, order.order_id, symbol, order.transaction_type, order.order_type,
+            quantity, execution_price, commission, abs(execution_price - mark),
+        ))
+        if self.on_fill is not None:
+            self.on_fill(order)
+        return True
+
+    def _match(self, orders: List[Order], o: float, h: float, l: float) -> None:
+        """Match resting orders of one symbol against an event's range"""
+        # Stops first (pessimistic when a stop and a limit are both reachable)
+        for order in sorted(orders, key=lambda x: x.triggered):
+            if order.status != OrderStatus.PENDING:
+                continue
+            buy = order.transaction_type == "BUY"
+            gapped = False
+            if not order.triggered:
+                stop = order.stop_price
+                if not (h >= stop if buy else l <= stop):
+                    continue
+                order.triggered = True
+                if order.order_type == "SL-M":
+                    price = max(o, stop) if buy else min(o, stop)
+                    self._fill(order, market_fill_price(price, order.transaction_type, self.slippage))
+                    continue
+                gapped = True  # Stop-limit becomes a limit within this range
+            limit = order.price
+            if buy and l <= limit:
+                self._fill(order, limit if gapped else min(o, limit))
+            elif not buy and h >= limit:
+                self._fill(order, limit if gapped else max(o, limit))
+        orders[:] = [order for order in orders if order.status == OrderStatus.PENDING]
+
+
+@dataclass
+class EventBacktestResult:
+    """Equity per event, fills, orders and metrics of an event-driven run"""
+
+    equity: pd.Series
+    fills: pd.DataFrame
+    orders: List[Dict[str, Any]]
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+
+FILL_COLUMNS = [
+    "ts", "order_id", "symbol", "transaction_type", "order_type",
+    "quantity", "price", "commission", "slippage",
+]
+
+
+class EventBacktester:
+    """
+    Replays an EventStream through a strategy and a BacktestBroker.
+
+    A strategy is either a callable on_bar(broker, bar) or an object with
+    on_bar(broker, bar) and optional on_start(broker), on_fill(broker, order)
+    and on_end(broker) methods. Broker keyword arguments are forwarded.
+    """
+
+    def __init__(self, tz_offset: int = IST_OFFSET_SECONDS, **broker_kwargs):
+        self.tz_offset = tz_offset
+        self.broker_kwargs = broker_kwargs
+        self.broker: Optional[BacktestBroker] = None
+
+    def run(self, events: EventStream, strategy: Union[Callable, Any]) -> EventBacktestResult:
+        broker = self.broker = BacktestBroker(**self.broker_kwargs)
+        on_bar = getattr(strategy, "on_bar", strategy)
+        on_fill = getattr(strategy, "on_fill", None)
+        if on_fill is not None:
+            broker.on_fill = lambda order: on_fill(broker, order)
+        if hasattr(strategy, "on_start"):
+            strategy.on_start(broker)
+
+        n = len(events)
+        equity = np.empty(n)
+        days = ((events.ts + self.tz_offset) // 86400).astype(np.int64).tolist()
+        symbols = events.symbols
+        last_prices = broker.last_prices
+        positions = broker.positions
+        open_orders = broker.open_orders
+        bar = Bar()
+        current_day = days[0] if n else 0
+        started = time.perf_counter()
+
+        columns = zip(
+            events.symbol_id.tolist(), events.ts.tolist(), events.open.tolist(), events.high.tolist(),
+            events.low.tolist(), events.close.tolist(), events.volume.tolist(), days,
+        )
+        for i, (sid, ts, o, h, l, c, v, day) in enumerate(columns):
+            symbol = symbols[sid]
+            broker.now = ts
+            if day != current_day:
+                current_day = day
+                broker.daily_pnl = 0.0
+                broker.circuit_breaker_triggered = False
+
+            pending = open_orders.get(symbol)
+            if pending:
+                broker._match(pending, o, h, l)
+
+            position = positions.get(symbol)
+            if position is not None:
+                broker.position_value += position[0] * (c - last_prices.get(symbol, c))
+            last_prices[symbol] = c
+
+            bar.index, bar.symbol, bar.ts = i, symbol, ts
+            bar.open, bar.high, bar.low, bar.close, bar.volume = o, h, l, c, v
+            on_bar(broker, bar)
+            equity[i] = broker.cash + broker.position_value
+
+        if hasattr(strategy, "on_end"):
+            strategy.on_end(broker)
+        elapsed = time.perf_counter() - started
+        return self._result(events, broker, equity, elapsed)
+
+    def _result(self, events: EventStream, broker: BacktestBroker, equity: np.ndarray, elapsed: float) -> EventBacktestResult:
+        index = pd.to_datetime(events.ts, unit="s")
+        equity_series = pd.Series(equity, index=index, name="equity")
+        fills = pd.DataFrame(broker.fills, columns=FILL_COLUMNS)
+        if not fills.empty:
+            fills["ts"] = pd.to_datetime(fills["ts"], unit="s")
+
+        # Risk/return metrics on end-of-day equity (events are irregularly spaced)
+        daily = equity_series.groupby((events.ts + self.tz_offset) // 86400).last().to_numpy()
+        metrics = portfolio_metrics(daily, broker.starting_capital, annualization_factor("D"))
+        metrics.pop("win_rate")
+        metrics.pop("closed_trades")
+        sells = fills[fills["transaction_type"] == "SELL"] if not fills.empty else fills
+        statuses = pd.Series([order.status for order in broker.orders.values()], dtype=object)
+        metrics.update({
+            "final_value": float(equity[-1]) if len(equity) else float(broker.starting_capital),
+            "realized_pnl": broker.realized_pnl,
+            "total_commission": float(fills["commission"].sum()) if not fills.empty else 0.0,
+            "fills": len(fills),
+            "sell_fills": len(sells),
+            "orders": len(broker.orders),
+            "rejected_orders": int((statuses == OrderStatus.REJECTED).sum()),
+            "events": len(events),
+            "events_per_second": len(events) / elapsed if elapsed > 0 else 0.0,
+        })
+        logger.info(
+            f"[EventBacktest] {len(events):,} events in {elapsed:.2f}s "
+            f"({metrics['events_per_second']:,.0f}/s), {len(fills)} fills, "
+            f"return {metrics['total_return']:.2%}"
+        )
+        return EventBacktestResult(
+            equity=equity_series,
+            fills=fills,
+            orders=broker.get_order_history(),
+            metrics=metrics,
+        )
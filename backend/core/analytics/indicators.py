@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Indicators - Batch and streaming technical indicators with identical definitions
+
+Every indicator has two interchangeable forms:
+
+  • batch functions over arrays, time along axis 0 (a (bars,) series or a
+    (bars, instruments) matrix), NaN during warm-up
+  • streaming classes holding per-instrument state arrays; update() takes
+    one new bar for any subset of instrument slots and costs O(1) per slot,
+    so a tick batch for thousands of instruments is a few array operations
+
+Warming a streaming indicator with a history and then updating it produces
+the same values as the batch function over the whole series (to float
+rounding), so backtests and live signals agree.
+
+    sma(close, 20); ema(close, 20); rsi(close, 14)              # batch
+    atr(high, low, close, 14); bollinger(close, 20, 2.0)
+    macd(close); supertrend(high, low, close, 10, 3.0)
+    vwap(high, low, close, volume, session=dates)
+
+    rsi_live = StreamingRSI(14, size=len(instruments)).warm(history)   # (bars, instruments)
+    values = rsi_live.update(closes, index=slots)                       # new bar for some slots
+
+Conventions: EMA-type averages are seeded with the SMA of their first
+`period` inputs; Wilder smoothing is an EMA with alpha = 1/period; RSI and
+ATR use Wilder smoothing by default (RSI also supports "sma", the rolling
+mean of gains and losses); Bollinger bands use the population standard
+deviation; SuperTrend starts in an uptrend.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy.signal import lfilter as _lfilter
+except ImportError:  # scipy is optional: recursive averages fall back to a loop
+    _lfilter = None
+
+logger = logging.getLogger(__name__)
+
+RSI_SMOOTHING = ("wilder", "sma")
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+# ============================================================================
+# Batch
+# ============================================================================
+
+
+def rolling_means(values, windows: Iterable[int]) -> Dict[int, np.ndarray]:
+    """Trailing means for several window lengths from one cumulative sum (NaN warm-up)"""
+    values = _as_float(values)
+    csum = np.concatenate((np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)))
+    means = {}
+    for window in set(windows):
+        mean = np.full(values.shape, np.nan)
+        if 0 < window <= len(values):
+            mean[window - 1:] = (csum[window:] - csum[:-window]) / window
+        means[window] = mean
+    return means
+
+
+def sma(values, period: int) -> np.ndarray:
+    """Simple moving average"""
+    return rolling_means(values, [period])[period]
+
+
+def smoothed(values, period: int, alpha: float) -> np.ndarray:
+    """y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded with the mean of the first period values"""
+    values = _as_float(values)
+    out = np.full(values.shape, np.nan)
+    if period < 1 or len(values) < period:
+        return out
+    seed = values[:period].mean(axis=0)
+    out[period - 1] = seed
+    rest = values[period:]
+    if len(rest):
+        if _lfilter is not None:
+            out[period:], _ = _lfilter([alpha], [1.0, alpha - 1.0], rest, axis=0, zi=((1 - alpha) * seed)[None])
+        else:
+            level = seed
+            for t, x in enumerate(rest, start=period):
+                level = alpha * x + (1 - alpha) * level
+                out[t] = level
+    return out
+
+
+def ema(values, period: int) -> np.ndarray:
+    """Exponential moving average (alpha = 2 / (period + 1))"""
+    return smoothed(values, period, 2.0 / (period + 1))
+
+
+def wilder(values, period: int) -> np.ndarray:
+    """Wilder's smoothing (alpha = 1 / period)"""
+    return smoothed(values, period, 1.0 / period)
+
+
+def _rsi_from_averages(gain, loss) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + gain / loss)
+
+
+def rsi(close, period: int = 14, smoothing: str = "wilder") -> np.ndarray:
+    """Relative Strength Index; first value at bar `period` (after period price changes)"""
+    if smoothing not in RSI_SMOOTHING:
+        raise ValueError(f"Unknown RSI smoothing '{smoothing}', expected one of {RSI_SMOOTHING}")
+    close = _as_float(close)
+    out = np.full(close.shape, np.nan)
+    if len(close) < 2:
+        return out
+    delta = np.diff(close, axis=0)
+    average = wilder if smoothing == "wilder" else sma
+    out[1:] = _rsi_from_averages(average(np.maximum(delta, 0.0), period), average(np.maximum(-delta, 0.0), period))
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """max(high - low, |high - prev close|, |low - prev close|); high - low on the first bar"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    tr = high - low
+    if len(close) > 1:
+        prev = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev), np.abs(low[1:] - prev)))
+    return tr
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average True Range (Wilder); first value at bar period - 1"""
+    return wilder(true_range(high, low, close), period)
+
+
+def vwap(high, low, close, volume, session=None) -> np.ndarray:
+    """
+    Volume-weighted average of the typical price (high + low + close) / 3.
+
+    Accumulation restarts whenever the session label (one per bar, e.g. the
+    trading date) changes; without labels it runs over the whole series.
+    """
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3
+    volume = _as_float(volume)
+    pv = np.cumsum(typical * volume, axis=0)
+    vol = np.cumsum(volume, axis=0)
+    if session is not None:
+        session = np.asarray(session)
+        starts = np.ones(len(session), dtype=bool)
+        starts[1:] = session[1:] != session[:-1]
+        first = np.maximum.accumulate(np.where(starts, np.arange(len(session)), 0))
+        pv = pv - (pv - typical * volume)[first]
+        vol = vol - (vol - volume)[first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(vol > 0, pv / vol, np.nan)
+
+
+def bollinger(close, period: int = 20, num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger bands (middle, upper, lower) with the population standard deviation"""
+    close = _as_float(close)
+    middle = sma(close, period)
+    std = np.full(close.shape, np.nan)
+    if 0 < period <= len(close):
+        std[period - 1:] = sliding_window_view(close, period, axis=0).std(axis=-1)
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line (fast EMA - slow EMA), its signal EMA and the histogram"""
+    close = _as_float(close)
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = np.full(close.shape, np.nan)
+    start = max(fast, slow) - 1
+    if len(close) > start:
+        signal_line[start:] = ema(line[start:], signal)
+    return line, signal_line, line - signal_line
+
+
+def _supertrend_step(close, prev_close, upper, lower, final_upper, final_lower, direction, first):
+    """One SuperTrend bar for a vector of instruments; `first` marks each one's first ATR bar"""
+    final_upper = np.where(first | (upper < final_upper) | (prev_close > final_upper), upper, final_upper)
+    final_lower = np.where(first | (lower > final_lower) | (prev_close < final_lower), lower, final_lower)
+    direction = np.where(
+        first, 1, np.where(direction > 0, np.where(close < final_lower, -1, 1), np.where(close > final_upper, 1, -1))
+    ).astype(np.int8)
+    return final_upper, final_lower, direction, np.where(direction > 0, final_lower, final_upper)
+
+
+def supertrend(high, low, close, period: int = 10, multiplier: float = 3.0) -> Tuple[np.ndarray, np.ndarray]:
+    """SuperTrend line and direction (1 up, -1 down, 0 during warm-up)"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    band = multiplier * atr(high, low, close, period)
+    mid = (high + low) / 2
+    line = np.full(close.shape, np.nan)
+    direction = np.zeros(close.shape, dtype=np.int8)
+    if len(close) < period:
+        return line, direction
+
+    start = period - 1
+    final_upper = final_lower = np.full(close.shape[1:], np.nan)
+    trend = np.ones(close.shape[1:], dtype=np.int8)
+    for t in range(start, len(close)):
+        final_upper, final_lower, trend, line[t] = _supertrend_step(
+            close[t], close[t - 1] if t else close[t], mid[t] + band[t], mid[t] - band[t],
+            final_upper, final_lower, trend, t == start,
+        )
+        direction[t] = trend
+    return line, direction
+
+
+# ============================================================================
+# Streaming
+# ============================================================================
+
+
+class StreamingIndicator:
+    """
+    Base for streaming indicators over `size` instrument slots.
+
+    State lives in arrays whose last axis is the slot. update(..., index=slots)
+    advances only the given slots (unique within a call; all slots when None)
+    and returns their current values, NaN until each slot is warmed up.
+    """
+
+    def __init__(self, size: int = 1):
+        self.size = size
+        self.count = np.zeros(size, dtype=np.int64)
+
+    def _slots(self, index) -> np.ndarray:
+        return np.arange(self.size) if index is None else np.atleast_1d(np.asarray(index, dtype=np.intp))
+
+    @staticmethod
+    def _input(values, slots: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(_as_float(values), slots.shape)
+
+    def resize(self, size: int) -> "StreamingIndicator":
+        """Grow to `size` slots; new slots start empty"""
+        if size <= self.size:
+            return self
+        for name, value in list(vars(self).items()):
+            if isinstance(value, StreamingIndicator):
+                value.resize(size)
+            elif isinstance(value, np.ndarray) and value.shape[-1:] == (self.size,):
+                pad = [(0, 0)] * (value.ndim - 1) + [(0, size - self.size)]
+                setattr(self, name, np.pad(value, pad))
+        self.size = size
+        return self
+
+    def warm(self, *history, index=None) -> "StreamingIndicator":
+        """Feed history arrays (bars, ...) bar by bar, e.g. closes of shape (bars, len(index))"""
+        for row in zip(*(_as_float(h) for h in history)):
+            self.update(*row, index=index)
+        return self
+
+    def update(self, *values, index=None):
+        raise NotImplementedError
+
+
+class StreamingSMA(StreamingIndicator):
+    """Simple moving average from a ring buffer and running sum"""
+
+    def __init__(self, period: int, size: int = 1):
+        super().__init__(size)
+        self.period = period
+        self.buffer = np.zeros((period, size))
+        self.total = np.zeros(size)
+
+    def update(self, value, index=None) -> np.ndarray:
+        slots = self._slots(index)
+        value = self._input(value, slots)
+        pos = self.count[slots] % self.period
+        self.total[slots] += value - self.buffer[pos, slots]
+        self.buffer[pos, slots] = value
+        self.count[slots] += 1
+        return np.where(self.count[slots] >= self.period, self.total[slots] / self.period, np.nan)
+
+
+class StreamingSmoothed(StreamingIndicator):
+    """Recursive average (see smoothed()); alpha defaults to the EMA's 2 / (period + 1)"""
+
+    def __init__(self, period: int, size: int = 1, alpha: Optional[float] = None):
+        super().__init__(size)
+        self.period = period
+        self.alpha = 2.0 / (period + 1) if alpha is None else alpha
+        self.level = np.zeros(size)
+
+    def update(self, value, index=None) -> np.ndarray:
+        slots = self._slots(index)
+        value = self._input(value, slots)
+        count = self.count[slots] + 1
+        level = self.level[slots]
+        level = np.where(
+            count <= self.period,
+            level + value,  # Seed: running sum of the first period values
+            self.alpha * value + (1 - self.alpha) * level,
+        )
+        level = np.where(count == self.period, level / self.period, level)
+        self.level[slots] = level
+        self.count[slots] = count
+        return np.where(count >= self.period, level, np.nan)
+
+
+class StreamingEMA(StreamingSmoothed):
+    """Exponential moving average"""
+
+    def __init__(self, period: int, size: int = 1):
+        super().__init__(period, size)
+
+
+class StreamingWilder(StreamingSmoothed):
+    """Wilder's smoothing"""
+
+    def __init__(self, period: int, size: int = 1):
+        super().__init__(period, size, alpha=1.0 / period)
+
+
+class StreamingRSI(StreamingIndicator):
+    """Relative Strength Index with Wilder or SMA smoothing of gains and losses"""
+
+    def __init__(self, period: int = 14, size: int = 1, smoothing: str = "wilder"):
+        if smoothing not in RSI_SMOOTHING:
+            raise ValueError(f"Unknown RSI smoothing '{smoothing}', expected one of {RSI_SMOOTHING}")
+        super().__init__(size)
+        average = StreamingWilder if smoothing == "wilder" else StreamingSMA
+        self.gains = average(period, size)
+        self.losses = average(period, size)
+        self.prev_close = np.zeros(size)
+
+    def update(self, close, index=None) -> np.ndarray:
+        slots = self._slots(index)
+        close = self._input(close, slots)
+        out = np.full(slots.shape, np.nan)
+        has_prev = self.count[slots] > 0
+        if has_prev.any():
+            moved = slots[has_prev]
+            delta = close[has_prev] - self.prev_close[moved]
+            out[has_prev] = _rsi_from_averages(
+                self.gains.update(np.maximum(delta, 0.0), moved), self.losses.update(np.maximum(-delta, 0.0), moved)
+            )
+        self.prev_close[slots] = close
+        self.count[slots] += 1
+        return out
+
+
+class StreamingATR(StreamingIndicator):
+    """Average True Range (Wilder)"""
+
+    def __init__(self, period: int = 14, size: int = 1):
+        super().__init__(size)
+        self.average = StreamingWilder(period, size)
+        self.prev_close = np.zeros(size)
+
+    def update(self, high, low, close, index=None) -> np.ndarray:
+        slots = self._slots(index)
+        high, low, close = (self._input(v, slots) for v in (high, low, close))
+        prev = self.prev_close[slots]
+        tr = np.where(
+            self.count[slots] > 0,
+            np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev))),
+            high - low,
+        )
+        self.prev_close[slots] = close
+        self.count[slots] += 1
+        return self.average.update(tr, slots)
+
+
+class StreamingVWAP(StreamingIndicator):
+    """Session VWAP; accumulation restarts when a slot's session label changes"""
+
+    def __init__(self, size: int = 1):
+        super().__init__(size)
+        self.pv = np.zeros(size)
+        self.volume = np.zeros(size)
+        self.session = np.zeros(size, dtype=np.int64)
+
+    def update(self, high, low, close, volume, session=None, index=None) -> np.ndarray:
+        slots = self._slots(index)
+        typical = (self._input(high, slots) + self._input(low, slots) + self._input(close, slots)) / 3
+        volume = self._input(volume, slots)
+        if session is not None:
+            session = np.broadcast_to(np.asarray(session, dtype=np.int64), slots.shape)
+            new = (self.count[slots] == 0) | (self.session[slots] != session)
+            self.pv[slots[new]] = 0.0
+            self.volume[slots[new]] = 0.0
+            self.session[slots] = session
+        self.pv[slots] += typical * volume
+        self.volume[slots] += volume
+        self.count[slots] += 1
+        total = self.volume[slots]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(total > 0, self.pv[slots] / total, np.nan)
+
+    def warm(self, high, low, close, volume, session=None, index=None) -> "StreamingVWAP":
+        sessions = [None] * len(close) if session is None else np.asarray(session)
+        for row in zip(_as_float(high), _as_float(low), _as_float(close), _as_float(volume), sessions):
+            self.update(*row, index=index)
+        return self
+
+
+class StreamingBollinger(StreamingIndicator):
+    """Bollinger bands from a sliding Welford mean and variance"""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0, size: int = 1):
+        super().__init__(size)
+        self.period = period
+        self.num_std = num_std
+        self.buffer = np.zeros((period, size))
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+
+    def update(self, close, index=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        slots = self._slots(index)
+        close = self._input(close, slots)
+        count = self.count[slots]
+        pos = count % self.period
+        old = self.buffer[pos, slots]
+        mean = self.mean[slots]
+        filling = count < self.period
+        # Growing window: Welford add; full window: replace the oldest value
+        new_mean = np.where(filling, mean + (close - mean) / np.minimum(count + 1, self.period),
+                            mean + (close - old) / self.period)
+        m2 = self.m2[slots] + np.where(filling, (close - mean) * (close - new_mean),
+                                       (close - old) * (close - new_mean + old - mean))
+        self.buffer[pos, slots] = close
+        self.mean[slots] = new_mean
+        self.m2[slots] = m2
+        self.count[slots] = count + 1
+
+        ready = count + 1 >= self.period
+        middle = np.where(ready, new_mean, np.nan)
+        std = np.sqrt(np.maximum(m2, 0.0) / self.period)
+        return middle, middle + self.num_std * std, middle - self.num_std * std
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD line, signal and histogram"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9, size: int = 1):
+        super().__init__(size)
+        self.fast = StreamingEMA(fast, size)
+        self.slow = StreamingEMA(slow, size)
+        self.signal = StreamingEMA(signal, size)
+
+    def update(self, close, index=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        slots = self._slots(index)
+        close = self._input(close, slots)
+        line = self.fast.update(close, slots) - self.slow.update(close, slots)
+        signal = np.full(slots.shape, np.nan)
+        valid = ~np.isnan(line)
+        if valid.any():
+            signal[valid] = self.signal.update(line[valid], slots[valid])
+        self.count[slots] += 1
+        return line, signal, line - signal
+
+
+class StreamingSuperTrend(StreamingIndicator):
+    """SuperTrend line and direction"""
+
+    def __init__(self, period: int = 10, multiplier: float = 3.0, size: int = 1):
+        super().__init__(size)
+        self.multiplier = multiplier
+        self.atr = StreamingATR(period, size)
+        self.prev_close = np.zeros(size)
+        self.final_upper = np.zeros(size)
+        self.final_lower = np.zeros(size)
+        self.direction = np.zeros(size, dtype=np.int8)
+
+    def update(self, high, low, close, index=None) -> Tuple[np.ndarray, np.ndarray]:
+        slots = self._slots(index)
+        high, low, close = (self._input(v, slots) for v in (high, low, close))
+        band = self.multiplier * self.atr.update(high, low, close, slots)
+        ready = ~np.isnan(band)
+        line = np.full(slots.shape, np.nan)
+        direction = np.zeros(slots.shape, dtype=np.int8)
+        if ready.any():
+            live = slots[ready]
+            mid = (high[ready] + low[ready]) / 2
+            prev = np.where(self.count[live] > 0, self.prev_close[live], close[ready])
+            upper, lower, trend, line[ready] = _supertrend_step(
+                close[ready], prev, mid + band[ready], mid - band[ready],
+                self.final_upper[live], self.final_lower[live], self.direction[live], self.direction[live] == 0,
+            )
+            self.final_upper[live], self.final_lower[live], self.direction[live] = upper, lower, trend
+            direction[ready] = trend
+        self.prev_close[slots] = close
+        self.count[slots] += 1
+        return line, direction
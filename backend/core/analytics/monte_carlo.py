@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo - Robustness distributions for backtest results
+
+Resamples a backtest's per-bar returns or per-trade returns into many
+synthetic equity paths and reports percentile bands of the paths and of
+per-path CAGR, max drawdown, Sharpe and ruin.
+
+Methods:
+  • bootstrap - circular block bootstrap (blocks keep volatility clustering)
+  • gbm       - geometric Brownian motion with the sample's log drift/vol
+
+The bootstrap never materializes paths: every possible block's growth,
+low, high and inner drawdown are precomputed once from the sample, so a
+path is a row of sampled block starts and its metrics are exact reductions
+over (paths x blocks) arrays. GBM draws per-step (paths x time) float32
+matrices. Paths run in chunks of chunk_size rows, optionally in a process
+pool; each chunk has its own seed from one SeedSequence, so results depend
+only on seed and chunk_size, not on the number of workers.
+
+    mc = MonteCarloSimulator(n_paths=100_000, method="bootstrap", block_size=20)
+    result = mc.run_simulation(engine.last_simulation, init_cash=100000, freq="1D")
+    result.percentiles["max_drawdown"]   # {"p5": ..., "p50": ..., "p95": ...}
+    result.bands                         # equity percentiles over time
+    result.ruin_probability
+
+CLI:
+    python -m backend.core.analytics.monte_carlo --symbol INFY --strategy SMA --paths 100000
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backend.core.analytics.backtest_engine import SimulationResult, annualization_factor
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("bootstrap", "gbm")
+PATH_METRICS = ("final_value", "total_return", "cagr", "max_drawdown", "sharpe_ratio")
+
+
+@dataclass
+class MonteCarloResult:
+    """Per-path metric distributions and equity percentile bands"""
+
+    method: str
+    source: str  # "returns" or "trades"
+    n_paths: int
+    horizon: int
+    init_cash: float
+    paths: Dict[str, np.ndarray]  # Metric arrays, one value per path
+    bands: pd.DataFrame  # Equity percentiles (columns) at sampled steps (index)
+    percentiles: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    ruin_probability: float = 0.0
+    loss_probability: float = 0.0
+
+    def to_dict(self) -> Dict:
+        """Summary for JSON serialization (bands as lists)"""
+        return {
+            "method": self.method,
+            "source": self.source,
+            "paths": self.n_paths,
+            "horizon": self.horizon,
+            "ruin_probability": round(self.ruin_probability, 4),
+            "loss_probability": round(self.loss_probability, 4),
+            "percentiles": {
+                metric: {p: round(v, 4) for p, v in values.items()}
+                for metric, values in self.percentiles.items()
+            },
+            "bands": {"step": self.bands.index.tolist(), **self.bands.to_dict("list")},
+        }
+
+
+def block_statistics(log_returns: np.ndarray, simple_returns: np.ndarray, length: int) -> Dict[str, np.ndarray]:
+    """
+    Statistics of the circular block of `length` steps starting at every sample index.
+
+    total/low/high are the block's log growth and its lowest/highest
+    cumulative level (high includes the starting level 0); drawdown is the
+    deepest log drawdown inside the block; sum/sum_sq are over simple returns.
+    """
+    n = len(log_returns)
+    wrap = np.resize(log_returns, n + length)
+    levels = np.cumsum(wrap)
+    levels = sliding_window_view(levels, length)[:n] - np.concatenate(([0.0], levels[: n - 1]))[:, None]
+    peaks = np.maximum.accumulate(np.maximum(levels, 0.0), axis=1)
+    simple = np.concatenate(([0.0], np.cumsum(np.resize(simple_returns, n + length))))
+    squares = np.concatenate(([0.0], np.cumsum(np.resize(simple_returns, n + length) ** 2)))
+    return {
+        "total": levels[:, -1],
+        "low": levels.min(axis=1),
+        "high": peaks[:, -1],
+        "drawdown": (levels - peaks).min(axis=1),
+        "levels": levels,
+        "sum": simple[length:length + n] - simple[:n],
+        "sum_sq": squares[length:length + n] - squares[:n],
+    }
+
+
+def _bootstrap_chunk(rng, log_returns, n_paths, horizon, block_size, band_steps) -> Dict[str, np.ndarray]:
+    """
+    Block-bootstrap path statistics, exact, on (paths x blocks) arrays.
+
+    Each path is a sequence of sampled block starts; its drawdown combines each
+    block's own drawdown with the fall from the running peak before the block.
+    """
+    n = len(log_returns)
+    block_size = max(1, min(block_size, n))
+    n_blocks = -(-horizon // block_size)
+    tail = horizon - (n_blocks - 1) * block_size
+    simple = np.expm1(log_returns)
+    full = block_statistics(log_returns, simple, block_size)
+    last = full if tail == block_size else block_statistics(log_returns, simple, tail)
+
+    starts = rng.integers(0, n, size=(n_paths, n_blocks))
+
+    def gather(key):
+        values = full[key][starts]
+        values[:, -1] = last[key][starts[:, -1]]
+        return values
+
+    total = gather("total")
+    level = np.cumsum(total, axis=1)
+    start_level = level - total
+    # Running peak entering each block (the start level 0 counts as a peak)
+    peak = np.maximum.accumulate(start_level + gather("high"), axis=1)
+    peak_before = np.zeros_like(peak)
+    peak_before[:, 1:] = np.maximum(peak[:, :-1], 0.0)
+    low = start_level + gather("low")
+    drawdown = np.minimum(gather("drawdown"), low - peak_before).min(axis=1)
+
+    block, offset = np.divmod(band_steps, block_size)
+    rows = np.arange(n_paths)[:, None]
+    band_start = starts[:, block]
+    band_levels = np.where(
+        block == n_blocks - 1,
+        last["levels"][band_start, np.minimum(offset, tail - 1)],
+        full["levels"][band_start, offset],
+    )
+    return {
+        "log_final": level[:, -1],
+        "log_low": np.minimum(low.min(axis=1), 0.0),
+        "log_drawdown": np.minimum(drawdown, 0.0),
+        "sum": gather("sum").sum(axis=1),
+        "sum_sq": gather("sum_sq").sum(axis=1),
+        "band_levels": start_level[rows, block] + band_levels,
+    }
+
+
+def _gbm_chunk(rng, log_returns, n_paths, horizon, band_steps) -> Dict[str, np.ndarray]:
+    """Per-step GBM paths with the sample's log drift and volatility (float32 matrices)"""
+    mu = log_returns.mean()
+    sigma = log_returns.std(ddof=1) if len(log_returns) > 1 else 0.0
+    steps = rng.standard_normal((n_paths, horizon), dtype=np.float32)
+    steps *= np.float32(sigma)
+    steps += np.float32(mu)
+    levels = np.cumsum(steps, axis=1)
+    peaks = np.maximum(np.maximum.accumulate(levels, axis=1), 0.0)
+    np.subtract(levels, peaks, out=peaks)
+    np.expm1(steps, out=steps)
+    return {
+        "log_final": levels[:, -1].astype(np.float64),
+        "log_low": np.minimum(levels.min(axis=1), 0.0).astype(np.float64),
+        "log_drawdown": np.minimum(peaks.min(axis=1), 0.0).astype(np.float64),
+        "sum": steps.sum(axis=1, dtype=np.float64),
+        "sum_sq": np.einsum("ij,ij->i", steps, steps, dtype=np.float64),
+        "band_levels": levels[:, band_steps].astype(np.float64),
+    }
+
+
+def simulate_paths(
+    returns: np.ndarray,
+    n_paths: int,
+    horizon: int,
+    seed,
+    method: str = "bootstrap",
+    block_size: int = 20,
+    init_cash: float = 100000.0,
+    periods_per_year: Optional[float] = None,
+    ruin_level: float = 0.5,
+    band_steps: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate one chunk of equity paths from a sample of per-step returns.
+
+    Returns per-path metric arrays (see PATH_METRICS), a boolean "ruined"
+    array (equity ever at or below ruin_level * init_cash) and "band_equity",
+    the equity at band_steps for every path. CAGR and Sharpe need
+    periods_per_year (steps per year); they are NaN without it.
+    """
+    rng = np.random.default_rng(seed)
+    log_returns = np.log1p(np.asarray(returns, dtype=np.float64))
+    band_steps = np.arange(horizon) if band_steps is None else np.asarray(band_steps)
+
+    if method == "bootstrap":
+        stats = _bootstrap_chunk(rng, log_returns, n_paths, horizon, block_size, band_steps)
+    elif method == "gbm":
+        stats = _gbm_chunk(rng, log_returns, n_paths, horizon, band_steps)
+    else:
+        raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+
+    total_return = np.expm1(stats["log_final"])
+    if periods_per_year:
+        cagr = np.expm1(stats["log_final"] * periods_per_year / horizon)
+        mean = stats["sum"] / horizon
+        variance = (stats["sum_sq"] - horizon * mean**2) / max(horizon - 1, 1)
+        std = np.sqrt(np.maximum(variance, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(std > 1e-12, mean / std * np.sqrt(periods_per_year), 0.0)
+    else:
+        cagr = sharpe = np.full(n_paths, np.nan)
+
+    return {
+        "final_value": init_cash * (1 + total_return),
+        "total_return": total_return,
+        "cagr": cagr,
+        "max_drawdown": np.expm1(stats["log_drawdown"]),
+        "sharpe_ratio": sharpe,
+        "ruined": stats["log_low"] <= np.log(ruin_level) if ruin_level > 0 else np.zeros(n_paths, dtype=bool),
+        "band_equity": init_cash * np.exp(stats["band_levels"]),
+    }
+
+
+def _simulate_chunk(kwargs: Dict) -> Dict[str, np.ndarray]:
+    return simulate_paths(**kwargs)
+
+
+class MonteCarloSimulator:
+    """
+    Resampling engine for backtest returns and trade lists.
+
+    Args:
+        n_paths: Paths to simulate
+        method: "bootstrap" or "gbm"
+        block_size: Bootstrap block length in steps (1 = i.i.d. resampling)
+        horizon: Steps per path (default: length of the sample)
+        chunk_size: Paths per (paths x horizon) matrix
+        max_workers: Process count (0 = simulate in this process)
+        seed: Seed for reproducible results
+        ruin_level: Equity fraction of init_cash that counts as ruin
+        percentiles: Percentiles to report
+        band_points: Equity band resolution (sampled steps)
+    """
+
+    def __init__(
+        self,
+        n_paths: int = 10000,
+        method: str = "bootstrap",
+        block_size: int = 20,
+        horizon: Optional[int] = None,
+        chunk_size: int = 2000,
+        max_workers: int = 0,
+        seed: Optional[int] = None,
+        ruin_level: float = 0.5,
+        percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+        band_points: int = 100,
+    ):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+        self.n_paths = n_paths
+        self.method = method
+        self.block_size = block_size
+        self.horizon = horizon
+        self.chunk_size = chunk_size
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self.seed = seed
+        self.ruin_level = ruin_level
+        self.percentiles = list(percentiles)
+        self.band_points = band_points
+
+    def run_returns(
+        self, returns, init_cash: float = 100000.0, periods_per_year: Optional[float] = None
+    ) -> MonteCarloResult:
+        """Resample a per-bar return series"""
+        return self._run(returns, "returns", init_cash, periods_per_year, self.block_size)
+
+    def run_trades(
+        self,
+        trade_returns,
+        init_cash: float = 100000.0,
+        trades_per_year: Optional[float] = None,
+        block_size: int = 1,
+    ) -> MonteCarloResult:
+        """Resample a sequence of per-trade returns (compounded on equity)"""
+        return self._run(trade_returns, "trades", init_cash, trades_per_year, block_size)
+
+    def run_simulation(
+        self,
+        sim: SimulationResult,
+        init_cash: float = 100000.0,
+        freq: str = "1D",
+        source: str = "returns",
+    ) -> MonteCarloResult:
+        """Resample a SimulationResult's bar returns or closed-trade returns"""
+        periods_per_year = annualization_factor(freq)
+        if source == "returns":
+            return self.run_returns(sim.returns, init_cash, periods_per_year)
+        if source == "trades":
+            closed = sim.trades["exit_idx"] >= 0
+            trades_per_year = closed.sum() / len(sim.equity) * periods_per_year if len(sim.equity) else None
+            return self.run_trades(sim.trades["return"][closed], init_cash, trades_per_year)
+        raise ValueError(f"Unknown source '{source}', expected 'returns' or 'trades'")
+
+    # --------------------------------------------------------------- internal
+
+    def _run(
+        self,
+        sample,
+        source: str,
+        init_cash: float,
+        periods_per_year: Optional[float],
+        block_size: int,
+    ) -> MonteCarloResult:
+        sample = np.asarray(sample, dtype=np.float64)
+        sample = sample[np.isfinite(sample)]
+        if len(sample) == 0:
+            raise ValueError(f"No {source} to resample")
+        horizon = self.horizon or len(sample)
+        band_steps = np.unique(np.linspace(0, horizon - 1, min(self.band_points, horizon)).astype(np.int64))
+
+        sizes = [min(self.chunk_size, self.n_paths - i) for i in range(0, self.n_paths, self.chunk_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        tasks = [
+            {
+                "returns": sample, "n_paths": size, "horizon": horizon, "seed": seed,
+                "method": self.method, "block_size": block_size, "init_cash": init_cash,
+                "periods_per_year": periods_per_year, "ruin_level": self.ruin_level, "band_steps": band_steps,
+            }
+            for size, seed in zip(sizes, seeds)
+        ]
+        logger.info(
+            f"[MonteCarlo] {self.method}: {self.n_paths} paths x {horizon} {source} in "
+            f"{len(tasks)} chunks ({self.max_workers or 'in-process'} workers)"
+        )
+        if self.max_workers and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                merged = self._merge(pool.map(_simulate_chunk, tasks))
+        else:
+            merged = self._merge(simulate_paths(**task) for task in tasks)
+        return self._summarize(merged, source, horizon, init_cash, band_steps)
+
+    def _merge(self, chunks) -> Dict[str, np.ndarray]:
+        """Copy chunk results into preallocated full-size arrays as they arrive"""
+        merged, row = {}, 0
+        for chunk in chunks:
+            if not merged:
+                merged = {
+                    key: np.empty((self.n_paths,) + values.shape[1:], dtype=values.dtype)
+                    for key, values in chunk.items()
+                }
+            size = len(chunk["final_value"])
+            for key, values in chunk.items():
+                merged[key][row:row + size] = values
+            row += size
+        return merged
+
+    def _summarize(
+        self, merged: Dict[str, np.ndarray], source: str, horizon: int, init_cash: float, band_steps: np.ndarray
+    ) -> MonteCarloResult:
+        labels = [f"p{p:g}" for p in self.percentiles]
+        paths = {metric: merged[metric] for metric in PATH_METRICS}
+        percentiles = {}
+        for metric, values in paths.items():
+            finite = values[np.isfinite(values)]
+            if len(finite):
+                percentiles[metric] = dict(zip(labels, np.percentile(finite, self.percentiles).tolist()))
+
+        bands = pd.DataFrame(
+            np.percentile(merged["band_equity"], self.percentiles, axis=0, overwrite_input=True).T,
+            index=pd.Index(band_steps + 1, name="step"),
+            columns=labels,
+        )
+        return MonteCarloResult(
+            method=self.method,
+            source=source,
+            n_paths=len(merged["final_value"]),
+            horizon=horizon,
+            init_cash=init_cash,
+            paths=paths,
+            bands=bands,
+            percentiles=percentiles,
+            ruin_probability=float(merged["ruined"].mean()),
+            loss_probability=float((merged["final_value"] < init_cash).mean()),
+        )
+
+
+def main():
+    import argparse
+
+    from backend.core.analytics.backtest_engine import BacktestEngine
+    from backend.core.analytics.parameter_sweep import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Monte Carlo robustness of a strategy backtest")
+    parser.add_argument("--symbol", required=True)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="SMA")
+    parser.add_argument("--timeframe", default="1d")
+    parser.add_argument("--start", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="End date (YYYY-MM-DD)")
+    parser.add_argument("--method", choices=METHODS, default="bootstrap")
+    parser.add_argument("--source", choices=["returns", "trades"], default="returns")
+    parser.add_argument("--paths", type=int, default=10000)
+    parser.add_argument("--block", type=int, default=20, help="Bootstrap block length")
+    parser.add_argument("--workers", type=int, default=0, help="Processes (0 = in-process)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    engine = BacktestEngine()
+    if engine.run_backtest(args.symbol.upper(), STRATEGIES[args.strategy](), args.timeframe, args.start, args.end) is None:
+        logger.error("Backtest failed")
+        return 1
+
+    mc = MonteCarloSimulator(
+        n_paths=args.paths, method=args.method, block_size=args.block, max_workers=args.workers, seed=args.seed
+    )
+    result = mc.run_simulation(
+        engine.last_simulation, engine.params["init_cash"], engine.params["freq"], args.source
+    )
+    for metric, values in result.percentiles.items():
+        logger.info(f"{metric}: " + "  ".join(f"{p}={v:.4f}" for p, v in values.items()))
+    logger.info(f"Ruin probability {result.ruin_probability:.2%}, loss probability {result.loss_probability:.2%}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Option History - Daily option prices from stored candles, with a vol-surface fallback
+
+Contracts are resolved through `expired_options` (underlying, type, strike,
+expiry) and joined to their candles in `expired_candles` (by the exchange
+token inside the Upstox instrument key) and `candles_new` (by trading
+symbol). Intraday candles collapse to the last close of each IST day.
+
+Usage:
+    prices = load_option_closes("NIFTY", ["2024-01-25", "2024-02-29"], "2024-01-01", "2024-02-29")
+    market = option_price_matrix(prices, dates, contracts)          # (days, contracts), NaN if missing
+    ivs = fill_implied_vols(observed_ivs, spot, strikes, years, 0.18)
+"""
+
+import logging
+import sqlite3
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "market_data.db"
+IST_OFFSET = 19800  # Seconds east of UTC
+OPTION_TYPES = {"CE": "CALL", "PE": "PUT", "CALL": "CALL", "PUT": "PUT"}
+PRICE_COLUMNS = ["date", "option_type", "strike", "expiry_date", "close"]
+
+
+def _daily_last(df: pd.DataFrame) -> pd.DataFrame:
+    """Last close per contract and date"""
+    df["option_type"] = df["option_type"].str.upper().map(OPTION_TYPES)
+    df = df.dropna(subset=["option_type", "close"]).sort_values("timestamp")
+    return df.groupby(["date", "option_type", "strike", "expiry_date"], as_index=False)["close"].last()
+
+
+def _ist_dates(timestamps: pd.Series) -> pd.Series:
+    return pd.to_datetime(timestamps.astype("int64") + IST_OFFSET, unit="s").dt.strftime("%Y-%m-%d")
+
+
+def load_option_closes(
+    underlying: str,
+    expiries: Iterable[str],
+    start_date: str,
+    end_date: str,
+    interval: str = "day",
+    timeframe: str = "1d",
+    db_path: str = DB_PATH,
+) -> pd.DataFrame:
+    """
+    Daily closes for every stored contract of the given expiries.
+
+    Rows from expired_candles take precedence over candles_new for the same
+    contract and day. Returns columns date, option_type (CALL/PUT), strike,
+    expiry_date, close; empty if nothing is stored.
+    """
+    expiries = sorted(set(expiries))
+    if not expiries:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    marks = ",".join("?" * len(expiries))
+    contract_filter = f"o.underlying_symbol = ? AND o.expiry_date IN ({marks})"
+
+    expired_query = f"""
+        SELECT o.option_type, o.strike_price AS strike, o.expiry_date, c.timestamp, c.close
+        FROM expired_candles c
+        JOIN expired_options o ON c.instrument_key LIKE '%|' || o.exchange_token || '|%'
+        WHERE {contract_filter} AND c.interval = ? AND c.timestamp >= ? AND c.timestamp < ?
+    """
+    live_query = f"""
+        SELECT o.option_type, o.strike_price AS strike, o.expiry_date, c.timestamp, c.close
+        FROM candles_new c
+        JOIN expired_options o ON c.symbol = o.tradingsymbol
+        WHERE {contract_filter} AND c.timeframe = ? AND c.timestamp >= ? AND c.timestamp < ?
+    """
+    end_next = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    start_ts = int(pd.Timestamp(start_date).timestamp()) - IST_OFFSET
+    end_ts = int(pd.Timestamp(end_next).timestamp()) - IST_OFFSET
+
+    sources = (
+        (expired_query, [interval, start_date, end_next], lambda ts: ts.astype(str).str[:10]),
+        (live_query, [timeframe, start_ts, end_ts], _ist_dates),
+    )
+    frames = []
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            for query, params, to_dates in sources:
+                try:
+                    df = pd.read_sql_query(query, conn, params=[underlying, *expiries, *params])
+                except (sqlite3.OperationalError, pd.errors.DatabaseError) as e:
+                    logger.warning(f"[OptionHistory] Skipping source: {e}")
+                    continue
+                if not df.empty:
+                    df["date"] = to_dates(df["timestamp"])
+                    frames.append(_daily_last(df))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"[OptionHistory] Failed to load option candles: {e}")
+
+    if not frames:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    prices = pd.concat(frames, ignore_index=True)
+    prices = prices.drop_duplicates(["date", "option_type", "strike", "expiry_date"], keep="first")
+    logger.info(f"[OptionHistory] Loaded {len(prices)} daily option closes for {underlying}")
+    return prices[PRICE_COLUMNS].reset_index(drop=True)
+
+
+def option_price_matrix(
+    prices: pd.DataFrame, dates: Sequence[str], contracts: List[Tuple[str, float, str]]
+) -> np.ndarray:
+    """Closes as a (len(dates), len(contracts)) array; contracts are (option_type, strike, expiry_date)"""
+    matrix = np.full((len(dates), len(contracts)), np.nan)
+    if prices is None or prices.empty or not contracts:
+        return matrix
+
+    keys = pd.MultiIndex.from_tuples(contracts, names=["option_type", "strike", "expiry_date"])
+    prices = prices.assign(
+        option_type=prices["option_type"].str.upper().map(OPTION_TYPES),
+        strike=prices["strike"].astype(float),
+        expiry_date=prices["expiry_date"].astype(str).str[:10],
+        date=prices["date"].astype(str).str[:10],
+    )
+    wide = prices.pivot_table(
+        index="date", columns=["option_type", "strike", "expiry_date"], values="close", aggfunc="last"
+    )
+    wide = wide.reindex(index=pd.Index(dates), columns=keys)
+    return wide.to_numpy(dtype=np.float64)
+
+
+def fill_implied_vols(
+    iv: np.ndarray,
+    spot: np.ndarray,
+    strikes: np.ndarray,
+    years: np.ndarray,
+    default,
+) -> np.ndarray:
+    """
+    Fill missing entries of a (days, contracts) implied-vol matrix.
+
+    In order: the same day's smile, interpolated in standardized moneyness
+    log(K/S)/sqrt(T) across observed contracts; the contract's own nearest
+    observation in time; `default` (scalar or per-contract array).
+    """
+    iv = np.array(iv, dtype=np.float64)
+    observed = ~np.isnan(iv)
+    missing_days = np.flatnonzero((~observed).any(axis=1) & observed.any(axis=1))
+    if len(missing_days):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            moneyness = np.log(strikes[None, :] / spot[:, None]) / np.sqrt(np.maximum(years, 1 / 365))
+        for day in missing_days:
+            have = observed[day]
+            order = np.argsort(moneyness[day, have])
+            iv[day, ~have] = np.interp(
+                moneyness[day, ~have], moneyness[day, have][order], iv[day, have][order]
+            )
+
+    if np.isnan(iv).any():
+        iv = pd.DataFrame(iv).ffill().bfill().to_numpy()
+    return np.where(np.isnan(iv), np.broadcast_to(default, iv.shape), iv)
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Parameter Sweep - Parallel grid search over strategy parameters
+
+Loads each symbol's OHLCV arrays from the database once, places them in
+shared memory, and evaluates chunks of the parameter grid in a process
+pool. Workers attach to the shared arrays without copying, build entry/exit
+matrices for a whole chunk with the strategy's generate_signal_batch
+(SMA/RSI indicators are computed once per distinct period and broadcast
+across parameter sets), and simulate each row with simulate_from_signals.
+
+Results stream back as chunks finish and are ranked by a metric:
+
+    sweep = ParameterSweep(SMAStrategy, {"fast_period": range(5, 101, 5),
+                                         "slow_period": range(20, 301, 10)})
+    sweep.load(["INFY", "TCS"], timeframe="1d")
+    for row in sweep.run_iter():       # as chunks complete
+        ...
+    top = sweep.run(top_n=20)          # ranked by sharpe_ratio
+    sweep.rank_combinations(top_n=10)  # mean metric across symbols
+
+CLI:
+    python -m backend.core.analytics.parameter_sweep --symbols INFY,TCS \\
+        --strategy SMA --fast 5:100:5 --slow 20:300:10 --top 20
+"""
+
+import heapq
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from backend.core.analytics.backtest_engine import (
+    DEFAULT_BACKTEST_PARAMS,
+    BacktestEngine,
+    BaseStrategy,
+    RSIStrategy,
+    SMAStrategy,
+    simulate_from_signals,
+)
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Default parameter constraints per strategy (combinations failing them are skipped)
+DEFAULT_CONSTRAINTS: Dict[type, Callable[[Dict], bool]] = {
+    SMAStrategy: lambda p: p["fast_period"] < p["slow_period"],
+    RSIStrategy: lambda p: p.get("oversold_threshold", 30) < p.get("overbought_threshold", 70),
+}
+
+
+class SharedArrays:
+    """
+    Named float64 arrays in one shared-memory block.
+
+    The owner creates the block; workers attach with SharedArrays.attach(spec)
+    and get zero-copy read views.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        layout = []
+        offset = 0
+        for name, array in arrays.items():
+            layout.append((name, offset, len(array)))
+            offset += len(array) * 8
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+        self.spec = {"name": self.shm.name, "layout": layout}
+        for name, start, length in layout:
+            view = np.ndarray((length,), dtype=np.float64, buffer=self.shm.buf, offset=start)
+            view[:] = arrays[name]
+        self.arrays = _views(self.shm, layout)
+
+    @staticmethod
+    def attach(spec: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+        shm = shared_memory.SharedMemory(name=spec["name"])
+        return shm, _views(shm, spec["layout"])
+
+    def close(self) -> None:
+        self.arrays = {}
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _views(shm: shared_memory.SharedMemory, layout) -> Dict[str, np.ndarray]:
+    views = {}
+    for name, start, length in layout:
+        view = np.ndarray((length,), dtype=np.float64, buffer=shm.buf, offset=start)
+        view.flags.writeable = False
+        views[name] = view
+    return views
+
+
+# Worker-side cache of attached blocks: one attach per block per process
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]] = {}
+
+
+def _attached_arrays(spec: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    entry = _attached.get(spec["name"])
+    if entry is None:
+        entry = _attached[spec["name"]] = SharedArrays.attach(spec)
+    return entry[1]
+
+
+def evaluate_chunk(
+    strategy_cls: Type[BaseStrategy],
+    arrays: Dict[str, np.ndarray],
+    param_sets: List[Dict],
+    sim_params: Dict[str, Any],
+) -> List[Dict[str, float]]:
+    """Metrics for each parameter set on one symbol's arrays"""
+    entries, exits = strategy_cls.generate_signal_batch(arrays, param_sets)
+    metrics = []
+    for row in range(len(param_sets)):
+        sim = simulate_from_signals(
+            arrays.get("open"),
+            arrays["close"],
+            entries[row],
+            exits[row],
+            init_cash=sim_params["init_cash"],
+            commission=sim_params["commission"],
+            slippage=sim_params["slippage"],
+            fill_price=sim_params["fill_price"],
+            freq=sim_params["freq"],
+        )
+        metrics.append(sim.metrics)
+    return metrics
+
+
+def _evaluate_shared(strategy_cls, spec, symbol, param_sets, sim_params):
+    """Process-pool task: attach to the symbol's shared arrays and evaluate"""
+    arrays = _attached_arrays(spec)
+    return symbol, param_sets, evaluate_chunk(strategy_cls, arrays, param_sets, sim_params)
+
+
+def parse_range(text: str) -> List[float]:
+    """'5:100:5' -> 5, 10, ..., 100 (inclusive); '10,20,50' -> list"""
+    if ":" in text:
+        parts = [float(x) for x in text.split(":")]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = [float(x) for x in text.split(",")]
+    return [int(v) if float(v).is_integer() else float(v) for v in values]
+
+
+class ParameterSweep:
+    """
+    Grid search of a strategy's parameters across symbols.
+
+    Args:
+        strategy_cls: BaseStrategy subclass (vectorized generate_signal_batch if available)
+        param_grid: Parameter name -> candidate values
+        params: Backtest params (defaults to DEFAULT_BACKTEST_PARAMS)
+        metric: Metric to rank by (any key of the simulation metrics)
+        constraint: Predicate on a parameter dict (default per strategy)
+        max_workers: Process count (0 = evaluate in this process)
+        chunk_size: Parameter sets per task
+    """
+
+    def __init__(
+        self,
+        strategy_cls: Type[BaseStrategy],
+        param_grid: Dict[str, Iterable],
+        params: Optional[Dict] = None,
+        metric: str = "sharpe_ratio",
+        constraint: Optional[Callable[[Dict], bool]] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 64,
+    ):
+        self.strategy_cls = strategy_cls
+        self.param_grid = {name: list(values) for name, values in param_grid.items()}
+        self.params = {**DEFAULT_BACKTEST_PARAMS, **(params or {})}
+        self.metric = metric
+        self.constraint = constraint or DEFAULT_CONSTRAINTS.get(strategy_cls)
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self.chunk_size = chunk_size
+        self.data: Dict[str, Dict[str, np.ndarray]] = {}
+        self.index: Dict[str, pd.Index] = {}
+        self._shared: Dict[str, SharedArrays] = {}
+
+    # ------------------------------------------------------------------ data
+
+    def add_data(self, symbol: str, ohlcv: pd.DataFrame) -> None:
+        """Use pre-loaded OHLCV for symbol"""
+        self.data[symbol] = {
+            col: ohlcv[col].to_numpy(dtype=np.float64) for col in OHLCV_COLUMNS if col in ohlcv
+        }
+        self.index[symbol] = ohlcv.index
+
+    def load(
+        self,
+        symbols: Iterable[str],
+        timeframe: str = "1d",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> int:
+        """Load each symbol from the database once; returns symbols loaded"""
+        engine = BacktestEngine(self.params)
+        loaded = 0
+        for symbol in symbols:
+            df = engine.load_candle_data(symbol, timeframe, start_date, end_date)
+            if df is not None and not df.empty:
+                self.add_data(symbol, df)
+                loaded += 1
+        return loaded
+
+    def combinations(self) -> List[Dict]:
+        names = list(self.param_grid)
+        combos = [dict(zip(names, values)) for values in itertools.product(*self.param_grid.values())]
+        if self.constraint:
+            combos = [c for c in combos if self.constraint(c)]
+        return combos
+
+    def _chunks(self, combos: List[Dict]) -> List[List[Dict]]:
+        return [combos[i:i + self.chunk_size] for i in range(0, len(combos), self.chunk_size)]
+
+    # ------------------------------------------------------------------- run
+
+    def run_iter(self) -> Iterator[Dict[str, Any]]:
+        """Yield one result row per (symbol, parameter set) as chunks complete"""
+        combos = self.combinations()
+        chunks = self._chunks(combos)
+        total = len(combos) * len(self.data)
+        logger.info(
+            f"[Sweep] {self.strategy_cls.__name__}: {len(combos)} combinations x "
+            f"{len(self.data)} symbols = {total} backtests ({self.max_workers or 'in-process'} workers)"
+        )
+        sim_params = {k: self.params[k] for k in ("init_cash", "commission", "slippage", "fill_price", "freq")}
+
+        if not self.max_workers:
+            for symbol, arrays in self.data.items():
+                for chunk in chunks:
+                    yield from self._rows(symbol, chunk, evaluate_chunk(self.strategy_cls, arrays, chunk, sim_params))
+            return
+
+        try:
+            for symbol, arrays in self.data.items():
+                if symbol not in self._shared:
+                    self._shared[symbol] = SharedArrays(arrays)
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [
+                    pool.submit(_evaluate_shared, self.strategy_cls, self._shared[symbol].spec,
+                                symbol, chunk, sim_params)
+                    for symbol in self.data
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    symbol, chunk, metrics = future.result()
+                    yield from self._rows(symbol, chunk, metrics)
+        finally:
+            self.close()
+
+    def _rows(self, symbol: str, chunk: List[Dict], metrics: List[Dict]) -> Iterator[Dict[str, Any]]:
+        for param_set, result in zip(chunk, metrics):
+            yield {"symbol": symbol, "params": param_set, **result}
+
+    def run(self, top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """All (or the top_n) results ranked by metric, best first"""
+        key = self._score
+        if top_n is None:
+            return sorted(self.run_iter(), key=key, reverse=True)
+        # Bounded heap keeps memory flat for very large sweeps
+        heap: List[Tuple[float, int, Dict]] = []
+        for seq, row in enumerate(self.run_iter()):
+            item = (key(row), seq, row)
+            if len(heap) < top_n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return [row for _, _, row in sorted(heap, reverse=True)]
+
+    def rank_combinations(
+        self, results: Optional[List[Dict[str, Any]]] = None, top_n: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Parameter sets ranked by mean metric across symbols"""
+        rows = results if results is not None else list(self.run_iter())
+        grouped: Dict[Tuple, List[float]] = {}
+        for row in rows:
+            grouped.setdefault(tuple(sorted(row["params"].items())), []).append(self._score(row))
+        ranked = sorted(
+            (
+                {"params": dict(key), self.metric: float(np.mean(scores)), "symbols": len(scores)}
+                for key, scores in grouped.items()
+            ),
+            key=lambda r: r[self.metric],
+            reverse=True,
+        )
+        return ranked[:top_n] if top_n else ranked
+
+    def _score(self, row: Dict[str, Any]) -> float:
+        value = row.get(self.metric)
+        return float(value) if value is not None and np.isfinite(value) else float("-inf")
+
+    def close(self) -> None:
+        """Release shared-memory blocks"""
+        for shared in self._shared.values():
+            shared.close()
+        self._shared.clear()
+
+
+STRATEGIES = {"SMA": SMAStrategy, "RSI": RSIStrategy}
+
+
+def add_grid_arguments(parser) -> None:
+    """Strategy and parameter-grid options shared by the sweep CLIs"""
+    parser.add_argument("--symbols", required=True, help="Comma-separated symbols (e.g. INFY,TCS)")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="SMA")
+    parser.add_argument("--timeframe", default="1d")
+    parser.add_argument("--start", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="End date (YYYY-MM-DD)")
+    parser.add_argument("--fast", default="5:100:5", help="SMA fast periods (start:stop:step or list)")
+    parser.add_argument("--slow", default="20:300:10", help="SMA slow periods")
+    parser.add_argument("--rsi-period", default="7:28:7", help="RSI periods")
+    parser.add_argument("--oversold", default="20,25,30", help="RSI oversold thresholds")
+    parser.add_argument("--overbought", default="70,75,80", help="RSI overbought thresholds")
+    parser.add_argument("--metric", default="sharpe_ratio")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (0 = in-process)")
+    parser.add_argument("--fill-price", choices=["close", "next_open"], default="close")
+
+
+def grid_from_args(args) -> Dict[str, List]:
+    if args.strategy == "SMA":
+        return {"fast_period": parse_range(args.fast), "slow_period": parse_range(args.slow)}
+    return {
+        "rsi_period": parse_range(args.rsi_period),
+        "oversold_threshold": parse_range(args.oversold),
+        "overbought_threshold": parse_range(args.overbought),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Grid-search strategy parameters across symbols")
+    add_grid_arguments(parser)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    sweep = ParameterSweep(
+        STRATEGIES[args.strategy], grid_from_args(args), params={"fill_price": args.fill_price},
+        metric=args.metric, max_workers=args.workers,
+    )
+    symbols = [s.strip().upper() for s in args.symbols.split(",")]
+    if not sweep.load(symbols, args.timeframe, args.start, args.end):
+        logger.error("No data loaded")
+        return 1
+
+    results = list(sweep.run_iter())
+    for row in sweep.rank_combinations(results, top_n=args.top):
+        logger.info(f"{row['params']}  {args.metric}={row[args.metric]:.3f}  ({row['symbols']} symbols)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Payoff Engine - Vectorized P&L curves, extremes and breakevens for option strategies
+
+All legs are held as flat arrays and evaluated together by broadcasting, so a
+price x date grid for a large strategy is a handful of NumPy operations.
+The expiry payoff is piecewise linear with kinks at the strikes, so its
+extremes and breakevens are computed exactly from the kinks and tail slopes
+rather than searched for on a grid.
+
+Usage:
+    legs = strategy_legs(strategy.legs, spot=22000, valuation_date="2024-06-03")
+    expiry_pnl(legs, prices)                 # P&L at expiry per price
+    analyze_expiry(legs)                     # max profit/loss and breakevens
+    payoff_curves(legs, prices, days=(0, 7)) # {"expiry", "T+0", "T+7"} curves
+
+Accepts `OptionLeg` (backtesting_engine), `MultiExpiryLeg` (multi_expiry_strategies)
+or plain dicts with option_type, action, strike, premium, qty and optional
+expiry_date / iv.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.analytics.black_scholes import (
+    DEFAULT_VOLATILITY,
+    RISK_FREE_RATE,
+    bs_price,
+    implied_volatility,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LegArrays:
+    """Strategy legs as parallel arrays (one element per leg)"""
+
+    is_call: np.ndarray
+    strike: np.ndarray
+    premium: np.ndarray
+    weight: np.ndarray  # +qty for BUY, -qty for SELL
+    years: np.ndarray  # time to expiry at the valuation date, NaN if unknown
+    iv: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.strike)
+
+    @property
+    def entry_cost(self) -> float:
+        return float(np.dot(self.weight, self.premium))
+
+
+def _value(obj):
+    return getattr(obj, "value", obj)
+
+
+def strategy_legs(
+    legs: Iterable,
+    spot: Optional[float] = None,
+    valuation_date: Optional[str] = None,
+    days_to_expiry: Optional[float] = None,
+    iv: Optional[float] = None,
+    risk_free_rate: float = RISK_FREE_RATE,
+) -> LegArrays:
+    """
+    Convert leg objects to LegArrays.
+
+    Time to expiry comes from each leg's expiry_date relative to valuation_date
+    (default today), or from days_to_expiry for legs without a date. Volatility
+    is, in order: the leg's own iv, the iv argument, the volatility implied by
+    the leg premium at spot, DEFAULT_VOLATILITY.
+    """
+    rows = []
+    for leg in legs:
+        get = leg.get if isinstance(leg, dict) else lambda key, default=None: getattr(leg, key, default)
+        rows.append((
+            str(_value(get("option_type"))).upper() == "CALL",
+            float(get("strike")),
+            float(get("premium")),
+            float(get("qty", 1)) * (1 if str(_value(get("action"))).upper() == "BUY" else -1),
+            get("expiry_date"),
+            get("iv"),
+        ))
+    if not rows:
+        raise ValueError("Strategy has no legs")
+
+    is_call, strike, premium, weight, expiries, leg_ivs = zip(*rows)
+    today = datetime.strptime(valuation_date, "%Y-%m-%d") if valuation_date else datetime.now()
+    days = [
+        (datetime.strptime(str(expiry)[:10], "%Y-%m-%d") - today).days if expiry else days_to_expiry
+        for expiry in expiries
+    ]
+    years = np.array([np.nan if d is None else d / 365.0 for d in days])
+
+    arrays = LegArrays(
+        is_call=np.array(is_call, dtype=bool),
+        strike=np.array(strike),
+        premium=np.array(premium),
+        weight=np.array(weight),
+        years=years,
+        iv=np.array([np.nan if v is None else float(v) for v in leg_ivs]),
+    )
+
+    missing = np.isnan(arrays.iv)
+    if iv is not None:
+        arrays.iv[missing] = iv
+    elif missing.any() and spot is not None:
+        arrays.iv[missing] = implied_volatility(
+            arrays.premium[missing], spot, arrays.strike[missing], years[missing],
+            risk_free_rate, arrays.is_call[missing],
+        )
+    arrays.iv[np.isnan(arrays.iv)] = DEFAULT_VOLATILITY
+    return arrays
+
+
+def expiry_pnl(legs: LegArrays, prices) -> np.ndarray:
+    """Strategy P&L at expiry for every price (any shape)"""
+    prices = np.asarray(prices, dtype=np.float64)[..., None]
+    intrinsic = np.where(legs.is_call, prices - legs.strike, legs.strike - prices)
+    return (np.maximum(intrinsic, 0.0) - legs.premium) @ legs.weight
+
+
+def analyze_expiry(legs: LegArrays, price_range: Optional[Tuple[float, float]] = None) -> Dict:
+    """
+    Exact extremes and breakevens of the expiry payoff.
+
+    With no price_range the domain is [0, inf): a non-zero slope beyond the
+    highest strike makes profit or loss unbounded (reported as +/-inf).
+    Returns max_profit, max_profit_price, max_loss, max_loss_price, breakevens.
+    """
+    low, high = (0.0, np.inf) if price_range is None else (float(price_range[0]), float(price_range[1]))
+    strikes = np.unique(legs.strike)
+    knots = np.concatenate(([low], strikes[(strikes > low) & (strikes < high)]))
+    if np.isfinite(high):
+        knots = np.append(knots, high)
+    values = expiry_pnl(legs, knots)
+
+    # Slope beyond the highest strike: only calls are in the money there
+    tail = float(legs.weight[legs.is_call].sum()) if not np.isfinite(high) else 0.0
+
+    best, worst = int(np.argmax(values)), int(np.argmin(values))
+    max_profit, max_profit_price = float(values[best]), float(knots[best])
+    max_loss, max_loss_price = float(values[worst]), float(knots[worst])
+    if tail > 0:
+        max_profit, max_profit_price = np.inf, np.inf
+    elif tail < 0:
+        max_loss, max_loss_price = -np.inf, np.inf
+
+    # Roots on each linear segment, plus touches at the knots themselves
+    v0, v1 = values[:-1], values[1:]
+    x0, x1 = knots[:-1], knots[1:]
+    crossing = v0 * v1 < 0
+    roots = x0[crossing] + (x1[crossing] - x0[crossing]) * v0[crossing] / (v0[crossing] - v1[crossing])
+    roots = np.concatenate((roots, knots[values == 0]))
+    if tail != 0 and values[-1] * tail < 0:
+        roots = np.append(roots, knots[-1] - values[-1] / tail)
+
+    return {
+        "max_profit": max_profit,
+        "max_profit_price": max_profit_price,
+        "max_loss": max_loss,
+        "max_loss_price": max_loss_price,
+        "breakevens": np.unique(roots).tolist(),
+    }
+
+
+def range_extremes(legs: LegArrays, lows, highs) -> Dict[str, np.ndarray]:
+    """
+    Exact expiry-payoff extremes over many [low, high] price ranges at once.
+
+    Each range is evaluated at its ends and the strikes inside it, so W ranges
+    cost one (W, strikes + 2) evaluation. Returns arrays keyed max_profit,
+    max_profit_price, max_loss, max_loss_price.
+    """
+    lows = np.asarray(lows, dtype=np.float64)
+    highs = np.asarray(highs, dtype=np.float64)
+    strikes = np.unique(legs.strike)
+    knots = np.column_stack((lows, np.broadcast_to(strikes, (len(lows), len(strikes))), highs))
+    inside = np.ones(knots.shape, dtype=bool)
+    inside[:, 1:-1] = (strikes > lows[:, None]) & (strikes < highs[:, None])
+    values = expiry_pnl(legs, knots)
+
+    rows = np.arange(len(lows))
+    best = np.where(inside, values, -np.inf).argmax(axis=1)
+    worst = np.where(inside, values, np.inf).argmin(axis=1)
+    return {
+        "max_profit": values[rows, best],
+        "max_profit_price": knots[rows, best],
+        "max_loss": values[rows, worst],
+        "max_loss_price": knots[rows, worst],
+    }
+
+def pnl_grid(
+    legs: LegArrays,
+    prices: Sequence[float],
+    days: Sequence[float] = (0,),
+    risk_free_rate: float = RISK_FREE_RATE,
+) -> np.ndarray:
+    """
+    Strategy P&L on a (len(days), len(prices)) grid, days after valuation.
+
+    Legs are marked with Black-Scholes at their remaining time; expired legs
+    and legs without an expiry are worth intrinsic value.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    elapsed = np.asarray(days, dtype=np.float64) / 365.0
+    remaining = np.nan_to_num(legs.years, nan=0.0)[None, :] - elapsed[:, None]
+    value = bs_price(
+        prices[None, :, None], legs.strike, remaining[:, None, :], legs.iv, risk_free_rate, legs.is_call,
+    )
+    return (value - legs.premium) @ legs.weight
+
+
+def payoff_curves(
+    legs: LegArrays,
+    prices: Sequence[float],
+    days: Iterable[float] = (0,),
+    risk_free_rate: float = RISK_FREE_RATE,
+) -> Dict[str, np.ndarray]:
+    """Expiry and T+n P&L curves keyed "expiry", "T+0", "T+7", ..."""
+    days = list(days)
+    curves = {"expiry": expiry_pnl(legs, prices)}
+    if days:
+        grid = pnl_grid(legs, prices, days, risk_free_rate)
+        curves.update({f"T+{d:g}": row for d, row in zip(days, grid)})
+    return curves
+
+
+def price_grid(legs: LegArrays, spot: float, width: float = 0.2, points: int = 501) -> np.ndarray:
+    """Evenly spaced prices around spot, widened to cover every strike, strikes included"""
+    low = min(spot * (1 - width), legs.strike.min() * 0.95)
+    high = max(spot * (1 + width), legs.strike.max() * 1.05)
+    return np.union1d(np.linspace(max(low, 0.0), high, points), legs.strike)
+
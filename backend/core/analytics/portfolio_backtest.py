@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Portfolio Backtest - Multi-symbol simulation on aligned time x symbol matrices
+
+Where BacktestEngine.run_backtest_batch runs every symbol independently with
+its own capital, this simulator trades one shared cash balance across the
+whole universe:
+
+- Allocation by target weights (any time x symbol matrix) or by entry/exit
+  signals (equal weight across held symbols, optional position limit and
+  per-symbol weight cap, ranked by a score matrix when over the limit)
+- Rebalancing on weight changes, on calendar periods ('W', 'M', 'Q', ...) or
+  every n bars, optionally only for symbols drifted beyond a threshold
+- Per-symbol commission and slippage (scalar, sequence or symbol mapping)
+- Fills at the signal bar's close or the next bar's open
+
+Holdings only change on rebalance bars, so the simulation loops over those
+bars with array operations across all symbols and values every bar in
+between with one matrix product. 500 symbols x 10 years of daily bars
+rebalanced on every signal change takes well under a second.
+
+    backtester = PortfolioBacktester({"rebalance": "M", "max_positions": 20})
+    prices = backtester.load(symbols, timeframe="1d")
+    result = backtester.run_signals(entries, exits, score=momentum)
+    result.equity, result.weights, result.trades, result.metrics
+"""
+
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backend.core.analytics import backtest_engine
+from backend.core.analytics.backtest_engine import (
+    DEFAULT_BACKTEST_PARAMS,
+    FILL_PRICES,
+    BaseStrategy,
+    annualization_factor,
+    portfolio_metrics,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTFOLIO_PARAMS = {
+    **DEFAULT_BACKTEST_PARAMS,
+    "rebalance": "change",  # 'change', a pandas period ('W', 'M', 'Q', 'Y') or every n bars (int)
+    "drift_threshold": 0.0,  # Skip resizing held symbols whose |current - target| weight is within this band
+    "max_positions": None,  # Signal allocation: hold at most this many symbols
+    "max_weight": 1.0,  # Signal allocation: per-symbol weight cap (remainder stays in cash)
+}
+
+PerSymbol = Union[float, Iterable[float], Mapping[str, float]]
+
+
+@dataclass
+class PortfolioResult:
+    """Equity, holdings, trades and metrics of one portfolio simulation"""
+
+    equity: pd.Series  # Portfolio value at each bar close
+    cash: pd.Series  # Cash balance at each bar close
+    positions: pd.DataFrame  # Shares held per symbol at each bar close
+    weights: pd.DataFrame  # Market-value weights at each bar close
+    trades: pd.DataFrame  # One row per fill: time, symbol, shares, price, value, fees
+    last_prices: pd.Series  # Last known price per symbol
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+    def symbol_pnl(self) -> pd.Series:
+        """Realized plus unrealized P&L per symbol, net of fees"""
+        final_value = self.positions.iloc[-1] * self.last_prices
+        flows = self.trades.groupby("symbol")["value"].sum() if not self.trades.empty else 0.0
+        fees = self.trades.groupby("symbol")["fees"].sum() if not self.trades.empty else 0.0
+        pnl = final_value.sub(flows, fill_value=0.0).sub(fees, fill_value=0.0)
+        return pnl.sort_values(ascending=False)
+
+
+def per_symbol(value: PerSymbol, columns: pd.Index) -> np.ndarray:
+    """Broadcast a scalar, sequence or symbol mapping to one value per column"""
+    if isinstance(value, Mapping):
+        default = value.get("default", 0.0)
+        return np.array([float(value.get(col, default)) for col in columns])
+    array = np.broadcast_to(np.asarray(value, dtype=np.float64), (len(columns),))
+    return array.copy()
+
+
+def rebalance_mask(index: pd.Index, weights: np.ndarray, rule: Union[str, int]) -> np.ndarray:
+    """Bars on which the portfolio is traded toward its target weights"""
+    n = len(weights)
+    changed = np.empty(n, dtype=bool)
+    changed[0] = bool(np.any(weights[0] != 0))
+    changed[1:] = np.any(weights[1:] != weights[:-1], axis=1)
+    if rule == "change":
+        return changed
+    if isinstance(rule, (int, np.integer)):
+        if rule < 1:
+            raise ValueError("rebalance interval must be >= 1 bar")
+        mask = np.zeros(n, dtype=bool)
+        mask[::rule] = True
+    else:
+        periods = pd.DatetimeIndex(index).to_period(rule)
+        mask = np.empty(n, dtype=bool)
+        mask[0] = True
+        mask[1:] = periods[1:] != periods[:-1]
+    # Nothing to do before the first non-zero target
+    started = np.maximum.accumulate(changed)
+    return mask & started
+
+
+def signal_weights(
+    entries: np.ndarray,
+    exits: np.ndarray,
+    max_positions: Optional[int] = None,
+    max_weight: float = 1.0,
+    score: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Equal target weights across symbols in a long state.
+
+    The state per column follows backtest_engine.signal_state (latest signal
+    wins). With max_positions, only the highest-scoring held symbols are
+    kept on each bar (score defaults to column order).
+    """
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    event = np.full(entries.shape, -1, dtype=np.int8)
+    event[entries & ~exits] = 1
+    event[exits & ~entries] = 0
+    has_event = event >= 0
+    rows = np.arange(len(event))[:, None]
+    last = np.maximum.accumulate(np.where(has_event, rows, 0), axis=0)
+    state = np.maximum.accumulate(has_event, axis=0) & (np.take_along_axis(event, last, axis=0) == 1)
+
+    if max_positions is not None and max_positions < state.shape[1]:
+        if score is None:
+            score = np.broadcast_to(-np.arange(state.shape[1], dtype=np.float64), state.shape)
+        ranked = np.where(state, np.nan_to_num(np.asarray(score, dtype=np.float64), nan=-np.inf), -np.inf)
+        # Rank within each bar: 0 = best
+        order = np.argsort(-ranked, axis=1, kind="stable")
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(state.shape[1])[None, :], axis=1)
+        state &= rank < max_positions
+
+    held = state.sum(axis=1, keepdims=True)
+    weights = np.divide(state, held, out=np.zeros(state.shape), where=held > 0)
+    return np.minimum(weights, max_weight)
+
+
+def simulate_portfolio(
+    close: pd.DataFrame,
+    target_weights: Union[pd.DataFrame, np.ndarray],
+    open_: Optional[pd.DataFrame] = None,
+    init_cash: float = DEFAULT_PORTFOLIO_PARAMS["init_cash"],
+    commission: PerSymbol = DEFAULT_PORTFOLIO_PARAMS["commission"],
+    slippage: PerSymbol = DEFAULT_PORTFOLIO_PARAMS["slippage"],
+    fill_price: str = DEFAULT_PORTFOLIO_PARAMS["fill_price"],
+    rebalance: Union[str, int] = DEFAULT_PORTFOLIO_PARAMS["rebalance"],
+    drift_threshold: float = DEFAULT_PORTFOLIO_PARAMS["drift_threshold"],
+    freq: str = DEFAULT_PORTFOLIO_PARAMS["freq"],
+) -> PortfolioResult:
+    """
+    Simulate a long-only portfolio trading toward target weights with shared cash.
+
+    close (and open_ for next_open fills) are aligned time x symbol frames;
+    NaN marks bars where a symbol does not trade (it keeps its last price for
+    valuation and its holding cannot change). Weights decided at a bar's
+    close are filled at that close or the next bar's open. Commission and
+    slippage are both charged as fractions of traded value (reported as
+    fees); when costs would overdraw cash, all buys on that bar are scaled
+    down pro rata.
+    """
+    if fill_price not in FILL_PRICES:
+        raise ValueError(f"fill_price must be one of {FILL_PRICES}, got {fill_price!r}")
+    if fill_price == "next_open" and open_ is None:
+        raise ValueError("next_open fills need open prices")
+
+    index, symbols = close.index, close.columns
+    n_bars, n_symbols = close.shape
+    weights = np.nan_to_num(np.asarray(target_weights, dtype=np.float64))
+    if weights.shape != close.shape:
+        raise ValueError(f"target_weights shape {weights.shape} != prices shape {close.shape}")
+    if (weights < 0).any() or (weights.sum(axis=1) > 1 + 1e-9).any():
+        raise ValueError("target weights must be non-negative and sum to at most 1")
+
+    mark = close.ffill().to_numpy(dtype=np.float64)
+    exec_prices = close.to_numpy(dtype=np.float64) if fill_price == "close" else open_.reindex_like(close).to_numpy(dtype=np.float64)
+    lag = 0 if fill_price == "close" else 1
+    buy_cost = per_symbol(commission, symbols) + per_symbol(slippage, symbols)
+    sell_cost = buy_cost.copy()
+
+    decisions = np.flatnonzero(rebalance_mask(index, weights, rebalance))
+    decisions = decisions[decisions + lag < n_bars]
+
+    shares = np.zeros(n_symbols)
+    cash = float(init_cash)
+    exec_bars = np.empty(len(decisions), dtype=np.int64)
+    shares_hist = np.empty((len(decisions), n_symbols))
+    cash_hist = np.empty(len(decisions))
+    trade_bars, trade_cols, trade_shares, trade_px, trade_fees = [], [], [], [], []
+
+    for i, decision in enumerate(decisions):
+        bar = decision + lag
+        price = exec_prices[bar]
+        valuation = np.where(np.isfinite(price), price, mark[bar])
+        held_value = shares * np.nan_to_num(valuation)
+        equity = cash + held_value.sum()
+        tradable = np.isfinite(price) & (price > 0)
+
+        target = weights[decision]
+        delta = np.zeros(n_symbols)
+        delta[tradable] = target[tradable] * equity / price[tradable] - shares[tradable]
+        if drift_threshold > 0 and equity > 0:
+            # Opening and closing positions always trade; resizing only beyond the band
+            drift = np.abs(held_value / equity - target)
+            delta[(drift <= drift_threshold) & (target > 0) & (shares > 0)] = 0.0
+
+        value = delta * np.where(tradable, price, 0.0)
+        sells = delta < 0
+        proceeds = -(value[sells] * (1 - sell_cost[sells])).sum()
+        buy_total = (value[~sells] * (1 + buy_cost[~sells])).sum()
+        available = cash + proceeds
+        if buy_total > available:
+            # Costs (or untradable holdings) leave less cash than the targets need
+            scale = max(available, 0.0) / buy_total
+            delta[~sells] *= scale
+            value[~sells] *= scale
+            buy_total *= scale
+        fees = np.abs(value) * np.where(sells, sell_cost, buy_cost)
+
+        shares = shares + delta
+        cash = available - buy_total
+        exec_bars[i] = bar
+        shares_hist[i] = shares
+        cash_hist[i] = cash
+
+        traded = np.flatnonzero(delta != 0)
+        trade_bars.append(np.full(len(traded), bar))
+        trade_cols.append(traded)
+        trade_shares.append(delta[traded])
+        trade_px.append(price[traded])
+        trade_fees.append(fees[traded])
+
+    # Holdings are constant between fills: value every bar with one pass
+    segment = np.searchsorted(exec_bars, np.arange(n_bars), side="right") - 1
+    started = segment >= 0
+    positions = np.zeros((n_bars, n_symbols))
+    positions[started] = shares_hist[segment[started]]
+    cash_series = np.where(started, cash_hist[np.maximum(segment, 0)] if len(decisions) else init_cash, init_cash)
+    market_value = positions * np.nan_to_num(mark)
+    equity = cash_series + market_value.sum(axis=1)
+
+    bars = np.concatenate(trade_bars) if trade_bars else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(trade_cols) if trade_cols else np.empty(0, dtype=np.int64)
+    qty = np.concatenate(trade_shares) if trade_shares else np.empty(0)
+    px = np.concatenate(trade_px) if trade_px else np.empty(0)
+    trades = pd.DataFrame({
+        "time": index[bars],
+        "symbol": symbols[cols],
+        "shares": qty,
+        "price": px,
+        "value": qty * px,
+        "fees": np.concatenate(trade_fees) if trade_fees else np.empty(0),
+    })
+
+    metrics = portfolio_metrics(equity, init_cash, annualization_factor(freq))
+    # Round-trip stats do not apply to continuously resized holdings
+    metrics.pop("win_rate")
+    metrics.pop("closed_trades")
+    mean_equity = equity.mean() if n_bars else float(init_cash)
+    metrics.update({
+        "rebalances": int(len(decisions)),
+        "total_trades": int(len(trades)),
+        "total_fees": float(trades["fees"].sum()),
+        "turnover": float(np.abs(trades["value"]).sum() / mean_equity) if mean_equity else 0.0,
+        "avg_exposure": float(np.mean(market_value.sum(axis=1) / np.where(equity > 0, equity, np.nan))),
+        "avg_positions": float((positions > 0).sum(axis=1).mean()) if n_bars else 0.0,
+    })
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weights_held = market_value / equity[:, None]
+    return PortfolioResult(
+        equity=pd.Series(equity, index=index, name="equity"),
+        cash=pd.Series(cash_series, index=index, name="cash"),
+        positions=pd.DataFrame(positions, index=index, columns=symbols),
+        weights=pd.DataFrame(weights_held, index=index, columns=symbols),
+        trades=trades,
+        last_prices=pd.Series(np.nan_to_num(mark[-1]) if n_bars else 0.0, index=symbols),
+        metrics=metrics,
+    )
+
+
+def load_price_matrices(
+    symbols: List[str],
+    timeframe: str = "1d",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fields: Iterable[str] = ("open", "close"),
+) -> Dict[str, pd.DataFrame]:
+    """Candles of many symbols in one query, pivoted to time x symbol frames per field"""
+    fields = list(fields)
+    placeholders = ",".join("?" * len(symbols))
+    query = f"""
+        SELECT symbol, timestamp, {", ".join(fields)}
+        FROM candles_new
+        WHERE timeframe = ? AND symbol IN ({placeholders})
+    """
+    params: List[Any] = [timeframe, *symbols]
+    if start_date:
+        query += " AND timestamp >= ?"
+        params.append(int(datetime.strptime(start_date, "%Y-%m-%d").timestamp()))
+    if end_date:
+        query += " AND timestamp <= ?"
+        params.append(int(datetime.strptime(end_date, "%Y-%m-%d").timestamp()))
+
+    conn = sqlite3.connect(backtest_engine.DB_PATH)
+    try:
+        df = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+    if df.empty:
+        return {name: pd.DataFrame(columns=symbols, dtype=np.float64) for name in fields}
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+    wide = df.pivot_table(index="timestamp", columns="symbol", values=fields, aggfunc="last")
+    return {
+        name: wide[name].reindex(columns=[s for s in symbols if s in wide[name].columns]).sort_index()
+        for name in fields
+    }
+
+
+def signal_matrices(strategy: BaseStrategy, ohlcv: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Entry/exit frames from a per-symbol strategy run on each column"""
+    close = ohlcv["close"]
+    entries = pd.DataFrame(False, index=close.index, columns=close.columns)
+    exits = entries.copy()
+    for symbol in close.columns:
+        frame = pd.DataFrame({name: data[symbol] for name, data in ohlcv.items()}).dropna(subset=["close"])
+        signals = strategy.generate_signals(frame)
+        if signals is None:
+            continue
+        trade_signal = signals["trade_signal"].reindex(close.index).fillna(0).to_numpy()
+        entries[symbol] = trade_signal > 0
+        exits[symbol] = trade_signal < 0
+    return {"entries": entries, "exits": exits}
+
+
+class PortfolioBacktester:
+    """Shared-capital backtests across a universe of symbols"""
+
+    def __init__(self, params: Dict = None):
+        self.params = {**DEFAULT_PORTFOLIO_PARAMS, **(params or {})}
+        self.prices: Dict[str, pd.DataFrame] = {}
+        self.last_result: Optional[PortfolioResult] = None
+
+    def load(
+        self,
+        symbols: List[str],
+        timeframe: str = "1d",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Load aligned open/high/low/close/volume matrices for symbols"""
+        self.prices = load_price_matrices(
+            symbols, timeframe, start_date, end_date, fields=("open", "high", "low", "close", "volume")
+        )
+        close = self.prices["close"]
+        logger.info(f"✓ Loaded {close.shape[1]} symbols x {close.shape[0]} bars")
+        return self.prices
+
+    def set_prices(self, close: pd.DataFrame, open_: Optional[pd.DataFrame] = None) -> None:
+        """Use pre-loaded time x symbol price frames"""
+        self.prices = {"close": close}
+        if open_ is not None:
+            self.prices["open"] = open_
+
+    def run_weights(self, weights: pd.DataFrame) -> PortfolioResult:
+        """Trade toward a time x symbol matrix of target weights"""
+        close = self.prices["close"]
+        weights = weights.reindex(index=close.index, columns=close.columns).fillna(0.0)
+        p = self.params
+        self.last_result = simulate_portfolio(
+            close,
+            weights,
+            open_=self.prices.get("open"),
+            init_cash=p["init_cash"],
+            commission=p["commission"],
+            slippage=p["slippage"],
+            fill_price=p["fill_price"],
+            rebalance=p["rebalance"],
+            drift_threshold=p["drift_threshold"],
+            freq=p["freq"],
+        )
+        return self.last_result
+
+    def run_signals(
+        self,
+        entries: pd.DataFrame,
+        exits: pd.DataFrame,
+        score: Optional[pd.DataFrame] = None,
+    ) -> PortfolioResult:
+        """Equal-weight the symbols in a long state (top max_positions by score)"""
+        close = self.prices["close"]
+        align = dict(index=close.index, columns=close.columns)
+        weights = signal_weights(
+            entries.reindex(**align).fillna(False).to_numpy(dtype=bool),
+            exits.reindex(**align).fillna(False).to_numpy(dtype=bool),
+            max_positions=self.params["max_positions"],
+            max_weight=self.params["max_weight"],
+            score=score.reindex(**align).to_numpy(dtype=np.float64) if score is not None else None,
+        )
+        return self.run_weights(pd.DataFrame(weights, **align))
+
+    def run_strategy(self, strategy: BaseStrategy, score: Optional[pd.DataFrame] = None) -> PortfolioResult:
+        """Run a per-symbol strategy on every loaded symbol and trade it as one portfolio"""
+        signals = signal_matrices(strategy, self.prices)
+        return self.run_signals(signals["entries"], signals["exits"], score)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Result Cache - Content-addressed store for backtest results
+
+A backtest is fully determined by its candles, its strategy (class and
+parameters) and the engine parameters, so its cache key is a hash of:
+
+  • data version - fingerprint of the symbol's candles_new rows in the
+    requested range (row count, first/last timestamp, OHLCV totals), taken
+    with one indexed aggregate query; a new or revised bar changes it
+  • strategy     - module-qualified class name and params
+  • engine       - BacktestEngine.params (cash, fees, fill price, ...)
+
+Rows live in the indexed `backtest_cache` table: the BacktestResult as
+JSON and the SimulationResult (equity, returns, position, trade columns)
+as one packed .npz blob. Repeating a request returns the stored result
+without loading candles; batch runs recompute only symbols whose data
+changed since the last sync.
+
+    cache = BacktestCache()
+    engine = BacktestEngine(cache=cache)
+    engine.run_backtest("INFY", SMAStrategy())     # computed and stored
+    engine.run_backtest("INFY", SMAStrategy())     # served from the cache
+    cache.stats()                                  # {"entries": 1, "hits": 1, ...}
+"""
+
+import hashlib
+import io
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from backend.core.analytics import backtest_engine
+from backend.core.analytics.backtest_engine import BacktestResult, SimulationResult, candle_filter
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2  # Bump when simulation semantics change to orphan old entries
+TRADE_PREFIX = "trade_"
+
+
+def _pack(arrays: Dict[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _unpack(blob: bytes) -> Dict[str, np.ndarray]:
+    with np.load(io.BytesIO(blob)) as npz:
+        return {name: npz[name] for name in npz.files}
+
+
+def _json_default(value):
+    """NumPy scalars as Python numbers, anything else as its string form"""
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def _digest(payload) -> str:
+    text = json.dumps(payload, sort_keys=True, default=_json_default)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def strategy_identity(strategy) -> Dict:
+    """Class and parameters that determine a strategy's signals"""
+    cls = type(strategy)
+    return {"class": f"{cls.__module__}.{cls.__qualname__}", "params": getattr(strategy, "params", {})}
+
+
+class BacktestCache:
+    """SQLite-backed content-addressed backtest result store"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or backtest_engine.DB_PATH
+        self.hits = 0
+        self.misses = 0
+        self._init_database()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection committed on success and always closed"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS backtest_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    strategy TEXT NOT NULL,
+                    data_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    arrays BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                )
+            """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_backtest_cache_symbol ON backtest_cache (symbol, timeframe)"
+            )
+
+    # ----------------------------------------------------------------- keys
+
+    def data_version(
+        self,
+        symbol: str,
+        timeframe: str = "1d",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Optional[str]:
+        """Fingerprint of the candles a backtest would load (None if there are none)"""
+        where, params = candle_filter(symbol, timeframe, start_date, end_date)
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    f"""
+                    SELECT COUNT(*), MIN(timestamp), MAX(timestamp),
+                           TOTAL(open), TOTAL(high), TOTAL(low), TOTAL(close), TOTAL(volume)
+                    FROM candles_new WHERE {where}
+                """,
+                    params,
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"[ResultCache] Cannot fingerprint {symbol} {timeframe}: {e}")
+            return None
+        if not row or not row[0]:
+            return None
+        return _digest(list(row))[:16]
+
+    def cache_key(self, data_version: str, strategy, engine_params: Dict) -> str:
+        """Hash of everything that determines a backtest result"""
+        return _digest({
+            "version": CACHE_VERSION,
+            "data": data_version,
+            "strategy": strategy_identity(strategy),
+            "engine": engine_params,
+        })
+
+    def key_for(
+        self,
+        symbol: str,
+        strategy,
+        engine_params: Dict,
+        timeframe: str = "1d",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Optional[Tuple[str, str]]:
+        """(cache_key, data_version) for a BacktestEngine.run_backtest call, None without data"""
+        version = self.data_version(symbol, timeframe, start_date, end_date)
+        if version is None:
+            return None
+        return self.cache_key(f"{symbol}|{timeframe}|{version}", strategy, engine_params), version
+
+    # -------------------------------------------------------------- storage
+
+    def get(self, cache_key: str) -> Optional[Tuple[BacktestResult, SimulationResult]]:
+        """Stored result and simulation for a key, or None"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT result, arrays FROM backtest_cache WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE backtest_cache SET hits = hits + 1 WHERE cache_key = ?", (cache_key,))
+        except sqlite3.Error as e:
+            logger.warning(f"[ResultCache] Lookup failed: {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        stored = json.loads(row[0])
+        arrays = _unpack(row[1])
+        sim = SimulationResult(
+            equity=arrays["equity"],
+            returns=arrays["returns"],
+            position=arrays["position"],
+            trades={
+                name[len(TRADE_PREFIX):]: values for name, values in arrays.items() if name.startswith(TRADE_PREFIX)
+            },
+            metrics=stored["metrics"],
+        )
+        return BacktestResult(**stored["result"]), sim
+
+    def put(
+        self,
+        cache_key: str,
+        data_version: str,
+        timeframe: str,
+        result: BacktestResult,
+        sim: SimulationResult,
+    ):
+        """Store a computed result under its key"""
+        arrays = {"equity": sim.equity, "returns": sim.returns, "position": sim.position}
+        arrays.update({f"{TRADE_PREFIX}{name}": np.asarray(values) for name, values in sim.trades.items()})
+        metrics = {name: float(value) for name, value in sim.metrics.items()}
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO backtest_cache
+                    (cache_key, symbol, timeframe, strategy, data_version, result, arrays, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (
+                        cache_key,
+                        result.symbol,
+                        timeframe,
+                        result.strategy_name,
+                        data_version,
+                        json.dumps({"result": result.__dict__, "metrics": metrics}, default=_json_default),
+                        _pack(arrays),
+                        time.time(),
+                    ),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"[ResultCache] Failed to store {result.symbol}: {e}")
+
+    def invalidate(self, symbol: Optional[str] = None, timeframe: Optional[str] = None) -> int:
+        """Delete entries (all, or one symbol / symbol-timeframe); returns rows removed"""
+        query, params = "DELETE FROM backtest_cache", []
+        if symbol:
+            query += " WHERE symbol = ?"
+            params.append(symbol)
+            if timeframe:
+                query += " AND timeframe = ?"
+                params.append(timeframe)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount
+
+    def stats(self) -> Dict:
+        """Entry count, stored size and hit counters"""
+        with self._connect() as conn:
+            entries, size, stored_hits = conn.execute(
+                "SELECT COUNT(*), TOTAL(LENGTH(arrays) + LENGTH(result)), TOTAL(hits) FROM backtest_cache"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "size_bytes": int(size),
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": int(stored_hits),
+        }
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Walk-Forward Optimization - Rolling in-sample optimization with out-of-sample tests
+
+Splits each symbol's pre-loaded arrays into consecutive windows: the
+parameter grid is optimized on the in-sample (train) bars, the best set is
+traded on the following out-of-sample (test) bars, and the test segments
+are stitched into one out-of-sample equity curve.
+
+    rolling:  [train 0..500)[test 500..600)
+                  [train 100..600)[test 600..700) ...
+    anchored: [train 0..500)[test 500..600)
+              [train 0..600)[test 600..700) ...
+
+Indicators are computed once over the full series per chunk of parameter
+sets and every window slices the resulting signal matrices, so overlapping
+train windows never recompute them (and each window's first bars see the
+indicator history before it rather than a fresh warm-up). This assumes
+strategies are causal: a signal at bar t only uses bars <= t.
+
+Chunks of the grid are scored on all windows in a process pool attached to
+the shared-memory arrays of ParameterSweep:
+
+    wf = WalkForwardOptimizer(SMAStrategy, {"fast_period": range(5, 60, 5),
+                                            "slow_period": range(20, 200, 10)},
+                              train_bars=500, test_bars=100)
+    wf.load(["INFY", "TCS"], timeframe="1d")
+    results = wf.run_walk_forward()
+    results["INFY"].equity, results["INFY"].metrics, results["INFY"].windows_frame()
+
+CLI:
+    python -m backend.core.analytics.walk_forward --symbols INFY --train 500 --test 100
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from backend.core.analytics.backtest_engine import (
+    BaseStrategy,
+    annualization_factor,
+    portfolio_metrics,
+    simulate_from_signals,
+)
+from backend.core.analytics.parameter_sweep import (
+    STRATEGIES,
+    ParameterSweep,
+    SharedArrays,
+    _attached_arrays,
+    add_grid_arguments,
+    grid_from_args,
+)
+
+logger = logging.getLogger(__name__)
+
+# (train_start, train_end, test_start, test_end) bar offsets, ends exclusive
+Window = Tuple[int, int, int, int]
+
+SIM_KEYS = ("init_cash", "commission", "slippage", "fill_price", "freq")
+
+
+@dataclass
+class WalkForwardResult:
+    """Stitched out-of-sample performance of one symbol"""
+
+    symbol: str
+    equity: pd.Series  # Out-of-sample equity, test segments chained
+    windows: List[Dict[str, Any]]  # Per window: bounds, chosen params, IS/OOS scores
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+    def windows_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.windows)
+        if not df.empty:
+            params = pd.DataFrame(list(df.pop("params")), index=df.index)
+            df = pd.concat([df, params], axis=1)
+        return df
+
+
+def _score(metrics: Dict[str, float], metric: str) -> float:
+    value = metrics.get(metric)
+    return float(value) if value is not None and np.isfinite(value) else float("-inf")
+
+
+def _flat_at_end(entries: np.ndarray, exits: np.ndarray, fill_price: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Force an exit that fills inside the segment so it ends in cash"""
+    entries, exits = entries.copy(), exits.copy()
+    last = -2 if fill_price == "next_open" and len(exits) > 1 else -1
+    entries[last:] = False
+    exits[last] = True
+    return entries, exits
+
+
+def score_windows(
+    strategy_cls: Type[BaseStrategy],
+    arrays: Dict[str, np.ndarray],
+    param_sets: List[Dict],
+    windows: List[Window],
+    sim_params: Dict[str, Any],
+    metric: str,
+) -> np.ndarray:
+    """In-sample metric of each parameter set on each window: (sets, windows)"""
+    entries, exits = strategy_cls.generate_signal_batch(arrays, param_sets)
+    open_ = arrays.get("open")
+    scores = np.empty((len(param_sets), len(windows)))
+    for col, (start, end, _, _) in enumerate(windows):
+        window_open = open_[start:end] if open_ is not None else None
+        window_close = arrays["close"][start:end]
+        for row in range(len(param_sets)):
+            sim = simulate_from_signals(
+                window_open, window_close, entries[row, start:end], exits[row, start:end], **sim_params
+            )
+            scores[row, col] = _score(sim.metrics, metric)
+    return scores
+
+
+def _score_windows_shared(strategy_cls, spec, symbol, chunk_idx, param_sets, windows, sim_params, metric):
+    """Process-pool task: attach to the symbol's shared arrays and score a chunk"""
+    arrays = _attached_arrays(spec)
+    return symbol, chunk_idx, score_windows(strategy_cls, arrays, param_sets, windows, sim_params, metric)
+
+
+class WalkForwardOptimizer(ParameterSweep):
+    """
+    Walk-forward optimization of a strategy's parameters.
+
+    Args:
+        strategy_cls: BaseStrategy subclass
+        param_grid: Parameter name -> candidate values
+        train_bars: In-sample bars per window (the first window's length when anchored)
+        test_bars: Out-of-sample bars per window; windows advance by this much
+        anchored: Grow the train window from the first bar instead of rolling it
+        params, metric, constraint, max_workers, chunk_size: As ParameterSweep
+    """
+
+    def __init__(
+        self,
+        strategy_cls: Type[BaseStrategy],
+        param_grid: Dict[str, Iterable],
+        train_bars: int,
+        test_bars: int,
+        anchored: bool = False,
+        params: Optional[Dict] = None,
+        metric: str = "sharpe_ratio",
+        constraint: Optional[Callable[[Dict], bool]] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 64,
+    ):
+        if train_bars < 2 or test_bars < 2:
+            raise ValueError("train_bars and test_bars must be at least 2")
+        super().__init__(strategy_cls, param_grid, params, metric, constraint, max_workers, chunk_size)
+        self.train_bars = train_bars
+        self.test_bars = test_bars
+        self.anchored = anchored
+
+    def windows(self, n_bars: int) -> List[Window]:
+        """Window bounds for a series of n_bars (last test window may be shorter)"""
+        windows = []
+        for test_start in range(self.train_bars, n_bars - 1, self.test_bars):
+            train_start = 0 if self.anchored else test_start - self.train_bars
+            windows.append((train_start, test_start, test_start, min(test_start + self.test_bars, n_bars)))
+        return windows
+
+    # ------------------------------------------------------------------- run
+
+    def _optimize(self, combos: List[Dict], windows: Dict[str, List[Window]]) -> Dict[str, np.ndarray]:
+        """Score matrix (combinations x windows) per symbol"""
+        sim_params = {k: self.params[k] for k in SIM_KEYS}
+        chunks = self._chunks(combos)
+        scores = {symbol: np.empty((len(combos), len(windows[symbol]))) for symbol in windows}
+
+        if not self.max_workers:
+            for symbol in windows:
+                for idx, chunk in enumerate(chunks):
+                    start = idx * self.chunk_size
+                    scores[symbol][start:start + len(chunk)] = score_windows(
+                        self.strategy_cls, self.data[symbol], chunk, windows[symbol], sim_params, self.metric
+                    )
+            return scores
+
+        try:
+            for symbol in windows:
+                if symbol not in self._shared:
+                    self._shared[symbol] = SharedArrays(self.data[symbol])
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [
+                    pool.submit(_score_windows_shared, self.strategy_cls, self._shared[symbol].spec, symbol,
+                                idx, chunk, windows[symbol], sim_params, self.metric)
+                    for symbol in windows
+                    for idx, chunk in enumerate(chunks)
+                ]
+                for future in as_completed(futures):
+                    symbol, idx, chunk_scores = future.result()
+                    start = idx * self.chunk_size
+                    scores[symbol][start:start + len(chunk_scores)] = chunk_scores
+        finally:
+            self.close()
+        return scores
+
+    def _out_of_sample(
+        self, symbol: str, combos: List[Dict], windows: List[Window], scores: np.ndarray
+    ) -> WalkForwardResult:
+        """Trade each window's best parameter set on its test bars and chain the segments"""
+        arrays = self.data[symbol]
+        index = self.index[symbol]
+        sim_params = {k: self.params[k] for k in SIM_KEYS}
+        best = scores.argmax(axis=0)
+
+        # Signals once per distinct winning parameter set
+        chosen = sorted(set(best.tolist()))
+        entries, exits = self.strategy_cls.generate_signal_batch(arrays, [combos[i] for i in chosen])
+        row_of = {combo_idx: row for row, combo_idx in enumerate(chosen)}
+
+        cash = float(self.params["init_cash"])
+        equity_parts, pnl_parts, records = [], [], []
+        for col, (train_start, train_end, start, end) in enumerate(windows):
+            row = row_of[int(best[col])]
+            seg_entries, seg_exits = _flat_at_end(
+                entries[row, start:end], exits[row, start:end], sim_params["fill_price"]
+            )
+            sim = simulate_from_signals(
+                arrays["open"][start:end] if "open" in arrays else None,
+                arrays["close"][start:end],
+                seg_entries,
+                seg_exits,
+                **{**sim_params, "init_cash": cash},
+            )
+            equity_parts.append(sim.equity)
+            pnl_parts.append(sim.trades["pnl"])
+            records.append({
+                "train_start": index[train_start],
+                "train_end": index[train_end - 1],
+                "test_start": index[start],
+                "test_end": index[end - 1],
+                "params": combos[int(best[col])],
+                "in_sample": float(scores[best[col], col]),
+                "out_of_sample": _score(sim.metrics, self.metric),
+                "return": sim.metrics["total_return"],
+                "trades": sim.metrics["total_trades"],
+            })
+            cash = float(sim.equity[-1])
+
+        equity = np.concatenate(equity_parts)
+        pnl = np.concatenate(pnl_parts)
+        metrics = portfolio_metrics(
+            equity, self.params["init_cash"], annualization_factor(self.params["freq"]), pnl
+        )
+        metrics["total_trades"] = int(len(pnl))
+        in_sample = np.mean([r["in_sample"] for r in records])
+        out_sample = np.mean([r["out_of_sample"] for r in records])
+        # Walk-forward efficiency: how much of the in-sample edge survives out of sample
+        metrics["efficiency"] = float(out_sample / in_sample) if in_sample > 0 else 0.0
+        metrics["windows"] = len(windows)
+        return WalkForwardResult(
+            symbol=symbol,
+            equity=pd.Series(equity, index=index[windows[0][2]:windows[-1][3]], name=symbol),
+            windows=records,
+            metrics=metrics,
+        )
+
+    def run_walk_forward(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, WalkForwardResult]:
+        """Walk-forward results per symbol (symbols with too few bars are skipped)"""
+        combos = self.combinations()
+        if not combos:
+            return {}
+        windows = {}
+        for symbol in symbols or self.data:
+            symbol_windows = self.windows(len(self.data[symbol]["close"]))
+            if symbol_windows:
+                windows[symbol] = symbol_windows
+            else:
+                logger.warning(f"[WalkForward] {symbol}: fewer than {self.train_bars + 2} bars, skipped")
+
+        logger.info(
+            f"[WalkForward] {self.strategy_cls.__name__}: {len(combos)} combinations x "
+            f"{sum(len(w) for w in windows.values())} windows "
+            f"({'anchored' if self.anchored else 'rolling'}, {self.train_bars}/{self.test_bars} bars)"
+        )
+        scores = self._optimize(combos, windows)
+        return {
+            symbol: self._out_of_sample(symbol, combos, windows[symbol], scores[symbol])
+            for symbol in windows
+        }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Walk-forward optimize strategy parameters")
+    add_grid_arguments(parser)
+    parser.add_argument("--train", type=int, default=500, help="In-sample bars per window")
+    parser.add_argument("--test", type=int, default=100, help="Out-of-sample bars per window")
+    parser.add_argument("--anchored", action="store_true", help="Grow the train window from the start")
+    args = parser.parse_args()
+
+    wf = WalkForwardOptimizer(
+        STRATEGIES[args.strategy], grid_from_args(args), train_bars=args.train, test_bars=args.test,
+        anchored=args.anchored, params={"fill_price": args.fill_price},
+        metric=args.metric, max_workers=args.workers,
+    )
+    symbols = [s.strip().upper() for s in args.symbols.split(",")]
+    if not wf.load(symbols, args.timeframe, args.start, args.end):
+        logger.error("No data loaded")
+        return 1
+
+    for symbol, result in wf.run_walk_forward().items():
+        m = result.metrics
+        logger.info(
+            f"{symbol}: OOS return {m['total_return']:.2%}, sharpe {m['sharpe_ratio']:.2f}, "
+            f"max DD {m['max_drawdown']:.2%}, efficiency {m['efficiency']:.2f} over {m['windows']} windows"
+        )
+        for window in result.windows:
+            logger.info(
+                f"  {window['test_start']} -> {window['test_end']}  {window['params']}  "
+                f"IS={window['in_sample']:.2f}  OOS={window['out_of_sample']:.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -15,6 +15,20 @@ from enum import Enum
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from backend.core.analytics.black_scholes import (
+    DEFAULT_VOLATILITY,
+    RISK_FREE_RATE,
+    bs_greeks,
+    implied_volatility,
+)
+from backend.core.analytics.option_history import DB_PATH as OPTION_DB_PATH
+from backend.core.analytics.option_history import (
+    fill_implied_vols,
+    load_option_closes,
+    option_price_matrix,
+)
+from backend.core.analytics.payoff import analyze_expiry, payoff_curves, strategy_legs
+
 # Setup basic logging (don't need full logger_config for this module)
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -79,84 +93,29 @@ class MultiExpiryLeg:
         volatility: float = 0.20,
         risk_free_rate: float = 0.06,
     ) -> Dict[str, float]:
-        """Calculate option Greeks using Black-Scholes (simplified)"""
-        try:
-            from scipy.stats import norm
-        except ImportError:
-            logger.warning("scipy not installed, returning approximate Greeks")
-            # Return simplified Greeks without scipy
-            days_to_expiry = (
-                datetime.strptime(self.expiry_date, "%Y-%m-%d") - datetime.now()
-            ).days
-            T = max(days_to_expiry / 365.0, 0.001)
-            S = underlying_price
-            K = self.strike
-
-            # Simplified delta (0.5 ATM, 1 ITM, 0 OTM)
-            if self.option_type == OptionType.CALL:
-                delta = 0.5 if abs(S - K) < 100 else (1.0 if S > K else 0.1)
-            else:
-                delta = -0.5 if abs(S - K) < 100 else (-1.0 if S < K else -0.1)
-
-            multiplier = 1 if self.action == ActionType.BUY else -1
-
-            return {
-                "delta": delta * multiplier * self.qty,
-                "gamma": 0.01 * multiplier * self.qty,  # Simplified
-                "vega": 10 * multiplier * self.qty,  # Simplified
-                "theta": -5 * multiplier * self.qty,  # Simplified decay
-                "price": max(
-                    0, (S - K) if self.option_type == OptionType.CALL else (K - S)
-                ),
-            }
-
+        """Calculate option Greeks using Black-Scholes"""
         days_to_expiry = (
             datetime.strptime(self.expiry_date, "%Y-%m-%d") - datetime.now()
         ).days
         T = max(days_to_expiry / 365.0, 0.001)  # Time to expiry in years
-        S = underlying_price
-        K = self.strike
-        sigma = volatility
-        r = risk_free_rate
-
-        # d1 and d2 for Black-Scholes
-        d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-        d2 = d1 - sigma * np.sqrt(T)
-
-        if self.option_type == OptionType.CALL:
-            delta = norm.cdf(d1)
-            option_price = S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
-        else:  # PUT
-            delta = -norm.cdf(-d1)
-            option_price = K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
-
-        # Gamma (same for call and put)
-        gamma = norm.pdf(d1) / (S * sigma * np.sqrt(T))
-
-        # Vega (same for call and put)
-        vega = S * norm.pdf(d1) * np.sqrt(T) / 100  # Per 1% change in volatility
-
-        # Theta
-        if self.option_type == OptionType.CALL:
-            theta = (
-                -S * norm.pdf(d1) * sigma / (2 * np.sqrt(T))
-                - r * K * np.exp(-r * T) * norm.cdf(d2)
-            ) / 365
-        else:
-            theta = (
-                -S * norm.pdf(d1) * sigma / (2 * np.sqrt(T))
-                + r * K * np.exp(-r * T) * norm.cdf(-d2)
-            ) / 365
+        greeks = bs_greeks(
+            underlying_price,
+            self.strike,
+            T,
+            volatility,
+            risk_free_rate,
+            is_call=self.option_type == OptionType.CALL,
+        )
 
         # Adjust for position (BUY vs SELL)
         multiplier = 1 if self.action == ActionType.BUY else -1
 
         return {
-            "delta": delta * multiplier * self.qty,
-            "gamma": gamma * multiplier * self.qty,
-            "vega": vega * multiplier * self.qty,
-            "theta": theta * multiplier * self.qty,
-            "price": option_price,
+            "delta": float(greeks["delta"]) * multiplier * self.qty,
+            "gamma": float(greeks["gamma"]) * multiplier * self.qty,
+            "vega": float(greeks["vega"]) * multiplier * self.qty,
+            "theta": float(greeks["theta"]) * multiplier * self.qty,
+            "price": float(greeks["price"]),
         }
 
 
@@ -197,29 +156,36 @@ class MultiExpiryStrategy:
         return expiry_map
 
     def get_max_profit_loss(self, price_range: List[float]) -> Dict[str, float]:
-        """Calculate max profit and loss across price range"""
-        # Use latest expiry for calculation
-        latest_expiry = max(leg.expiry_date for leg in self.legs)
-
-        pnls = [self.calculate_pnl(price, latest_expiry) for price in price_range]
+        """Calculate max profit and loss across price range (all legs at expiry)"""
+        legs = strategy_legs(self.legs)
+        result = analyze_expiry(legs, (min(price_range), max(price_range)))
 
         return {
-            "max_profit": max(pnls),
-            "max_loss": min(pnls),
-            "breakeven_points": self._find_breakevens(price_range, pnls),
+            "max_profit": result["max_profit"],
+            "max_loss": result["max_loss"],
+            "breakeven_points": result["breakevens"],
         }
 
-    def _find_breakevens(self, prices: List[float], pnls: List[float]) -> List[float]:
-        """Find breakeven points where P&L crosses zero"""
-        breakevens = []
-        for i in range(len(pnls) - 1):
-            if pnls[i] * pnls[i + 1] < 0:  # Sign change
-                # Linear interpolation
-                breakeven = prices[i] + (prices[i + 1] - prices[i]) * abs(
-                    pnls[i]
-                ) / abs(pnls[i + 1] - pnls[i])
-                breakevens.append(breakeven)
-        return breakevens
+    def payoff_curves(
+        self,
+        prices: List[float],
+        days: Tuple[int, ...] = (0,),
+        valuation_date: Optional[str] = None,
+        volatility: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Expiry and T+n P&L curves over prices, n calendar days after valuation_date.
+
+        Legs are marked with Black-Scholes; without a volatility each leg uses
+        the volatility implied by its premium at the entry price.
+        """
+        legs = strategy_legs(
+            self.legs,
+            spot=self.entry_price,
+            valuation_date=valuation_date or self.entry_date,
+            iv=volatility,
+        )
+        return payoff_curves(legs, prices, days)
 
 
 # ============================================================================
@@ -455,8 +421,53 @@ class ExpiryRoller:
 class MultiExpiryBacktester:
     """Backtest multi-expiry strategies with rolling"""
 
-    def __init__(self):
+    def __init__(self, db_path: str = OPTION_DB_PATH):
         self.roller = ExpiryRoller()
+        self.db_path = db_path
+
+    def roll_schedule(
+        self,
+        strategy: MultiExpiryStrategy,
+        dates: np.ndarray,
+        auto_roll: bool = True,
+        roll_days_before: int = 3,
+    ) -> pd.DataFrame:
+        """
+        Holding periods for every leg, one row per contract held
+
+        Columns: leg, option_type, strike, expiry_date, weight (+qty BUY,
+        -qty SELL), start and end (day indexes, inclusive) and rolled. A
+        rolled period ends on the roll day, when the next one starts.
+        """
+        rows = []
+        for leg_idx, leg in enumerate(strategy.legs):
+            weight = leg.qty * (1 if leg.action == ActionType.BUY else -1)
+            expiry, start = leg.expiry_date, 0
+            while True:
+                to_expiry = (np.datetime64(expiry) - dates).astype(int)
+                due = np.flatnonzero(to_expiry[start:] <= roll_days_before)
+                due = due[due > 0] if start > 0 else due
+                end = start + int(due[0]) if auto_roll and len(due) else len(dates) - 1
+                rolled = end < len(dates) - 1
+                rows.append((leg_idx, leg.option_type.value, float(leg.strike), expiry, weight, start, end, rolled))
+                if not rolled:
+                    break
+                expiry = self._roll_target(expiry, str(dates[end]), roll_days_before)
+                start = end
+
+        return pd.DataFrame(
+            rows,
+            columns=["leg", "option_type", "strike", "expiry_date", "weight", "start", "end", "rolled"],
+        )
+
+    def _roll_target(self, expiry: str, roll_date: str, roll_days_before: int) -> str:
+        """First weekly expiry after `expiry` that is beyond the roll window"""
+        target = self.roller.get_next_expiry(roll_date)
+        while target <= expiry or (
+            datetime.strptime(target, "%Y-%m-%d") - datetime.strptime(roll_date, "%Y-%m-%d")
+        ).days <= roll_days_before:
+            target = self.roller.get_next_expiry(target)
+        return target
 
     def backtest_with_rolling(
         self,
@@ -466,77 +477,115 @@ class MultiExpiryBacktester:
         end_date: str,
         auto_roll: bool = True,
         roll_days_before: int = 3,
+        option_prices: Optional[pd.DataFrame] = None,
+        volatility: Optional[float] = None,
+        risk_free_rate: float = RISK_FREE_RATE,
     ) -> Dict:
         """
         Backtest strategy with automatic expiry rolling
+
+        Legs are valued at their historical option closes (option_prices, or
+        loaded from expired_candles/candles_new). Missing closes are priced
+        with Black-Scholes on a vol surface filled from the observed implied
+        vols, falling back to `volatility` or the vol implied by each leg's
+        premium at the strategy entry price. Positions open at the first
+        day's value; expired contracts settle at their expiry-day value.
         """
-        results = []
-        current_strategy = strategy
-
-        # Filter historical data
-        hist_filtered = historical_data[
-            (historical_data["date"] >= start_date)
-            & (historical_data["date"] <= end_date)
-        ].copy()
-
-        for idx, row in hist_filtered.iterrows():
-            current_date = row["date"]
-            underlying_price = row["close"]
-
-            # Check if any legs need rolling
-            if auto_roll:
-                rolled_legs = []
-                for leg in current_strategy.legs:
-                    if self.roller.should_roll(leg, current_date, roll_days_before):
-                        next_expiry = self.roller.get_next_expiry(current_date)
-                        new_leg, roll_info = self.roller.roll_position(
-                            leg, next_expiry, underlying_price, current_date
-                        )
-                        rolled_legs.append(new_leg)
-                    else:
-                        rolled_legs.append(leg)
-
-                # Update strategy with rolled legs
-                current_strategy = MultiExpiryStrategy(
-                    strategy.name, rolled_legs, underlying_price
-                )
-
-            # Calculate daily P&L
-            pnl = current_strategy.calculate_pnl(underlying_price, current_date)
-            greeks = current_strategy.get_portfolio_greeks(underlying_price)
-
-            results.append(
+        data = historical_data[["date", "close"]].copy()
+        data["date"] = pd.to_datetime(data["date"])
+        data = data[(data["date"] >= start_date) & (data["date"] <= end_date)]
+        dates = data["date"].to_numpy(dtype="datetime64[D]")
+        spot = data["close"].to_numpy(dtype=np.float64)
+        if len(dates) == 0:
+            return {"error": "No data available for this period"}
+
+        schedule = self.roll_schedule(strategy, dates, auto_roll, roll_days_before)
+        contracts = list(dict.fromkeys(zip(schedule["option_type"], schedule["strike"], schedule["expiry_date"])))
+        column = {contract: i for i, contract in enumerate(contracts)}
+        seg_col = np.array([column[c] for c in zip(schedule["option_type"], schedule["strike"], schedule["expiry_date"])])
+
+        day_labels = np.datetime_as_string(dates).tolist()
+        if option_prices is None:
+            option_prices = load_option_closes(
+                strategy.legs[0].symbol, schedule["expiry_date"], day_labels[0], day_labels[-1], db_path=self.db_path
+            )
+        market = option_price_matrix(option_prices, day_labels, contracts)
+
+        # Day x contract grids
+        is_call = np.array([c[0] == OptionType.CALL.value for c in contracts])
+        strikes = np.array([c[1] for c in contracts])
+        expiries = np.array([c[2] for c in contracts], dtype="datetime64[D]")
+        years = (expiries[None, :] - dates[:, None]).astype(np.float64) / 365.0
+        settle_day = np.maximum(np.searchsorted(dates, expiries, side="right") - 1, 0)
+        S = spot[:, None]
+
+        entry_iv = strategy_legs(
+            strategy.legs, spot=strategy.entry_price, valuation_date=day_labels[0], iv=volatility
+        ).iv
+        default_iv = np.full(len(contracts), DEFAULT_VOLATILITY)
+        default_iv[seg_col] = entry_iv[schedule["leg"].to_numpy()]
+
+        observed_iv = implied_volatility(market, S, strikes, years, risk_free_rate, is_call)
+        iv = fill_implied_vols(observed_iv, spot, strikes, years, default_iv)
+        greeks = bs_greeks(S, strikes, years, iv, risk_free_rate, is_call)
+        value = np.where(np.isnan(market), greeks["price"], market)
+        day = np.arange(len(dates))[:, None]
+        value = value[np.minimum(day, settle_day[None, :]), np.arange(len(contracts))]
+
+        # Holding-period P&L: marked while open, frozen once closed
+        start = schedule["start"].to_numpy()
+        end = schedule["end"].to_numpy()
+        weight = schedule["weight"].to_numpy(dtype=np.float64)
+        entry_value = value[start, seg_col]
+        marked = value[np.clip(day, start, end), seg_col]
+        pnl = (np.where(day >= start, weight * (marked - entry_value), 0.0)).sum(axis=1)
+
+        # Greeks of the open positions
+        stop = np.where(schedule["rolled"].to_numpy(), end, len(dates))
+        open_ = (day >= start) & (day < stop) & (day <= settle_day[seg_col])
+        exposure = np.zeros((len(dates), len(contracts)))
+        np.add.at(exposure.T, seg_col, (open_ * weight).T)
+        portfolio = {greek: (exposure * greeks[greek]).sum(axis=1) for greek in ("delta", "gamma", "vega", "theta")}
+
+        rolls = []
+        for i in np.flatnonzero(schedule["rolled"].to_numpy()):
+            exit_value, new_premium = value[end[i], seg_col[i]], value[end[i], seg_col[i + 1]]
+            rolls.append(
                 {
-                    "date": current_date,
-                    "underlying_price": underlying_price,
-                    "pnl": pnl,
-                    "delta": greeks["delta"],
-                    "gamma": greeks["gamma"],
-                    "vega": greeks["vega"],
-                    "theta": greeks["theta"],
+                    "roll_date": day_labels[end[i]],
+                    "old_expiry": schedule["expiry_date"].iat[i],
+                    "new_expiry": schedule["expiry_date"].iat[i + 1],
+                    "old_strike": float(schedule["strike"].iat[i]),
+                    "new_strike": float(schedule["strike"].iat[i + 1]),
+                    "exit_pnl": float(weight[i] * (exit_value - entry_value[i])),
+                    "old_premium": float(entry_value[i]),
+                    "new_premium": float(new_premium),
+                    "roll_cost": float(weight[i] * (new_premium - exit_value)),
                 }
             )
+        self.roller.roll_history.extend(rolls)
 
-        # Calculate summary metrics
-        pnls = [r["pnl"] for r in results]
+        priced = ~np.isnan(market[:, seg_col]) & (day >= start) & (day <= end)
+        held = (day >= start) & (day <= end)
+        results = pd.DataFrame(
+            {"date": day_labels, "underlying_price": spot, "pnl": pnl, **portfolio}
+        ).to_dict("records")
+        daily = np.diff(pnl, prepend=0.0)
 
         return {
             "daily_results": results,
-            "roll_history": self.roller.roll_history,
+            "roll_history": rolls,
             "summary": {
-                "total_pnl": sum(pnls),
-                "avg_daily_pnl": np.mean(pnls),
-                "max_pnl": max(pnls),
-                "min_pnl": min(pnls),
+                "total_pnl": float(pnl[-1]),
+                "avg_daily_pnl": float(daily.mean()),
+                "max_pnl": float(pnl.max()),
+                "min_pnl": float(pnl.min()),
                 "sharpe_ratio": (
-                    np.mean(pnls) / np.std(pnls) * np.sqrt(252)
-                    if np.std(pnls) > 0
-                    else 0
-                ),
-                "num_rolls": len(self.roller.roll_history),
-                "total_roll_cost": sum(
-                    r["roll_cost"] for r in self.roller.roll_history
+                    float(daily.mean() / daily.std() * np.sqrt(252)) if daily.std() > 0 else 0
                 ),
+                "num_rolls": len(rolls),
+                "total_roll_cost": float(sum(r["roll_cost"] for r in rolls)),
+                "market_priced_pct": float(priced.sum() / max(held.sum(), 1) * 100),
             },
         }
 
@@ -9,6 +9,7 @@ import logging
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import json
+import time
 import uuid
 
 from backend.core.risk.manager import RiskManager
@@ -18,6 +19,23 @@ from backend.data.database.database_validator import DatabaseValidator
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default cost model (shared with the event-driven backtester)
+COMMISSION_PER_TRADE = 20
+COMMISSION_PERCENTAGE = 0.0003
+SLIPPAGE = 0.0005
+
+
+def calculate_commission(trade_value: float, per_trade: float, percentage: float) -> float:
+    """Flat fee per trade plus a percentage of traded value"""
+    return per_trade + trade_value * percentage
+
+
+def market_fill_price(price: float, transaction_type: str, slippage: float) -> float:
+    """Market order price after flat slippage: buys pay up, sells give up"""
+    if transaction_type == "BUY":
+        return price * (1 + slippage)
+    return price * (1 - slippage)
+
 
 class OrderStatus:
     """Order status constants"""
@@ -48,15 +66,20 @@ class PaperTradingSystem:
         self,
         db_path: str = "market_data.db",
         starting_capital: float = 100000,
-        commission_per_trade: float = 20,
-        commission_percentage: float = 0.0003,
-        slippage: float = 0.0005,
+        commission_per_trade: float = COMMISSION_PER_TRADE,
+        commission_percentage: float = COMMISSION_PERCENTAGE,
+        slippage: float = SLIPPAGE,
+        order_book: Optional[Any] = None,
+        depth_max_age_seconds: float = 10.0,
     ):
         self.db_path = db_path
         self.starting_capital = starting_capital
         self.commission_per_trade = commission_per_trade
         self.commission_percentage = commission_percentage
         self.slippage = slippage
+        # Live depth (OrderBookManager); market orders walk the book when fresh
+        self.order_book = order_book
+        self.depth_max_age_seconds = depth_max_age_seconds
 
         self.risk_manager = RiskManager(db_path=db_path)
         self.analytics = PerformanceAnalytics(db_path=db_path)
@@ -276,7 +299,11 @@ class PaperTradingSystem:
             current_price = self._get_current_price(symbol)
 
             if order_type == "MARKET":
-                required_funds = quantity * current_price * (1 + self.slippage)
+                estimate = self.estimate_slippage(symbol, "BUY", quantity)
+                if estimate:
+                    required_funds = quantity * estimate["execution_price"]
+                else:
+                    required_funds = quantity * market_fill_price(current_price, "BUY", self.slippage)
             else:
                 required_funds = quantity * price
 
@@ -372,12 +399,13 @@ class PaperTradingSystem:
         # Get current market price
         current_price = self._get_current_price(symbol)
 
-        # Apply slippage for market orders
-        if order_type == "MARKET":
-            if transaction_type == "BUY":
-                execution_price = current_price * (1 + self.slippage)
-            else:
-                execution_price = current_price * (1 - self.slippage)
+        # Market orders walk the live book when available, else flat slippage
+        estimate = self.estimate_slippage(symbol, transaction_type, quantity) if order_type == "MARKET" else None
+        if estimate:
+            execution_price = estimate["execution_price"]
+            current_price = estimate["mid"] or current_price
+        elif order_type == "MARKET":
+            execution_price = market_fill_price(current_price, transaction_type, self.slippage)
         else:
             execution_price = limit_price
 
@@ -472,6 +500,49 @@ class PaperTradingSystem:
 
         return True
 
+    def estimate_slippage(
+        self, symbol: str, transaction_type: str, quantity: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fill estimate for a market order from live market depth.
+
+        Walks the visible book; any quantity beyond it is priced at the
+        worst visible level plus the flat slippage. Returns None when there
+        is no order book or its depth is stale.
+        """
+        if self.order_book is None:
+            return None
+        book = self.order_book.get_book(symbol)
+        if book is None:
+            instrument_key = self._get_instrument_key(symbol)
+            book = self.order_book.get_book(instrument_key) if instrument_key else None
+        if book is None or time.time() - book.updated_at > self.depth_max_age_seconds:
+            return None
+
+        fill = book.estimate_fill(transaction_type, quantity)
+        if not fill["filled"]:
+            return None
+        sign = 1 if transaction_type == "BUY" else -1
+        value = fill["avg_price"] * fill["filled"]
+        if fill["unfilled"]:
+            value += fill["unfilled"] * fill["worst_price"] * (1 + sign * self.slippage)
+        fill["execution_price"] = value / quantity
+        fill["mid"] = book.mid
+        return fill
+
+    def _get_instrument_key(self, symbol: str) -> Optional[str]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute(
+                "SELECT instrument_key FROM exchange_listings WHERE symbol = ? OR trading_symbol = ? LIMIT 1",
+                (symbol, symbol),
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        finally:
+            conn.close()
+        return row[0] if row else None
+
     def _get_current_price(self, symbol: str) -> float:
         """Get current market price for a symbol"""
         conn = sqlite3.connect(self.db_path)
@@ -500,9 +571,7 @@ class PaperTradingSystem:
 
     def _calculate_commission(self, trade_value: float) -> float:
         """Calculate trading commission"""
-        percentage_commission = trade_value * self.commission_percentage
-        total_commission = self.commission_per_trade + percentage_commission
-        return total_commission
+        return calculate_commission(trade_value, self.commission_per_trade, self.commission_percentage)
 
     def _get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
         """Get current position for a symbol"""
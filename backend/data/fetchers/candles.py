@@ -238,6 +238,37 @@ class CandleFetcherV3(OptionalAuthHeadersMixin):
         # Return latest N candles
         return candles[-count:] if len(candles) > count else candles
 
+    def fetch_intraday_candles(
+        self,
+        instrument_key: str,
+        interval: str = "1minute",
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch today's candles from the intraday endpoint.
+
+        Not cached: the current day's candles keep changing while the market
+        is open. Raises RateLimitError on 429 so callers can back off.
+
+        Args:
+            instrument_key: Instrument key
+            interval: '1minute' or '30minute'
+
+        Returns:
+            List of candle dictionaries, oldest first
+        """
+        url = f"{self.BASE_URL}{self.CANDLES_V2}/intraday/{instrument_key}/{interval}"
+        response = self.session.get(url, headers=self._get_headers(), timeout=30)
+
+        if response.status_code == 429:
+            raise RateLimitError("Rate limit exceeded")
+        if response.status_code != 200:
+            logger.error(f"Intraday candles failed: {response.status_code}")
+            return []
+
+        candles = response.json().get("data", {}).get("candles", [])
+        # API returns newest first
+        return list(reversed(self._process_candles(candles)))
+
     def _process_candles(self, candles: List[Any]) -> List[Dict[str, Any]]:
         """Process raw candle data into standardized format"""
         processed = []
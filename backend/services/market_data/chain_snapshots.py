@@ -0,0 +1,545 @@
+"""
+Option Chain Snapshot Store - Intraday chain history for replay and OI analysis
+
+Chains are captured at a fixed cadence and written to compact per-day files
+outside market_data.db:
+
+    data/chain_snapshots/<YYYY-MM-DD>/<SYMBOL>_<EXPIRY>.ocs
+
+Each file is a sequence of records. A record holds one snapshot as a
+column-major int64 matrix (prices in paise, IV/delta in 1e-4 units, OI and
+volume as-is) compressed with zlib. Keyframes store the full matrix plus the
+strike grid; delta records store only the element-wise difference from the
+previous snapshot, which is mostly zeros between 5s captures and compresses
+to a few hundred bytes. A keyframe is forced every KEYFRAME_INTERVAL records
+and whenever the strike grid changes, which bounds replay cost.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = b"OCS1"
+
+# ts_ms, spot, kind, n_strikes, raw_len, comp_len
+RECORD_HEADER = struct.Struct("<qdBIII")
+
+KIND_KEYFRAME = 0
+KIND_DELTA = 1
+
+# One keyframe every 10 minutes at 5s cadence
+KEYFRAME_INTERVAL = 120
+
+# Per-side fields and their fixed-point scale
+SNAPSHOT_FIELDS = (
+    ("ltp", 100),
+    ("bid", 100),
+    ("ask", 100),
+    ("oi", 1),
+    ("volume", 1),
+    ("iv", 10000),
+    ("delta", 10000),
+)
+SIDES = ("call", "put")
+COLUMNS = tuple(f"{side}_{field}" for side in SIDES for field, _ in SNAPSHOT_FIELDS)
+COLUMN_SCALES = np.array(
+    [scale for _ in SIDES for _, scale in SNAPSHOT_FIELDS], dtype=np.float64
+)
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+# Marker for missing values (None/NaN) in the fixed-point matrix
+MISSING = np.int64(-(2**62))
+
+STRIKE_SCALE = 100
+
+TimestampLike = Union[datetime, float, int]
+
+
+def _to_epoch_ms(ts: TimestampLike) -> int:
+    if isinstance(ts, datetime):
+        return int(ts.timestamp() * 1000)
+    return int(float(ts) * 1000)
+
+
+def encode_chain(chain: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize a processed chain into (strikes, matrix).
+
+    Returns:
+        strikes: int64 strike grid in paise, ascending
+        matrix: int64 array of shape (len(COLUMNS), n_strikes)
+    """
+    rows = sorted(chain.get("strikes") or [], key=lambda r: r.get("strike") or 0)
+    n = len(rows)
+
+    values = np.full((len(COLUMNS), n), np.nan, dtype=np.float64)
+    strikes = np.empty(n, dtype=np.float64)
+    for j, row in enumerate(rows):
+        strikes[j] = row.get("strike") or 0.0
+        for side in SIDES:
+            leg = row.get(side) or {}
+            for field, _ in SNAPSHOT_FIELDS:
+                value = leg.get(field)
+                if value is not None:
+                    values[COLUMN_INDEX[f"{side}_{field}"], j] = value
+
+    missing = ~np.isfinite(values)
+    matrix = np.rint(np.where(missing, 0.0, values) * COLUMN_SCALES[:, None]).astype(
+        np.int64
+    )
+    matrix[missing] = MISSING
+    return np.rint(strikes * STRIKE_SCALE).astype(np.int64), matrix
+
+
+def decode_matrix(matrix: np.ndarray) -> np.ndarray:
+    """Convert a fixed-point matrix back to floats with NaN for missing values"""
+    values = matrix.astype(np.float64) / COLUMN_SCALES[:, None]
+    values[matrix == MISSING] = np.nan
+    return values
+
+
+def _matrix_to_chain(
+    strikes: np.ndarray, matrix: np.ndarray
+) -> List[Dict[str, Any]]:
+    values = decode_matrix(matrix)
+    rows = []
+    for j, strike in enumerate(strikes / STRIKE_SCALE):
+        row = {"strike": float(strike)}
+        for side in SIDES:
+            leg = {}
+            for field, _ in SNAPSHOT_FIELDS:
+                value = values[COLUMN_INDEX[f"{side}_{field}"], j]
+                leg[field] = None if np.isnan(value) else float(value)
+            row[side] = leg
+        rows.append(row)
+    return rows
+
+
+class _FileIndex:
+    """Record offsets/timestamps for one snapshot file, extended incrementally"""
+
+    def __init__(self):
+        self.scanned_to = len(FILE_MAGIC)
+        self.offsets: List[int] = []
+        self.timestamps: List[int] = []
+        self.kinds: List[int] = []
+        self.spots: List[float] = []
+
+    def refresh(self, path: Path) -> None:
+        size = path.stat().st_size
+        if size <= self.scanned_to:
+            return
+        with open(path, "rb") as f:
+            f.seek(self.scanned_to)
+            pos = self.scanned_to
+            while pos + RECORD_HEADER.size <= size:
+                header = f.read(RECORD_HEADER.size)
+                ts_ms, spot, kind, _, _, comp_len = RECORD_HEADER.unpack(header)
+                end = pos + RECORD_HEADER.size + comp_len
+                if end > size:
+                    break  # Partially written record
+                self.offsets.append(pos)
+                self.timestamps.append(ts_ms)
+                self.kinds.append(kind)
+                self.spots.append(spot)
+                f.seek(comp_len, os.SEEK_CUR)
+                pos = end
+        self.scanned_to = pos
+
+
+class ChainSnapshotStore:
+    """Delta-encoded columnar option chain snapshots, one file per day/expiry"""
+
+    def __init__(
+        self,
+        base_dir: str = "data/chain_snapshots",
+        keyframe_interval: int = KEYFRAME_INTERVAL,
+        compression_level: int = 6,
+    ):
+        self.base_dir = Path(base_dir)
+        self.keyframe_interval = keyframe_interval
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        # path -> (strikes, matrix, records since keyframe)
+        self._writers: Dict[Path, Tuple[np.ndarray, np.ndarray, int]] = {}
+        self._indexes: Dict[Path, _FileIndex] = {}
+
+    # ------------------------------------------------------------------ paths
+
+    def _path(self, symbol: str, expiry_date: str, day: date) -> Path:
+        return self.base_dir / day.isoformat() / f"{symbol.upper()}_{expiry_date}.ocs"
+
+    def list_expiries(self, symbol: str, day: date) -> List[str]:
+        """Expiries recorded for a symbol on a given day"""
+        day_dir = self.base_dir / day.isoformat()
+        prefix = f"{symbol.upper()}_"
+        if not day_dir.exists():
+            return []
+        return sorted(
+            p.stem[len(prefix):] for p in day_dir.glob(f"{prefix}*.ocs")
+        )
+
+    # ---------------------------------------------------------------- writing
+
+    def append(self, chain: Dict[str, Any], ts: Optional[TimestampLike] = None) -> int:
+        """
+        Append one processed chain snapshot.
+
+        Args:
+            chain: Output of OptionsChainService.get_option_chain
+            ts: Capture time (defaults to now)
+
+        Returns:
+            Bytes written
+        """
+        if not chain or not chain.get("strikes"):
+            return 0
+
+        ts_ms = _to_epoch_ms(ts if ts is not None else time.time())
+        day = datetime.fromtimestamp(ts_ms / 1000).date()
+        symbol = chain.get("symbol") or "UNKNOWN"
+        expiry = chain.get("expiry_date") or "NA"
+        spot = float(chain.get("underlying_price") or 0.0)
+
+        strikes, matrix = encode_chain(chain)
+        path = self._path(symbol, expiry, day)
+
+        with self._lock:
+            previous = self._writers.get(path)
+            if (
+                previous is not None
+                and previous[2] < self.keyframe_interval
+                and np.array_equal(previous[0], strikes)
+            ):
+                kind = KIND_DELTA
+                payload = (matrix - previous[1]).tobytes()
+                since_key = previous[2] + 1
+            else:
+                kind = KIND_KEYFRAME
+                payload = strikes.tobytes() + matrix.tobytes()
+                since_key = 1
+
+            compressed = zlib.compress(payload, self.compression_level)
+            header = RECORD_HEADER.pack(
+                ts_ms, spot, kind, strikes.size, len(payload), len(compressed)
+            )
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not path.exists()
+            with open(path, "ab") as f:
+                if new_file:
+                    f.write(FILE_MAGIC)
+                f.write(header)
+                f.write(compressed)
+
+            self._writers[path] = (strikes, matrix, since_key)
+
+        return len(header) + len(compressed)
+
+    # ---------------------------------------------------------------- reading
+
+    def _index(self, path: Path) -> Optional[_FileIndex]:
+        if not path.exists():
+            return None
+        with self._lock:
+            index = self._indexes.setdefault(path, _FileIndex())
+            index.refresh(path)
+            return index
+
+    @staticmethod
+    def _read_payload(f, offset: int) -> Tuple[int, int, np.ndarray]:
+        f.seek(offset)
+        _, _, kind, n, _, comp_len = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+        data = np.frombuffer(zlib.decompress(f.read(comp_len)), dtype=np.int64)
+        return kind, n, data
+
+    def _decode_range(
+        self, path: Path, index: _FileIndex, start: int, stop: int
+    ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Decode records [start, stop) into segments of identical strike grid.
+
+        Returns:
+            List of (record_positions, strikes, matrices[k, cols, strikes])
+        """
+        # Rewind to the keyframe that the first record depends on
+        first = start
+        while first > 0 and index.kinds[first] != KIND_KEYFRAME:
+            first -= 1
+
+        n_cols = len(COLUMNS)
+        segments = []
+        with open(path, "rb") as f:
+            pos = first
+            while pos < stop:
+                kind, n, data = self._read_payload(f, index.offsets[pos])
+                strikes = data[:n]
+                base = data[n:].reshape(n_cols, n)
+
+                seg_end = pos + 1
+                while seg_end < stop and index.kinds[seg_end] == KIND_DELTA:
+                    seg_end += 1
+
+                frames = np.empty((seg_end - pos, n_cols, n), dtype=np.int64)
+                frames[0] = base
+                for k in range(pos + 1, seg_end):
+                    _, _, delta = self._read_payload(f, index.offsets[k])
+                    frames[k - pos] = delta.reshape(n_cols, n)
+                np.cumsum(frames, axis=0, out=frames)
+
+                positions = np.arange(pos, seg_end)
+                keep = positions >= start
+                segments.append((positions[keep], strikes, frames[keep]))
+                pos = seg_end
+        return segments
+
+    def get_chain_at(
+        self, symbol: str, expiry_date: str, ts: TimestampLike
+    ) -> Dict[str, Any]:
+        """
+        Reconstruct the chain as it was at (or just before) a timestamp.
+
+        Returns:
+            Processed-chain dict with an extra 'snapshot_ts', or {} if none
+        """
+        ts_ms = _to_epoch_ms(ts)
+        day = datetime.fromtimestamp(ts_ms / 1000).date()
+        path = self._path(symbol, expiry_date, day)
+        index = self._index(path)
+        if index is None or not index.timestamps:
+            return {}
+
+        pos = int(np.searchsorted(index.timestamps, ts_ms, side="right")) - 1
+        if pos < 0:
+            return {}
+
+        positions, strikes, frames = self._decode_range(path, index, pos, pos + 1)[-1]
+        snapshot_ts = index.timestamps[pos] / 1000
+        return {
+            "symbol": symbol.upper(),
+            "expiry_date": expiry_date,
+            "underlying_price": index.spots[pos],
+            "timestamp": datetime.fromtimestamp(snapshot_ts).isoformat(),
+            "snapshot_ts": snapshot_ts,
+            "strikes": _matrix_to_chain(strikes, frames[-1]),
+        }
+
+    def get_oi_series(
+        self,
+        symbol: str,
+        expiry_date: str,
+        strike: float,
+        day: Optional[date] = None,
+        start: Optional[TimestampLike] = None,
+        end: Optional[TimestampLike] = None,
+    ) -> Dict[str, Any]:
+        """
+        Call/put OI time series for one strike over a trading day.
+
+        Returns:
+            {'timestamps': [...], 'call_oi': [...], 'put_oi': [...], 'spot': [...]}
+            with None where the strike was absent or OI missing.
+        """
+        if day is None:
+            day = datetime.fromtimestamp(_to_epoch_ms(start) / 1000).date() if start else date.today()
+
+        result = {
+            "symbol": symbol.upper(),
+            "expiry_date": expiry_date,
+            "strike": float(strike),
+            "timestamps": [],
+            "call_oi": [],
+            "put_oi": [],
+            "spot": [],
+        }
+
+        path = self._path(symbol, expiry_date, day)
+        index = self._index(path)
+        if index is None or not index.timestamps:
+            return result
+
+        times = np.asarray(index.timestamps)
+        lo = int(np.searchsorted(times, _to_epoch_ms(start), side="left")) if start else 0
+        hi = int(np.searchsorted(times, _to_epoch_ms(end), side="right")) if end else len(times)
+        if lo >= hi:
+            return result
+
+        target = int(round(strike * STRIKE_SCALE))
+        call_col, put_col = COLUMN_INDEX["call_oi"], COLUMN_INDEX["put_oi"]
+        call_oi = np.full(hi - lo, np.nan)
+        put_oi = np.full(hi - lo, np.nan)
+
+        for positions, strikes, frames in self._decode_range(path, index, lo, hi):
+            j = int(np.searchsorted(strikes, target))
+            if j >= strikes.size or strikes[j] != target:
+                continue
+            calls = frames[:, call_col, j]
+            puts = frames[:, put_col, j]
+            call_oi[positions - lo] = np.where(calls == MISSING, np.nan, calls)
+            put_oi[positions - lo] = np.where(puts == MISSING, np.nan, puts)
+
+        def as_list(values: np.ndarray) -> List[Optional[float]]:
+            return [None if np.isnan(v) else float(v) for v in values]
+
+        result.update(
+            timestamps=[
+                datetime.fromtimestamp(t / 1000).isoformat() for t in times[lo:hi]
+            ],
+            call_oi=as_list(call_oi),
+            put_oi=as_list(put_oi),
+            spot=[float(s) for s in index.spots[lo:hi]],
+        )
+        return result
+
+    def storage_stats(self, day: Optional[date] = None) -> Dict[str, Any]:
+        """File count and bytes on disk for a day (or all days)"""
+        root = self.base_dir / day.isoformat() if day else self.base_dir
+        files = list(root.rglob("*.ocs")) if root.exists() else []
+        return {
+            "files": len(files),
+            "bytes": sum(p.stat().st_size for p in files),
+        }
+
+
+class ChainSnapshotRecorder:
+    """Background thread that captures configured chains at a fixed cadence"""
+
+    def __init__(
+        self,
+        symbols: Optional[List[str]] = None,
+        interval_seconds: float = 5.0,
+        store: Optional[ChainSnapshotStore] = None,
+        service=None,
+        record_when_closed: bool = False,
+    ):
+        if service is None:
+            from backend.services.market_data.options_chain import OptionsChainService
+
+            service = OptionsChainService()
+
+        self.symbols = [s.upper() for s in (symbols or ["NIFTY", "BANKNIFTY"])]
+        self.interval_seconds = interval_seconds
+        self.store = store or ChainSnapshotStore()
+        self.service = service
+        self.record_when_closed = record_when_closed
+
+        self.snapshots_written = 0
+        self.bytes_written = 0
+        self.errors = 0
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_once(self) -> int:
+        """Capture every configured symbol once; returns snapshots written"""
+        written = 0
+        ts = time.time()
+        for symbol in self.symbols:
+            try:
+                chain = self.service.get_option_chain(symbol)
+                size = self.store.append(chain, ts=ts)
+                if size:
+                    written += 1
+                    self.bytes_written += size
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"[SNAPSHOT] Failed to record {symbol}: {e}")
+        self.snapshots_written += written
+        return written
+
+    def _run(self) -> None:
+        logger.info(
+            f"[SNAPSHOT] Recording {self.symbols} every {self.interval_seconds}s"
+        )
+        next_run = time.monotonic()
+        while not self._stop_event.is_set():
+            market_open, _ = self.service.is_market_open()
+            if market_open or self.record_when_closed:
+                self.record_once()
+
+            # Schedule against a fixed grid so slow fetches don't drift the cadence
+            next_run += self.interval_seconds
+            delay = next_run - time.monotonic()
+            if delay < 0:
+                next_run = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="chain-snapshot-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        logger.info(
+            f"[SNAPSHOT] Stopped: {self.snapshots_written} snapshots, "
+            f"{self.bytes_written / 1024:.1f} KB"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": self.symbols,
+            "interval_seconds": self.interval_seconds,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "snapshots_written": self.snapshots_written,
+            "bytes_written": self.bytes_written,
+            "errors": self.errors,
+        }
+
+
+_default_store: Optional[ChainSnapshotStore] = None
+
+
+def get_chain_snapshot_store(base_dir: str = "data/chain_snapshots") -> ChainSnapshotStore:
+    """Get or create the process-wide snapshot store (shares file indexes)"""
+    global _default_store
+
+    if _default_store is None or _default_store.base_dir != Path(base_dir):
+        _default_store = ChainSnapshotStore(base_dir=base_dir)
+    return _default_store
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record intraday option chain snapshots")
+    parser.add_argument("--symbols", default="NIFTY,BANKNIFTY", help="Comma-separated underlyings")
+    parser.add_argument("--interval", type=float, default=5.0, help="Capture cadence in seconds")
+    parser.add_argument("--base-dir", default="data/chain_snapshots", help="Snapshot directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    recorder = ChainSnapshotRecorder(
+        symbols=args.symbols.split(","),
+        interval_seconds=args.interval,
+        store=ChainSnapshotStore(base_dir=args.base_dir),
+    )
+    recorder.start()
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(f"[SNAPSHOT] {recorder.get_stats()}")
+    except KeyboardInterrupt:
+        recorder.stop()
+
+
+if __name__ == "__main__":
+    main()
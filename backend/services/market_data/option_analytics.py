@@ -0,0 +1,206 @@
+"""
+Option Chain Analytics - Vectorized OI / PCR / Max Pain / IV skew
+Operates on NumPy strike arrays built from processed option chains
+
+All functions accept the standardized chain format produced by
+OptionsChainService._process_upstox_response:
+    {'underlying_price': float, 'strikes': [{'strike', 'call': {...}, 'put': {...}}]}
+"""
+
+import logging
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Columns extracted from each side of a strike row
+CHAIN_FIELDS = ("ltp", "oi", "volume", "iv")
+
+# Moneyness used for wing IVs when measuring skew (5% OTM)
+SKEW_WING_PCT = 0.05
+
+
+def chain_to_arrays(chain: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Convert a processed option chain into aligned NumPy arrays.
+
+    Args:
+        chain: Processed chain with a 'strikes' list
+
+    Returns:
+        Dict with 'strike' plus call_<field>/put_<field> float arrays.
+        Missing values are NaN for ltp/iv and 0 for oi/volume.
+    """
+    rows = chain.get("strikes") or []
+    n = len(rows)
+
+    arrays = {"strike": np.empty(n, dtype=np.float64)}
+    for side in ("call", "put"):
+        for field in CHAIN_FIELDS:
+            arrays[f"{side}_{field}"] = np.empty(n, dtype=np.float64)
+
+    for i, row in enumerate(rows):
+        arrays["strike"][i] = row.get("strike") or 0.0
+        for side in ("call", "put"):
+            leg = row.get(side) or {}
+            for field in CHAIN_FIELDS:
+                value = leg.get(field)
+                arrays[f"{side}_{field}"][i] = np.nan if value is None else value
+
+    for side in ("call", "put"):
+        for field in ("oi", "volume"):
+            np.nan_to_num(arrays[f"{side}_{field}"], copy=False, nan=0.0)
+
+    order = np.argsort(arrays["strike"], kind="stable")
+    return {key: values[order] for key, values in arrays.items()}
+
+
+def _safe_ratio(numerator: float, denominator: float) -> Optional[float]:
+    return round(float(numerator / denominator), 4) if denominator > 0 else None
+
+
+def compute_pcr(arrays: Dict[str, np.ndarray]) -> Dict[str, Optional[float]]:
+    """Put/Call ratio by open interest and by volume"""
+    return {
+        "pcr_oi": _safe_ratio(arrays["put_oi"].sum(), arrays["call_oi"].sum()),
+        "pcr_volume": _safe_ratio(
+            arrays["put_volume"].sum(), arrays["call_volume"].sum()
+        ),
+    }
+
+
+def compute_max_pain(
+    strikes: np.ndarray, call_oi: np.ndarray, put_oi: np.ndarray
+) -> Optional[float]:
+    """
+    Strike at which option writers pay out the least at expiry.
+
+    Evaluates the total intrinsic payout for every candidate settlement
+    strike at once: payout[k] = sum_i call_oi[i] * max(K_k - K_i, 0)
+                               + put_oi[i]  * max(K_i - K_k, 0)
+    """
+    if strikes.size == 0:
+        return None
+
+    diff = strikes[:, None] - strikes[None, :]  # settlement x contract strike
+    payout = np.maximum(diff, 0.0) @ call_oi + np.maximum(-diff, 0.0) @ put_oi
+    return float(strikes[int(np.argmin(payout))])
+
+
+def compute_oi_walls(
+    strikes: np.ndarray, oi: np.ndarray, top_n: int = 3
+) -> List[Dict[str, float]]:
+    """Strikes with the highest open interest, largest first"""
+    if strikes.size == 0:
+        return []
+
+    top_n = min(top_n, strikes.size)
+    idx = np.argpartition(-oi, top_n - 1)[:top_n]
+    idx = idx[np.argsort(-oi[idx], kind="stable")]
+    return [
+        {"strike": float(strikes[i]), "oi": float(oi[i])} for i in idx if oi[i] > 0
+    ]
+
+
+def compute_iv_skew(
+    strikes: np.ndarray,
+    call_iv: np.ndarray,
+    put_iv: np.ndarray,
+    spot: float,
+    wing_pct: float = SKEW_WING_PCT,
+) -> Dict[str, Optional[float]]:
+    """
+    ATM IV and put-minus-call wing skew, interpolated on OTM strikes.
+
+    Uses OTM puts below spot and OTM calls above spot, which is how the
+    smile is normally read off an index chain.
+    """
+    result = {"atm_iv": None, "put_wing_iv": None, "call_wing_iv": None, "skew": None}
+    if strikes.size == 0 or not spot:
+        return result
+
+    otm_iv = np.where(strikes < spot, put_iv, call_iv)
+    valid = np.isfinite(otm_iv) & (otm_iv > 0)
+    if valid.sum() < 2:
+        return result
+
+    k, iv = strikes[valid], otm_iv[valid]
+    atm, put_wing, call_wing = np.interp(
+        [spot, spot * (1 - wing_pct), spot * (1 + wing_pct)], k, iv
+    )
+
+    result.update(
+        atm_iv=round(float(atm), 4),
+        put_wing_iv=round(float(put_wing), 4),
+        call_wing_iv=round(float(call_wing), 4),
+        skew=round(float(put_wing - call_wing), 4),
+    )
+    return result
+
+
+def analyze_arrays(arrays: Dict[str, np.ndarray], spot: float) -> Dict[str, Any]:
+    """Run all chain analytics over pre-built strike arrays"""
+    strikes = arrays["strike"]
+    return {
+        **compute_pcr(arrays),
+        "total_call_oi": float(arrays["call_oi"].sum()),
+        "total_put_oi": float(arrays["put_oi"].sum()),
+        "max_pain": compute_max_pain(strikes, arrays["call_oi"], arrays["put_oi"]),
+        "call_oi_walls": compute_oi_walls(strikes, arrays["call_oi"]),
+        "put_oi_walls": compute_oi_walls(strikes, arrays["put_oi"]),
+        "iv_skew": compute_iv_skew(
+            strikes, arrays["call_iv"], arrays["put_iv"], spot
+        ),
+        "strike_count": int(strikes.size),
+    }
+
+
+def analyze_chain(chain: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute per-expiry analytics for one processed chain"""
+    arrays = chain_to_arrays(chain)
+    return analyze_arrays(arrays, chain.get("underlying_price") or 0.0)
+
+
+def aggregate_chains(chains: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine several expiries of the same underlying into one analytics view.
+
+    OI and volume are summed per strike across expiries (strike union), so
+    max pain and OI walls reflect the total positioning. IV skew is taken
+    from the nearest expiry (earliest expiry_date, whatever the input
+    order), since mixing tenors would blur the smile.
+    """
+    chains = [c for c in chains if c and c.get("strikes")]
+    if not chains:
+        return {}
+
+    per_chain = [chain_to_arrays(c) for c in chains]
+    all_strikes = np.concatenate([a["strike"] for a in per_chain])
+    strikes, inverse = np.unique(all_strikes, return_inverse=True)
+
+    combined = {"strike": strikes}
+    for side in ("call", "put"):
+        for field in ("oi", "volume"):
+            values = np.concatenate([a[f"{side}_{field}"] for a in per_chain])
+            combined[f"{side}_{field}"] = np.bincount(
+                inverse, weights=values, minlength=strikes.size
+            )
+
+    near = min(range(len(chains)), key=lambda i: chains[i].get("expiry_date") or "9999-12-31")
+    spot = chains[near].get("underlying_price") or 0.0
+    nearest = per_chain[near]
+
+    return {
+        **compute_pcr(combined),
+        "total_call_oi": float(combined["call_oi"].sum()),
+        "total_put_oi": float(combined["put_oi"].sum()),
+        "max_pain": compute_max_pain(strikes, combined["call_oi"], combined["put_oi"]),
+        "call_oi_walls": compute_oi_walls(strikes, combined["call_oi"]),
+        "put_oi_walls": compute_oi_walls(strikes, combined["put_oi"]),
+        "iv_skew": compute_iv_skew(
+            nearest["strike"], nearest["call_iv"], nearest["put_iv"], spot
+        ),
+        "expiry_count": len(chains),
+        "strike_count": int(strikes.size),
+    }
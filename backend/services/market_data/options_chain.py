@@ -7,6 +7,10 @@ import logging
 import requests
 import sys
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta, time as dt_time
 from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
@@ -14,6 +18,7 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from backend.utils.auth.manager import AuthManager
 from backend.utils.auth.headers import build_bearer_headers
+from backend.services.market_data.option_analytics import analyze_chain, aggregate_chains
 
 # Configure logging
 logging.basicConfig(
@@ -30,12 +35,37 @@ Path("logs").mkdir(exist_ok=True)
 class OptionsChainService:
     """Service for fetching and processing options chain data from Upstox"""
 
+    # Multi-expiry fetch settings
+    MAX_CONCURRENT_EXPIRIES = 8
+    CHAIN_CACHE_TTL_SECONDS = 5  # Matches the websocket server refresh interval
+
+    # Shared across instances: API routes create a service per request
+    _shared_session: Optional[requests.Session] = None
+    _chain_cache: Dict[Tuple, Tuple[float, Dict]] = {}
+    _class_lock = threading.Lock()
+
     def __init__(self, db_path: str = "market_data.db"):
         self.db_path = db_path
         self.base_url = "https://api.upstox.com/v2"
         self.auth_manager = AuthManager(db_path=db_path)
+        self.session = self._get_shared_session()
         logger.info(f"Initialized OptionsChainService with db={db_path}")
 
+    @classmethod
+    def _get_shared_session(cls) -> requests.Session:
+        """Shared keep-alive session sized for concurrent expiry fetches"""
+        with cls._class_lock:
+            if cls._shared_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=cls.MAX_CONCURRENT_EXPIRIES,
+                    pool_maxsize=cls.MAX_CONCURRENT_EXPIRIES,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                cls._shared_session = session
+            return cls._shared_session
+
     def get_expiry_dates(self, instrument_key: str) -> List[str]:
         """
         Fetch available expiry dates for an instrument.
@@ -489,7 +519,7 @@ class OptionsChainService:
                 f"[OPTIONS] API request: {self.base_url}/option/chain, params={params}"
             )
 
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/option/chain",
                 headers=headers,
                 params=params,
@@ -575,6 +605,141 @@ class OptionsChainService:
             return self._mock_option_chain(symbol, expiry_date, market_open)
         """
 
+    def get_multi_expiry_chain(
+        self,
+        symbol: str,
+        expiry_dates: Optional[List[str]] = None,
+        num_expiries: int = 3,
+        include_strikes: bool = True,
+    ) -> Dict:
+        """
+        Fetch several expiries concurrently and compute chain analytics.
+
+        Args:
+            symbol: Underlying symbol (e.g., 'NIFTY')
+            expiry_dates: Explicit expiries (YYYY-MM-DD); nearest ones from DB if omitted
+            num_expiries: Number of nearest expiries to fetch when none are given
+            include_strikes: Include full strike rows per expiry (False for summary views)
+
+        Returns:
+            {
+                'symbol': str,
+                'underlying_price': float,
+                'timestamp': str,
+                'market_open': bool,
+                'expiries': [{'expiry_date', 'analytics', 'strikes'?}],
+                'aggregate': {...},
+                'fetch_ms': float,
+                'cached': bool
+            }
+        """
+        if not expiry_dates:
+            expiry_dates = self.get_expiry_dates_from_db(symbol)[:num_expiries]
+        if not expiry_dates:
+            logger.warning(f"[OPTIONS] No expiry dates found for {symbol}")
+            return {}
+        expiry_dates = sorted(set(expiry_dates))  # nearest first, whatever the caller's order
+
+        cache_key = (symbol.upper(), tuple(expiry_dates))
+        cached = self._get_cached_chain(cache_key)
+        if cached is None:
+            cached = self._fetch_multi_expiry(symbol, expiry_dates)
+            if not cached:
+                return {}
+            with self._class_lock:
+                self._chain_cache[cache_key] = (time.time(), cached)
+            result = dict(cached, cached=False)
+        else:
+            result = dict(cached, cached=True)
+
+        if not include_strikes:
+            result["expiries"] = [
+                {k: v for k, v in exp.items() if k != "strikes"}
+                for exp in result["expiries"]
+            ]
+        return result
+
+    def _get_cached_chain(self, cache_key: Tuple) -> Optional[Dict]:
+        """Return cached multi-expiry result if younger than the refresh interval"""
+        with self._class_lock:
+            entry = self._chain_cache.get(cache_key)
+            if entry is None:
+                return None
+            cached_at, data = entry
+            if time.time() - cached_at < self.CHAIN_CACHE_TTL_SECONDS:
+                return data
+            del self._chain_cache[cache_key]
+            return None
+
+    def _fetch_multi_expiry(self, symbol: str, expiry_dates: List[str]) -> Dict:
+        """Fetch and analyze all expiries in parallel over the shared session"""
+        start = time.perf_counter()
+
+        token = self.auth_manager.get_valid_token()
+        if not token:
+            logger.error("[OPTIONS] No valid Upstox token available")
+            return {}
+
+        headers = build_bearer_headers(token, include_json=True)
+        inst_key = self._get_instrument_key(symbol)
+        market_open, _ = self.is_market_open()
+
+        def fetch(expiry: str) -> Dict:
+            try:
+                response = self.session.get(
+                    f"{self.base_url}/option/chain",
+                    headers=headers,
+                    params={"instrument_key": inst_key, "expiry_date": expiry},
+                    timeout=5,
+                )
+                if response.status_code != 200:
+                    logger.warning(
+                        f"[OPTIONS] {symbol} {expiry} failed {response.status_code}"
+                    )
+                    return {}
+                return self._process_upstox_response(
+                    response.json(), symbol, market_open
+                )
+            except Exception as e:
+                logger.error(f"[OPTIONS] Error fetching {symbol} {expiry}: {e}")
+                return {}
+
+        workers = min(len(expiry_dates), self.MAX_CONCURRENT_EXPIRIES)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chains = list(executor.map(fetch, expiry_dates))
+
+        expiries = []
+        for expiry, chain in zip(expiry_dates, chains):
+            if not chain:
+                continue
+            expiries.append(
+                {
+                    "expiry_date": chain.get("expiry_date") or expiry,
+                    "analytics": analyze_chain(chain),
+                    "strikes": chain["strikes"],
+                }
+            )
+
+        if not expiries:
+            return {}
+
+        valid_chains = [c for c in chains if c]
+        fetch_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"[OPTIONS] Multi-expiry {symbol}: {len(expiries)}/{len(expiry_dates)} "
+            f"expiries in {fetch_ms:.0f}ms"
+        )
+
+        return {
+            "symbol": symbol,
+            "underlying_price": valid_chains[0].get("underlying_price", 0),
+            "timestamp": datetime.now().isoformat(),
+            "market_open": market_open,
+            "expiries": expiries,
+            "aggregate": aggregate_chains(valid_chains),
+            "fetch_ms": round(fetch_ms, 1),
+        }
+
     def _get_instrument_key(self, symbol: str) -> str:
         """
         Convert symbol to Upstox instrument key by searching the database.
@@ -38,6 +38,11 @@ from backend.utils.auth.manager import AuthManager
 from backend.utils.logging.error_handler import with_retry, RateLimitError
 from backend.data.database.database_pool import get_db_pool
 from backend.utils.auth.mixins import OptionalAuthHeadersMixin
+from backend.services.streaming.quote_store import (
+    QuoteStore,
+    flatten_market_quote,
+    load_instrument_ids,
+)
 import requests
 
 logger = logging.getLogger(__name__)
@@ -74,8 +79,8 @@ class MarketQuoteV3(OptionalAuthHeadersMixin):
         self.session = requests.Session()
         self.use_v3 = use_v3
 
-        # Multi-level cache
-        self._memory_cache: Dict[str, tuple] = {}  # (quote, timestamp)
+        # Multi-level cache (memory: compact rows indexed by instrument id)
+        self._memory_cache = QuoteStore(load_instrument_ids(db_path))
 
         self._init_database()
         logger.info(f"✅ MarketQuoteV3 initialized (v3_enabled: {use_v3})")
@@ -273,11 +278,10 @@ class MarketQuoteV3(OptionalAuthHeadersMixin):
 
     def _get_from_memory_cache(self, instrument_key: str) -> Optional[Dict[str, Any]]:
         """Get quote from memory cache"""
-        if instrument_key in self._memory_cache:
-            quote, cached_time = self._memory_cache[instrument_key]
-
+        quote = self._memory_cache.get(instrument_key)
+        if quote is not None:
             # Check staleness
-            age = (datetime.now() - cached_time).total_seconds()
+            age = time.time() - quote.updated_at
             if age < self.QUOTE_CACHE_TTL_SECONDS:
                 logger.debug(f"Memory cache hit: {instrument_key} (age: {age:.1f}s)")
                 return quote
@@ -336,8 +340,10 @@ class MarketQuoteV3(OptionalAuthHeadersMixin):
 
     def _save_to_cache(self, instrument_key: str, quote: Dict[str, Any]):
         """Save quote to both memory and database cache"""
-        # Memory cache
-        self._memory_cache[instrument_key] = (quote, datetime.now())
+        flat = flatten_market_quote(quote)
+
+        # Memory cache (updated in place)
+        self._memory_cache[instrument_key] = flat
 
         # Database cache
         try:
@@ -351,19 +357,19 @@ class MarketQuoteV3(OptionalAuthHeadersMixin):
                 """,
                     (
                         instrument_key,
-                        quote.get("ltp"),
-                        quote.get("ohlc", {}).get("open"),
-                        quote.get("ohlc", {}).get("high"),
-                        quote.get("ohlc", {}).get("low"),
-                        quote.get("ohlc", {}).get("close"),
-                        quote.get("volume"),
-                        quote.get("oi"),
-                        quote.get("depth", {}).get("buy", [{}])[0].get("price"),
-                        quote.get("depth", {}).get("sell", [{}])[0].get("price"),
-                        quote.get("depth", {}).get("buy", [{}])[0].get("quantity"),
-                        quote.get("depth", {}).get("sell", [{}])[0].get("quantity"),
-                        quote.get("upper_circuit_limit"),
-                        quote.get("lower_circuit_limit"),
+                        flat["ltp"],
+                        flat["open"],
+                        flat["high"],
+                        flat["low"],
+                        flat["close"],
+                        flat["volume"],
+                        flat["oi"],
+                        flat["bid_price"],
+                        flat["ask_price"],
+                        flat["bid_qty"],
+                        flat["ask_qty"],
+                        flat["upper_circuit"],
+                        flat["lower_circuit"],
                     ),
                 )
 
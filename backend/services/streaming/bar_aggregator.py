@@ -0,0 +1,552 @@
+"""
+Live Tick-to-Bar Aggregator
+
+Builds OHLCV bars (1s/1m/5m by default) per instrument in memory from the
+live tick feed and flushes completed bars in batches to the candle store
+used by the backtest engine (candles_new), so intraday charts and live
+strategies do not need REST candle calls during market hours.
+
+Bar rules:
+    - Bar time is the exchange last-trade time (ltt) when present, else the
+      local receive time. Buckets are aligned to IST, so 1m/5m bars start at
+      09:15, 09:20, ... exactly like exchange candles.
+    - Only ticks inside the NSE session (09:15:00-15:30:00 IST, Mon-Fri) are
+      aggregated; bars never straddle the session open or close.
+    - Volume is the delta of the cumulative day volume carried by full-mode
+      ticks; the first tick of an instrument only sets the baseline. For
+      ltpc-mode ticks (no cumulative volume) the last traded quantity is used.
+    - A bar is completed when a tick for a later bucket arrives or when the
+      wall clock passes its end (flush_due), so quiet instruments still close.
+
+Usage:
+    aggregator = BarAggregator(store=CandleBarStore("market_data.db"))
+    aggregator.attach(get_tick_bus(), universes=["NIFTY50"])
+    aggregator.start()
+    ...
+    aggregator.get_bars("NSE_EQ|INE009A01021", "1m", limit=60)
+"""
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from backend.data.database.database_pool import get_db_pool
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+IST_OFFSET_SECONDS = 19800
+
+SESSION_OPEN_SECONDS = 9 * 3600 + 15 * 60  # 09:15 IST, seconds from midnight
+SESSION_CLOSE_SECONDS = 15 * 3600 + 30 * 60  # 15:30 IST
+
+TIMEFRAMES = {"1s": 1, "1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600}
+DEFAULT_TIMEFRAMES = ("1s", "1m", "5m")
+
+
+def session_bounds(ts: float) -> Optional[Tuple[int, int]]:
+    """(open, close) epoch seconds of the NSE session containing ts, or None"""
+    local_seconds = int(ts) + IST_OFFSET_SECONDS
+    day_start = local_seconds - local_seconds % 86400
+    # 1970-01-01 was a Thursday: weekday = (days + 3) % 7, Monday = 0
+    if (day_start // 86400 + 3) % 7 >= 5:
+        return None
+    offset = local_seconds - day_start
+    if not SESSION_OPEN_SECONDS <= offset < SESSION_CLOSE_SECONDS:
+        return None
+    base = day_start - IST_OFFSET_SECONDS
+    return base + SESSION_OPEN_SECONDS, base + SESSION_CLOSE_SECONDS
+
+
+def bucket_start(ts: float, seconds: int) -> int:
+    """Start of the IST-aligned bucket containing ts"""
+    ts = int(ts)
+    return ts - (ts + IST_OFFSET_SECONDS) % seconds
+
+
+class Bar:
+    """One OHLCV bar; mutable while open"""
+
+    __slots__ = ("instrument_key", "timeframe", "start", "end", "open", "high", "low",
+                 "close", "volume", "oi", "ticks")
+
+    def __init__(self, instrument_key: str, timeframe: str, start: int, end: int, price: float):
+        self.instrument_key = instrument_key
+        self.timeframe = timeframe
+        self.start = start
+        self.end = end
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0
+        self.oi = None
+        self.ticks = 0
+
+    def update(self, price: float, volume: int, oi: Optional[int]) -> None:
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+        if oi:
+            self.oi = oi
+        self.ticks += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "instrument_key": self.instrument_key,
+            "timeframe": self.timeframe,
+            "timestamp": self.start,
+            "datetime": datetime.fromtimestamp(self.start, IST).isoformat(),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "oi": self.oi,
+            "ticks": self.ticks,
+        }
+
+    def __repr__(self) -> str:
+        return (f"Bar({self.instrument_key!r}, {self.timeframe}, {self.start}, "
+                f"o={self.open}, h={self.high}, l={self.low}, c={self.close}, v={self.volume})")
+
+
+class CandleBarStore:
+    """
+    Batched bar writer for the candles_new table read by BacktestEngine.
+
+    Rows carry the trading symbol the backtester queries by. It comes from
+    symbol_map when given, else from the instrument master
+    (exchange_listings.trading_symbol); unknown keys keep the instrument key.
+    """
+
+    def __init__(self, db_path: str = "market_data.db", symbol_map: Optional[Dict[str, str]] = None):
+        self.db_path = db_path
+        self.db_pool = get_db_pool(db_path)
+        self.symbol_map = dict(symbol_map or {})
+        self.bars_written = 0
+        self._init_database()
+
+    def _init_database(self):
+        with self.db_pool.get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS candles_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    symbol TEXT NOT NULL,
+                    instrument_key TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    open REAL NOT NULL,
+                    high REAL NOT NULL,
+                    low REAL NOT NULL,
+                    close REAL NOT NULL,
+                    volume INTEGER NOT NULL,
+                    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(instrument_key, timeframe, timestamp)
+                )
+            """
+            )
+
+    def write_bars(self, bars: List[Bar]) -> int:
+        """Upsert completed bars in one transaction; returns rows written"""
+        if not bars:
+            return 0
+        self._resolve_symbols({bar.instrument_key for bar in bars})
+        rows = [
+            (
+                self.symbol_map[bar.instrument_key],
+                bar.instrument_key,
+                bar.timeframe,
+                bar.start,
+                bar.open,
+                bar.high,
+                bar.low,
+                bar.close,
+                int(bar.volume),
+            )
+            for bar in bars
+        ]
+        with self.db_pool.get_connection() as conn:
+            conn.executemany(
+                """
+                INSERT INTO candles_new
+                (symbol, instrument_key, timeframe, timestamp, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(instrument_key, timeframe, timestamp) DO UPDATE SET
+                    symbol = excluded.symbol, open = excluded.open, high = excluded.high,
+                    low = excluded.low, close = excluded.close, volume = excluded.volume,
+                    fetched_at = CURRENT_TIMESTAMP
+            """,
+                rows,
+            )
+        self.bars_written += len(rows)
+        return len(rows)
+
+    def _resolve_symbols(self, instrument_keys: Iterable[str]) -> None:
+        """Fill symbol_map for new keys from the instrument master (once per key)"""
+        missing = [key for key in instrument_keys if key not in self.symbol_map]
+        if not missing:
+            return
+        found: Dict[str, str] = {}
+        try:
+            with self.db_pool.get_connection() as conn:
+                placeholders = ",".join("?" * len(missing))
+                for key, trading_symbol in conn.execute(
+                    f"SELECT instrument_key, trading_symbol FROM exchange_listings "
+                    f"WHERE instrument_key IN ({placeholders})",
+                    missing,
+                ):
+                    if trading_symbol:
+                        found[key] = trading_symbol
+        except Exception as e:
+            logger.warning(f"[BarStore] Instrument master lookup failed: {e}")
+        for key in missing:
+            self.symbol_map[key] = found.get(key, key)
+
+
+class BarAggregator:
+    """
+    Streaming OHLCV aggregation for many instruments and timeframes.
+
+    Args:
+        timeframes: Bar sizes to build (keys of TIMEFRAMES)
+        store: Bar writer with write_bars(bars); None keeps bars in memory only
+        flush_batch_size: Write once this many completed bars are pending
+        flush_interval: Background flush period in seconds (start())
+        close_grace_seconds: Wall-clock delay after a bar's end before it is
+                             force-closed, allowing for late ticks
+        history_size: Completed bars kept in memory per instrument/timeframe
+        session_filter: Drop ticks outside the NSE session
+    """
+
+    def __init__(
+        self,
+        timeframes: Iterable[str] = DEFAULT_TIMEFRAMES,
+        store: Optional[CandleBarStore] = None,
+        flush_batch_size: int = 500,
+        flush_interval: float = 1.0,
+        close_grace_seconds: float = 2.0,
+        history_size: int = 500,
+        session_filter: bool = True,
+    ):
+        unknown = set(timeframes) - set(TIMEFRAMES)
+        if unknown:
+            raise ValueError(f"Unknown timeframes: {sorted(unknown)}")
+        self.timeframes = [(tf, TIMEFRAMES[tf]) for tf in timeframes]
+        self.store = store
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
+        self.close_grace_seconds = close_grace_seconds
+        self.history_size = history_size
+        self.session_filter = session_filter
+
+        self._lock = threading.RLock()
+        self._open_bars: Dict[Tuple[str, str], Bar] = {}
+        self._history: Dict[Tuple[str, str], Deque[Bar]] = {}
+        self._last_volume: Dict[str, Tuple[int, int]] = {}  # key -> (session_open, cumulative)
+        self._last_ts: Dict[str, float] = {}
+        self._pending: List[Bar] = []
+        self.bar_callbacks: List[Callable[[Bar], None]] = []
+
+        self.ticks_processed = 0
+        self.ticks_out_of_session = 0
+        self.ticks_late = 0
+        self.bars_completed = 0
+        self.flush_errors = 0
+
+        self._subscription = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------------------------------------------------- ingestion
+
+    def on_ticks(self, ticks: Iterable[Any]) -> None:
+        """Feed a batch of Tick objects (TickBus / streamer callback signature)"""
+        with self._lock:
+            for tick in ticks:
+                self._add_tick(tick)
+        if len(self._pending) >= self.flush_batch_size:
+            self.flush()
+
+    def add_tick(self, tick: Any) -> None:
+        self.on_ticks((tick,))
+
+    def _add_tick(self, tick: Any) -> None:
+        price = tick.ltp
+        if not price:
+            return
+        ts = tick.ltt / 1000.0 if tick.ltt else tick.received_ts
+        key = tick.instrument_key
+
+        session = session_bounds(ts)
+        if session is None and self.session_filter:
+            self.ticks_out_of_session += 1
+            return
+        session_open = session[0] if session else 0
+
+        volume = self._volume_delta(key, session_open, tick)
+
+        last_ts = self._last_ts.get(key)
+        if last_ts is not None and ts < last_ts:
+            self.ticks_late += 1
+        else:
+            self._last_ts[key] = ts
+
+        for timeframe, seconds in self.timeframes:
+            start = bucket_start(ts, seconds)
+            end = start + seconds
+            if session is not None:
+                start = max(start, session[0])
+                end = min(end, session[1])
+
+            bar_key = (key, timeframe)
+            bar = self._open_bars.get(bar_key)
+            if bar is not None and bar.start != start:
+                if start < bar.start:
+                    # Tick for an already completed bar: too late to change it
+                    continue
+                self._complete(bar_key, bar)
+                bar = None
+            if bar is None:
+                bar = Bar(key, timeframe, start, end, price)
+                self._open_bars[bar_key] = bar
+            bar.update(price, volume, tick.oi)
+
+        self.ticks_processed += 1
+
+    def _volume_delta(self, key: str, session_open: int, tick: Any) -> int:
+        cumulative = tick.volume
+        if not cumulative:
+            return tick.ltq or 0
+        previous = self._last_volume.get(key)
+        self._last_volume[key] = (session_open, cumulative)
+        if previous is None or previous[0] != session_open:
+            return 0  # Baseline: cumulative volume before we joined is unknown
+        delta = cumulative - previous[1]
+        return delta if delta > 0 else 0
+
+    def _complete(self, bar_key: Tuple[str, str], bar: Bar) -> None:
+        del self._open_bars[bar_key]
+        history = self._history.get(bar_key)
+        if history is None:
+            history = self._history[bar_key] = deque(maxlen=self.history_size)
+        history.append(bar)
+        self._pending.append(bar)
+        self.bars_completed += 1
+        for callback in self.bar_callbacks:
+            try:
+                callback(bar)
+            except Exception as e:
+                logger.error(f"[BarAggregator] Bar callback failed: {e}")
+
+    # ------------------------------------------------------- closing/flushing
+
+    def flush_due(self, now: float) -> int:
+        """Complete open bars whose end (plus grace) is before now"""
+        cutoff = now - self.close_grace_seconds
+        with self._lock:
+            due = [(k, bar) for k, bar in self._open_bars.items() if bar.end <= cutoff]
+            for bar_key, bar in due:
+                self._complete(bar_key, bar)
+        return len(due)
+
+    def close_all(self) -> int:
+        """Complete every open bar (session end or shutdown)"""
+        with self._lock:
+            bars = list(self._open_bars.items())
+            for bar_key, bar in bars:
+                self._complete(bar_key, bar)
+        return len(bars)
+
+    def flush(self) -> int:
+        """Write pending completed bars to the store in one batch"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending or self.store is None:
+            return 0
+        try:
+            return self.store.write_bars(pending)
+        except Exception as e:
+            self.flush_errors += 1
+            logger.error(f"[BarAggregator] Failed to write {len(pending)} bars: {e}")
+            with self._lock:
+                self._pending[:0] = pending
+            return 0
+
+    # --------------------------------------------------------------- backfill
+
+    def merge_bars(self, bars: Iterable[Bar], timeframe: str = "1m") -> int:
+        """
+        Merge externally fetched bars (REST backfill after a feed gap).
+
+        Fetched bars replace streamed bars with the same start, since they
+        include the ticks the stream missed. Coarser timeframes are rebuilt
+        from the repaired `timeframe` series, which must be tracked for that;
+        finer timeframes cannot be recovered and stay as streamed. Repaired
+        completed bars are queued for the store like any other bar.
+
+        Returns:
+            Number of bars added or replaced across all timeframes
+        """
+        base_seconds = TIMEFRAMES[timeframe]
+        tracked = any(tf == timeframe for tf, _ in self.timeframes)
+        by_key: Dict[str, List[Bar]] = {}
+        for bar in bars:
+            by_key.setdefault(bar.instrument_key, []).append(bar)
+
+        changed = 0
+        with self._lock:
+            for key, fetched in by_key.items():
+                series = {bar.start: bar for bar in self._series(key, timeframe)}
+                series.update((bar.start, bar) for bar in fetched)
+                starts = sorted(series)
+
+                for tf, seconds in self.timeframes:
+                    if seconds < base_seconds or seconds % base_seconds:
+                        continue
+                    if tf != timeframe and not tracked:
+                        continue
+                    buckets = {self._bucket_bounds(bar.start, seconds) for bar in fetched}
+                    for start, end in sorted(buckets):
+                        parts = [series[s] for s in starts if start <= s < end]
+                        self._replace_bar(key, tf, start, end, parts)
+                        changed += 1
+        return changed
+
+    def _series(self, instrument_key: str, timeframe: str) -> List[Bar]:
+        bars = list(self._history.get((instrument_key, timeframe), ()))
+        partial = self._open_bars.get((instrument_key, timeframe))
+        if partial is not None:
+            bars.append(partial)
+        return bars
+
+    @staticmethod
+    def _bucket_bounds(ts: float, seconds: int) -> Tuple[int, int]:
+        start = bucket_start(ts, seconds)
+        end = start + seconds
+        session = session_bounds(ts)
+        if session is not None:
+            start = max(start, session[0])
+            end = min(end, session[1])
+        return start, end
+
+    def _replace_bar(self, key: str, timeframe: str, start: int, end: int, parts: List[Bar]) -> None:
+        bar_key = (key, timeframe)
+        open_bar = self._open_bars.get(bar_key)
+        if open_bar is not None and open_bar.start == start:
+            # Still forming: repair in place and let the stream keep updating it
+            bar = open_bar
+        else:
+            if open_bar is not None and open_bar.start < start:
+                self._complete(bar_key, open_bar)  # stale bar from before the gap
+            bar = Bar(key, timeframe, start, end, parts[0].open)
+
+        bar.open = parts[0].open
+        bar.high = max(p.high for p in parts)
+        bar.low = min(p.low for p in parts)
+        bar.close = parts[-1].close
+        bar.volume = sum(p.volume for p in parts)
+        bar.ticks = sum(p.ticks for p in parts)
+        oi = [p.oi for p in parts if p.oi]
+        bar.oi = oi[-1] if oi else bar.oi
+        if bar is open_bar:
+            return
+
+        history = self._history.get(bar_key)
+        if history is None:
+            history = self._history[bar_key] = deque(maxlen=self.history_size)
+        bars = [b for b in history if b.start != start]
+        bars.append(bar)
+        bars.sort(key=lambda b: b.start)
+        history.clear()
+        history.extend(bars)
+        self._pending.append(bar)
+
+    # ---------------------------------------------------------------- queries
+
+    def get_bars(
+        self, instrument_key: str, timeframe: str, limit: Optional[int] = None, include_partial: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Recent bars for charts/strategies, oldest first"""
+        with self._lock:
+            bars = list(self._history.get((instrument_key, timeframe), ()))
+            partial = self._open_bars.get((instrument_key, timeframe))
+            if include_partial and partial is not None:
+                bars.append(partial)
+            if limit:
+                bars = bars[-limit:]
+            return [bar.to_dict() for bar in bars]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "timeframes": [tf for tf, _ in self.timeframes],
+            "instruments": len(self._last_ts),
+            "open_bars": len(self._open_bars),
+            "pending_bars": len(self._pending),
+            "bars_completed": self.bars_completed,
+            "bars_written": self.store.bars_written if self.store else 0,
+            "ticks_processed": self.ticks_processed,
+            "ticks_out_of_session": self.ticks_out_of_session,
+            "ticks_late": self.ticks_late,
+            "flush_errors": self.flush_errors,
+        }
+
+    # -------------------------------------------------------------- lifecycle
+
+    def attach(self, bus, **subscription) -> Any:
+        """Consume ticks from a TickBus (instruments/universes/all_instruments)"""
+        if not subscription:
+            subscription = {"all_instruments": True}
+        self._subscription = bus.subscribe(
+            name="bar-aggregator", callback=self.on_ticks, capacity=65536, **subscription
+        )
+        return self._subscription
+
+    def start(self) -> None:
+        """Background thread that closes due bars and flushes batches"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.flush_interval):
+                self.flush_due(datetime.now().timestamp())
+                self.flush()
+
+        self._thread = threading.Thread(target=loop, name="bar-aggregator", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop, complete open bars and write everything pending"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._subscription is not None:
+            self._subscription.close()
+            # Ticks published after the worker's last batch are still buffered
+            self.on_ticks(self._subscription.poll())
+            self._subscription = None
+        self.close_all()
+        self.flush()
+
+
+_bar_aggregator: Optional[BarAggregator] = None
+_bar_aggregator_lock = threading.Lock()
+
+
+def get_bar_aggregator(db_path: str = "market_data.db") -> BarAggregator:
+    """Process-wide aggregator fed by the shared tick bus and writing to db_path"""
+    global _bar_aggregator
+    if _bar_aggregator is None:
+        with _bar_aggregator_lock:
+            if _bar_aggregator is None:
+                from backend.services.streaming.tick_bus import get_tick_bus
+
+                aggregator = BarAggregator(store=CandleBarStore(db_path))
+                aggregator.attach(get_tick_bus())
+                aggregator.start()
+                _bar_aggregator = aggregator
+    return _bar_aggregator
@@ -0,0 +1,760 @@
+"""
+Upstox V3 Market Data Feed Decoder
+
+The V3 market data websocket sends protobuf-encoded FeedResponse frames
+(MarketDataFeedV3.proto). This module decodes the protobuf wire format
+directly into compact Tick objects instead of building intermediate message
+objects or dicts, which keeps the per-frame cost low on the streaming hot path.
+
+Supported modes:
+    ltpc           - LTP, last trade time/qty, previous close
+    option_greeks  - LTPC + first level depth + greeks + OI/IV
+    full           - LTPC + 5 level depth + OHLC + greeks + ATP/volume/OI (full_d5)
+    full_d30       - Same as full with 30 depth levels
+
+Schema reference (field numbers used below):
+    FeedResponse { Type type=1; map<string, Feed> feeds=2; int64 currentTs=3; MarketInfo marketInfo=4 }
+    Feed { LTPC ltpc=1 | FullFeed fullFeed=2 | FirstLevelWithGreeks firstLevelWithGreeks=3; RequestMode requestMode=4 }
+    FullFeed { MarketFullFeed marketFF=1 | IndexFullFeed indexFF=2 }
+    MarketFullFeed { LTPC ltpc=1; MarketLevel marketLevel=2; OptionGreeks optionGreeks=3;
+                     MarketOHLC marketOHLC=4; double atp=5; int64 vtt=6; double oi=7;
+                     double iv=8; double tbq=9; double tsq=10 }
+    IndexFullFeed { LTPC ltpc=1; MarketOHLC marketOHLC=2 }
+    FirstLevelWithGreeks { LTPC ltpc=1; Quote firstDepth=2; OptionGreeks optionGreeks=3;
+                           int64 vtt=4; double oi=5; double iv=6 }
+    LTPC { double ltp=1; int64 ltt=2; int64 ltq=3; double cp=4 }
+    Quote { int64 bidQ=1; double bidP=2; int64 askQ=3; double askP=4 }
+    OptionGreeks { double delta=1; double theta=2; double gamma=3; double vega=4; double rho=5 }
+    OHLC { string interval=1; double open=2; double high=3; double low=4; double close=5;
+           int64 vol=6; int64 ts=7 }
+    MarketInfo { map<string, MarketStatus> segmentStatus=1 }
+
+Two interchangeable decoders produce identical Tick output:
+    decode_feed_response_protobuf - protobuf message classes (feed_proto), fastest
+                                    when protobuf runs on its C backend (upb/cpp)
+    decode_feed_response_wire     - hand-rolled wire parser, no protobuf needed,
+                                    faster than the pure-Python protobuf backend
+decode_feed_response is bound to the faster one available at import time
+(see tools/scripts/benchmark_feed_decoder.py).
+"""
+
+import logging
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# FeedResponse.type
+FEED_TYPE_INITIAL = 0
+FEED_TYPE_LIVE = 1
+FEED_TYPE_MARKET_INFO = 2
+
+# Feed.requestMode
+REQUEST_MODES = {0: "ltpc", 1: "full", 2: "option_greeks", 3: "full_d30"}
+
+MARKET_STATUS = {
+    0: "PRE_OPEN_START",
+    1: "PRE_OPEN_END",
+    2: "NORMAL_OPEN",
+    3: "NORMAL_CLOSE",
+    4: "CLOSING_START",
+    5: "CLOSING_END",
+}
+
+# Interval whose OHLC is exposed as the tick's day open/high/low/close
+DAY_OHLC_INTERVAL = "1d"
+
+# Protobuf wire types
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+_unpack_double = struct.Struct("<d").unpack_from
+_INT64_SIGN = 1 << 63
+_UINT64_RANGE = 1 << 64
+
+
+class FeedDecodeError(ValueError):
+    """Raised when a frame is not a valid FeedResponse"""
+
+
+class Tick:
+    """
+    Compact decoded tick for one instrument.
+
+    Prices are floats, quantities ints. Fields not carried by the
+    subscription mode are left as None; fields of a message that is present
+    but omitted on the wire take their proto3 default (0). 'depth' holds
+    (bid_qty, bid_price, ask_qty, ask_price) tuples, best level first.
+    """
+
+    __slots__ = (
+        "instrument_key",
+        "mode",
+        "ltp",
+        "ltt",
+        "ltq",
+        "cp",
+        "volume",
+        "oi",
+        "iv",
+        "atp",
+        "tbq",
+        "tsq",
+        "bid_price",
+        "bid_qty",
+        "ask_price",
+        "ask_qty",
+        "open",
+        "high",
+        "low",
+        "close",
+        "delta",
+        "theta",
+        "gamma",
+        "vega",
+        "depth",
+        "received_ts",
+    )
+
+    def __init__(self, instrument_key: str, received_ts: float = 0.0):
+        self.instrument_key = instrument_key
+        self.received_ts = received_ts
+        self.mode = None
+        self.ltp = None
+        self.ltt = None
+        self.ltq = None
+        self.cp = None
+        self.volume = None
+        self.oi = None
+        self.iv = None
+        self.atp = None
+        self.tbq = None
+        self.tsq = None
+        self.bid_price = None
+        self.bid_qty = None
+        self.ask_price = None
+        self.ask_qty = None
+        self.open = None
+        self.high = None
+        self.low = None
+        self.close = None
+        self.delta = None
+        self.theta = None
+        self.gamma = None
+        self.vega = None
+        self.depth = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict view using the websocket_ticks_v3 column names"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Tick({self.instrument_key!r}, ltp={self.ltp}, mode={self.mode})"
+
+
+class FeedMessage:
+    """One decoded FeedResponse frame"""
+
+    __slots__ = ("type", "current_ts", "ticks", "market_status")
+
+    def __init__(self):
+        self.type = FEED_TYPE_LIVE
+        self.current_ts = 0
+        self.ticks: List[Tick] = []
+        self.market_status: Optional[Dict[str, str]] = None
+
+
+def _float_or_none(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def tick_from_quote(quote: Dict[str, Any], received_ts: Optional[float] = None) -> Tick:
+    """
+    Tick from a legacy JSON quote dict (websocket_quote_streamer), so quote
+    streams can share the tick bus with decoded V3 ticks. The topic is the
+    quote's instrument_key or symbol; day_high/day_low and open_interest
+    fill high/low/oi, and a best bid/ask becomes one depth level.
+    """
+    tick = Tick(
+        quote.get("instrument_key") or quote.get("symbol"),
+        received_ts or quote.get("received_ts") or time.time(),
+    )
+    tick.mode = quote.get("mode")
+    tick.ltp = _float_or_none(quote.get("ltp"))
+    tick.ltt = _int_or_none(quote.get("ltt"))
+    tick.ltq = _int_or_none(quote.get("ltq"))
+    tick.cp = _float_or_none(quote.get("cp"))
+    tick.volume = _int_or_none(quote.get("volume"))
+    tick.oi = _float_or_none(quote.get("oi", quote.get("open_interest")))
+    tick.iv = _float_or_none(quote.get("iv"))
+    tick.atp = _float_or_none(quote.get("atp"))
+    tick.bid_price = _float_or_none(quote.get("bid_price"))
+    tick.bid_qty = _int_or_none(quote.get("bid_qty"))
+    tick.ask_price = _float_or_none(quote.get("ask_price"))
+    tick.ask_qty = _int_or_none(quote.get("ask_qty"))
+    tick.open = _float_or_none(quote.get("open"))
+    tick.high = _float_or_none(quote.get("high", quote.get("day_high")))
+    tick.low = _float_or_none(quote.get("low", quote.get("day_low")))
+    tick.close = _float_or_none(quote.get("close"))
+    if tick.bid_price is not None or tick.ask_price is not None:
+        tick.depth = ((tick.bid_qty or 0, tick.bid_price or 0.0, tick.ask_qty or 0, tick.ask_price or 0.0),)
+    return tick
+
+
+# ---------------------------------------------------------------------------
+# Wire format primitives
+# ---------------------------------------------------------------------------
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    b = buf[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result = b & 0x7F
+    shift = 7
+    pos += 1
+    while True:
+        b = buf[pos]
+        result |= (b & 0x7F) << shift
+        pos += 1
+        if b < 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 70:
+            raise FeedDecodeError("varint too long")
+
+
+def _read_int64(buf: bytes, pos: int) -> Tuple[int, int]:
+    value, pos = _read_varint(buf, pos)
+    if value >= _INT64_SIGN:
+        value -= _UINT64_RANGE
+    return value, pos
+
+
+def _skip(buf: bytes, pos: int, wire_type: int) -> int:
+    if wire_type == _VARINT:
+        return _read_varint(buf, pos)[1]
+    if wire_type == _FIXED64:
+        return pos + 8
+    if wire_type == _LENGTH_DELIMITED:
+        length, pos = _read_varint(buf, pos)
+        return pos + length
+    if wire_type == _FIXED32:
+        return pos + 4
+    raise FeedDecodeError(f"unsupported wire type {wire_type}")
+
+
+def _skip_field(buf: bytes, pos: int, key: int) -> int:
+    """Skip an unknown field whose first tag byte has already been read"""
+    if key & 0x80:  # Multi-byte tag (field number > 15)
+        while buf[pos] & 0x80:
+            pos += 1
+        pos += 1
+    return _skip(buf, pos, key & 7)
+
+
+# ---------------------------------------------------------------------------
+# Message parsers (each parses buf[pos:end] into the given tick)
+# ---------------------------------------------------------------------------
+
+
+def _parse_ltpc(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    tick.ltp = tick.cp = 0.0
+    tick.ltt = tick.ltq = 0
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x09:  # 1: ltp double
+            tick.ltp = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x10:  # 2: ltt int64
+            tick.ltt, pos = _read_int64(buf, pos)
+        elif key == 0x18:  # 3: ltq int64
+            tick.ltq, pos = _read_int64(buf, pos)
+        elif key == 0x21:  # 4: cp double
+            tick.cp = _unpack_double(buf, pos)[0]
+            pos += 8
+        else:
+            pos = _skip_field(buf, pos, key)
+
+
+def _parse_quote(buf: bytes, pos: int, end: int) -> Tuple[int, float, int, float]:
+    bid_q = ask_q = 0
+    bid_p = ask_p = 0.0
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x08:  # 1: bidQ
+            bid_q, pos = _read_int64(buf, pos)
+        elif key == 0x11:  # 2: bidP
+            bid_p = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x18:  # 3: askQ
+            ask_q, pos = _read_int64(buf, pos)
+        elif key == 0x21:  # 4: askP
+            ask_p = _unpack_double(buf, pos)[0]
+            pos += 8
+        else:
+            pos = _skip_field(buf, pos, key)
+    return bid_q, bid_p, ask_q, ask_p
+
+
+def _set_best(tick: Tick, quote: Tuple[int, float, int, float]) -> None:
+    tick.bid_qty, tick.bid_price, tick.ask_qty, tick.ask_price = quote
+
+
+def _parse_market_level(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    depth = []
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:  # 1: repeated Quote bidAskQuote
+            length, pos = _read_varint(buf, pos)
+            depth.append(_parse_quote(buf, pos, pos + length))
+            pos += length
+        else:
+            pos = _skip_field(buf, pos, key)
+    tick.depth = tuple(depth)
+    if depth:
+        _set_best(tick, depth[0])
+
+
+def _parse_greeks(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    tick.delta = tick.theta = tick.gamma = tick.vega = 0.0
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x09:
+            tick.delta = _unpack_double(buf, pos)[0]
+        elif key == 0x11:
+            tick.theta = _unpack_double(buf, pos)[0]
+        elif key == 0x19:
+            tick.gamma = _unpack_double(buf, pos)[0]
+        elif key == 0x21:
+            tick.vega = _unpack_double(buf, pos)[0]
+        elif key == 0x29:  # rho - not kept
+            pass
+        else:
+            pos = _skip_field(buf, pos, key)
+            continue
+        pos += 8
+
+
+def _parse_ohlc_entry(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    interval = ""
+    o = h = l = c = 0.0
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:  # 1: interval string
+            length, pos = _read_varint(buf, pos)
+            interval = buf[pos : pos + length].decode("ascii")
+            pos += length
+        elif key == 0x11:
+            o = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x19:
+            h = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x21:
+            l = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x29:
+            c = _unpack_double(buf, pos)[0]
+            pos += 8
+        else:  # 6: vol, 7: ts and unknown fields
+            pos = _skip_field(buf, pos, key)
+    if interval == DAY_OHLC_INTERVAL:
+        tick.open, tick.high, tick.low, tick.close = o, h, l, c
+
+
+def _parse_market_ohlc(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:  # 1: repeated OHLC
+            length, pos = _read_varint(buf, pos)
+            _parse_ohlc_entry(buf, pos, pos + length, tick)
+            pos += length
+        else:
+            pos = _skip_field(buf, pos, key)
+
+
+def _parse_market_full_feed(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    tick.atp = tick.oi = tick.iv = tick.tbq = tick.tsq = 0.0
+    tick.volume = 0
+    tick.depth = ()
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:
+            length, pos = _read_varint(buf, pos)
+            _parse_ltpc(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x12:
+            length, pos = _read_varint(buf, pos)
+            _parse_market_level(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x1A:
+            length, pos = _read_varint(buf, pos)
+            _parse_greeks(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x22:
+            length, pos = _read_varint(buf, pos)
+            _parse_market_ohlc(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x29:  # 5: atp
+            tick.atp = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x30:  # 6: vtt
+            tick.volume, pos = _read_int64(buf, pos)
+        elif key == 0x39:  # 7: oi
+            tick.oi = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x41:  # 8: iv
+            tick.iv = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x49:  # 9: tbq
+            tick.tbq = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x51:  # 10: tsq
+            tick.tsq = _unpack_double(buf, pos)[0]
+            pos += 8
+        else:
+            pos = _skip_field(buf, pos, key)
+
+
+def _parse_index_full_feed(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:
+            length, pos = _read_varint(buf, pos)
+            _parse_ltpc(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x12:
+            length, pos = _read_varint(buf, pos)
+            _parse_market_ohlc(buf, pos, pos + length, tick)
+            pos += length
+        else:
+            pos = _skip_field(buf, pos, key)
+
+
+def _parse_full_feed(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:
+            length, pos = _read_varint(buf, pos)
+            _parse_market_full_feed(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x12:
+            length, pos = _read_varint(buf, pos)
+            _parse_index_full_feed(buf, pos, pos + length, tick)
+            pos += length
+        else:
+            pos = _skip_field(buf, pos, key)
+
+
+def _parse_first_level(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    tick.oi = tick.iv = 0.0
+    tick.volume = 0
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:
+            length, pos = _read_varint(buf, pos)
+            _parse_ltpc(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x12:
+            length, pos = _read_varint(buf, pos)
+            quote = _parse_quote(buf, pos, pos + length)
+            tick.depth = (quote,)
+            _set_best(tick, quote)
+            pos += length
+        elif key == 0x1A:
+            length, pos = _read_varint(buf, pos)
+            _parse_greeks(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x20:  # 4: vtt
+            tick.volume, pos = _read_int64(buf, pos)
+        elif key == 0x29:  # 5: oi
+            tick.oi = _unpack_double(buf, pos)[0]
+            pos += 8
+        elif key == 0x31:  # 6: iv
+            tick.iv = _unpack_double(buf, pos)[0]
+            pos += 8
+        else:
+            pos = _skip_field(buf, pos, key)
+
+
+def _parse_feed(buf: bytes, pos: int, end: int, tick: Tick) -> None:
+    mode = 0
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:  # 1: ltpc
+            length, pos = _read_varint(buf, pos)
+            _parse_ltpc(buf, pos, pos + length, tick)
+            pos += length
+        elif key == 0x12:  # 2: fullFeed
+            length, pos = _read_varint(buf, pos)
+            _parse_full_feed(buf, pos, pos + length, tick)
+            pos += length
+            if not mode:
+                mode = 1
+        elif key == 0x1A:  # 3: firstLevelWithGreeks
+            length, pos = _read_varint(buf, pos)
+            _parse_first_level(buf, pos, pos + length, tick)
+            pos += length
+            if not mode:
+                mode = 2
+        elif key == 0x20:  # 4: requestMode
+            mode, pos = _read_varint(buf, pos)
+        else:
+            pos = _skip_field(buf, pos, key)
+    tick.mode = REQUEST_MODES.get(mode, "ltpc")
+
+
+def _parse_feed_entry(buf: bytes, pos: int, end: int, received_ts: float) -> Tick:
+    tick = None
+    feed_start = feed_end = 0
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:  # map key: instrument key
+            length, pos = _read_varint(buf, pos)
+            tick = Tick(buf[pos : pos + length].decode("utf-8"), received_ts)
+            pos += length
+        elif key == 0x12:  # map value: Feed
+            length, pos = _read_varint(buf, pos)
+            feed_start, feed_end = pos, pos + length
+            pos += length
+        else:
+            pos = _skip_field(buf, pos, key)
+    if tick is None:
+        tick = Tick("", received_ts)
+    if feed_end:
+        _parse_feed(buf, feed_start, feed_end, tick)
+    else:
+        tick.mode = "ltpc"
+    return tick
+
+
+def _parse_market_info(buf: bytes, pos: int, end: int) -> Dict[str, str]:
+    status = {}
+    while pos < end:
+        key = buf[pos]
+        pos += 1
+        if key == 0x0A:  # map<string, MarketStatus> entry
+            length, pos = _read_varint(buf, pos)
+            entry_end = pos + length
+            segment, value = "", 0
+            while pos < entry_end:
+                entry_key = buf[pos]
+                pos += 1
+                if entry_key == 0x0A:
+                    n, pos = _read_varint(buf, pos)
+                    segment = buf[pos : pos + n].decode("utf-8")
+                    pos += n
+                elif entry_key == 0x10:
+                    value, pos = _read_varint(buf, pos)
+                else:
+                    pos = _skip_field(buf, pos, entry_key)
+            status[segment] = MARKET_STATUS.get(value, str(value))
+        else:
+            pos = _skip_field(buf, pos, key)
+    return status
+
+
+def decode_feed_response_wire(
+    data: bytes, received_ts: Optional[float] = None
+) -> FeedMessage:
+    """
+    Decode one binary FeedResponse frame with the pure-Python wire parser.
+
+    Args:
+        data: Raw websocket binary frame
+        received_ts: Receive timestamp stamped on every tick (defaults to now)
+
+    Returns:
+        FeedMessage with one Tick per instrument in the frame
+
+    Raises:
+        FeedDecodeError: If the frame is truncated or malformed
+    """
+    if received_ts is None:
+        received_ts = time.time()
+
+    message = FeedMessage()
+    ticks = message.ticks
+    buf = memoryview(data) if not isinstance(data, (bytes, bytearray)) else data
+    end = len(buf)
+    pos = 0
+    try:
+        while pos < end:
+            key = buf[pos]
+            pos += 1
+            if key == 0x12:  # 2: feeds map entry
+                length, pos = _read_varint(buf, pos)
+                ticks.append(_parse_feed_entry(buf, pos, pos + length, received_ts))
+                pos += length
+            elif key == 0x08:  # 1: type
+                message.type, pos = _read_varint(buf, pos)
+            elif key == 0x18:  # 3: currentTs
+                message.current_ts, pos = _read_int64(buf, pos)
+            elif key == 0x22:  # 4: marketInfo
+                length, pos = _read_varint(buf, pos)
+                message.market_status = _parse_market_info(buf, pos, pos + length)
+                pos += length
+            else:
+                pos = _skip_field(buf, pos, key)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise FeedDecodeError(f"truncated or malformed feed frame: {e}") from e
+
+    if pos != end:
+        raise FeedDecodeError("frame length mismatch")
+    return message
+
+
+# ---------------------------------------------------------------------------
+# Protobuf-class decoder
+# ---------------------------------------------------------------------------
+
+
+def _copy_ltpc(ltpc, tick: Tick) -> None:
+    tick.ltp = ltpc.ltp
+    tick.ltt = ltpc.ltt
+    tick.ltq = ltpc.ltq
+    tick.cp = ltpc.cp
+
+
+def _copy_greeks(greeks, tick: Tick) -> None:
+    tick.delta = greeks.delta
+    tick.theta = greeks.theta
+    tick.gamma = greeks.gamma
+    tick.vega = greeks.vega
+
+
+def _copy_day_ohlc(market_ohlc, tick: Tick) -> None:
+    for ohlc in market_ohlc.ohlc:
+        if ohlc.interval == DAY_OHLC_INTERVAL:
+            tick.open, tick.high, tick.low, tick.close = (
+                ohlc.open,
+                ohlc.high,
+                ohlc.low,
+                ohlc.close,
+            )
+
+
+def decode_feed_response_protobuf(
+    data: bytes, received_ts: Optional[float] = None
+) -> FeedMessage:
+    """Decode one binary FeedResponse frame via the protobuf message classes"""
+    if received_ts is None:
+        received_ts = time.time()
+
+    response = _FeedResponse()
+    try:
+        response.ParseFromString(data)
+    except _ProtobufDecodeError as e:
+        raise FeedDecodeError(f"truncated or malformed feed frame: {e}") from e
+
+    message = FeedMessage()
+    message.type = response.type
+    message.current_ts = response.currentTs
+    if response.HasField("marketInfo"):
+        message.market_status = {
+            segment: MARKET_STATUS.get(value, str(value))
+            for segment, value in response.marketInfo.segmentStatus.items()
+        }
+
+    ticks = message.ticks
+    for instrument_key, feed in response.feeds.items():
+        tick = Tick(instrument_key, received_ts)
+        which = feed.WhichOneof("FeedUnion")
+        mode = feed.requestMode
+
+        if which == "ltpc":
+            _copy_ltpc(feed.ltpc, tick)
+        elif which == "fullFeed":
+            full = feed.fullFeed
+            if full.WhichOneof("FullFeedUnion") == "indexFF":
+                index_ff = full.indexFF
+                if index_ff.HasField("ltpc"):
+                    _copy_ltpc(index_ff.ltpc, tick)
+                if index_ff.HasField("marketOHLC"):
+                    _copy_day_ohlc(index_ff.marketOHLC, tick)
+            elif full.HasField("marketFF"):
+                market_ff = full.marketFF
+                if market_ff.HasField("ltpc"):
+                    _copy_ltpc(market_ff.ltpc, tick)
+                depth = tuple(
+                    (q.bidQ, q.bidP, q.askQ, q.askP)
+                    for q in market_ff.marketLevel.bidAskQuote
+                )
+                tick.depth = depth
+                if depth:
+                    _set_best(tick, depth[0])
+                if market_ff.HasField("optionGreeks"):
+                    _copy_greeks(market_ff.optionGreeks, tick)
+                if market_ff.HasField("marketOHLC"):
+                    _copy_day_ohlc(market_ff.marketOHLC, tick)
+                tick.atp = market_ff.atp
+                tick.volume = market_ff.vtt
+                tick.oi = market_ff.oi
+                tick.iv = market_ff.iv
+                tick.tbq = market_ff.tbq
+                tick.tsq = market_ff.tsq
+            mode = mode or 1
+        elif which == "firstLevelWithGreeks":
+            first = feed.firstLevelWithGreeks
+            if first.HasField("ltpc"):
+                _copy_ltpc(first.ltpc, tick)
+            if first.HasField("firstDepth"):
+                q = first.firstDepth
+                quote = (q.bidQ, q.bidP, q.askQ, q.askP)
+                tick.depth = (quote,)
+                _set_best(tick, quote)
+            if first.HasField("optionGreeks"):
+                _copy_greeks(first.optionGreeks, tick)
+            tick.volume = first.vtt
+            tick.oi = first.oi
+            tick.iv = first.iv
+            mode = mode or 2
+
+        tick.mode = REQUEST_MODES.get(mode, "ltpc")
+        ticks.append(tick)
+
+    return message
+
+
+try:
+    from google.protobuf.internal import api_implementation
+    from google.protobuf.message import DecodeError as _ProtobufDecodeError
+
+    from backend.services.streaming.feed_proto import get_message_class
+
+    _FeedResponse = get_message_class("FeedResponse")
+    PROTOBUF_BACKEND = api_implementation.Type()
+except ImportError:  # protobuf not installed
+    _FeedResponse = None
+    PROTOBUF_BACKEND = None
+
+# The C protobuf backends parse ~2-3x faster than the wire parser; the
+# pure-Python backend is several times slower than it.
+if PROTOBUF_BACKEND in ("upb", "cpp"):
+    decode_feed_response = decode_feed_response_protobuf
+    DECODER_BACKEND = f"protobuf-{PROTOBUF_BACKEND}"
+else:
+    decode_feed_response = decode_feed_response_wire
+    DECODER_BACKEND = "wire"
+
+logger.debug(f"Feed decoder backend: {DECODER_BACKEND}")
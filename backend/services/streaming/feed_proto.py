@@ -0,0 +1,305 @@
+"""
+Upstox V3 Market Data Feed - protobuf message classes
+
+Builds the MarketDataFeedV3.proto message classes at runtime from a
+descriptor, so no protoc step or generated _pb2 file is needed. The live
+decode path uses feed_decoder (hand-rolled, faster); these classes are used
+to encode frames for the replay server, tests and the decoder benchmark.
+
+Usage:
+    from backend.services.streaming.feed_proto import get_message_class, encode_feed_response
+
+    FeedResponse = get_message_class("FeedResponse")
+    frame = encode_feed_response({"NSE_EQ|INE002A01018": {"ltpc": {"ltp": 2500.5}}})
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.protobuf import descriptor_pb2, descriptor_pool, json_format
+
+try:
+    from google.protobuf.message_factory import GetMessageClass
+except ImportError:  # protobuf < 4.21
+    from google.protobuf import message_factory
+
+    def GetMessageClass(descriptor):
+        return message_factory.MessageFactory().GetPrototype(descriptor)
+
+
+PACKAGE = "com.upstox.marketdatafeederv3udapi.rpc.proto"
+
+_F = descriptor_pb2.FieldDescriptorProto
+_DOUBLE, _INT64, _STRING, _ENUM, _MESSAGE = (
+    _F.TYPE_DOUBLE,
+    _F.TYPE_INT64,
+    _F.TYPE_STRING,
+    _F.TYPE_ENUM,
+    _F.TYPE_MESSAGE,
+)
+
+# message -> [(name, number, type, type_name, repeated, oneof)]
+_MESSAGES = {
+    "LTPC": [
+        ("ltp", 1, _DOUBLE, None, False, None),
+        ("ltt", 2, _INT64, None, False, None),
+        ("ltq", 3, _INT64, None, False, None),
+        ("cp", 4, _DOUBLE, None, False, None),
+    ],
+    "Quote": [
+        ("bidQ", 1, _INT64, None, False, None),
+        ("bidP", 2, _DOUBLE, None, False, None),
+        ("askQ", 3, _INT64, None, False, None),
+        ("askP", 4, _DOUBLE, None, False, None),
+    ],
+    "MarketLevel": [("bidAskQuote", 1, _MESSAGE, "Quote", True, None)],
+    "OptionGreeks": [
+        ("delta", 1, _DOUBLE, None, False, None),
+        ("theta", 2, _DOUBLE, None, False, None),
+        ("gamma", 3, _DOUBLE, None, False, None),
+        ("vega", 4, _DOUBLE, None, False, None),
+        ("rho", 5, _DOUBLE, None, False, None),
+    ],
+    "OHLC": [
+        ("interval", 1, _STRING, None, False, None),
+        ("open", 2, _DOUBLE, None, False, None),
+        ("high", 3, _DOUBLE, None, False, None),
+        ("low", 4, _DOUBLE, None, False, None),
+        ("close", 5, _DOUBLE, None, False, None),
+        ("vol", 6, _INT64, None, False, None),
+        ("ts", 7, _INT64, None, False, None),
+    ],
+    "MarketOHLC": [("ohlc", 1, _MESSAGE, "OHLC", True, None)],
+    "MarketFullFeed": [
+        ("ltpc", 1, _MESSAGE, "LTPC", False, None),
+        ("marketLevel", 2, _MESSAGE, "MarketLevel", False, None),
+        ("optionGreeks", 3, _MESSAGE, "OptionGreeks", False, None),
+        ("marketOHLC", 4, _MESSAGE, "MarketOHLC", False, None),
+        ("atp", 5, _DOUBLE, None, False, None),
+        ("vtt", 6, _INT64, None, False, None),
+        ("oi", 7, _DOUBLE, None, False, None),
+        ("iv", 8, _DOUBLE, None, False, None),
+        ("tbq", 9, _DOUBLE, None, False, None),
+        ("tsq", 10, _DOUBLE, None, False, None),
+    ],
+    "IndexFullFeed": [
+        ("ltpc", 1, _MESSAGE, "LTPC", False, None),
+        ("marketOHLC", 2, _MESSAGE, "MarketOHLC", False, None),
+    ],
+    "FullFeed": [
+        ("marketFF", 1, _MESSAGE, "MarketFullFeed", False, "FullFeedUnion"),
+        ("indexFF", 2, _MESSAGE, "IndexFullFeed", False, "FullFeedUnion"),
+    ],
+    "FirstLevelWithGreeks": [
+        ("ltpc", 1, _MESSAGE, "LTPC", False, None),
+        ("firstDepth", 2, _MESSAGE, "Quote", False, None),
+        ("optionGreeks", 3, _MESSAGE, "OptionGreeks", False, None),
+        ("vtt", 4, _INT64, None, False, None),
+        ("oi", 5, _DOUBLE, None, False, None),
+        ("iv", 6, _DOUBLE, None, False, None),
+    ],
+    "Feed": [
+        ("ltpc", 1, _MESSAGE, "LTPC", False, "FeedUnion"),
+        ("fullFeed", 2, _MESSAGE, "FullFeed", False, "FeedUnion"),
+        ("firstLevelWithGreeks", 3, _MESSAGE, "FirstLevelWithGreeks", False, "FeedUnion"),
+        ("requestMode", 4, _ENUM, "RequestMode", False, None),
+    ],
+    "MarketInfo": [],  # segmentStatus map added below
+    "FeedResponse": [
+        ("type", 1, _ENUM, "Type", False, None),
+        ("currentTs", 3, _INT64, None, False, None),
+        ("marketInfo", 4, _MESSAGE, "MarketInfo", False, None),
+    ],
+}
+
+_ENUMS = {
+    "Type": ["initial_feed", "live_feed", "market_info"],
+    "RequestMode": ["ltpc", "full_d5", "option_greeks", "full_d30"],
+    "MarketStatus": [
+        "PRE_OPEN_START",
+        "PRE_OPEN_END",
+        "NORMAL_OPEN",
+        "NORMAL_CLOSE",
+        "CLOSING_START",
+        "CLOSING_END",
+    ],
+}
+
+# (message, field name, number, map value type, value type_name, entry name)
+_MAPS = [
+    ("FeedResponse", "feeds", 2, _MESSAGE, "Feed", "FeedsEntry"),
+    ("MarketInfo", "segmentStatus", 1, _ENUM, "MarketStatus", "SegmentStatusEntry"),
+]
+
+_classes: Dict[str, Any] = {}
+
+
+def _add_field(message, name, number, ftype, type_name, repeated, oneof_index=None):
+    field = message.field.add()
+    field.name = name
+    field.json_name = name
+    field.number = number
+    field.type = ftype
+    field.label = _F.LABEL_REPEATED if repeated else _F.LABEL_OPTIONAL
+    if type_name:
+        field.type_name = type_name if type_name.startswith(".") else f".{PACKAGE}.{type_name}"
+    if oneof_index is not None:
+        field.oneof_index = oneof_index
+
+
+def _build_file() -> descriptor_pb2.FileDescriptorProto:
+    file_proto = descriptor_pb2.FileDescriptorProto(
+        name="MarketDataFeedV3.proto", package=PACKAGE, syntax="proto3"
+    )
+
+    for enum_name, values in _ENUMS.items():
+        enum = file_proto.enum_type.add(name=enum_name)
+        for number, value in enumerate(values):
+            enum.value.add(name=value, number=number)
+
+    messages = {}
+    for message_name, fields in _MESSAGES.items():
+        message = file_proto.message_type.add(name=message_name)
+        messages[message_name] = message
+        oneofs: Dict[str, int] = {}
+        for name, number, ftype, type_name, repeated, oneof in fields:
+            oneof_index = None
+            if oneof:
+                if oneof not in oneofs:
+                    oneofs[oneof] = len(message.oneof_decl)
+                    message.oneof_decl.add(name=oneof)
+                oneof_index = oneofs[oneof]
+            _add_field(message, name, number, ftype, type_name, repeated, oneof_index)
+
+    for message_name, name, number, value_type, value_type_name, entry_name in _MAPS:
+        message = messages[message_name]
+        entry = message.nested_type.add(name=entry_name)
+        entry.options.map_entry = True
+        _add_field(entry, "key", 1, _STRING, None, False)
+        _add_field(entry, "value", 2, value_type, value_type_name, False)
+        _add_field(
+            message, name, number, _MESSAGE, f".{PACKAGE}.{message_name}.{entry_name}", True
+        )
+
+    return file_proto
+
+
+def get_message_class(name: str):
+    """Return the protobuf message class for a MarketDataFeedV3 message"""
+    if not _classes:
+        pool = descriptor_pool.DescriptorPool()
+        pool.Add(_build_file())
+        file_descriptor = pool.FindFileByName("MarketDataFeedV3.proto")
+        for message_name in _MESSAGES:
+            _classes[message_name] = GetMessageClass(
+                file_descriptor.message_types_by_name[message_name]
+            )
+    return _classes[name]
+
+
+def encode_feed_response(
+    feeds: Dict[str, Dict[str, Any]],
+    feed_type: str = "live_feed",
+    current_ts: Optional[int] = None,
+    market_status: Optional[Dict[str, str]] = None,
+) -> bytes:
+    """
+    Encode a FeedResponse frame from plain dicts.
+
+    Args:
+        feeds: instrument_key -> Feed dict using proto field names, e.g.
+               {"ltpc": {"ltp": 101.5, "ltt": 1700000000000}}
+               {"fullFeed": {"marketFF": {...}}, "requestMode": "full_d5"}
+        feed_type: 'initial_feed', 'live_feed' or 'market_info'
+        current_ts: Server timestamp in epoch ms
+        market_status: segment -> MarketStatus name for market_info frames
+
+    Returns:
+        Serialized protobuf bytes
+    """
+    payload: Dict[str, Any] = {"type": feed_type, "feeds": feeds}
+    if current_ts is not None:
+        payload["currentTs"] = str(current_ts)
+    if market_status:
+        payload["marketInfo"] = {"segmentStatus": market_status}
+
+    message = json_format.ParseDict(payload, get_message_class("FeedResponse")())
+    return message.SerializeToString()
+
+
+def _sample_feed(mode: str, ltp: float, ltt: int, volume: int, depth_levels: int):
+    ltpc = {"ltp": ltp, "ltt": str(ltt), "ltq": "75", "cp": round(ltp * 0.99, 2)}
+    greeks = {"delta": 0.51, "theta": -11.2, "gamma": 0.0012, "vega": 8.4, "rho": 0.9}
+    quotes = [
+        {
+            "bidQ": str(75 * (i + 1)),
+            "bidP": round(ltp - 0.05 * (i + 1), 2),
+            "askQ": str(75 * (i + 2)),
+            "askP": round(ltp + 0.05 * (i + 1), 2),
+        }
+        for i in range(depth_levels)
+    ]
+    if mode == "ltpc":
+        return {"ltpc": ltpc, "requestMode": "ltpc"}
+    if mode == "option_greeks":
+        return {
+            "firstLevelWithGreeks": {
+                "ltpc": ltpc,
+                "firstDepth": quotes[0],
+                "optionGreeks": greeks,
+                "vtt": str(volume),
+                "oi": 125000.0,
+                "iv": 0.142,
+            },
+            "requestMode": "option_greeks",
+        }
+    return {
+        "fullFeed": {
+            "marketFF": {
+                "ltpc": ltpc,
+                "marketLevel": {"bidAskQuote": quotes},
+                "optionGreeks": greeks,
+                "marketOHLC": {
+                    "ohlc": [
+                        {"interval": "1d", "open": ltp - 5, "high": ltp + 8,
+                         "low": ltp - 9, "close": ltp, "vol": str(volume), "ts": str(ltt)},
+                        {"interval": "I1", "open": ltp - 1, "high": ltp + 1,
+                         "low": ltp - 1, "close": ltp, "vol": "750", "ts": str(ltt)},
+                    ]
+                },
+                "atp": ltp - 1.25,
+                "vtt": str(volume),
+                "oi": 125000.0,
+                "iv": 0.142,
+                "tbq": 250000.0,
+                "tsq": 310000.0,
+            }
+        },
+        "requestMode": "full_d30" if mode == "full_d30" else "full_d5",
+    }
+
+
+def build_sample_frames(
+    num_frames: int,
+    instrument_keys: List[str],
+    mode: str = "full",
+    interval_ms: int = 250,
+    start_ts: int = 1737604800000,
+) -> List[Tuple[int, bytes]]:
+    """
+    Deterministic synthetic feed frames for replay tests and benchmarks.
+
+    Returns:
+        [(offset_ms, frame_bytes)] in the format used by feed_replay
+    """
+    depth_levels = 30 if mode == "full_d30" else 5
+    frames = []
+    for i in range(num_frames):
+        ltt = start_ts + i * interval_ms
+        feeds = {
+            key: _sample_feed(
+                mode, 100.0 + k * 10 + (i % 40) * 0.05, ltt, 1000 + i * 75, depth_levels
+            )
+            for k, key in enumerate(instrument_keys)
+        }
+        frames.append((i * interval_ms, encode_feed_response(feeds, current_ts=ltt)))
+    return frames
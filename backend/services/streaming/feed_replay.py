@@ -0,0 +1,295 @@
+"""
+Market Data Feed Recording and Replay
+
+Records raw binary websocket frames to a compact file and serves them back
+through a minimal local websocket server, so the streaming stack can be
+tested end-to-end against real frame bytes without connecting to Upstox.
+
+Frame file format:
+    b"UFR1" magic, then per frame: uint32 offset_ms (from first frame),
+    uint32 length, <length> bytes of frame payload
+
+Usage:
+    frames = read_frames("tests/fixtures/nifty_feed.bin")
+    with FeedReplayServer(frames) as server:
+        streamer.ws_url = server.url
+        streamer.connect()
+"""
+
+import base64
+import hashlib
+import logging
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+FRAME_FILE_MAGIC = b"UFR1"
+_FRAME_HEADER = struct.Struct("<II")
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_OPCODE_TEXT = 0x1
+_OPCODE_BINARY = 0x2
+_OPCODE_CLOSE = 0x8
+_OPCODE_PING = 0x9
+_OPCODE_PONG = 0xA
+
+RecordedFrame = Tuple[int, bytes]  # (offset_ms, payload)
+
+
+class FrameRecorder:
+    """Appends raw feed frames with their arrival offsets to a frame file"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(FRAME_FILE_MAGIC)
+        self._start: Optional[float] = None
+        self._lock = threading.Lock()
+        self.frames_recorded = 0
+
+    def record(self, payload: bytes) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._start is None:
+                self._start = now
+            offset_ms = int((now - self._start) * 1000)
+            self._file.write(_FRAME_HEADER.pack(offset_ms, len(payload)))
+            self._file.write(payload)
+            self.frames_recorded += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        logger.info(f"Recorded {self.frames_recorded} frames to {self.path}")
+
+
+def write_frames(path: Union[str, Path], frames: Iterable[RecordedFrame]) -> int:
+    """Write (offset_ms, payload) frames to a frame file; returns frame count"""
+    count = 0
+    with open(path, "wb") as f:
+        f.write(FRAME_FILE_MAGIC)
+        for offset_ms, payload in frames:
+            f.write(_FRAME_HEADER.pack(offset_ms, len(payload)))
+            f.write(payload)
+            count += 1
+    return count
+
+
+def read_frames(path: Union[str, Path]) -> List[RecordedFrame]:
+    """Read all frames from a frame file"""
+    data = Path(path).read_bytes()
+    if data[:4] != FRAME_FILE_MAGIC:
+        raise ValueError(f"{path} is not a feed frame file")
+
+    frames = []
+    pos = 4
+    while pos + _FRAME_HEADER.size <= len(data):
+        offset_ms, length = _FRAME_HEADER.unpack_from(data, pos)
+        pos += _FRAME_HEADER.size
+        frames.append((offset_ms, data[pos : pos + length]))
+        pos += length
+    return frames
+
+
+def _encode_ws_frame(payload: bytes, opcode: int = _OPCODE_BINARY) -> bytes:
+    """Server-to-client frame (FIN set, unmasked)"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _recv_exact(conn: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = conn.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("client disconnected")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _read_ws_frame(conn: socket.socket) -> Tuple[int, bytes]:
+    """Read one client frame (masked per RFC 6455)"""
+    b1, b2 = _recv_exact(conn, 2)
+    opcode = b1 & 0x0F
+    length = b2 & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", _recv_exact(conn, 2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", _recv_exact(conn, 8))[0]
+    mask = _recv_exact(conn, 4) if b2 & 0x80 else b"\x00\x00\x00\x00"
+    payload = _recv_exact(conn, length)
+    if b2 & 0x80:
+        payload = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+class FeedReplayServer:
+    """
+    Minimal local websocket server that replays recorded binary frames.
+
+    Each client connection gets the full frame sequence. With speed=None
+    frames are sent back-to-back; otherwise recorded gaps are honoured,
+    scaled by speed (2.0 = twice as fast). Client messages such as
+    subscription requests are collected in 'received'.
+    """
+
+    def __init__(
+        self,
+        frames: List[RecordedFrame],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        speed: Optional[float] = None,
+        wait_for_subscribe: bool = False,
+        close_when_done: bool = False,
+    ):
+        self.frames = frames
+        self.host = host
+        self.speed = speed
+        self.wait_for_subscribe = wait_for_subscribe
+        self.close_when_done = close_when_done
+
+        self.received: List[bytes] = []
+        self.frames_sent = 0
+        self.connections = 0
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self.port = self._sock.getsockname()[1]
+        self._stop = threading.Event()
+        self._subscribed = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._clients: List[socket.socket] = []
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self) -> "FeedReplayServer":
+        self._sock.listen(4)
+        self._sock.settimeout(0.2)
+        thread = threading.Thread(target=self._accept_loop, name="feed-replay", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        for conn in list(self._clients):
+            try:
+                conn.close()
+            except OSError:
+                pass
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._sock.close()
+
+    def __enter__(self) -> "FeedReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            self.connections += 1
+            self._clients.append(conn)
+            thread = threading.Thread(target=self._serve, args=(conn,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _handshake(self, conn: socket.socket) -> bool:
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = conn.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+
+        key = None
+        for line in request.decode("latin-1").split("\r\n"):
+            if line.lower().startswith("sec-websocket-key:"):
+                key = line.split(":", 1)[1].strip()
+        if not key:
+            return False
+
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        conn.sendall(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode()
+        )
+        return True
+
+    def _reader(self, conn: socket.socket) -> None:
+        try:
+            while not self._stop.is_set():
+                opcode, payload = _read_ws_frame(conn)
+                if opcode == _OPCODE_CLOSE:
+                    conn.sendall(_encode_ws_frame(payload[:2], _OPCODE_CLOSE))
+                    break
+                if opcode == _OPCODE_PING:
+                    conn.sendall(_encode_ws_frame(payload, _OPCODE_PONG))
+                elif opcode in (_OPCODE_TEXT, _OPCODE_BINARY):
+                    self.received.append(payload)
+                    self._subscribed.set()
+        except (ConnectionError, OSError):
+            pass
+
+    def _serve(self, conn: socket.socket) -> None:
+        try:
+            if not self._handshake(conn):
+                conn.close()
+                return
+
+            reader = threading.Thread(target=self._reader, args=(conn,), daemon=True)
+            reader.start()
+
+            if self.wait_for_subscribe:
+                while not self._subscribed.wait(0.1):
+                    if self._stop.is_set():
+                        return
+
+            start = time.monotonic()
+            for offset_ms, payload in self.frames:
+                if self._stop.is_set():
+                    return
+                if self.speed:
+                    delay = offset_ms / 1000 / self.speed - (time.monotonic() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                conn.sendall(_encode_ws_frame(payload))
+                self.frames_sent += 1
+
+            if self.close_when_done:
+                conn.sendall(_encode_ws_frame(struct.pack("!H", 1000), _OPCODE_CLOSE))
+            reader.join(timeout=5 if self.close_when_done else None)
+        except OSError:
+            pass
+        finally:
+            try:
+                conn.close()
+            except OSError:
+                pass
@@ -0,0 +1,439 @@
+"""
+Feed Gap Backfill - Repair live bars after websocket outages
+
+When the upstream feed drops, ticks traded during the outage never arrive,
+so bars built from the stream are wrong for the rest of the day. This
+module detects those gaps per instrument and repairs them from the REST
+candle API:
+
+    - The last exchange timestamp (ltt) seen for every instrument is
+      tracked from the tick bus.
+    - Connection events carry the connection (shard) that changed. On a
+      disconnect, the tracked instruments subscribed on that connection are
+      marked as waiting; instruments on healthy shards are left alone. Each
+      gap runs from max(last seen, disconnect time) to the first tick after
+      the outage, or to that connection's reconnect time for instruments
+      that stay quiet.
+      Gaps are clipped to the NSE session; tiny ones are ignored.
+    - Each gap becomes a backfill job for just the missing 1-minute window.
+      Jobs wait until the last affected minute has closed, are paced by a
+      token bucket, and back off on rate-limit errors. A fetch that returns
+      no bars for the window is retried like a failure, not counted as done.
+    - Fetched bars are merged into the BarAggregator (which rebuilds the
+      coarser timeframes and upserts into candles_new), so a reconnect never
+      needs a full-day re-download.
+
+Usage:
+    backfiller = get_gap_backfiller()
+    backfiller.watch(streamer)   # listener(connected, source) for every shard
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from backend.services.streaming.bar_aggregator import (
+    IST,
+    Bar,
+    BarAggregator,
+    CandleBarStore,
+    bucket_start,
+    session_bounds,
+)
+from backend.services.streaming.rate_limit import TokenBucket
+from backend.utils.logging.error_handler import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+BAR_SECONDS = 60
+
+
+class FeedGap:
+    """Missing window for one instrument, and its backfill job state"""
+
+    __slots__ = ("instrument_key", "start", "end", "detected_at", "not_before", "attempts")
+
+    def __init__(self, instrument_key: str, start: float, end: float, detected_at: float):
+        self.instrument_key = instrument_key
+        self.start = start
+        self.end = end
+        self.detected_at = detected_at
+        self.not_before = 0.0
+        self.attempts = 0
+
+    @property
+    def first_bar(self) -> int:
+        return bucket_start(self.start, BAR_SECONDS)
+
+    @property
+    def last_bar(self) -> int:
+        return bucket_start(self.end, BAR_SECONDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "instrument_key": self.instrument_key,
+            "start": datetime.fromtimestamp(self.start, IST).isoformat(),
+            "end": datetime.fromtimestamp(self.end, IST).isoformat(),
+            "seconds": round(self.end - self.start, 3),
+            "attempts": self.attempts,
+        }
+
+
+def _candle_epoch(value: Any) -> int:
+    if isinstance(value, (int, float)):
+        return int(value / 1000 if value > 1e11 else value)
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        moment = datetime.fromisoformat(str(value))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=IST)
+    return int(moment.timestamp())
+
+
+def candles_to_bars(
+    instrument_key: str, candles: Iterable[Dict[str, Any]], first: int, last: int
+) -> List[Bar]:
+    """1-minute Bars from REST candle dicts whose start is within [first, last]"""
+    bars = []
+    for candle in candles:
+        start = _candle_epoch(candle["timestamp"])
+        if not first <= start <= last:
+            continue
+        bar = Bar(instrument_key, "1m", start, start + BAR_SECONDS, float(candle["open"]))
+        bar.high = float(candle["high"])
+        bar.low = float(candle["low"])
+        bar.close = float(candle["close"])
+        bar.volume = int(candle.get("volume") or 0)
+        bar.oi = candle.get("oi") or None
+        bars.append(bar)
+    bars.sort(key=lambda b: b.start)
+    return bars
+
+
+def _connection_instruments(source: Any) -> Optional[List[str]]:
+    """Instrument keys subscribed on a connection, or None if it cannot tell"""
+    subscriptions = getattr(source, "subscriptions", None)  # StreamingCore
+    if subscriptions is None:
+        subscriptions = getattr(source, "subscribed_symbols", None)  # WebSocketV3Streamer
+    return None if subscriptions is None else list(subscriptions)
+
+
+class GapBackfiller:
+    """
+    Per-instrument gap detection and rate-limited REST repair.
+
+    Args:
+        fetch: fetch(instrument_key, start_ts, end_ts) -> 1-minute candle dicts
+               (timestamp/open/high/low/close/volume); defaults to the
+               intraday candle endpoint via CandleFetcherV3
+        aggregator: BarAggregator to merge repaired bars into
+        store: Bar writer used directly when there is no aggregator
+        db_path: Database for the default fetcher
+        requests_per_second: REST request budget for backfill jobs
+        min_gap_seconds: Ignore gaps shorter than this
+        settle_seconds: After a reconnect, instruments still silent for this
+                        long get their gap closed at the reconnect time
+        candle_grace_seconds: Wait after the last missing minute closes
+                              before fetching, so the REST candle is final
+        clock_skew_seconds: Allowance between exchange and local clocks when
+                            bounding a gap by the disconnect time
+        max_attempts: Fetch attempts per job before giving up
+        retry_delay: Base delay between attempts (doubles each time)
+    """
+
+    def __init__(
+        self,
+        fetch: Optional[Callable[[str, float, float], List[Dict[str, Any]]]] = None,
+        aggregator: Optional[BarAggregator] = None,
+        store: Optional[CandleBarStore] = None,
+        db_path: str = "market_data.db",
+        requests_per_second: float = 5.0,
+        min_gap_seconds: float = 2.0,
+        settle_seconds: float = 5.0,
+        candle_grace_seconds: float = 5.0,
+        clock_skew_seconds: float = 2.0,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        poll_interval: float = 1.0,
+    ):
+        self.fetch = fetch or self._fetch_from_api
+        self.aggregator = aggregator
+        self.store = store
+        self.db_path = db_path
+        self.rate_limiter = TokenBucket(rate=requests_per_second, burst=max(1.0, requests_per_second))
+        self.min_gap_seconds = min_gap_seconds
+        self.settle_seconds = settle_seconds
+        self.candle_grace_seconds = candle_grace_seconds
+        self.clock_skew_seconds = clock_skew_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._last_seen: Dict[str, float] = {}
+        # instrument_key -> (last exchange ts, disconnect time, connection)
+        self._awaiting: Dict[str, Tuple[float, float, Any]] = {}
+        self._jobs: Dict[str, FeedGap] = {}
+        # connection -> last reconnect time (None: connection not identified)
+        self._reconnected_at: Dict[Any, float] = {}
+        self._paused_until = 0.0
+        self._fetcher = None
+        self.recent_gaps: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+        self.disconnects = 0
+        self.reconnects = 0
+        self.gaps_detected = 0
+        self.backfills_completed = 0
+        self.backfills_failed = 0
+        self.bars_backfilled = 0
+        self.requests_made = 0
+
+        self._subscription = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------- detection
+
+    def on_ticks(self, ticks: Iterable[Any]) -> None:
+        """Track exchange timestamps; the first tick after an outage closes its gap"""
+        with self._lock:
+            for tick in ticks:
+                key = tick.instrument_key
+                ts = tick.ltt / 1000.0 if tick.ltt else tick.received_ts
+                waiting = self._awaiting.pop(key, None)
+                if waiting is not None:
+                    self._open_gap(key, waiting[0], waiting[1], ts)
+                if ts > self._last_seen.get(key, 0.0):
+                    self._last_seen[key] = ts
+
+    def on_connection_change(self, connected: bool, source: Any = None) -> None:
+        if connected:
+            self.on_reconnect(source=source)
+        else:
+            self.on_disconnect(source=source)
+
+    def on_disconnect(self, now: Optional[float] = None, source: Any = None) -> None:
+        """
+        Mark the instruments of the connection that dropped as waiting.
+        Without a source (or one that does not expose its subscriptions)
+        every tracked instrument is marked.
+        """
+        now = time.time() if now is None else now
+        instruments = _connection_instruments(source)
+        with self._lock:
+            keys = self._last_seen if instruments is None else instruments
+            marked = 0
+            for key in keys:
+                last_seen = self._last_seen.get(key)
+                if last_seen is not None and key not in self._awaiting:
+                    self._awaiting[key] = (last_seen, now, source)
+                    marked += 1
+            self.disconnects += 1
+        logger.info(f"[GapBackfill] Feed disconnected; watching {marked} instruments")
+
+    def on_reconnect(self, now: Optional[float] = None, source: Any = None) -> None:
+        with self._lock:
+            self._reconnected_at[source] = time.time() if now is None else now
+            self.reconnects += 1
+
+    def _settle(self, now: float) -> None:
+        """Close gaps of instruments still silent well after their connection came back"""
+        for key, (last_seen, disconnected_at, source) in list(self._awaiting.items()):
+            reconnected_at = self._reconnected_at.get(source)
+            if reconnected_at is None or now - reconnected_at < self.settle_seconds:
+                continue
+            if disconnected_at <= reconnected_at:
+                del self._awaiting[key]
+                self._open_gap(key, last_seen, disconnected_at, reconnected_at)
+
+    def _open_gap(self, key: str, last_seen: float, disconnected_at: float, end: float) -> None:
+        # Nothing was lost between the last tick and the moment the feed dropped
+        start = max(last_seen, disconnected_at - self.clock_skew_seconds)
+        if end - start < self.min_gap_seconds:
+            return
+        session = session_bounds(end) or session_bounds(start)
+        if session is None:
+            return
+        start = max(start, session[0])
+        end = min(end, session[1] - 1)
+        if end <= start:
+            return
+
+        self.gaps_detected += 1
+        job = self._jobs.get(key)
+        if job is None:
+            job = self._jobs[key] = FeedGap(key, start, end, time.time())
+        else:
+            job.start = min(job.start, start)
+            job.end = max(job.end, end)
+        job.not_before = job.last_bar + BAR_SECONDS + self.candle_grace_seconds
+        self.recent_gaps.append(job.to_dict())
+        logger.info(f"[GapBackfill] Gap detected: {job.to_dict()}")
+
+    # -------------------------------------------------------------- backfill
+
+    def process_due(self, now: Optional[float] = None) -> int:
+        """Run backfill jobs that are due; returns jobs completed"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._settle(now)
+            if now < self._paused_until:
+                return 0
+            due = [job for job in self._jobs.values() if job.not_before <= now]
+
+        completed = 0
+        for job in sorted(due, key=lambda j: j.not_before):
+            if not self._acquire_request_slot():
+                break
+            try:
+                self._backfill(job)
+            except RateLimitError as e:
+                pause = getattr(e, "retry_after", None) or 60
+                with self._lock:
+                    self._paused_until = time.time() + pause
+                logger.warning(f"[GapBackfill] Rate limited; pausing backfill for {pause}s")
+                break
+            except Exception as e:
+                with self._lock:
+                    job.attempts += 1
+                    if job.attempts >= self.max_attempts:
+                        self._jobs.pop(job.instrument_key, None)
+                        self.backfills_failed += 1
+                        logger.error(f"[GapBackfill] Giving up on {job.instrument_key}: {e}")
+                    else:
+                        job.not_before = time.time() + self.retry_delay * 2 ** (job.attempts - 1)
+                        logger.warning(f"[GapBackfill] Backfill of {job.instrument_key} failed: {e}")
+                continue
+            completed += 1
+        return completed
+
+    def _acquire_request_slot(self) -> bool:
+        while not self.rate_limiter.consume(1):
+            if self._stop.wait(1.0 / self.rate_limiter.rate):
+                return False
+        return True
+
+    def _backfill(self, job: FeedGap) -> None:
+        first, last = job.first_bar, job.last_bar
+        self.requests_made += 1
+        candles = self.fetch(job.instrument_key, job.start, job.end)
+        bars = candles_to_bars(job.instrument_key, candles or [], first, last)
+        if not bars:
+            # The gap is inside the session, so the minutes should exist; the
+            # candles are probably not published yet. Retry with backoff.
+            raise ValueError(
+                f"no candles for {datetime.fromtimestamp(first, IST):%H:%M}-"
+                f"{datetime.fromtimestamp(last, IST):%H:%M} ({len(candles or [])} returned)"
+            )
+
+        if self.aggregator is not None:
+            self.aggregator.merge_bars(bars)
+            self.aggregator.flush()
+        elif self.store is not None:
+            self.store.write_bars(bars)
+
+        with self._lock:
+            # A newer outage may have widened the job while we were fetching
+            current = self._jobs.get(job.instrument_key)
+            if current is job and job.first_bar == first and job.last_bar == last:
+                del self._jobs[job.instrument_key]
+            self.backfills_completed += 1
+            self.bars_backfilled += len(bars)
+        logger.info(
+            f"[GapBackfill] Repaired {job.instrument_key}: {len(bars)} bars "
+            f"{datetime.fromtimestamp(first, IST):%H:%M}-{datetime.fromtimestamp(last, IST):%H:%M}"
+        )
+
+    def _fetch_from_api(self, instrument_key: str, start: float, end: float) -> List[Dict[str, Any]]:
+        """Intraday endpoint for today's gaps, historical 1-minute candles otherwise"""
+        if self._fetcher is None:
+            from backend.data.fetchers.candles import CandleFetcherV3
+
+            self._fetcher = CandleFetcherV3(self.db_path)
+        day = datetime.fromtimestamp(end, IST).date()
+        if day == datetime.now(IST).date():
+            return self._fetcher.fetch_intraday_candles(instrument_key, "1minute")
+        return self._fetcher.fetch_candles(instrument_key, "1minute", day.isoformat(), day.isoformat())
+
+    # -------------------------------------------------------------- lifecycle
+
+    def attach(self, bus) -> Any:
+        """Track every instrument published on a TickBus"""
+        self._subscription = bus.subscribe(
+            all_instruments=True, callback=self.on_ticks, capacity=65536, name="gap-backfill"
+        )
+        return self._subscription
+
+    def watch(self, source: Any) -> None:
+        """
+        Receive connect/disconnect events from a streamer (which reports the
+        shard that changed) or from a single StreamingCore
+        """
+        if hasattr(source, "add_connection_listener"):
+            source.add_connection_listener(self.on_connection_change)
+        else:
+            source.connection_listeners.append(lambda connected: self.on_connection_change(connected, source))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    self.process_due()
+                except Exception as e:
+                    logger.error(f"[GapBackfill] Backfill loop failed: {e}", exc_info=True)
+
+        self._thread = threading.Thread(target=loop, name="gap-backfill", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "instruments": len(self._last_seen),
+                "awaiting": len(self._awaiting),
+                "pending_jobs": len(self._jobs),
+                "disconnects": self.disconnects,
+                "reconnects": self.reconnects,
+                "gaps_detected": self.gaps_detected,
+                "backfills_completed": self.backfills_completed,
+                "backfills_failed": self.backfills_failed,
+                "bars_backfilled": self.bars_backfilled,
+                "requests_made": self.requests_made,
+                "paused_for_seconds": max(0.0, round(self._paused_until - time.time(), 1)),
+                "recent_gaps": list(self.recent_gaps),
+            }
+
+
+_gap_backfiller: Optional[GapBackfiller] = None
+_gap_backfiller_lock = threading.Lock()
+
+
+def get_gap_backfiller(db_path: str = "market_data.db") -> GapBackfiller:
+    """Process-wide backfiller repairing the shared bar aggregator"""
+    global _gap_backfiller
+    if _gap_backfiller is None:
+        with _gap_backfiller_lock:
+            if _gap_backfiller is None:
+                from backend.services.streaming.bar_aggregator import get_bar_aggregator
+                from backend.services.streaming.tick_bus import get_tick_bus
+
+                backfiller = GapBackfiller(aggregator=get_bar_aggregator(db_path), db_path=db_path)
+                backfiller.attach(get_tick_bus())
+                backfiller.start()
+                _gap_backfiller = backfiller
+    return _gap_backfiller
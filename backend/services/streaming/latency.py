@@ -0,0 +1,274 @@
+"""
+Tick Latency Instrumentation - Per-stage HDR-style histograms
+
+Every decoded tick carries the time its frame was read off the socket
+(received_ts) and every frame carries the server timestamp (currentTs).
+Each pipeline stage records how old a tick is when it gets there, so a
+regression shows up in exactly the stage that caused it:
+
+    exchange   server timestamp -> socket receive (network + upstream lag)
+    decode     socket receive   -> ticks decoded
+    dispatch   socket receive   -> handed to tick consumers / the bus
+    persist    socket receive   -> written to the database
+    emit       socket receive   -> pushed to a UI client (incl. conflation)
+
+Histograms use HdrHistogram-style log-linear buckets (about 2 significant
+digits from 1 microsecond to 60 seconds), so recording is O(1) and
+percentiles stay accurate in the tail. They are exported to Prometheus as
+histogram and quantile metrics by register_prometheus_collector(), which
+config/enhancements.py::setup_prometheus_metrics calls.
+
+Usage:
+    tracker = get_latency_tracker()
+    tracker.record("exchange", received_ts - feed.current_ts / 1000)
+    tracker.observe_ticks("persist", ticks)
+    tracker.get_stats()["persist"]["p99_ms"]
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("exchange", "decode", "dispatch", "persist", "emit")
+
+# Prometheus bucket boundaries (seconds) derived from the HDR counts at scrape time
+PROMETHEUS_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999))
+
+_SUB_BUCKET_BITS = 8  # 256 linear sub-buckets per power of two: < 1% error
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+
+
+def _index(value: int) -> int:
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS
+    return shift * _SUB_BUCKET_HALF + (value >> shift)
+
+
+def _lowest_value(index: int) -> int:
+    if index < _SUB_BUCKET_COUNT:
+        return index
+    shift = index // _SUB_BUCKET_HALF - 1
+    return (index - shift * _SUB_BUCKET_HALF) << shift
+
+
+def _highest_value(index: int) -> int:
+    if index < _SUB_BUCKET_COUNT:
+        return index
+    shift = index // _SUB_BUCKET_HALF - 1
+    return _lowest_value(index) + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram with microsecond resolution.
+
+    Values above max_seconds are clamped into the top bucket and negative
+    values (clock skew between exchange and local clock) are recorded as 0
+    and counted separately.
+    """
+
+    def __init__(self, max_seconds: float = 60.0):
+        self.max_value = int(max_seconds * 1_000_000)
+        self.counts: List[int] = [0] * (_index(self.max_value) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.negative = 0
+        self.overflow = 0
+
+    def record(self, seconds: float) -> None:
+        value = int(seconds * 1_000_000)
+        if value < 0:
+            self.negative += 1
+            value = 0
+        elif value > self.max_value:
+            self.overflow += 1
+            value = self.max_value
+        self.counts[_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def percentile(self, p: float) -> float:
+        """Value (seconds) at percentile p in [0, 100]"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(self.count * p / 100.0)))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if n:
+                seen += n
+                if seen >= target:
+                    return min(_highest_value(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def cumulative_counts(self, bounds: Sequence[float]) -> List[int]:
+        """Observations <= each bound (seconds), for Prometheus buckets"""
+        result = []
+        seen = 0
+        index = 0
+        counts = self.counts
+        for bound in bounds:
+            limit = int(bound * 1_000_000)
+            while index < len(counts) and _highest_value(index) <= limit:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def reset(self) -> None:
+        self.counts = [0] * len(self.counts)
+        self.count = self.total = self.max = self.negative = self.overflow = 0
+        self.min = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        mean = self.total / self.count / 1000 if self.count else 0.0
+        stats = {
+            "count": self.count,
+            "mean_ms": round(mean, 3),
+            "min_ms": round((self.min or 0) / 1000, 3),
+            "max_ms": round(self.max / 1000, 3),
+            "negative": self.negative,
+            "overflow": self.overflow,
+        }
+        for name, q in QUANTILES:
+            stats[f"{name}_ms"] = round(self.percentile(q * 100) * 1000, 3)
+        return stats
+
+
+class LatencyTracker:
+    """
+    One histogram per pipeline stage.
+
+    Args:
+        stages: Stage names (others are created on first use)
+        sample_every: Record every Nth tick in observe_ticks (1 = all)
+        max_seconds: Histogram range
+    """
+
+    def __init__(self, stages: Iterable[str] = STAGES, sample_every: int = 1, max_seconds: float = 60.0):
+        self.sample_every = max(1, sample_every)
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {
+            stage: LatencyHistogram(max_seconds) for stage in stages
+        }
+        self._sample_counters: Dict[str, int] = {}
+        self.started_at = time.time()
+
+    def _histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram(self.max_seconds))
+        return histogram
+
+    def record(self, stage: str, seconds: float) -> None:
+        self._histogram(stage).record(seconds)
+
+    def observe_ticks(self, stage: str, ticks: Sequence[Any], now: Optional[float] = None) -> None:
+        """Record age since socket receive for (a sample of) ticks reaching stage"""
+        if not ticks:
+            return
+        now = time.time() if now is None else now
+        histogram = self._histogram(stage)
+        step = self.sample_every
+        if step == 1:
+            for tick in ticks:
+                received = getattr(tick, "received_ts", None)
+                if received:
+                    histogram.record(now - received)
+            return
+        start = self._sample_counters.get(stage, 0)
+        for tick in ticks[(-start) % step::step]:
+            received = getattr(tick, "received_ts", None)
+            if received:
+                histogram.record(now - received)
+        self._sample_counters[stage] = (start + len(ticks)) % step
+
+    def reset(self) -> None:
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.started_at = time.time()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {stage: h.to_dict() for stage, h in list(self.histograms.items())}
+
+
+class LatencyCollector:
+    """prometheus_client collector exposing a LatencyTracker at scrape time"""
+
+    def __init__(self, tracker: LatencyTracker, prefix: str = "tick_latency"):
+        self.tracker = tracker
+        self.prefix = prefix
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily
+
+        histograms = HistogramMetricFamily(
+            f"{self.prefix}_seconds",
+            "Tick age when reaching each pipeline stage (exchange: server timestamp to receive)",
+            labels=["stage"],
+        )
+        quantiles = GaugeMetricFamily(
+            f"{self.prefix}_quantile_seconds",
+            "Tick latency quantiles per stage from the HDR histogram",
+            labels=["stage", "quantile"],
+        )
+        for stage, histogram in list(self.tracker.histograms.items()):
+            cumulative = histogram.cumulative_counts(PROMETHEUS_BUCKETS)
+            buckets: List[Tuple[str, float]] = [
+                (str(bound), count) for bound, count in zip(PROMETHEUS_BUCKETS, cumulative)
+            ]
+            buckets.append(("+Inf", histogram.count))
+            histograms.add_metric([stage], buckets, histogram.total / 1_000_000)
+            for _, q in QUANTILES:
+                quantiles.add_metric([stage, str(q)], histogram.percentile(q * 100))
+        yield histograms
+        yield quantiles
+
+
+_latency_tracker: Optional[LatencyTracker] = None
+_latency_tracker_lock = threading.Lock()
+_registered_collectors: Dict[int, LatencyCollector] = {}
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Process-wide tracker shared by the streamers, push hub and metrics"""
+    global _latency_tracker
+    if _latency_tracker is None:
+        with _latency_tracker_lock:
+            if _latency_tracker is None:
+                _latency_tracker = LatencyTracker()
+    return _latency_tracker
+
+
+def register_prometheus_collector(
+    tracker: Optional[LatencyTracker] = None, registry: Any = None
+) -> LatencyCollector:
+    """Expose tracker (default: the shared one) on a Prometheus registry once"""
+    from prometheus_client import REGISTRY
+
+    registry = registry if registry is not None else REGISTRY
+    existing = _registered_collectors.get(id(registry))
+    if existing is not None:
+        return existing
+    collector = LatencyCollector(tracker or get_latency_tracker())
+    registry.register(collector)
+    _registered_collectors[id(registry)] = collector
+    return collector
@@ -0,0 +1,491 @@
+"""
+Live Strategy Signals on Completed Bars
+
+Runs the backtest strategies (SMA crossover, RSI mean reversion) live with
+the streaming indicators from backend.core.analytics.indicators, so live
+values and signals match what BacktestEngine computes on the same candles.
+
+    - Completed bars arrive from BarAggregator.bar_callbacks and are buffered;
+      process() (background thread or manual) applies them in rounds, one
+      vectorized indicator update per round for every instrument with a bar.
+    - Each instrument gets a state slot. A new instrument is warmed from its
+      stored candles_new history before its first live bar, without signals.
+    - Signals follow the strategies' entry/exit rules: BUY when the signal
+      state steps up (fast SMA crosses above slow, RSI drops below oversold),
+      SELL when it steps down. They are written to trading_signals, which
+      /api/signals reads, and the latest indicator values per instrument to
+      live_signal_snapshot.
+
+The engine runs in the feed process (websocket_server), where ticks are
+published and bars completed; it acquires its instruments upstream through
+the SubscriptionManager. Other processes (the REST API) only read the
+persisted rows with read_live_signals().
+
+Usage:
+    # feed process
+    engine = get_live_signal_engine(["NSE_INDEX|Nifty 50"], symbol_map={"NSE_INDEX|Nifty 50": "NIFTY"})
+    ...
+    engine.snapshot()        # latest close, SMAs and RSI per instrument
+
+    # any process
+    read_live_signals("market_data.db", ["NSE_INDEX|Nifty 50"])
+"""
+
+import logging
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backend.core.analytics.backtest_engine import RSIStrategy, SMAStrategy
+from backend.core.analytics.indicators import StreamingRSI, StreamingSMA
+from backend.data.database.database_pool import get_db_pool
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = {1: "BUY", -1: "SELL"}
+SUBSCRIPTION_CONSUMER = "live_signals"
+SNAPSHOT_FIELDS = ("close", "sma_fast", "sma_slow", "rsi", "sma_state", "rsi_state")
+
+
+class SignalStore:
+    """Batched writer for trading_signals and the live_signal_snapshot table"""
+
+    def __init__(self, db_path: str = "market_data.db"):
+        self.db_path = db_path
+        self.db_pool = get_db_pool(db_path)
+        self.signals_written = 0
+        self._init_database()
+
+    def _init_database(self):
+        with self.db_pool.get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS trading_signals (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    symbol TEXT NOT NULL,
+                    strategy TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    confidence REAL,
+                    entry_price REAL,
+                    target_price REAL,
+                    stop_loss REAL,
+                    generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS live_signal_snapshot (
+                    instrument_key TEXT PRIMARY KEY,
+                    symbol TEXT NOT NULL,
+                    bar_end INTEGER,
+                    close REAL,
+                    sma_fast REAL,
+                    sma_slow REAL,
+                    rsi REAL,
+                    sma_state INTEGER,
+                    rsi_state INTEGER,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+
+    def write_signals(self, signals: List[Dict[str, Any]]) -> int:
+        """Insert signals in one transaction; returns rows written"""
+        if not signals:
+            return 0
+        rows = [
+            (s["symbol"], s["strategy"], s["action"], s.get("confidence"), s["price"], s["generated_at"])
+            for s in signals
+        ]
+        with self.db_pool.get_connection() as conn:
+            conn.executemany(
+                """
+                INSERT INTO trading_signals (symbol, strategy, action, confidence, entry_price, generated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+            conn.commit()
+        self.signals_written += len(rows)
+        return len(rows)
+
+    def write_snapshot(self, rows: List[Dict[str, Any]]) -> int:
+        """Upsert the latest indicator values per instrument (LiveSignalEngine.snapshot rows)"""
+        if not rows:
+            return 0
+        values = [
+            (row["instrument_key"], row["symbol"], row["bar_end"], *(row[name] for name in SNAPSHOT_FIELDS))
+            for row in rows
+        ]
+        with self.db_pool.get_connection() as conn:
+            conn.executemany(
+                f"""
+                INSERT OR REPLACE INTO live_signal_snapshot
+                (instrument_key, symbol, bar_end, {", ".join(SNAPSHOT_FIELDS)})
+                VALUES (?, ?, ?, {", ".join("?" * len(SNAPSHOT_FIELDS))})
+            """,
+                values,
+            )
+            conn.commit()
+        return len(values)
+
+
+class LiveSignalEngine:
+    """
+    Streaming SMA-crossover and RSI signals for many instruments.
+
+    Args:
+        timeframe: Bar timeframe to consume (others are ignored)
+        sma_params: SMAStrategy params (fast_period, slow_period)
+        rsi_params: RSIStrategy params (rsi_period, thresholds, rsi_smoothing)
+        store: Signal writer with write_signals(signals) and write_snapshot(rows);
+               None keeps them in memory
+        instruments: Instrument keys to compute (None: every bar of the timeframe)
+        symbol_map: instrument_key -> trading symbol for stored signals
+        history_db: Database with candles_new to warm new instruments from
+        warmup_bars: History bars loaded per new instrument
+        capacity: Initial instrument slots (grows as needed)
+        process_interval: Background processing period in seconds (start())
+    """
+
+    def __init__(
+        self,
+        timeframe: str = "1m",
+        sma_params: Optional[Dict] = None,
+        rsi_params: Optional[Dict] = None,
+        store: Optional[SignalStore] = None,
+        instruments: Optional[Iterable[str]] = None,
+        symbol_map: Optional[Dict[str, str]] = None,
+        history_db: Optional[str] = None,
+        warmup_bars: int = 200,
+        capacity: int = 256,
+        process_interval: float = 1.0,
+    ):
+        self.timeframe = timeframe
+        self.sma_strategy = SMAStrategy(sma_params)
+        self.rsi_strategy = RSIStrategy(rsi_params)
+        self.store = store
+        self.instruments = frozenset(instruments) if instruments is not None else None
+        self.symbol_map = symbol_map or {}
+        self.history_db = history_db
+        self.warmup_bars = warmup_bars
+        self.process_interval = process_interval
+
+        sma, rsi = self.sma_strategy.params, self.rsi_strategy.params
+        self.fast = StreamingSMA(sma["fast_period"], capacity)
+        self.slow = StreamingSMA(sma["slow_period"], capacity)
+        self.rsi = StreamingRSI(rsi["rsi_period"], capacity, rsi["rsi_smoothing"])
+        self.capacity = capacity
+
+        self._slots: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._state = {name: np.zeros(capacity, dtype=np.int8) for name in ("sma", "rsi")}
+        self._latest = {name: np.full(capacity, np.nan) for name in ("close", "sma_fast", "sma_slow", "rsi")}
+        self._bar_time = np.zeros(capacity, dtype=np.int64)
+
+        self._lock = threading.RLock()
+        self._pending: List[Any] = []
+        self.recent_signals: Deque[Dict[str, Any]] = deque(maxlen=1000)
+        self.bars_processed = 0
+        self.signals_generated = 0
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._subscriptions = None
+
+    # -------------------------------------------------------------- ingestion
+
+    def on_bar(self, bar: Any) -> None:
+        """BarAggregator callback: buffer completed bars of our timeframe and instruments"""
+        if bar.timeframe != self.timeframe:
+            return
+        if self.instruments is not None and bar.instrument_key not in self.instruments:
+            return
+        with self._lock:
+            self._pending.append(bar)
+
+    def process(self) -> List[Dict[str, Any]]:
+        """Apply buffered bars, store the resulting signals and refresh the snapshot"""
+        with self._lock:
+            bars, self._pending = self._pending, []
+            signals = self.process_bars(bars)
+            updated = self.snapshot({bar.instrument_key for bar in bars}) if bars else []
+        if self.store is not None:
+            try:
+                self.store.write_signals(signals)
+                self.store.write_snapshot(updated)
+            except Exception as e:
+                logger.error(f"[LiveSignals] Failed to store {len(signals)} signals and snapshot: {e}")
+        return signals
+
+    def process_bars(self, bars: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Update indicators with completed bars (oldest first per instrument); returns new signals"""
+        rounds: List[List[Any]] = []
+        seen: Dict[str, int] = {}
+        for bar in sorted(bars, key=lambda b: b.start):
+            n = seen.get(bar.instrument_key, 0)
+            seen[bar.instrument_key] = n + 1
+            if n == len(rounds):
+                rounds.append([])
+            rounds[n].append(bar)
+
+        signals = []
+        for batch in rounds:
+            keys = [bar.instrument_key for bar in batch]
+            self._warm_new(keys, min(bar.start for bar in batch))
+            signals.extend(self._update(
+                self._slot_index(keys),
+                np.array([bar.close for bar in batch], dtype=np.float64),
+                np.array([bar.end for bar in batch], dtype=np.int64),
+                emit=True,
+            ))
+        return signals
+
+    def warm(self, closes: Dict[str, Iterable[float]]) -> None:
+        """Feed close histories (oldest first) without emitting signals"""
+        histories = {key: np.asarray(list(values), dtype=np.float64) for key, values in closes.items()}
+        histories = {key: values for key, values in histories.items() if len(values)}
+        if not histories:
+            return
+        slots = self._slot_index(list(histories))
+        lengths = np.array([len(values) for values in histories.values()])
+        matrix = np.full((lengths.max(), len(histories)), np.nan)
+        for column, values in enumerate(histories.values()):
+            matrix[: len(values), column] = values
+        with self._lock:
+            for t in range(len(matrix)):
+                present = lengths > t
+                self._update(slots[present], matrix[t, present], None, emit=False)
+
+    # ---------------------------------------------------------------- updates
+
+    def _slot_index(self, keys: List[str]) -> np.ndarray:
+        new = [key for key in dict.fromkeys(keys) if key not in self._slots]
+        for key in new:
+            self._slots[key] = len(self._keys)
+            self._keys.append(key)
+        if len(self._keys) > self.capacity:
+            self._grow(max(len(self._keys), 2 * self.capacity))
+        return np.array([self._slots[key] for key in keys], dtype=np.intp)
+
+    def _grow(self, capacity: int) -> None:
+        for indicator in (self.fast, self.slow, self.rsi):
+            indicator.resize(capacity)
+        pad = capacity - self.capacity
+        self._state = {name: np.pad(values, (0, pad)) for name, values in self._state.items()}
+        self._latest = {name: np.pad(values, (0, pad), constant_values=np.nan) for name, values in self._latest.items()}
+        self._bar_time = np.pad(self._bar_time, (0, pad))
+        self.capacity = capacity
+
+    def _warm_new(self, keys: List[str], before: int) -> None:
+        """Warm instruments seen for the first time from stored candles older than `before`"""
+        new = [key for key in keys if key not in self._slots]
+        if not new or not self.history_db:
+            return
+        self.warm(self.load_history(new, before))
+
+    def load_history(self, keys: List[str], before: int) -> Dict[str, np.ndarray]:
+        """Last warmup_bars closes per instrument from candles_new (oldest first)"""
+        histories = {}
+        try:
+            conn = sqlite3.connect(self.history_db)
+            try:
+                for key in keys:
+                    rows = conn.execute(
+                        """
+                        SELECT close FROM candles_new
+                        WHERE instrument_key = ? AND timeframe = ? AND timestamp < ?
+                        ORDER BY timestamp DESC LIMIT ?
+                    """,
+                        (key, self.timeframe, before, self.warmup_bars),
+                    ).fetchall()
+                    histories[key] = np.array([row[0] for row in reversed(rows)], dtype=np.float64)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"[LiveSignals] History warm-up unavailable: {e}")
+        return histories
+
+    def _update(
+        self, slots: np.ndarray, closes: np.ndarray, bar_end: Optional[np.ndarray], emit: bool
+    ) -> List[Dict[str, Any]]:
+        fast = self.fast.update(closes, slots)
+        slow = self.slow.update(closes, slots)
+        rsi = self.rsi.update(closes, slots)
+        rsi_params = self.rsi_strategy.params
+
+        # Signal states exactly as SMAStrategy / RSIStrategy define them
+        states = {
+            "sma": np.nan_to_num(np.sign(fast - slow)).astype(np.int8),
+            "rsi": np.where(rsi < rsi_params["oversold_threshold"], 1,
+                            np.where(rsi > rsi_params["overbought_threshold"], -1, 0)).astype(np.int8),
+        }
+        steps = {name: np.sign(state - self._state[name][slots]) for name, state in states.items()}
+        for name, state in states.items():
+            self._state[name][slots] = state
+
+        for name, values in (("close", closes), ("sma_fast", fast), ("sma_slow", slow), ("rsi", rsi)):
+            self._latest[name][slots] = values
+        if bar_end is not None:
+            self._bar_time[slots] = bar_end
+        self.bars_processed += len(slots)
+        if not emit:
+            return []
+
+        signals = []
+        for name, strategy in (("sma", self.sma_strategy), ("rsi", self.rsi_strategy)):
+            for i in np.flatnonzero(steps[name]):
+                key = self._keys[slots[i]]
+                signals.append({
+                    "instrument_key": key,
+                    "symbol": self.symbol_map.get(key, key),
+                    "strategy": strategy.name,
+                    "action": ACTIONS[int(steps[name][i])],
+                    "price": float(closes[i]),
+                    "generated_at": datetime.fromtimestamp(int(bar_end[i]), timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                })
+        self.recent_signals.extend(signals)
+        self.signals_generated += len(signals)
+        return signals
+
+    # ---------------------------------------------------------------- queries
+
+    def snapshot(self, keys: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Latest close, indicator values and signal states per instrument"""
+        with self._lock:
+            keys = list(self._keys) if keys is None else [k for k in keys if k in self._slots]
+            rows = []
+            for key in keys:
+                slot = self._slots[key]
+                row = {"instrument_key": key, "symbol": self.symbol_map.get(key, key),
+                       "bar_end": int(self._bar_time[slot])}
+                for name, values in self._latest.items():
+                    value = values[slot]
+                    row[name] = None if np.isnan(value) else round(float(value), 4)
+                row.update({f"{name}_state": int(values[slot]) for name, values in self._state.items()})
+                rows.append(row)
+        return rows
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "timeframe": self.timeframe,
+            "instruments": len(self._keys),
+            "pending_bars": len(self._pending),
+            "bars_processed": self.bars_processed,
+            "signals_generated": self.signals_generated,
+            "signals_written": self.store.signals_written if self.store else 0,
+        }
+
+    # -------------------------------------------------------------- lifecycle
+
+    def attach(self, aggregator) -> None:
+        """Consume completed bars from a BarAggregator"""
+        aggregator.bar_callbacks.append(self.on_bar)
+
+    def acquire(self, manager, mode: str = "full") -> None:
+        """Hold upstream feed subscriptions for the instrument universe until stop()"""
+        if not self.instruments:
+            return
+        manager.acquire(SUBSCRIPTION_CONSUMER, sorted(self.instruments), mode=mode)
+        self._subscriptions = manager
+
+    def start(self) -> None:
+        """Background thread that processes buffered bars"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.process_interval):
+                self.process()
+
+        self._thread = threading.Thread(target=loop, name="live-signals", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop and process everything still buffered"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._subscriptions is not None:
+            self._subscriptions.release(SUBSCRIPTION_CONSUMER)
+            self._subscriptions = None
+        self.process()
+
+
+def read_live_signals(
+    db_path: str, instrument_keys: Optional[Iterable[str]] = None, limit: int = 50
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Persisted live view for processes that do not run the engine: latest
+    indicator values per instrument and the most recent live signals.
+    Only reads; empty lists until the feed process has written anything.
+    """
+    keys = list(instrument_keys) if instrument_keys else None
+    strategies = (SMAStrategy().name, RSIStrategy().name)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        query = "SELECT * FROM live_signal_snapshot"
+        params: List[Any] = []
+        if keys:
+            query += f" WHERE instrument_key IN ({', '.join('?' * len(keys))})"
+            params = keys
+        instruments = [dict(row) for row in conn.execute(query + " ORDER BY instrument_key", params)]
+
+        query = "SELECT symbol, strategy, action, entry_price, generated_at FROM trading_signals"
+        query += f" WHERE strategy IN ({', '.join('?' * len(strategies))})"
+        params = list(strategies)
+        symbols = [row["symbol"] for row in instruments]
+        if keys:
+            query += f" AND symbol IN ({', '.join('?' * len(symbols))})"
+            params += symbols
+        signals = [] if keys and not symbols else [
+            dict(row) for row in conn.execute(query + " ORDER BY generated_at DESC, id DESC LIMIT ?", params + [limit])
+        ]
+    except sqlite3.OperationalError as e:
+        logger.debug(f"[LiveSignals] No live signals stored yet: {e}")
+        return {"instruments": [], "signals": []}
+    finally:
+        conn.close()
+    return {"instruments": instruments, "signals": signals}
+
+
+_live_signal_engine: Optional[LiveSignalEngine] = None
+_live_signal_engine_lock = threading.Lock()
+
+
+def get_live_signal_engine(
+    instrument_keys: Iterable[str],
+    symbol_map: Optional[Dict[str, str]] = None,
+    db_path: str = "market_data.db",
+    mode: str = "full",
+) -> LiveSignalEngine:
+    """
+    Process-wide engine for the feed process: consumes the shared bar
+    aggregator, acquires instrument_keys upstream through the
+    SubscriptionManager and stores signals in db_path.
+    """
+    global _live_signal_engine
+    if _live_signal_engine is None:
+        with _live_signal_engine_lock:
+            if _live_signal_engine is None:
+                from backend.services.streaming.bar_aggregator import get_bar_aggregator
+                from backend.services.streaming.subscription_manager import get_subscription_manager
+
+                engine = LiveSignalEngine(
+                    store=SignalStore(db_path), instruments=instrument_keys,
+                    symbol_map=symbol_map, history_db=db_path,
+                )
+                manager = get_subscription_manager()
+                engine.attach(get_bar_aggregator(db_path))
+                engine.acquire(manager, mode=mode)
+                engine.start()
+                logger.info(f"[LiveSignals] Computing signals for {len(engine.instruments)} instruments")
+                _live_signal_engine = engine
+    return _live_signal_engine
@@ -0,0 +1,356 @@
+"""
+Order Book Depth - Multi-level depth per instrument in compact arrays
+
+Maintains bid/ask depth for every streamed instrument from depth-carrying
+feed messages (full: 5 levels, full_d30: 30 levels, option_greeks: 1 level)
+in preallocated NumPy row blocks, one row per instrument:
+
+    bid_px / bid_qty / ask_px / ask_qty   levels, best first
+    cum_bid_qty / cum_ask_qty             cumulative quantity per level
+    cum_bid_val / cum_ask_val             cumulative notional per level
+
+Cumulative columns are refreshed on every update, so best bid/ask, spread,
+mid, imbalance and depth-to-level reads are O(1), and a fill estimate for
+any quantity is one binary search (no per-query walks of the book).
+
+Updates are incremental: a message with n levels rewrites levels [0, n)
+of its side in place. Deeper levels from an earlier, deeper message (e.g.
+option_greeks top-of-book after a full snapshot) are kept only while they
+still sit behind the new top levels; otherwise they are cut off.
+
+Usage:
+    books = get_order_book_manager()          # fed by the shared tick bus
+    book = books.get_book("NSE_FO|43885")
+    book.spread, book.imbalance(levels=5), book.cumulative_depth("BUY", 3)
+    books.estimate_fill("NSE_FO|43885", "BUY", 1500)
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_LEVELS = 30
+
+
+class DepthBook:
+    """Read view of one instrument's row in an OrderBookManager"""
+
+    __slots__ = ("instrument_key", "_m", "_row")
+
+    def __init__(self, instrument_key: str, manager: "OrderBookManager", row: int):
+        self.instrument_key = instrument_key
+        self._m = manager
+        self._row = row
+
+    @property
+    def bid_levels(self) -> int:
+        return int(self._m.bid_n[self._row])
+
+    @property
+    def ask_levels(self) -> int:
+        return int(self._m.ask_n[self._row])
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return float(self._m.bid_px[self._row, 0]) if self._m.bid_n[self._row] else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self._m.ask_px[self._row, 0]) if self._m.ask_n[self._row] else None
+
+    @property
+    def best_bid_qty(self) -> int:
+        return int(self._m.bid_qty[self._row, 0]) if self._m.bid_n[self._row] else 0
+
+    @property
+    def best_ask_qty(self) -> int:
+        return int(self._m.ask_qty[self._row, 0]) if self._m.ask_n[self._row] else 0
+
+    @property
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid, self.best_ask
+        return ask - bid if bid is not None and ask is not None else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best_bid, self.best_ask
+        return (bid + ask) / 2 if bid is not None and ask is not None else None
+
+    @property
+    def updated_at(self) -> float:
+        return float(self._m.updated_at[self._row])
+
+    def cumulative_depth(self, side: str, levels: Optional[int] = None) -> int:
+        """Total quantity resting on side ('BUY' = bids) within the top levels"""
+        m, row = self._m, self._row
+        if side.upper() in ("BUY", "BID"):
+            n, cum = m.bid_n[row], m.cum_bid_qty
+        else:
+            n, cum = m.ask_n[row], m.cum_ask_qty
+        k = n if levels is None else min(levels, n)
+        return int(cum[row, k - 1]) if k else 0
+
+    def imbalance(self, levels: Optional[int] = None) -> Optional[float]:
+        """(bid qty - ask qty) / (bid qty + ask qty) over the top levels, in [-1, 1]"""
+        bids = self.cumulative_depth("BID", levels)
+        asks = self.cumulative_depth("ASK", levels)
+        total = bids + asks
+        return (bids - asks) / total if total else None
+
+    def levels(self) -> Dict[str, List[Tuple[float, int]]]:
+        """Copy of the book as (price, qty) lists, best first"""
+        m, row = self._m, self._row
+        nb, na = int(m.bid_n[row]), int(m.ask_n[row])
+        return {
+            "bids": [(float(p), int(q)) for p, q in zip(m.bid_px[row, :nb], m.bid_qty[row, :nb])],
+            "asks": [(float(p), int(q)) for p, q in zip(m.ask_px[row, :na], m.ask_qty[row, :na])],
+        }
+
+    def estimate_fill(self, side: str, quantity: int) -> Dict[str, Any]:
+        return self._m.estimate_fill(self.instrument_key, side, quantity)
+
+    def to_dict(self) -> Dict[str, Any]:
+        mid = self.mid
+        spread = self.spread
+        return {
+            "instrument_key": self.instrument_key,
+            "bid": self.best_bid,
+            "bid_qty": self.best_bid_qty,
+            "ask": self.best_ask,
+            "ask_qty": self.best_ask_qty,
+            "spread": spread,
+            "spread_pct": spread / mid * 100 if spread is not None and mid else None,
+            "mid": mid,
+            "imbalance": self.imbalance(),
+            "bid_depth": self.cumulative_depth("BID"),
+            "ask_depth": self.cumulative_depth("ASK"),
+            "bid_levels": self.bid_levels,
+            "ask_levels": self.ask_levels,
+            "updated_at": self.updated_at,
+        }
+
+
+class OrderBookManager:
+    """
+    Depth books for many instruments in shared NumPy arrays.
+
+    Args:
+        max_levels: Levels stored per side (30 covers full_d30)
+        initial_capacity: Instrument rows preallocated (doubles when full)
+    """
+
+    def __init__(self, max_levels: int = DEFAULT_MAX_LEVELS, initial_capacity: int = 256):
+        self.max_levels = max_levels
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}
+        self._books: Dict[str, DepthBook] = {}
+        self._allocate(initial_capacity)
+        self.updates = 0
+        self.truncations = 0
+        self._subscription = None
+
+    def _allocate(self, capacity: int) -> None:
+        shape = (capacity, self.max_levels)
+        old = getattr(self, "bid_px", None)
+        arrays = {}
+        for name in ("bid_px", "bid_qty", "ask_px", "ask_qty",
+                     "cum_bid_qty", "cum_ask_qty", "cum_bid_val", "cum_ask_val"):
+            arrays[name] = np.zeros(shape, dtype=np.float64)
+        arrays["bid_n"] = np.zeros(capacity, dtype=np.int16)
+        arrays["ask_n"] = np.zeros(capacity, dtype=np.int16)
+        arrays["updated_at"] = np.zeros(capacity, dtype=np.float64)
+        if old is not None:
+            used = old.shape[0]
+            for name, array in arrays.items():
+                array[:used] = getattr(self, name)
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def _row_for(self, instrument_key: str) -> int:
+        row = self._rows.get(instrument_key)
+        if row is None:
+            row = len(self._rows)
+            if row >= self.capacity:
+                self._allocate(self.capacity * 2)
+            self._rows[instrument_key] = row
+            self._books[instrument_key] = DepthBook(instrument_key, self, row)
+        return row
+
+    # --------------------------------------------------------------- updates
+
+    def update(
+        self,
+        instrument_key: str,
+        depth: Sequence[Tuple[float, float, float, float]],
+        ts: Optional[float] = None,
+    ) -> None:
+        """Apply (bid_qty, bid_price, ask_qty, ask_price) levels, best first"""
+        if not depth:
+            return
+        with self._lock:
+            row = self._row_for(instrument_key)
+            levels = np.asarray(depth[: self.max_levels], dtype=np.float64)
+            self._update_side(row, levels[:, 1], levels[:, 0], self.bid_px, self.bid_qty,
+                              self.bid_n, self.cum_bid_qty, self.cum_bid_val, bids=True)
+            self._update_side(row, levels[:, 3], levels[:, 2], self.ask_px, self.ask_qty,
+                              self.ask_n, self.cum_ask_qty, self.cum_ask_val, bids=False)
+            self.updated_at[row] = ts if ts else time.time()
+            self.updates += 1
+
+    def _update_side(self, row, prices, qtys, px, qty, count, cum_qty, cum_val, bids: bool) -> None:
+        # Proto3 omits empty levels as zeros: the side ends at the first empty one
+        valid = (prices > 0) & (qtys > 0)
+        n = len(prices) if valid.all() else int(np.argmin(valid))
+        old_n = int(count[row])
+
+        px[row, :n] = prices[:n]
+        qty[row, :n] = qtys[:n]
+        keep = n
+        if len(prices) < old_n and n == len(prices) and n:
+            # Shallower message: keep deeper levels that still sit behind it
+            deeper = px[row, n:old_n]
+            behind = deeper < prices[n - 1] if bids else deeper > prices[n - 1]
+            keep = n + (old_n - n if behind.all() else int(np.argmin(behind)))
+            if keep < old_n:
+                self.truncations += 1
+        count[row] = keep
+        if keep:
+            np.cumsum(qty[row, :keep], out=cum_qty[row, :keep])
+            np.cumsum(px[row, :keep] * qty[row, :keep], out=cum_val[row, :keep])
+
+    def on_ticks(self, ticks: Iterable[Any]) -> None:
+        """TickBus callback: Tick objects with .depth, or quote dicts"""
+        for item in ticks:
+            if isinstance(item, dict):
+                key = item.get("instrument_key") or item.get("symbol")
+                depth = item.get("depth")
+                if depth is None and item.get("bid_price") is not None:
+                    depth = ((item.get("bid_qty") or 0, item["bid_price"],
+                              item.get("ask_qty") or 0, item.get("ask_price") or 0),)
+                if key and depth:
+                    self.update(key, depth)
+            elif getattr(item, "depth", None):
+                self.update(item.instrument_key, item.depth, item.received_ts)
+
+    # --------------------------------------------------------------- queries
+
+    def get_book(self, instrument_key: str) -> Optional[DepthBook]:
+        return self._books.get(instrument_key)
+
+    def best_bid_ask(self, instrument_key: str) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        book = self._books.get(instrument_key)
+        return (book.best_bid, book.best_ask) if book else None
+
+    def estimate_fill(self, instrument_key: str, side: str, quantity: int) -> Dict[str, Any]:
+        """
+        Walk the visible book for a market order of quantity.
+
+        BUY orders lift asks, SELL orders hit bids. Returns filled/unfilled
+        quantity, average and worst price, levels consumed and slippage
+        against the touch and the mid. Unfilled is non-zero when the order
+        is larger than the visible depth.
+        """
+        book = self._books.get(instrument_key)
+        result = {"instrument_key": instrument_key, "side": side.upper(), "quantity": quantity,
+                  "filled": 0, "unfilled": quantity, "avg_price": None, "worst_price": None,
+                  "levels": 0, "slippage": None, "slippage_bps": None}
+        if book is None or quantity <= 0:
+            return result
+
+        with self._lock:
+            row = self._rows[instrument_key]
+            if side.upper() == "BUY":
+                n, px, cum_qty, cum_val, touch = self.ask_n[row], self.ask_px, self.cum_ask_qty, self.cum_ask_val, book.best_ask
+            else:
+                n, px, cum_qty, cum_val, touch = self.bid_n[row], self.bid_px, self.cum_bid_qty, self.cum_bid_val, book.best_bid
+            if not n:
+                return result
+            cum = cum_qty[row, :n]
+            # First level whose cumulative quantity covers the order
+            k = int(np.searchsorted(cum, quantity))
+            if k >= n:
+                filled = int(cum[-1])
+                value = float(cum_val[row, n - 1])
+                worst = float(px[row, n - 1])
+                k = n - 1
+            else:
+                before_qty = float(cum[k - 1]) if k else 0.0
+                before_val = float(cum_val[row, k - 1]) if k else 0.0
+                worst = float(px[row, k])
+                filled = quantity
+                value = before_val + (quantity - before_qty) * worst
+            mid = book.mid
+
+        avg = value / filled
+        slippage = avg - touch if side.upper() == "BUY" else touch - avg
+        result.update(
+            filled=filled,
+            unfilled=quantity - filled,
+            avg_price=avg,
+            worst_price=worst,
+            levels=k + 1,
+            slippage=slippage,
+            slippage_bps=abs(avg - mid) / mid * 10000 if mid else None,
+        )
+        return result
+
+    def spreads(self) -> Dict[str, float]:
+        """Spread of every instrument with both sides, computed across rows at once"""
+        with self._lock:
+            used = len(self._rows)
+            both = (self.bid_n[:used] > 0) & (self.ask_n[:used] > 0)
+            spread = self.ask_px[:used, 0] - self.bid_px[:used, 0]
+            keys = list(self._rows)
+        return {keys[i]: float(spread[i]) for i in np.flatnonzero(both)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "instruments": len(self._rows),
+            "capacity": self.capacity,
+            "max_levels": self.max_levels,
+            "updates": self.updates,
+            "truncations": self.truncations,
+            "memory_bytes": sum(getattr(self, name).nbytes for name in (
+                "bid_px", "bid_qty", "ask_px", "ask_qty", "cum_bid_qty", "cum_ask_qty",
+                "cum_bid_val", "cum_ask_val", "bid_n", "ask_n", "updated_at")),
+        }
+
+    # ------------------------------------------------------------- lifecycle
+
+    def attach(self, bus, **subscription) -> Any:
+        """Maintain books from a TickBus (all instruments by default)"""
+        if not subscription:
+            subscription = {"all_instruments": True}
+        self._subscription = bus.subscribe(
+            name="order-books", callback=self.on_ticks, capacity=65536, **subscription
+        )
+        return self._subscription
+
+    def stop(self) -> None:
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+
+_order_book_manager: Optional[OrderBookManager] = None
+_order_book_manager_lock = threading.Lock()
+
+
+def get_order_book_manager() -> OrderBookManager:
+    """Process-wide depth books fed by the shared tick bus"""
+    global _order_book_manager
+    if _order_book_manager is None:
+        with _order_book_manager_lock:
+            if _order_book_manager is None:
+                from backend.services.streaming.tick_bus import get_tick_bus
+
+                manager = OrderBookManager()
+                manager.attach(get_tick_bus())
+                _order_book_manager = manager
+    return _order_book_manager
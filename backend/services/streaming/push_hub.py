@@ -0,0 +1,312 @@
+"""
+Push Hub - Tick-driven client updates with per-client conflation
+
+Bridges the internal tick bus to Socket.IO clients. Instead of polling the
+REST API per room, the hub receives ticks as they arrive and pushes them to
+each interested client on a short conflation window:
+
+    - Per client, only the latest tick per instrument is kept between
+      flushes (latest value wins), so a fast instrument costs a client at
+      most one message per window no matter how many ticks arrive.
+    - Each client has a bandwidth budget (token bucket, bytes/second). When
+      a flush would exceed it, the remaining instruments stay pending and
+      keep conflating until budget is available again; nothing queues up
+      without bound and one slow client never delays the others.
+
+Usage:
+    hub = PushHub(emit=lambda event, data, sid: socketio.emit(event, data, to=sid))
+    hub.attach(get_tick_bus())
+    hub.subscribe(sid, "NSE_INDEX|Nifty 50", topic="NIFTY")
+    socketio.start_background_task(hub.run, socketio.sleep)
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.services.streaming.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def tick_to_quote(tick: Any) -> Dict[str, Any]:
+    """Quote payload from a Tick, using the field names the UI reads"""
+    ltp = tick.ltp
+    cp = tick.cp
+    change = ltp - cp if ltp is not None and cp else None
+    quote = {
+        "instrument_key": tick.instrument_key,
+        "ltp": ltp,
+        "last_price": ltp,
+        "net_change": round(change, 2) if change is not None else None,
+        "change": round(change / cp * 100, 2) if change is not None else None,
+        "volume": tick.volume,
+        "oi": tick.oi,
+        "ltt": tick.ltt,
+    }
+    if tick.bid_price is not None:
+        quote["bid_price"] = tick.bid_price
+        quote["bid_qty"] = tick.bid_qty
+        quote["ask_price"] = tick.ask_price
+        quote["ask_qty"] = tick.ask_qty
+    if tick.open is not None:
+        quote["ohlc"] = {"open": tick.open, "high": tick.high, "low": tick.low, "close": tick.close}
+    return quote
+
+
+class ClientChannel:
+    """Pending updates and accounting for one client"""
+
+    def __init__(self, sid: str, budget: TokenBucket):
+        self.sid = sid
+        self.budget = budget
+        self.pending: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self.topics: Dict[str, str] = {}  # instrument_key -> topic (e.g. symbol)
+        self.last_flush = 0.0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.conflated = 0
+        self.deferred = 0
+
+    def offer(self, instrument_key: str, tick: Any) -> None:
+        if instrument_key in self.pending:
+            self.conflated += 1
+        self.pending[instrument_key] = (self.topics[instrument_key], tick)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscriptions": len(self.topics),
+            "pending": len(self.pending),
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "conflated": self.conflated,
+            "deferred": self.deferred,
+        }
+
+
+class PushHub:
+    """
+    Fans ticks out to Socket.IO clients with conflation and bandwidth limits.
+
+    Args:
+        emit: emit(event, payload, sid) used to send to one client
+        window_seconds: Minimum time between flushes for a client
+        budget_bytes_per_sec: Per-client bandwidth budget
+        event: Event name for pushed updates
+        serializer: Tick -> JSON-serializable quote
+        on_new_instruments: Called with instrument keys that gained their
+                            first subscriber (e.g. to subscribe upstream)
+        on_released_instruments: Called with instrument keys that lost their
+                                 last subscriber
+        latency_tracker: Records tick age at emit ("emit" stage) when given
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[str, Dict[str, Any], str], None],
+        window_seconds: float = 0.25,
+        budget_bytes_per_sec: float = 64 * 1024,
+        event: str = "quote_update",
+        serializer: Callable[[Any], Dict[str, Any]] = tick_to_quote,
+        on_new_instruments: Optional[Callable[[List[str]], None]] = None,
+        on_released_instruments: Optional[Callable[[List[str]], None]] = None,
+        latency_tracker: Optional[Any] = None,
+    ):
+        self.emit = emit
+        self.window_seconds = window_seconds
+        self.budget_bytes_per_sec = budget_bytes_per_sec
+        self.event = event
+        self.serializer = serializer
+        self.on_new_instruments = on_new_instruments
+        self.on_released_instruments = on_released_instruments
+        self.latency = latency_tracker
+
+        self._lock = threading.Lock()
+        # Serializes creating/updating the bus subscription; taken before _lock, never inside it
+        self._bus_lock = threading.Lock()
+        self._channels: Dict[str, ClientChannel] = {}
+        self._routes: Dict[str, Set[str]] = {}  # instrument_key -> sids
+        self.last_tick_time: Dict[str, float] = {}
+
+        self._bus = None
+        self._subscription = None
+        self._running = False
+        self.ticks_received = 0
+        self.emit_errors = 0
+
+    # ---------------------------------------------------------- subscriptions
+
+    def attach(self, bus) -> None:
+        """Receive ticks from a TickBus for the instruments clients want"""
+        self._bus = bus
+        self._sync_bus_subscription()
+
+    def subscribe(self, sid: str, instrument_key: str, topic: Optional[str] = None) -> None:
+        with self._lock:
+            channel = self._channels.get(sid)
+            if channel is None:
+                channel = self._channels[sid] = ClientChannel(
+                    sid, TokenBucket(self.budget_bytes_per_sec)
+                )
+            channel.topics[instrument_key] = topic or instrument_key
+            sids = self._routes.setdefault(instrument_key, set())
+            is_new = not sids
+            sids.add(sid)
+
+        if is_new:
+            self._sync_bus_subscription()
+            if self.on_new_instruments:
+                try:
+                    self.on_new_instruments([instrument_key])
+                except Exception as e:
+                    logger.error(f"[PushHub] Upstream subscribe failed for {instrument_key}: {e}")
+
+    def unsubscribe(self, sid: str, instrument_key: str) -> None:
+        with self._lock:
+            channel = self._channels.get(sid)
+            if channel is not None:
+                channel.topics.pop(instrument_key, None)
+                channel.pending.pop(instrument_key, None)
+            released = [instrument_key] if self._drop_route(instrument_key, sid) else []
+        self._on_released(released)
+
+    def remove_client(self, sid: str) -> None:
+        with self._lock:
+            channel = self._channels.pop(sid, None)
+            released = []
+            if channel is not None:
+                released = [key for key in channel.topics if self._drop_route(key, sid)]
+        self._on_released(released)
+
+    def _on_released(self, instrument_keys: List[str]) -> None:
+        if not instrument_keys:
+            return
+        self._sync_bus_subscription()
+        if self.on_released_instruments:
+            try:
+                self.on_released_instruments(instrument_keys)
+            except Exception as e:
+                logger.error(f"[PushHub] Upstream unsubscribe failed for {instrument_keys}: {e}")
+
+    def _drop_route(self, instrument_key: str, sid: str) -> bool:
+        sids = self._routes.get(instrument_key)
+        if not sids:
+            return False
+        sids.discard(sid)
+        if not sids:
+            del self._routes[instrument_key]
+            return True
+        return False
+
+    def _sync_bus_subscription(self) -> None:
+        """Point the bus subscription at the current routes (the last sync applies the latest state)"""
+        if self._bus is None:
+            return
+        with self._bus_lock:
+            with self._lock:
+                instruments = list(self._routes)
+            if self._subscription is None:
+                if instruments:
+                    self._subscription = self._bus.subscribe(
+                        instruments=instruments, callback=self.on_ticks, name="push-hub", capacity=65536
+                    )
+            else:
+                self._bus.update_subscription(self._subscription, instruments=instruments)
+
+    def subscribed_instruments(self) -> List[str]:
+        with self._lock:
+            return list(self._routes)
+
+    # --------------------------------------------------------------- ingest
+
+    def on_ticks(self, ticks: List[Any]) -> None:
+        now = time.time()
+        with self._lock:
+            routes = self._routes
+            channels = self._channels
+            for tick in ticks:
+                key = tick.instrument_key
+                sids = routes.get(key)
+                if not sids:
+                    continue
+                self.last_tick_time[key] = now
+                for sid in sids:
+                    channels[sid].offer(key, tick)
+            self.ticks_received += len(ticks)
+
+    def is_live(self, instrument_key: str, max_age_seconds: float = 30.0) -> bool:
+        """True if ticks for the instrument arrived recently"""
+        last = self.last_tick_time.get(instrument_key)
+        return last is not None and time.time() - last < max_age_seconds
+
+    # ---------------------------------------------------------------- flush
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """Send due updates to every client; returns messages emitted"""
+        now = time.monotonic() if now is None else now
+        outgoing: List[Tuple[str, Dict[str, Any], Any]] = []
+
+        with self._lock:
+            for channel in self._channels.values():
+                if not channel.pending or now - channel.last_flush < self.window_seconds:
+                    continue
+                channel.last_flush = now
+                timestamp = datetime.now().isoformat()
+                while channel.pending:
+                    instrument_key, (topic, tick) = next(iter(channel.pending.items()))
+                    payload = {"symbol": topic, "data": self.serializer(tick), "timestamp": timestamp}
+                    size = len(json.dumps(payload, default=str))
+                    if not channel.budget.consume(size, now):
+                        # Over budget: keep the rest pending (still conflating)
+                        channel.deferred += len(channel.pending)
+                        break
+                    del channel.pending[instrument_key]
+                    channel.messages_sent += 1
+                    channel.bytes_sent += size
+                    outgoing.append((channel.sid, payload, tick))
+
+        # Emit outside the lock so a slow transport never blocks tick ingest
+        emitted = []
+        for sid, payload, tick in outgoing:
+            try:
+                self.emit(self.event, payload, sid)
+                emitted.append(tick)
+            except Exception as e:
+                self.emit_errors += 1
+                logger.error(f"[PushHub] Emit to {sid} failed: {e}")
+        if self.latency is not None:
+            self.latency.observe_ticks("emit", emitted)
+        return len(outgoing)
+
+    def run(self, sleep: Callable[[float], Any] = time.sleep, tick_seconds: float = 0.05) -> None:
+        """Flush loop; pass socketio.sleep when running under Socket.IO"""
+        self._running = True
+        while self._running:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"[PushHub] Flush failed: {e}", exc_info=True)
+            sleep(tick_seconds)
+
+    def stop(self) -> None:
+        self._running = False
+        with self._bus_lock:
+            if self._subscription is not None:
+                self._subscription.close()
+                self._subscription = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._channels),
+                "instruments": len(self._routes),
+                "ticks_received": self.ticks_received,
+                "emit_errors": self.emit_errors,
+                "window_ms": int(self.window_seconds * 1000),
+                "budget_bytes_per_sec": self.budget_bytes_per_sec,
+                "per_client": {sid: ch.stats() for sid, ch in self._channels.items()},
+            }
@@ -0,0 +1,306 @@
+"""
+Quote Store - Compact latest-quote records in a preallocated structured array
+
+Holds the latest quote of every instrument as one row of a NumPy
+structured array, indexed by a small integer instrument id (preassigned
+from the instrument master, new keys appended). Updates write the fields
+in place, so high-rate streams no longer allocate a dict per instrument
+per tick and the quote set never churns the garbage collector.
+
+Numeric fields live in the array (missing = NaN). String fields such as
+symbol or exchange are kept in a side table and only rewritten when they
+change; other keys in incoming quotes are ignored.
+
+Existing callers keep dict semantics:
+    quotes = QuoteStore()
+    quotes["NSE_EQ|INE009A01021"] = {"ltp": 1520.5, "volume": 120000}
+    quote = quotes.get("NSE_EQ|INE009A01021")    # QuoteView (a Mapping)
+    quote.get("ltp"), quote["volume"], dict(quote), quotes.copy()
+
+Vectorized readers use columns directly:
+    keys, ltp = quotes.keys(), quotes.column("ltp")
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUOTE_FIELDS = (
+    "ltp", "open", "high", "low", "close", "net_change",
+    "volume", "oi", "bid_price", "bid_qty", "ask_price", "ask_qty",
+    "day_high", "day_low", "upper_circuit", "lower_circuit", "iv",
+    "received_ts", "updated_at",
+)
+INT_FIELDS = frozenset(("volume", "oi", "bid_qty", "ask_qty"))
+QUOTE_DTYPE = np.dtype([(name, "f8") for name in QUOTE_FIELDS])
+
+# Upstox market-quote names read through to the stored fields
+ALIASES = {
+    "last_price": "ltp",
+    "upper_circuit_limit": "upper_circuit",
+    "lower_circuit_limit": "lower_circuit",
+    "open_interest": "oi",
+}
+
+_EMPTY_ROW = tuple([np.nan] * len(QUOTE_FIELDS))
+_FIELD_SET = frozenset(QUOTE_FIELDS)
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, (str, bytes, dict, list, tuple)):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten_market_quote(quote: Mapping) -> Dict[str, Any]:
+    """Flat QuoteStore fields from an Upstox market-quote response entry"""
+    ohlc = quote.get("ohlc") or {}
+    depth = quote.get("depth") or {}
+    buy = (depth.get("buy") or [{}])[0]
+    sell = (depth.get("sell") or [{}])[0]
+    ltp = quote.get("last_price")
+    return {
+        "instrument_key": quote.get("instrument_token"),
+        "symbol": quote.get("symbol"),
+        "ltp": ltp if ltp is not None else quote.get("ltp"),
+        "open": ohlc.get("open"),
+        "high": ohlc.get("high"),
+        "low": ohlc.get("low"),
+        "close": ohlc.get("close"),
+        "net_change": quote.get("net_change"),
+        "volume": quote.get("volume"),
+        "oi": quote.get("oi"),
+        "bid_price": buy.get("price"),
+        "bid_qty": buy.get("quantity"),
+        "ask_price": sell.get("price"),
+        "ask_qty": sell.get("quantity"),
+        "upper_circuit": quote.get("upper_circuit_limit"),
+        "lower_circuit": quote.get("lower_circuit_limit"),
+    }
+
+
+def load_instrument_ids(db_path: str) -> List[str]:
+    """Instrument keys from the instrument master in rowid order ([] if unavailable)"""
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute("SELECT instrument_key FROM instruments ORDER BY rowid").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.debug(f"[QuoteStore] No instrument master in {db_path}: {e}")
+        return []
+    return [row[0] for row in rows]
+
+
+class QuoteView(Mapping):
+    """Read-only dict view of one QuoteStore row"""
+
+    __slots__ = ("key", "_store", "_row")
+
+    def __init__(self, key: str, store: "QuoteStore", row: int):
+        self.key = key
+        self._store = store
+        self._row = row
+
+    def _value(self, name: str) -> Any:
+        value = self._store._data[name][self._row]
+        if value != value:  # NaN: field not set
+            return None
+        return int(value) if name in INT_FIELDS else float(value)
+
+    def __getitem__(self, name: str) -> Any:
+        field = ALIASES.get(name, name)
+        if field in _FIELD_SET:
+            value = self._value(field)
+            if value is not None:
+                return value
+        elif name == "ohlc":
+            ohlc = {f: self._value(f) for f in ("open", "high", "low", "close")}
+            if any(v is not None for v in ohlc.values()):
+                return ohlc
+        else:
+            text = self._store._text.get(self._row)
+            if text and name in text:
+                return text[name]
+        raise KeyError(name)
+
+    def __iter__(self) -> Iterator[str]:
+        row = self._store._data[self._row]
+        for name, value in zip(QUOTE_FIELDS, row.tolist()):
+            if value == value:
+                yield name
+        yield from self._store._text.get(self._row, ())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @property
+    def updated_at(self) -> float:
+        return float(self._store._data["updated_at"][self._row])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self[name] for name in self}
+
+    def __repr__(self) -> str:
+        return f"QuoteView({self.key!r}, {self.to_dict()!r})"
+
+
+class QuoteStore:
+    """
+    Latest quote per instrument in one structured array.
+
+    Args:
+        instrument_keys: Keys to preassign ids to (e.g. load_instrument_ids())
+        initial_capacity: Rows preallocated (doubles when full)
+    """
+
+    def __init__(self, instrument_keys: Iterable[str] = (), initial_capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._text: Dict[int, Dict[str, str]] = {}
+        keys = list(dict.fromkeys(instrument_keys))
+        self._data = np.empty(max(initial_capacity, len(keys), 1), dtype=QUOTE_DTYPE)
+        self._data[:] = _EMPTY_ROW
+        self._present = np.zeros(len(self._data), dtype=bool)
+        for key in keys:
+            self.instrument_id(key)
+        self.updates = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def instrument_id(self, key: str) -> int:
+        """Row of key, assigning the next free id to unseen keys"""
+        row = self._ids.get(key)
+        if row is None:
+            with self._lock:
+                row = self._ids.get(key)
+                if row is None:
+                    row = len(self._keys)
+                    if row >= len(self._data):
+                        self._grow(2 * len(self._data))
+                    self._keys.append(key)
+                    self._ids[key] = row
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        data = np.empty(capacity, dtype=QUOTE_DTYPE)
+        data[:] = _EMPTY_ROW
+        data[: len(self._data)] = self._data
+        present = np.zeros(capacity, dtype=bool)
+        present[: len(self._present)] = self._present
+        self._data, self._present = data, present
+
+    # --------------------------------------------------------------- updates
+
+    def update(self, key: str, quote: Mapping, ts: Optional[float] = None) -> int:
+        """Merge the fields present in quote into key's row"""
+        row = self.instrument_id(key)
+        data = self._data
+        text = None
+        for name, value in quote.items():
+            field = ALIASES.get(name, name)
+            if field in _FIELD_SET:
+                number = _number(value)
+                if number is not None:
+                    data[field][row] = number
+            elif isinstance(value, str):
+                if text is None:
+                    text = self._text.setdefault(row, {})
+                if text.get(name) != value:
+                    text[name] = value
+        data["updated_at"][row] = ts if ts is not None else time.time()
+        self._present[row] = True
+        self.updates += 1
+        return row
+
+    def __setitem__(self, key: str, quote: Mapping) -> None:
+        """Replace key's quote (fields absent from quote are cleared)"""
+        row = self.instrument_id(key)
+        self._data[row] = _EMPTY_ROW
+        self._text.pop(row, None)
+        self.update(key, quote)
+
+    def __delitem__(self, key: str) -> None:
+        row = self._ids.get(key)
+        if row is None or not self._present[row]:
+            raise KeyError(key)
+        self._data[row] = _EMPTY_ROW
+        self._text.pop(row, None)
+        self._present[row] = False
+
+    def clear(self) -> None:
+        self._data[:] = _EMPTY_ROW
+        self._present[:] = False
+        self._text.clear()
+
+    # --------------------------------------------------------------- reads
+
+    def __getitem__(self, key: str) -> QuoteView:
+        row = self._ids.get(key)
+        if row is None or not self._present[row]:
+            raise KeyError(key)
+        return QuoteView(key, self, row)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._ids.get(key)
+        if row is None or not self._present[row]:
+            return default
+        return QuoteView(key, self, row)
+
+    def __contains__(self, key: object) -> bool:
+        row = self._ids.get(key)
+        return row is not None and bool(self._present[row])
+
+    def keys(self) -> List[str]:
+        """Keys with a quote, in id order"""
+        used = len(self._keys)
+        return [self._keys[i] for i in np.flatnonzero(self._present[:used])]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return int(self._present[: len(self._keys)].sum())
+
+    def items(self) -> List[tuple]:
+        return [(key, QuoteView(key, self, self._ids[key])) for key in self.keys()]
+
+    def values(self) -> List[QuoteView]:
+        return [view for _, view in self.items()]
+
+    def copy(self) -> Dict[str, Dict[str, Any]]:
+        """Plain dict snapshot: key -> quote dict"""
+        return {key: view.to_dict() for key, view in self.items()}
+
+    def column(self, field: str, keys: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Field values for keys (default: keys()), NaN where unset"""
+        field = ALIASES.get(field, field)
+        keys = self.keys() if keys is None else keys
+        rows = np.fromiter((self._ids.get(k, -1) for k in keys), dtype=np.int64)
+        values = np.full(len(rows), np.nan)
+        known = rows >= 0
+        values[known] = self._data[field][rows[known]]
+        return values
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "instruments": len(self),
+            "ids_assigned": len(self._keys),
+            "capacity": self.capacity,
+            "updates": self.updates,
+            "memory_bytes": self._data.nbytes + self._present.nbytes,
+        }
@@ -0,0 +1,36 @@
+"""
+Rate Limit - Token bucket shared by streaming services
+
+Tokens refill continuously at `rate` per second up to `burst`; a caller
+spends tokens with consume() and is refused (never blocked) when the
+bucket is short. The unit is up to the caller: PushHub spends bytes per
+client, GapBackfiller spends REST requests.
+
+Usage:
+    bucket = TokenBucket(rate=5.0, burst=5.0)
+    if bucket.consume(1):
+        ...
+"""
+
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Budget refilled at `rate` tokens/second up to `burst` tokens"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def consume(self, amount: int, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = now
+        if amount > self.tokens:
+            return False
+        self.tokens -= amount
+        return True
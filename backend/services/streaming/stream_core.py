@@ -0,0 +1,730 @@
+"""
+Asyncio Streaming Core - Staged market data pipeline with backpressure
+
+Replaces the "everything inside _on_message" model of the thread-based
+streamers with independent asyncio stages connected by bounded queues:
+
+    socket --reader--> [raw] --decoder--> [dispatch] --dispatcher--> callbacks
+                                      \\--> [persist] --persister--> DB (batched)
+
+A slow callback or DB write only backs up its own queue; the reader keeps
+draining the socket. Each queue has an overflow policy:
+
+    block        - producer waits (true backpressure)
+    drop_oldest  - evict the oldest item (ring buffer)
+    drop_newest  - reject the incoming item
+    conflate     - keep only the latest item per key (e.g. instrument_key)
+
+A supervisor owns the connection lifecycle and reconnects in a loop with
+full-jitter exponential backoff; there is no recursion and no blocking sleep.
+
+Usage:
+    core = StreamingCore(url=get_authorized_url, on_ticks=[print_ticks],
+                         persist=save_ticks)
+    core.subscribe(["NSE_INDEX|Nifty 50"], mode="full")
+    core.start_in_thread()
+    ...
+    core.get_metrics()
+    core.stop()
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from backend.services.streaming.feed_decoder import FeedDecodeError, decode_feed_response
+from backend.services.streaming.latency import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(str, Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    CONFLATE = "conflate"
+
+
+class TransportClosed(ConnectionError):
+    """Raised by transports when the websocket is closed"""
+
+
+class RingQueue:
+    """
+    Bounded asyncio queue with an overflow policy and lag accounting.
+
+    Lag is the time an item spent queued (enqueue -> dequeue). For conflated
+    queues it is measured from the first unconsumed update of a key, i.e. how
+    stale the oldest pending value is.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+        key_func: Optional[Callable[[Any], Any]] = None,
+        name: str = "queue",
+    ):
+        self.maxsize = maxsize
+        self.policy = OverflowPolicy(policy)
+        self.key_func = key_func
+        self.name = name
+        if self.policy == OverflowPolicy.CONFLATE and key_func is None:
+            raise ValueError("conflate policy requires key_func")
+
+        # conflate: key -> (first_enqueue_ts, latest item); otherwise deque of (ts, item)
+        self._items: Union[deque, OrderedDict] = (
+            OrderedDict() if self.policy == OverflowPolicy.CONFLATE else deque()
+        )
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        self.put_count = 0
+        self.get_count = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.high_watermark = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.avg_lag = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put_nowait(self, item: Any) -> bool:
+        """Enqueue according to the policy; returns False if the item was dropped"""
+        now = time.monotonic()
+        self.put_count += 1
+        items = self._items
+
+        if self.policy == OverflowPolicy.CONFLATE:
+            key = self.key_func(item)
+            if key in items:
+                items[key] = (items[key][0], item)
+                self.conflated += 1
+                return True
+            if len(items) >= self.maxsize:
+                items.popitem(last=False)
+                self.dropped += 1
+            items[key] = (now, item)
+        else:
+            if len(items) >= self.maxsize:
+                if self.policy == OverflowPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == OverflowPolicy.BLOCK:
+                    raise asyncio.QueueFull(self.name)
+                items.popleft()
+                self.dropped += 1
+            items.append((now, item))
+
+        if len(items) > self.high_watermark:
+            self.high_watermark = len(items)
+        if len(items) >= self.maxsize:
+            self._not_full.clear()
+        self._not_empty.set()
+        return True
+
+    async def put(self, item: Any) -> bool:
+        """Enqueue; waits for space only under the block policy"""
+        if self.policy == OverflowPolicy.BLOCK:
+            while len(self._items) >= self.maxsize:
+                await self._not_full.wait()
+        return self.put_nowait(item)
+
+    def _pop(self, now: float) -> Any:
+        if self.policy == OverflowPolicy.CONFLATE:
+            _, (ts, item) = self._items.popitem(last=False)
+        else:
+            ts, item = self._items.popleft()
+        lag = now - ts
+        self.last_lag = lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self.avg_lag += 0.05 * (lag - self.avg_lag)
+        self.get_count += 1
+        return item
+
+    def get_batch_nowait(self, max_items: int) -> List[Any]:
+        now = time.monotonic()
+        batch = []
+        while self._items and len(batch) < max_items:
+            batch.append(self._pop(now))
+        if not self._items:
+            self._not_empty.clear()
+        if len(self._items) < self.maxsize:
+            self._not_full.set()
+        return batch
+
+    async def get_batch(self, max_items: int, timeout: Optional[float] = None) -> List[Any]:
+        """Wait for at least one item (or timeout) and return up to max_items"""
+        if not self._items:
+            try:
+                await asyncio.wait_for(self._not_empty.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        return self.get_batch_nowait(max_items)
+
+    async def get(self) -> Any:
+        return (await self.get_batch(1))[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy.value,
+            "depth": len(self._items),
+            "maxsize": self.maxsize,
+            "high_watermark": self.high_watermark,
+            "put": self.put_count,
+            "get": self.get_count,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "lag_last_ms": round(self.last_lag * 1000, 3),
+            "lag_avg_ms": round(self.avg_lag * 1000, 3),
+            "lag_max_ms": round(self.max_lag * 1000, 3),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+
+
+class AiohttpTransport:
+    """Native asyncio websocket transport (aiohttp)"""
+
+    def __init__(self):
+        self._session = None
+        self._ws = None
+
+    async def connect(self, url: str, headers: Optional[Dict[str, str]] = None):
+        import aiohttp
+
+        self._session = aiohttp.ClientSession()
+        self._ws = await self._session.ws_connect(url, headers=headers, heartbeat=30)
+
+    async def recv(self) -> Union[bytes, str]:
+        import aiohttp
+
+        msg = await self._ws.receive()
+        if msg.type in (aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT):
+            return msg.data
+        raise TransportClosed(f"websocket closed: {msg.type.name}")
+
+    async def send(self, data: bytes):
+        await self._ws.send_bytes(data)
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._session is not None:
+            await self._session.close()
+
+
+class ThreadedWebSocketTransport:
+    """
+    websocket-client transport; blocking recv runs on a dedicated thread.
+
+    Used when aiohttp is not installed. Only the socket read blocks that
+    thread, all processing still happens in the asyncio stages.
+    """
+
+    def __init__(self):
+        self._ws = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ws-recv")
+
+    async def connect(self, url: str, headers: Optional[Dict[str, str]] = None):
+        import websocket
+
+        header = [f"{k}: {v}" for k, v in (headers or {}).items()]
+        loop = asyncio.get_running_loop()
+        self._ws = await loop.run_in_executor(
+            self._executor,
+            lambda: websocket.create_connection(url, header=header, timeout=30),
+        )
+        self._ws.settimeout(None)
+
+    async def recv(self) -> Union[bytes, str]:
+        import websocket
+
+        loop = asyncio.get_running_loop()
+        try:
+            opcode, data = await loop.run_in_executor(self._executor, self._ws.recv_data)
+        except (websocket.WebSocketException, OSError) as e:
+            raise TransportClosed(str(e)) from e
+        if opcode == websocket.ABNF.OPCODE_TEXT:
+            return data.decode("utf-8")
+        if opcode == websocket.ABNF.OPCODE_BINARY:
+            return data
+        raise TransportClosed(f"websocket closed: opcode {opcode}")
+
+    async def send(self, data: bytes):
+        import websocket
+
+        self._ws.send(data, opcode=websocket.ABNF.OPCODE_BINARY)
+
+    async def close(self):
+        if self._ws is not None:
+            try:
+                self._ws.close(timeout=1)
+            except Exception:
+                pass
+        self._executor.shutdown(wait=False)
+
+
+def default_transport_factory():
+    try:
+        import aiohttp  # noqa: F401
+
+        return AiohttpTransport()
+    except ImportError:
+        return ThreadedWebSocketTransport()
+
+
+def build_v3_subscription(method: str, instrument_keys: List[str], mode: Optional[str]) -> bytes:
+    """Upstox V3 feed request (JSON sent as a binary frame)"""
+    data: Dict[str, Any] = {"instrumentKeys": instrument_keys}
+    if mode:
+        data["mode"] = mode
+    return json.dumps({"guid": str(uuid.uuid4()), "method": method, "data": data}).encode("utf-8")
+
+
+def _feed_items(decoded: Any) -> List[Any]:
+    """Normalize decoder output (FeedMessage, list or single item) to a list"""
+    if decoded is None:
+        return []
+    ticks = getattr(decoded, "ticks", None)
+    if ticks is not None:
+        return ticks
+    if isinstance(decoded, list):
+        return decoded
+    return [decoded]
+
+
+class StreamingCore:
+    """
+    Supervised websocket pipeline: reader, decode, dispatch and persist stages.
+
+    Args:
+        url: Websocket URL, or a (blocking) callable returning a fresh
+             authorized URL on every (re)connect
+        decoder: Binary frame -> FeedMessage/list of items
+        text_decoder: Text frame -> items; text frames are counted and
+                      skipped when None (control messages on the V3 feed)
+        on_ticks: Callbacks receiving a list of items; coroutine functions are
+                  awaited, plain functions run on a dedicated dispatch thread
+        persist: Callable receiving batches of items, run on a persist thread
+        on_connection_change: Callables receiving True after each connect and
+                              False after each established connection drops
+        key_func: Item key when dispatch_policy is "conflate"
+        dispatch_policy: Overflow policy of the dispatch queue. Defaults to
+                         drop_oldest (drops counted in queue stats) because
+                         bar building and the tick journal need every tick;
+                         conflate only where latest-value semantics are
+                         wanted (UI fan-out conflates per client instead)
+        headers: Extra websocket handshake headers
+        latency_tracker: Records per-stage tick latency (decode, dispatch,
+                         persist and server-to-receive lag) when given
+    """
+
+    def __init__(
+        self,
+        url: Union[str, Callable[[], str]],
+        decoder: Callable[[Any], Any] = decode_feed_response,
+        text_decoder: Optional[Callable[[str], Any]] = None,
+        on_ticks: Optional[List[Callable[[List[Any]], Any]]] = None,
+        persist: Optional[Callable[[List[Any]], None]] = None,
+        on_connection_change: Optional[List[Callable[[bool], None]]] = None,
+        key_func: Callable[[Any], Any] = lambda tick: tick.instrument_key,
+        headers: Optional[Dict[str, str]] = None,
+        transport_factory: Callable[[], Any] = default_transport_factory,
+        subscription_builder: Callable[[str, List[str], Optional[str]], bytes] = build_v3_subscription,
+        raw_queue_size: int = 2048,
+        raw_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+        dispatch_queue_size: int = 10000,
+        dispatch_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+        persist_queue_size: int = 100000,
+        persist_policy: Union[OverflowPolicy, str] = OverflowPolicy.DROP_OLDEST,
+        dispatch_batch_size: int = 500,
+        persist_batch_size: int = 1000,
+        persist_interval: float = 1.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        stable_after: float = 30.0,
+        max_reconnect_attempts: Optional[int] = None,
+        latency_tracker: Optional[LatencyTracker] = None,
+    ):
+        self.url = url
+        self.decoder = decoder
+        # Stamp ticks with the socket receive time rather than the decode time
+        try:
+            self._decoder_takes_ts = "received_ts" in inspect.signature(decoder).parameters
+        except (TypeError, ValueError):
+            self._decoder_takes_ts = False
+        self.latency = latency_tracker
+        self.text_decoder = text_decoder
+        self.on_ticks = list(on_ticks or [])
+        self.persist = persist
+        self.connection_listeners = list(on_connection_change or [])
+        self.key_func = key_func
+        self.headers = headers
+        self.transport_factory = transport_factory
+        self.subscription_builder = subscription_builder
+
+        self._queue_config = {
+            "raw": (raw_queue_size, raw_policy, None),
+            "dispatch": (dispatch_queue_size, dispatch_policy, key_func),
+            "persist": (persist_queue_size, persist_policy, None),
+        }
+        self.dispatch_batch_size = dispatch_batch_size
+        self.persist_batch_size = persist_batch_size
+        self.persist_interval = persist_interval
+
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.max_reconnect_attempts = max_reconnect_attempts
+
+        # instrument_key -> mode, replayed on every reconnect
+        self.subscriptions: Dict[str, Optional[str]] = {}
+
+        self.connected = False
+        self.connections = 0
+        self.reconnects = 0
+        self.frames_received = 0
+        self.items_decoded = 0
+        self.decode_errors = 0
+        self.control_messages = 0
+        self.callback_errors = 0
+        self.persisted = 0
+        self.persist_batches = 0
+        self.persist_errors = 0
+        self.last_error: Optional[str] = None
+        self.last_frame_time: Optional[float] = None
+        self.market_status: Dict[str, str] = {}
+
+        self.queues: Dict[str, RingQueue] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._transport = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._running = False
+        self._dispatch_executor: Optional[ThreadPoolExecutor] = None
+        self._persist_executor: Optional[ThreadPoolExecutor] = None
+
+    # ------------------------------------------------------------- lifecycle
+
+    async def run(self) -> None:
+        """Run the pipeline until stop() is called or reconnects are exhausted"""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._running = True
+        self.queues = {
+            name: RingQueue(size, policy, key, name=name)
+            for name, (size, policy, key) in self._queue_config.items()
+        }
+        # Single worker each: callbacks and DB writes stay ordered, off the loop
+        self._dispatch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-dispatch")
+        self._persist_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-persist")
+
+        stages = [
+            asyncio.create_task(self._decode_stage(), name="stream-decode"),
+            asyncio.create_task(self._dispatch_stage(), name="stream-dispatch"),
+        ]
+        if self.persist:
+            stages.append(asyncio.create_task(self._persist_stage(), name="stream-persist"))
+
+        try:
+            await self._supervise()
+        finally:
+            self._running = False
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            await self._flush()
+            self._dispatch_executor.shutdown(wait=False)
+            self._persist_executor.shutdown(wait=False)
+            logger.info(f"[STREAM] Stopped: {self.get_metrics()}")
+
+    async def _supervise(self) -> None:
+        attempt = 0
+        while self._running:
+            connected_at = None
+            transport = self.transport_factory()
+            self._transport = transport
+            try:
+                url = self.url
+                if callable(url):
+                    url = await self._loop.run_in_executor(None, url)
+                await transport.connect(url, self.headers)
+
+                connected_at = time.monotonic()
+                self.connected = True
+                self.connections += 1
+                logger.info(f"[STREAM] Connected (connection #{self.connections})")
+                self._notify_connection(True)
+
+                await self._send_subscriptions(transport, list(self.subscriptions))
+                await self._read_stage(transport)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                if self._running:
+                    logger.warning(f"[STREAM] Connection lost: {self.last_error}")
+            finally:
+                self.connected = False
+                self._transport = None
+                try:
+                    await transport.close()
+                except Exception:
+                    pass
+                if connected_at is not None:
+                    self._notify_connection(False)
+
+            if not self._running:
+                break
+
+            if connected_at is not None and time.monotonic() - connected_at >= self.stable_after:
+                attempt = 0
+            attempt += 1
+            if self.max_reconnect_attempts is not None and attempt > self.max_reconnect_attempts:
+                logger.error("[STREAM] Max reconnection attempts reached")
+                break
+
+            # Full jitter: uniform(0, min(cap, base * 2^attempt))
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+            self.reconnects += 1
+            logger.info(f"[STREAM] Reconnecting in {delay:.2f}s (attempt {attempt})")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _notify_connection(self, connected: bool) -> None:
+        for listener in self.connection_listeners:
+            try:
+                listener(connected)
+            except Exception as e:
+                logger.error(f"[STREAM] Connection listener failed: {e}")
+
+    def start_in_thread(self) -> threading.Thread:
+        """Run the core on its own event loop in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return self._thread
+        started = threading.Event()
+
+        def runner():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            loop.call_soon(started.set)
+            try:
+                loop.run_until_complete(self.run())
+            finally:
+                loop.close()
+
+        self._thread = threading.Thread(target=runner, name="stream-core", daemon=True)
+        self._thread.start()
+        started.wait(timeout=5)
+        return self._thread
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the pipeline (safe to call from any thread)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        if self._is_loop_thread():
+            self._request_stop()
+        else:
+            loop.call_soon_threadsafe(self._request_stop)
+            if self._thread:
+                self._thread.join(timeout=timeout)
+
+    def _request_stop(self) -> None:
+        self._running = False
+        if self._stop_event:
+            self._stop_event.set()
+        if self._transport is not None:
+            asyncio.ensure_future(self._transport.close())
+
+    def _is_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    # --------------------------------------------------------- subscriptions
+
+    def subscribe(self, instrument_keys: List[str], mode: Optional[str] = "full") -> None:
+        """Add subscriptions; sent now if connected and replayed on reconnect"""
+        for key in instrument_keys:
+            self.subscriptions[key] = mode
+        self._schedule_send("sub", instrument_keys, mode)
+
+    def unsubscribe(self, instrument_keys: List[str]) -> None:
+        for key in instrument_keys:
+            self.subscriptions.pop(key, None)
+        self._schedule_send("unsub", instrument_keys, None)
+
+    def _schedule_send(self, method: str, instrument_keys: List[str], mode: Optional[str]) -> None:
+        if not self.connected or self._loop is None or not instrument_keys:
+            return
+        payload = self.subscription_builder(method, instrument_keys, mode)
+        coro = self._send(payload)
+        if self._is_loop_thread():
+            asyncio.ensure_future(coro)
+        else:
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _send(self, payload: bytes) -> None:
+        transport = self._transport
+        if transport is None:
+            return
+        try:
+            await transport.send(payload)
+        except Exception as e:
+            logger.error(f"[STREAM] Send failed: {e}")
+
+    async def _send_subscriptions(self, transport, instrument_keys: List[str]) -> None:
+        by_mode: Dict[Optional[str], List[str]] = {}
+        for key in instrument_keys:
+            by_mode.setdefault(self.subscriptions.get(key), []).append(key)
+        for mode, keys in by_mode.items():
+            await transport.send(self.subscription_builder("sub", keys, mode))
+
+    # ---------------------------------------------------------------- stages
+
+    async def _read_stage(self, transport) -> None:
+        raw = self.queues["raw"]
+        while self._running:
+            frame = await transport.recv()
+            self.frames_received += 1
+            self.last_frame_time = time.time()
+            if raw.policy == OverflowPolicy.BLOCK:
+                await raw.put((self.last_frame_time, frame))
+            else:
+                raw.put_nowait((self.last_frame_time, frame))
+
+    async def _decode_stage(self) -> None:
+        raw = self.queues["raw"]
+        dispatch = self.queues["dispatch"]
+        persist = self.queues["persist"] if self.persist else None
+        while True:
+            for received_ts, frame in await raw.get_batch(64):
+                if isinstance(frame, str) and self.text_decoder is None:
+                    self.control_messages += 1
+                    continue
+                try:
+                    if isinstance(frame, str):
+                        decoded = self.text_decoder(frame)
+                    elif self._decoder_takes_ts:
+                        decoded = self.decoder(frame, received_ts=received_ts)
+                    else:
+                        decoded = self.decoder(frame)
+                except (FeedDecodeError, ValueError) as e:
+                    self.decode_errors += 1
+                    logger.debug(f"[STREAM] Decode error: {e}")
+                    continue
+
+                market_status = getattr(decoded, "market_status", None)
+                if market_status:
+                    self.market_status.update(market_status)
+
+                items = _feed_items(decoded)
+                self.items_decoded += len(items)
+                if self.latency is not None:
+                    current_ts = getattr(decoded, "current_ts", None)
+                    if current_ts:
+                        self.latency.record("exchange", received_ts - current_ts / 1000.0)
+                    self.latency.record("decode", time.time() - received_ts)
+                for item in items:
+                    if dispatch.policy == OverflowPolicy.BLOCK:
+                        await dispatch.put(item)
+                    else:
+                        dispatch.put_nowait(item)
+                    if persist is not None:
+                        if persist.policy == OverflowPolicy.BLOCK:
+                            await persist.put(item)
+                        else:
+                            persist.put_nowait(item)
+            # Let the reader and other stages run between batches
+            await asyncio.sleep(0)
+
+    async def _dispatch_stage(self) -> None:
+        dispatch = self.queues["dispatch"]
+        while True:
+            batch = await dispatch.get_batch(self.dispatch_batch_size)
+            if not batch:
+                continue
+            if self.latency is not None:
+                self.latency.observe_ticks("dispatch", batch)
+            for callback in self.on_ticks:
+                try:
+                    if inspect.iscoroutinefunction(callback):
+                        await callback(batch)
+                    else:
+                        await self._loop.run_in_executor(self._dispatch_executor, callback, batch)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.callback_errors += 1
+                    logger.error(f"[STREAM] Tick callback failed: {e}")
+
+    async def _persist_stage(self) -> None:
+        persist = self.queues["persist"]
+        while True:
+            batch = await persist.get_batch(self.persist_batch_size, timeout=self.persist_interval)
+            if batch:
+                await self._persist_batch(batch)
+
+    async def _persist_batch(self, batch: List[Any]) -> None:
+        try:
+            await self._loop.run_in_executor(self._persist_executor, self.persist, batch)
+            if self.latency is not None:
+                self.latency.observe_ticks("persist", batch)
+            self.persisted += len(batch)
+            self.persist_batches += 1
+        except Exception as e:
+            self.persist_errors += 1
+            logger.error(f"[STREAM] Persist failed for {len(batch)} items: {e}")
+
+    async def _flush(self) -> None:
+        """Persist whatever is still queued on shutdown"""
+        persist = self.queues.get("persist")
+        if not self.persist or persist is None:
+            return
+        while len(persist):
+            await self._persist_batch(persist.get_batch_nowait(self.persist_batch_size))
+
+    # --------------------------------------------------------------- metrics
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "connections": self.connections,
+            "reconnects": self.reconnects,
+            "subscriptions": len(self.subscriptions),
+            "frames_received": self.frames_received,
+            "items_decoded": self.items_decoded,
+            "decode_errors": self.decode_errors,
+            "control_messages": self.control_messages,
+            "callback_errors": self.callback_errors,
+            "persisted": self.persisted,
+            "persist_batches": self.persist_batches,
+            "persist_errors": self.persist_errors,
+            "last_frame_ago_seconds": (
+                round(time.time() - self.last_frame_time, 3) if self.last_frame_time else None
+            ),
+            "last_error": self.last_error,
+            "queues": {name: q.stats() for name, q in self.queues.items()},
+        }
@@ -0,0 +1,284 @@
+"""
+Upstream Subscription Manager - Ref-counted, batched, sharded feed subscriptions
+
+All consumers (UI rooms, movers, paper trading, strategies) declare interest
+in instruments here instead of talking to a websocket directly:
+
+    - Interest is reference-counted per consumer; an instrument is
+      subscribed upstream once, in the richest mode any holder asked for,
+      and unsubscribed only when its last holder releases it.
+    - Changes are collected and applied in batches (one sub/unsub message
+      per connection and mode per flush) instead of one message per symbol.
+    - Instruments are packed onto upstream connections (shards) up to the
+      per-connection limits of each mode; a new connection is opened only
+      when the existing ones are full, and empty ones are closed.
+
+Usage:
+    manager = get_subscription_manager()
+    manager.acquire("movers", ["NSE_EQ|INE009A01021", ...], mode="ltpc")
+    manager.acquire("ui:abc123", ["NSE_INDEX|Nifty 50"], mode="full")
+    ...
+    manager.release("ui:abc123")
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Richer modes carry everything the poorer ones do
+MODE_RANK = {"ltpc": 0, "option_greeks": 1, "full": 2, "full_d30": 3}
+
+# Per-connection instrument limits of the Upstox V3 market data feed
+DEFAULT_MODE_LIMITS = {"ltpc": 5000, "option_greeks": 3000, "full": 2000, "full_d30": 50}
+
+
+class Shard:
+    """One upstream connection and the instruments placed on it"""
+
+    def __init__(self, shard_id: int, core: Any):
+        self.shard_id = shard_id
+        self.core = core
+        self.instruments: Dict[str, str] = {}  # instrument_key -> mode
+        self.load = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        by_mode: Dict[str, int] = {}
+        for mode in self.instruments.values():
+            by_mode[mode] = by_mode.get(mode, 0) + 1
+        stats = {
+            "shard_id": self.shard_id,
+            "instruments": len(self.instruments),
+            "load": round(self.load, 4),
+            "by_mode": by_mode,
+        }
+        metrics = getattr(self.core, "get_metrics", None)
+        if metrics:
+            core_metrics = metrics()
+            stats["connected"] = core_metrics.get("connected")
+            stats["frames_received"] = core_metrics.get("frames_received")
+        return stats
+
+
+class SubscriptionManager:
+    """
+    Shared, ref-counted upstream subscriptions.
+
+    Args:
+        connection_factory: Returns a new, unstarted StreamingCore-like object
+                            (subscribe/unsubscribe/start_in_thread/stop)
+        mode_limits: Max instruments per connection for each mode; mixed
+                     modes share a connection proportionally
+        batch_interval: Seconds between automatic flushes (start()); 0
+                        applies every change immediately
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        mode_limits: Optional[Dict[str, int]] = None,
+        batch_interval: float = 0.2,
+    ):
+        self.connection_factory = connection_factory
+        self.mode_limits = {**DEFAULT_MODE_LIMITS, **(mode_limits or {})}
+        self.batch_interval = batch_interval
+
+        self._lock = threading.RLock()
+        self._holders: Dict[str, Dict[str, str]] = {}  # instrument -> {consumer: mode}
+        self._consumers: Dict[str, Set[str]] = {}  # consumer -> instruments
+        self._placement: Dict[str, Tuple[Shard, str]] = {}  # instrument -> (shard, mode)
+        self._dirty: Set[str] = set()
+        self.shards: List[Shard] = []
+        self._next_shard_id = 1
+
+        self.messages_sent = 0
+        self.flushes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ----------------------------------------------------------- ref counting
+
+    def acquire(self, consumer: str, instrument_keys: Iterable[str], mode: str = "full") -> None:
+        """Declare that consumer wants instrument_keys in (at least) mode"""
+        if mode not in MODE_RANK:
+            raise ValueError(f"Unknown mode: {mode}")
+        with self._lock:
+            held = self._consumers.setdefault(consumer, set())
+            for key in instrument_keys:
+                self._holders.setdefault(key, {})[consumer] = mode
+                held.add(key)
+                self._dirty.add(key)
+        if not self.batch_interval:
+            self.flush()
+
+    def release(self, consumer: str, instrument_keys: Optional[Iterable[str]] = None) -> None:
+        """Drop consumer's interest in instrument_keys (all of them if None)"""
+        with self._lock:
+            held = self._consumers.get(consumer)
+            if not held:
+                return
+            keys = list(held) if instrument_keys is None else [k for k in instrument_keys if k in held]
+            for key in keys:
+                held.discard(key)
+                holders = self._holders.get(key)
+                if holders is not None:
+                    holders.pop(consumer, None)
+                    if not holders:
+                        del self._holders[key]
+                self._dirty.add(key)
+            if not held:
+                del self._consumers[consumer]
+        if not self.batch_interval:
+            self.flush()
+
+    def refcount(self, instrument_key: str) -> int:
+        return len(self._holders.get(instrument_key, ()))
+
+    def desired_mode(self, instrument_key: str) -> Optional[str]:
+        holders = self._holders.get(instrument_key)
+        if not holders:
+            return None
+        return max(holders.values(), key=MODE_RANK.__getitem__)
+
+    # -------------------------------------------------------------- placement
+
+    def _weight(self, mode: str) -> float:
+        return 1.0 / self.mode_limits[mode]
+
+    def _shard_with_room(self, weight: float) -> Shard:
+        for shard in self.shards:
+            if shard.load + weight <= 1.0 + 1e-9:
+                return shard
+        shard = Shard(self._next_shard_id, self.connection_factory())
+        self._next_shard_id += 1
+        self.shards.append(shard)
+        shard.core.start_in_thread()
+        logger.info(f"[Subscriptions] Opened upstream connection #{shard.shard_id}")
+        return shard
+
+    def flush(self) -> int:
+        """Apply pending changes upstream in batches; returns messages sent"""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, set()
+
+            unsubs: Dict[Shard, List[str]] = {}
+            subs: Dict[Tuple[Shard, str], List[str]] = {}
+
+            # Removals and mode changes first so their capacity can be reused
+            for key in dirty:
+                current = self._placement.get(key)
+                mode = self.desired_mode(key)
+                if current is None:
+                    continue
+                shard, current_mode = current
+                if mode is None:
+                    unsubs.setdefault(shard, []).append(key)
+                    del shard.instruments[key]
+                    shard.load -= self._weight(current_mode)
+                    del self._placement[key]
+                elif mode != current_mode:
+                    shard.load -= self._weight(current_mode)
+                    del shard.instruments[key]
+                    del self._placement[key]
+                    if shard.load + self._weight(mode) <= 1.0 + 1e-9:
+                        # Re-subscribing with the new mode switches it in place
+                        shard.instruments[key] = mode
+                        shard.load += self._weight(mode)
+                        self._placement[key] = (shard, mode)
+                        subs.setdefault((shard, mode), []).append(key)
+                    else:
+                        unsubs.setdefault(shard, []).append(key)
+
+            for key in sorted(dirty):
+                mode = self.desired_mode(key)
+                if mode is None or key in self._placement:
+                    continue
+                weight = self._weight(mode)
+                shard = self._shard_with_room(weight)
+                shard.instruments[key] = mode
+                shard.load += weight
+                self._placement[key] = (shard, mode)
+                subs.setdefault((shard, mode), []).append(key)
+
+            sent = 0
+            for shard, keys in unsubs.items():
+                shard.core.unsubscribe(keys)
+                sent += 1
+            for (shard, mode), keys in subs.items():
+                shard.core.subscribe(keys, mode)
+                sent += 1
+
+            # Close connections that no longer carry anything
+            for shard in [s for s in self.shards if not s.instruments]:
+                self.shards.remove(shard)
+                shard.core.stop()
+                logger.info(f"[Subscriptions] Closed idle upstream connection #{shard.shard_id}")
+
+            self.messages_sent += sent
+            self.flushes += 1
+            return sent
+
+    # -------------------------------------------------------------- lifecycle
+
+    def start(self) -> None:
+        """Flush batched changes every batch_interval seconds"""
+        if self._thread and self._thread.is_alive() or not self.batch_interval:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.batch_interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"[Subscriptions] Flush failed: {e}", exc_info=True)
+
+        self._thread = threading.Thread(target=loop, name="subscription-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        with self._lock:
+            for shard in self.shards:
+                shard.core.stop()
+            self.shards = []
+            self._placement.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "instruments": len(self._placement),
+                "consumers": {c: len(keys) for c, keys in self._consumers.items()},
+                "pending_changes": len(self._dirty),
+                "connections": len(self.shards),
+                "messages_sent": self.messages_sent,
+                "flushes": self.flushes,
+                "shards": [shard.stats() for shard in self.shards],
+            }
+
+
+_subscription_manager: Optional[SubscriptionManager] = None
+_subscription_manager_lock = threading.Lock()
+
+
+def get_subscription_manager() -> SubscriptionManager:
+    """Process-wide manager whose connections publish to the shared tick bus"""
+    global _subscription_manager
+    if _subscription_manager is None:
+        with _subscription_manager_lock:
+            if _subscription_manager is None:
+                from backend.services.streaming.gap_backfill import get_gap_backfiller
+                from backend.services.streaming.websocket_v3_streamer import WebSocketV3Streamer
+
+                streamer = WebSocketV3Streamer()
+                # Outages on any shard are repaired from REST candles
+                get_gap_backfiller(streamer.db_path).watch(streamer)
+                manager = SubscriptionManager(connection_factory=streamer.create_stream_core)
+                manager.start()
+                _subscription_manager = manager
+    return _subscription_manager
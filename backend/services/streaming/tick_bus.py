@@ -0,0 +1,379 @@
+"""
+Tick Bus - In-process pub/sub for live ticks
+
+The feed fans ticks out to any number of internal consumers (websocket
+server, movers, paper trading, stop-loss checks, alerts) without letting
+any of them slow the feed or each other.
+
+Design:
+    - Topics are instrument keys. A subscription selects instruments
+      explicitly, through named universes (e.g. "NIFTY50", "FNO_WATCHLIST")
+      or everything.
+    - Each subscriber owns a fixed-size ring buffer of *references* to the
+      published tick objects; nothing is copied or serialized on fan-out.
+    - Publishing never waits for consumers: the producer writes into the
+      ring and moves on. A consumer that falls more than `capacity` items
+      behind loses the oldest items and the loss is counted (overflow
+      accounting), instead of the producer waiting.
+    - Several feed threads (one per upstream shard) may publish at once;
+      publish() serializes them with a short lock so each ring keeps a
+      single writer at a time.
+    - Routing tables are rebuilt copy-on-write on (un)subscribe, so the hot
+      publish path reads them without taking a lock.
+
+Usage:
+    bus = get_tick_bus()
+    bus.define_universe("INDICES", ["NSE_INDEX|Nifty 50", "NSE_INDEX|Nifty Bank"])
+
+    sub = bus.subscribe(universes=["INDICES"], capacity=1024, name="alerts")
+    for tick in sub.poll():
+        ...
+
+    # Or let the bus run the consumer on its own thread
+    bus.subscribe(instruments=["NSE_EQ|INE009A01021"], callback=on_ticks, name="sl")
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _instrument_key(item: Any) -> str:
+    """Topic of a published item: Tick.instrument_key or a quote dict's key"""
+    key = getattr(item, "instrument_key", None)
+    if key is None and isinstance(item, dict):
+        key = item.get("instrument_key") or item.get("symbol")
+    return key
+
+
+class Subscription:
+    """
+    Single-producer/single-consumer ring buffer for one consumer.
+
+    TickBus.publish() holds the publish lock around every _push, so there is
+    one writer at a time however many feed threads publish. The producer
+    only ever advances `_write_seq`; the consumer only advances
+    `_read_seq`. Slots hold references to published objects. If the producer
+    laps the consumer, the overwritten items are counted as dropped when the
+    consumer next reads.
+    """
+
+    def __init__(
+        self,
+        bus: "TickBus",
+        name: str,
+        capacity: int,
+        instruments: FrozenSet[str],
+        universes: FrozenSet[str],
+        all_instruments: bool,
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.bus = bus
+        self.name = name
+        self.capacity = capacity
+        self.instruments = instruments
+        self.universes = universes
+        self.all_instruments = all_instruments
+
+        self._slots: List[Any] = [None] * capacity
+        self._write_seq = 0
+        self._read_seq = 0
+        self._ready = threading.Event()
+        self.dropped = 0
+        self.delivered = 0
+        self.active = True
+
+        self._callback: Optional[Callable[[List[Any]], None]] = None
+        self._worker: Optional[threading.Thread] = None
+        self.callback_errors = 0
+
+    # ---------------------------------------------------------- producer side
+
+    def _push(self, item: Any) -> None:
+        seq = self._write_seq
+        self._slots[seq % self.capacity] = item
+        self._write_seq = seq + 1
+        self._ready.set()
+
+    # ---------------------------------------------------------- consumer side
+
+    @property
+    def pending(self) -> int:
+        return min(self._write_seq - self._read_seq, self.capacity)
+
+    def poll(self, max_items: Optional[int] = None) -> List[Any]:
+        """Return buffered items (oldest first) without blocking"""
+        write_seq = self._write_seq
+        read_seq = self._read_seq
+        if write_seq - read_seq > self.capacity:
+            self.dropped += write_seq - read_seq - self.capacity
+            read_seq = write_seq - self.capacity
+
+        end = write_seq if max_items is None else min(write_seq, read_seq + max_items)
+        capacity = self.capacity
+        slots = self._slots
+        start_idx, end_idx = read_seq % capacity, end % capacity
+        if end == read_seq:
+            items = []
+        elif start_idx < end_idx:
+            items = slots[start_idx:end_idx]
+        else:
+            items = slots[start_idx:] + slots[:end_idx]
+
+        # The producer may have lapped us while we copied; discard overwritten slots
+        overwritten = self._write_seq - capacity - read_seq
+        if overwritten > 0:
+            overwritten = min(overwritten, len(items))
+            self.dropped += overwritten
+            items = items[overwritten:]
+
+        self._read_seq = end
+        self.delivered += len(items)
+        if self._read_seq >= self._write_seq:
+            self._ready.clear()
+            # Re-check to avoid missing a push that raced the clear
+            if self._write_seq > self._read_seq:
+                self._ready.set()
+        return items
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block the consumer until items are available"""
+        return self._ready.wait(timeout)
+
+    def get(self, timeout: Optional[float] = None, max_items: Optional[int] = None) -> List[Any]:
+        """Wait up to timeout for items, then poll"""
+        if self.wait(timeout):
+            return self.poll(max_items)
+        return []
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def _run_callback(self, batch_size: int) -> None:
+        while self.active:
+            if not self._ready.wait(0.5):
+                continue
+            items = self.poll(batch_size)
+            if not items:
+                continue
+            try:
+                self._callback(items)
+            except Exception as e:
+                self.callback_errors += 1
+                logger.error(f"[TickBus] Subscriber '{self.name}' callback failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "capacity": self.capacity,
+            "pending": self.pending,
+            "published": self._write_seq,
+            "delivered": self.delivered,
+            "dropped": self.dropped + max(0, self._write_seq - self._read_seq - self.capacity),
+            "callback_errors": self.callback_errors,
+            "instruments": len(self.instruments),
+            "universes": sorted(self.universes),
+            "all_instruments": self.all_instruments,
+        }
+
+
+class TickBus:
+    """In-process tick fan-out with per-subscriber ring buffers"""
+
+    def __init__(self, default_capacity: int = 4096):
+        self.default_capacity = default_capacity
+        self._lock = threading.Lock()
+        # Serializes publishers (one dispatch thread per upstream shard)
+        self._publish_lock = threading.Lock()
+        self._subscriptions: List[Subscription] = []
+        self._universes: Dict[str, FrozenSet[str]] = {}
+
+        # Copy-on-write routing: instrument -> subscribers, plus wildcard subscribers
+        self._routes: Dict[str, Tuple[Subscription, ...]] = {}
+        self._wildcard: Tuple[Subscription, ...] = ()
+
+        # Latest item per instrument, for consumers that only need a snapshot
+        self.latest: Dict[str, Any] = {}
+        self.published = 0
+        self.unrouted = 0
+
+    # -------------------------------------------------------------- universes
+
+    def define_universe(self, name: str, instrument_keys: Iterable[str]) -> None:
+        """Create or replace a named instrument universe"""
+        with self._lock:
+            self._universes[name] = frozenset(instrument_keys)
+            self._rebuild_routes()
+
+    def remove_universe(self, name: str) -> None:
+        with self._lock:
+            self._universes.pop(name, None)
+            self._rebuild_routes()
+
+    def get_universe(self, name: str) -> FrozenSet[str]:
+        return self._universes.get(name, frozenset())
+
+    # ---------------------------------------------------------- subscriptions
+
+    def subscribe(
+        self,
+        instruments: Optional[Iterable[str]] = None,
+        universes: Optional[Iterable[str]] = None,
+        all_instruments: bool = False,
+        capacity: Optional[int] = None,
+        name: Optional[str] = None,
+        callback: Optional[Callable[[List[Any]], None]] = None,
+        batch_size: int = 500,
+    ) -> Subscription:
+        """
+        Subscribe to ticks.
+
+        Args:
+            instruments: Instrument keys to receive
+            universes: Universe names to receive (tracks later universe changes)
+            all_instruments: Receive every published tick
+            capacity: Ring buffer size (items) for this subscriber
+            name: Label used in stats and logs
+            callback: If given, a daemon thread drains the buffer and calls
+                      callback(batch); otherwise the consumer calls poll()/get()
+            batch_size: Max items per callback invocation
+
+        Returns:
+            Subscription handle
+        """
+        if not (instruments or universes or all_instruments):
+            raise ValueError("Subscription needs instruments, universes or all_instruments")
+
+        with self._lock:
+            sub = Subscription(
+                self,
+                name or f"sub-{len(self._subscriptions) + 1}",
+                capacity or self.default_capacity,
+                frozenset(instruments or ()),
+                frozenset(universes or ()),
+                all_instruments,
+            )
+            self._subscriptions.append(sub)
+            self._rebuild_routes()
+
+        if callback is not None:
+            sub._callback = callback
+            sub._worker = threading.Thread(
+                target=sub._run_callback, args=(batch_size,), name=f"tickbus-{sub.name}", daemon=True
+            )
+            sub._worker.start()
+
+        logger.info(f"[TickBus] Subscribed '{sub.name}'")
+        return sub
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                self._rebuild_routes()
+        subscription.active = False
+        subscription._ready.set()
+        worker = subscription._worker
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout=2)
+
+    def update_subscription(
+        self,
+        subscription: Subscription,
+        instruments: Optional[Iterable[str]] = None,
+        universes: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Replace the instrument and/or universe selection of a subscriber"""
+        with self._lock:
+            if instruments is not None:
+                subscription.instruments = frozenset(instruments)
+            if universes is not None:
+                subscription.universes = frozenset(universes)
+            self._rebuild_routes()
+
+    def _rebuild_routes(self) -> None:
+        """Recompute routing tables; caller holds the lock"""
+        routes: Dict[str, List[Subscription]] = {}
+        wildcard = []
+        for sub in self._subscriptions:
+            if sub.all_instruments:
+                wildcard.append(sub)
+                continue
+            keys: Set[str] = set(sub.instruments)
+            for universe in sub.universes:
+                keys |= self._universes.get(universe, frozenset())
+            for key in keys:
+                routes.setdefault(key, []).append(sub)
+
+        self._routes = {key: tuple(subs) for key, subs in routes.items()}
+        self._wildcard = tuple(wildcard)
+
+    # ------------------------------------------------------------- publishing
+
+    def publish(self, items: Iterable[Any]) -> int:
+        """
+        Fan items out to subscribers. Never waits for consumers; concurrent
+        publishers (one per shard) only wait for each other's batch.
+
+        Returns:
+            Number of subscriber deliveries
+        """
+        latest = self.latest
+        deliveries = 0
+        count = 0
+
+        with self._publish_lock:
+            routes = self._routes
+            wildcard = self._wildcard
+            for item in items:
+                count += 1
+                key = _instrument_key(item)
+                latest[key] = item
+                subs = routes.get(key, ())
+                if not subs and not wildcard:
+                    self.unrouted += 1
+                    continue
+                for sub in subs:
+                    sub._push(item)
+                for sub in wildcard:
+                    sub._push(item)
+                deliveries += len(subs) + len(wildcard)
+
+            self.published += count
+        return deliveries
+
+    def publish_one(self, item: Any) -> int:
+        return self.publish((item,))
+
+    def get_latest(self, instrument_key: str) -> Optional[Any]:
+        return self.latest.get(instrument_key)
+
+    # ----------------------------------------------------------------- stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        subscriptions = list(self._subscriptions)
+        return {
+            "published": self.published,
+            "unrouted": self.unrouted,
+            "instruments_seen": len(self.latest),
+            "routed_instruments": len(self._routes),
+            "universes": {name: len(keys) for name, keys in self._universes.items()},
+            "subscribers": [sub.stats() for sub in subscriptions],
+        }
+
+
+_tick_bus: Optional[TickBus] = None
+_tick_bus_lock = threading.Lock()
+
+
+def get_tick_bus() -> TickBus:
+    """Process-wide tick bus"""
+    global _tick_bus
+    if _tick_bus is None:
+        with _tick_bus_lock:
+            if _tick_bus is None:
+                _tick_bus = TickBus()
+    return _tick_bus
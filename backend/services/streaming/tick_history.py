@@ -0,0 +1,257 @@
+"""
+Tick History - Fixed-capacity in-memory tick rings per instrument
+
+Keeps the most recent ticks of every streamed instrument in a NumPy ring
+(ts, ltp, volume, oi, bid, bid_qty, ask, ask_qty) so sparklines, short
+window indicators and "last N ticks" requests are served from memory in
+microseconds instead of querying the tick table the streamer is writing to.
+
+Each ring writes every record twice (at i and i + capacity), so the
+ordered history is always one contiguous slice: reads are a slice plus a
+binary search on ts, with no reordering copies.
+
+Rolling stats over a time window:
+    vwap        volume-weighted price (traded qty from cumulative volume)
+    high / low / range
+    tick_rate   ticks per second
+
+Usage:
+    history = get_tick_history()      # fed by the shared tick bus
+    history.recent("NIFTY", 100)      # newest first
+    history.series("NIFTY", "ltp", 300)
+    history.stats("NIFTY", window_seconds=60)
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 4096
+
+TICK_DTYPE = np.dtype([
+    ("ts", "f8"),
+    ("ltp", "f8"),
+    ("volume", "f8"),
+    ("oi", "f8"),
+    ("bid", "f8"),
+    ("bid_qty", "f8"),
+    ("ask", "f8"),
+    ("ask_qty", "f8"),
+])
+
+
+class TickRing:
+    """Ring of the last `capacity` ticks of one instrument, ordered by arrival"""
+
+    __slots__ = ("capacity", "count", "_buf", "_next")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.count = 0
+        self._buf = np.zeros(2 * capacity, dtype=TICK_DTYPE)
+        self._next = 0
+
+    def append(self, record: tuple) -> None:
+        i = self._next
+        self._buf[i] = record
+        self._buf[i + self.capacity] = record
+        self._next = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def view(self) -> np.ndarray:
+        """Ordered records, oldest first (a view, not a copy)"""
+        end = self._next + self.capacity
+        return self._buf[end - self.count:end]
+
+    @property
+    def oldest_ts(self) -> Optional[float]:
+        return float(self.view()["ts"][0]) if self.count else None
+
+
+def _nan(value: Any) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def _record(item: Any, now: float) -> Optional[tuple]:
+    """Ring record from a Tick or a quote dict (None when it carries no price)"""
+    if isinstance(item, dict):
+        ltp = item.get("ltp")
+        if ltp is None:
+            return None
+        ts = item.get("received_ts") or now
+        return (ts, ltp, _nan(item.get("volume")), _nan(item.get("oi")),
+                _nan(item.get("bid_price")), _nan(item.get("bid_qty")),
+                _nan(item.get("ask_price")), _nan(item.get("ask_qty")))
+    ltp = getattr(item, "ltp", None)
+    if ltp is None:
+        return None
+    return (item.received_ts or now, ltp, _nan(item.volume), _nan(item.oi),
+            _nan(item.bid_price), _nan(item.bid_qty), _nan(item.ask_price), _nan(item.ask_qty))
+
+
+def _key(item: Any) -> Optional[str]:
+    if isinstance(item, dict):
+        return item.get("instrument_key") or item.get("symbol")
+    return getattr(item, "instrument_key", None)
+
+
+class TickHistory:
+    """
+    Tick rings for many instruments.
+
+    Args:
+        capacity: Ticks kept per instrument
+        max_instruments: Rings allocated before new instruments are ignored
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, max_instruments: int = 5000):
+        self.capacity = capacity
+        self.max_instruments = max_instruments
+        self._rings: Dict[str, TickRing] = {}
+        self._lock = threading.Lock()
+        self._subscription = None
+        self.ticks_recorded = 0
+        self.dropped_instruments = 0
+
+    def append(self, instrument_key: str, record: tuple) -> None:
+        with self._lock:
+            ring = self._rings.get(instrument_key)
+            if ring is None:
+                if len(self._rings) >= self.max_instruments:
+                    self.dropped_instruments += 1
+                    return
+                ring = self._rings[instrument_key] = TickRing(self.capacity)
+            ring.append(record)
+            self.ticks_recorded += 1
+
+    def on_ticks(self, ticks: Iterable[Any]) -> None:
+        """TickBus callback: Tick objects or quote dicts"""
+        now = time.time()
+        for item in ticks:
+            key = _key(item)
+            record = _record(item, now) if key else None
+            if record is not None:
+                self.append(key, record)
+
+    # --------------------------------------------------------------- queries
+
+    def has(self, instrument_key: str) -> bool:
+        return instrument_key in self._rings
+
+    def oldest_ts(self, instrument_key: str) -> Optional[float]:
+        ring = self._rings.get(instrument_key)
+        return ring.oldest_ts if ring else None
+
+    def window(self, instrument_key: str, seconds: Optional[float] = None,
+               last: Optional[int] = None, now: Optional[float] = None) -> np.ndarray:
+        """Copy of records within the last `seconds` and/or `last` ticks, oldest first"""
+        ring = self._rings.get(instrument_key)
+        if ring is None:
+            return np.empty(0, dtype=TICK_DTYPE)
+        with self._lock:
+            records = ring.view()
+            if seconds is not None:
+                since = (time.time() if now is None else now) - seconds
+                records = records[np.searchsorted(records["ts"], since, side="left"):]
+            if last is not None:
+                records = records[-last:] if last > 0 else records[:0]
+            return records.copy()
+
+    def series(self, instrument_key: str, field: str = "ltp", last: Optional[int] = None) -> np.ndarray:
+        """One column (e.g. ltp for a sparkline), oldest first"""
+        return self.window(instrument_key, last=last)[field]
+
+    def recent(self, instrument_key: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Last `limit` ticks as dicts, newest first"""
+        records = self.window(instrument_key, last=limit)[::-1]
+        return [
+            {name: (None if np.isnan(value) else float(value)) for name, value in zip(TICK_DTYPE.names, row)}
+            for row in records.tolist()
+        ]
+
+    def stats(self, instrument_key: str, window_seconds: float = 60.0,
+              now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Rolling VWAP, high/low/range and tick rate over the window"""
+        ring = self._rings.get(instrument_key)
+        if ring is None:
+            return None
+        now = time.time() if now is None else now
+        with self._lock:
+            records = ring.view()
+            start = int(np.searchsorted(records["ts"], now - window_seconds, side="left"))
+            # One tick before the window gives the first tick's traded quantity
+            volume = records["volume"][max(start - 1, 0):].copy()
+            window = records[start:].copy()
+
+        if not len(window):
+            return {"instrument_key": instrument_key, "ticks": 0, "window_seconds": window_seconds,
+                    "tick_rate": 0.0, "vwap": None, "high": None, "low": None, "range": None,
+                    "last": None}
+
+        ltp = window["ltp"]
+        traded = np.diff(volume) if start > 0 else np.diff(volume, prepend=volume[0])
+        # Cumulative volume resets at the session start; missing volume is NaN
+        traded = np.where(np.isfinite(traded) & (traded > 0), traded, 0.0)
+        total = traded.sum()
+        high, low = float(ltp.max()), float(ltp.min())
+        return {
+            "instrument_key": instrument_key,
+            "ticks": len(window),
+            "window_seconds": window_seconds,
+            "tick_rate": len(window) / window_seconds if window_seconds else 0.0,
+            "vwap": float(np.dot(traded, ltp) / total) if total else None,
+            "volume": float(total),
+            "high": high,
+            "low": low,
+            "range": high - low,
+            "last": float(ltp[-1]),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "instruments": len(self._rings),
+            "capacity": self.capacity,
+            "ticks_recorded": self.ticks_recorded,
+            "dropped_instruments": self.dropped_instruments,
+            "memory_bytes": len(self._rings) * 2 * self.capacity * TICK_DTYPE.itemsize,
+        }
+
+    # ------------------------------------------------------------- lifecycle
+
+    def attach(self, bus, **subscription) -> Any:
+        """Record ticks from a TickBus (all instruments by default)"""
+        if not subscription:
+            subscription = {"all_instruments": True}
+        self._subscription = bus.subscribe(
+            name="tick-history", callback=self.on_ticks, capacity=65536, **subscription
+        )
+        return self._subscription
+
+    def stop(self) -> None:
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+
+_tick_history: Optional[TickHistory] = None
+_tick_history_lock = threading.Lock()
+
+
+def get_tick_history() -> TickHistory:
+    """Process-wide tick rings fed by the shared tick bus"""
+    global _tick_history
+    if _tick_history is None:
+        with _tick_history_lock:
+            if _tick_history is None:
+                from backend.services.streaming.tick_bus import get_tick_bus
+
+                history = TickHistory()
+                history.attach(get_tick_bus())
+                _tick_history = history
+    return _tick_history
@@ -0,0 +1,475 @@
+"""
+Tick Journal - Append-only memory-mapped capture of the live feed
+
+One journal per trading day under data/tick_journal/:
+
+    YYYY-MM-DD.ticks  fixed-size binary records in a memory-mapped file
+    YYYY-MM-DD.keys   instrument keys, one per line (record key_id = line no.)
+
+.ticks layout:
+    header (64 bytes): b"TJR1", uint32 record_size, uint64 record_count,
+                       zero padding
+    records:           RECORD struct below, appended in arrival order
+
+Writing a tick is a struct.pack_into into the mapping plus a header count
+update; the file grows in GROW_BYTES chunks so appends never touch the
+filesystem metadata on the hot path. Readers use the committed record
+count, so a journal can be replayed while it is still being written.
+
+A sparse time index (received_ts of every INDEX_STRIDE-th record) is built
+on open and maintained while appending, giving O(log n) seeks to a time.
+
+The feed process (websocket_server) captures every tick published on the
+shared tick bus with get_tick_journal(); TICK_JOURNAL_DIR sets the
+directory and an empty value disables capture.
+
+Replay pushes journaled ticks, grouped per original frame, through any tick
+sink (TickBus.publish, BarAggregator.on_ticks, a streamer's dispatch) at
+1x/10x/Nx recorded speed or as fast as possible, so any day can be
+reproduced deterministically and used as a throughput benchmark:
+
+    python -m backend.services.streaming.tick_journal --date 2024-01-15 --speed max
+"""
+
+import argparse
+import bisect
+import logging
+import math
+import mmap
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from backend.services.streaming.feed_decoder import REQUEST_MODES, Tick
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MAGIC = b"TJR1"
+HEADER = struct.Struct("<4sIQ")
+HEADER_SIZE = 64
+GROW_BYTES = 16 * 1024 * 1024
+INDEX_STRIDE = 1024
+
+# Field types follow the decoded Tick (oi/tbq/tsq are doubles on the wire).
+# Market depth beyond the best bid/ask is not journaled.
+INT_FIELDS = ("ltt", "ltq", "volume", "bid_qty", "ask_qty")
+FLOAT_FIELDS = (
+    "ltp", "cp", "oi", "iv", "atp", "tbq", "tsq", "bid_price", "ask_price",
+    "open", "high", "low", "close", "delta", "theta", "gamma", "vega",
+)
+# key_id, presence mask, mode, received_ts, ints..., floats...
+RECORD = struct.Struct("<IIB7xd" + "q" * len(INT_FIELDS) + "d" * len(FLOAT_FIELDS))
+RECORD_SIZE = RECORD.size
+
+# The same record as a NumPy structured dtype, for columnar reads
+RECORD_DTYPE = np.dtype({
+    "names": ["key_id", "mask", "mode", "received_ts", *INT_FIELDS, *FLOAT_FIELDS],
+    "formats": ["<u4", "<u4", "u1", "<f8"] + ["<i8"] * len(INT_FIELDS) + ["<f8"] * len(FLOAT_FIELDS),
+    "offsets": [0, 4, 8, 16] + [24 + 8 * i for i in range(len(INT_FIELDS) + len(FLOAT_FIELDS))],
+    "itemsize": RECORD_SIZE,
+})
+
+_MODE_IDS = {name: mode_id for mode_id, name in REQUEST_MODES.items()}
+_NO_MODE = 255
+_FIELDS = INT_FIELDS + FLOAT_FIELDS
+
+
+def field_bit(name: str) -> int:
+    """Presence-mask bit of a journaled field (RECORD_DTYPE 'mask' column)"""
+    return 1 << _FIELDS.index(name)
+
+
+def _encode(tick: Tick, key_id: int) -> tuple:
+    mask = 0
+    values = []
+    for bit, name in enumerate(_FIELDS):
+        value = getattr(tick, name)
+        if value is None:
+            values.append(0)
+        else:
+            mask |= 1 << bit
+            values.append(value)
+    return (key_id, mask, _MODE_IDS.get(tick.mode, _NO_MODE), tick.received_ts or 0.0, *values)
+
+
+def _decode(record: tuple, keys: List[str]) -> Tick:
+    key_id, mask, mode_id, received_ts = record[:4]
+    tick = Tick(keys[key_id], received_ts)
+    tick.mode = REQUEST_MODES.get(mode_id)
+    values = record[4:]
+    for bit, name in enumerate(_FIELDS):
+        if mask >> bit & 1:
+            setattr(tick, name, values[bit])
+    return tick
+
+
+class TickJournal:
+    """
+    Append-only journal for one trading day.
+
+    Args:
+        path: .ticks file path (the .keys file sits next to it)
+        readonly: Open an existing journal for reading/replay only
+    """
+
+    def __init__(self, path: Union[str, Path], readonly: bool = False):
+        self.path = Path(path)
+        self.keys_path = self.path.with_suffix(".keys")
+        self.readonly = readonly
+        self._lock = threading.Lock()
+
+        if readonly:
+            if not self.path.exists():
+                raise FileNotFoundError(self.path)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if not self.path.exists():
+                with open(self.path, "wb") as f:
+                    f.write(HEADER.pack(JOURNAL_MAGIC, RECORD_SIZE, 0).ljust(HEADER_SIZE, b"\0"))
+                    f.truncate(HEADER_SIZE + GROW_BYTES)
+
+        self._file = open(self.path, "rb" if readonly else "r+b")
+        self._map = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE
+        )
+        magic, record_size, count = HEADER.unpack_from(self._map, 0)
+        if magic != JOURNAL_MAGIC:
+            raise ValueError(f"{self.path} is not a tick journal")
+        if record_size != RECORD_SIZE:
+            raise ValueError(f"{self.path} has record size {record_size}, expected {RECORD_SIZE}")
+        self.count = count
+
+        self.keys: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        if self.keys_path.exists():
+            for line in self.keys_path.read_text(encoding="utf-8").splitlines():
+                self._key_ids[line] = len(self.keys)
+                self.keys.append(line)
+        self._keys_file = None if readonly else open(self.keys_path, "a", encoding="utf-8")
+
+        # Sparse index: received_ts of records 0, STRIDE, 2*STRIDE, ...
+        self._index_ts: List[float] = []
+        for record_no in range(0, self.count, INDEX_STRIDE):
+            self._index_ts.append(self._received_ts(record_no))
+
+    # ---------------------------------------------------------------- writing
+
+    def append(self, ticks: List[Tick]) -> int:
+        """Append ticks (one frame/batch); returns the new record count"""
+        if self.readonly:
+            raise PermissionError("journal opened read-only")
+        with self._lock:
+            needed = HEADER_SIZE + (self.count + len(ticks)) * RECORD_SIZE
+            if needed > len(self._map):
+                self._grow(needed)
+
+            offset = HEADER_SIZE + self.count * RECORD_SIZE
+            for tick in ticks:
+                key_id = self._key_ids.get(tick.instrument_key)
+                if key_id is None:
+                    key_id = self._add_key(tick.instrument_key)
+                if self.count % INDEX_STRIDE == 0:
+                    self._index_ts.append(tick.received_ts or 0.0)
+                RECORD.pack_into(self._map, offset, *_encode(tick, key_id))
+                offset += RECORD_SIZE
+                self.count += 1
+
+            # Publish the new count only after the records are in place
+            struct.pack_into("<Q", self._map, 8, self.count)
+            return self.count
+
+    def on_ticks(self, ticks: List[Tick]) -> None:
+        """Tick sink signature for TickBus callbacks"""
+        self.append(ticks)
+
+    def _add_key(self, instrument_key: str) -> int:
+        key_id = len(self.keys)
+        self.keys.append(instrument_key)
+        self._key_ids[instrument_key] = key_id
+        self._keys_file.write(instrument_key + "\n")
+        self._keys_file.flush()
+        return key_id
+
+    def _grow(self, needed: int) -> None:
+        new_size = max(needed, len(self._map) + GROW_BYTES)
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(new_size)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE)
+
+    def flush(self) -> None:
+        if not self.readonly:
+            self._map.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map.closed:
+                return
+            if not self.readonly:
+                self._map.flush()
+                self._keys_file.close()
+            self._map.close()
+            if not self.readonly:
+                # Drop the unused preallocated tail
+                self._file.truncate(HEADER_SIZE + self.count * RECORD_SIZE)
+            self._file.close()
+
+    def __enter__(self) -> "TickJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------------------------------------------------------------- reading
+
+    def _received_ts(self, record_no: int) -> float:
+        return struct.unpack_from("<d", self._map, HEADER_SIZE + record_no * RECORD_SIZE + 16)[0]
+
+    def _refresh(self) -> None:
+        """Pick up records appended by another process (read-only mode)"""
+        if not self.readonly:
+            return
+        count = HEADER.unpack_from(self._map, 0)[2]
+        if HEADER_SIZE + count * RECORD_SIZE > len(self._map):
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.keys_path.exists() and count > self.count:
+            for line in self.keys_path.read_text(encoding="utf-8").splitlines()[len(self.keys):]:
+                self._key_ids[line] = len(self.keys)
+                self.keys.append(line)
+        for record_no in range(len(self._index_ts) * INDEX_STRIDE, count, INDEX_STRIDE):
+            self._index_ts.append(self._received_ts(record_no))
+        self.count = count
+
+    def seek(self, ts: float) -> int:
+        """Index of the first record with received_ts >= ts"""
+        self._refresh()
+        block = max(bisect.bisect_left(self._index_ts, ts) - 1, 0)
+        record_no = block * INDEX_STRIDE
+        end = min(record_no + 2 * INDEX_STRIDE, self.count)
+        while record_no < end and self._received_ts(record_no) < ts:
+            record_no += 1
+        return record_no
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> List[Tick]:
+        """Decode records [start, end)"""
+        self._refresh()
+        end = self.count if end is None else min(end, self.count)
+        if start >= end:
+            return []
+        buf = self._map[HEADER_SIZE + start * RECORD_SIZE : HEADER_SIZE + end * RECORD_SIZE]
+        keys = self.keys
+        return [_decode(record, keys) for record in RECORD.iter_unpack(buf)]
+
+    def records(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """Records [start, end) as a RECORD_DTYPE array (a copy; unset fields read 0)"""
+        self._refresh()
+        end = self.count if end is None else min(end, self.count)
+        if start >= end:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.frombuffer(
+            self._map, dtype=RECORD_DTYPE, count=end - start, offset=HEADER_SIZE + start * RECORD_SIZE
+        ).copy()
+
+    def iter_frames(
+        self, start_ts: Optional[float] = None, end_ts: Optional[float] = None, chunk: int = 8192
+    ) -> Iterator[List[Tick]]:
+        """Yield ticks grouped by original frame (same received_ts), in order"""
+        record_no = self.seek(start_ts) if start_ts is not None else 0
+        frame: List[Tick] = []
+        while record_no < self.count:
+            ticks = self.read(record_no, record_no + chunk)
+            record_no += len(ticks)
+            for tick in ticks:
+                if end_ts is not None and tick.received_ts >= end_ts:
+                    if frame:
+                        yield frame
+                    return
+                if frame and tick.received_ts != frame[0].received_ts:
+                    yield frame
+                    frame = []
+                frame.append(tick)
+        if frame:
+            yield frame
+
+    def time_range(self) -> Optional[tuple]:
+        self._refresh()
+        if not self.count:
+            return None
+        return self._received_ts(0), self._received_ts(self.count - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        span = self.time_range()
+        return {
+            "path": str(self.path),
+            "records": self.count,
+            "instruments": len(self.keys),
+            "record_size": RECORD_SIZE,
+            "bytes": HEADER_SIZE + self.count * RECORD_SIZE,
+            "first_ts": span[0] if span else None,
+            "last_ts": span[1] if span else None,
+        }
+
+
+def journal_path(base_dir: Union[str, Path], day: Optional[str] = None) -> Path:
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    return Path(base_dir) / f"{day}.ticks"
+
+
+class DailyTickJournal:
+    """Routes ticks to the journal of the current day, rolling over at midnight"""
+
+    def __init__(self, base_dir: Union[str, Path] = "data/tick_journal"):
+        self.base_dir = Path(base_dir)
+        self._day: Optional[str] = None
+        self._journal: Optional[TickJournal] = None
+        self._subscription = None
+
+    @property
+    def journal(self) -> Optional[TickJournal]:
+        return self._journal
+
+    def on_ticks(self, ticks: List[Tick]) -> None:
+        day = datetime.now().strftime("%Y-%m-%d")
+        if day != self._day:
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = TickJournal(journal_path(self.base_dir, day))
+            self._day = day
+        self._journal.append(ticks)
+
+    def attach(self, bus, **subscription) -> Any:
+        """Journal every tick published on a TickBus"""
+        if not subscription:
+            subscription = {"all_instruments": True}
+        self._subscription = bus.subscribe(
+            name="tick-journal", callback=self.on_ticks, capacity=262144, **subscription
+        )
+        return self._subscription
+
+    def close(self) -> None:
+        if self._subscription is not None:
+            self._subscription.close()
+            leftover = self._subscription.poll()
+            if leftover:
+                self.on_ticks(leftover)
+            self._subscription = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+_tick_journal: Optional[DailyTickJournal] = None
+_tick_journal_lock = threading.Lock()
+
+
+def get_tick_journal(base_dir: Union[str, Path] = "data/tick_journal") -> DailyTickJournal:
+    """Process-wide daily journal capturing every tick on the shared tick bus"""
+    global _tick_journal
+    if _tick_journal is None:
+        with _tick_journal_lock:
+            if _tick_journal is None:
+                from backend.services.streaming.tick_bus import get_tick_bus
+
+                journal = DailyTickJournal(base_dir)
+                journal.attach(get_tick_bus())
+                logger.info(f"[TickJournal] Capturing live ticks under {journal.base_dir}")
+                _tick_journal = journal
+    return _tick_journal
+
+
+def replay(
+    journal: TickJournal,
+    sink: Callable[[List[Tick]], Any],
+    speed: Optional[float] = 1.0,
+    start_ts: Optional[float] = None,
+    end_ts: Optional[float] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Push journaled frames into sink, preserving recorded inter-frame gaps.
+
+    Args:
+        journal: Journal to replay
+        sink: Callable receiving each frame's ticks (e.g. TickBus.publish)
+        speed: 1.0 = real time, 10.0 = ten times faster, None/inf = no pacing
+        start_ts, end_ts: Optional received_ts window
+        stop_event: Set to abort the replay
+
+    Returns:
+        Replay statistics (frames, ticks, elapsed, ticks_per_sec, max_lag_ms)
+    """
+    paced = speed is not None and not math.isinf(speed)
+    frames = ticks = 0
+    max_lag = 0.0
+    wall_start = time.perf_counter()
+    first_ts = None
+
+    for frame in journal.iter_frames(start_ts, end_ts):
+        if stop_event is not None and stop_event.is_set():
+            break
+        if paced:
+            if first_ts is None:
+                first_ts = frame[0].received_ts
+            due = (frame[0].received_ts - first_ts) / speed
+            delay = due - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay > max_lag:
+                max_lag = -delay
+        sink(frame)
+        frames += 1
+        ticks += len(frame)
+
+    elapsed = time.perf_counter() - wall_start
+    return {
+        "frames": frames,
+        "ticks": ticks,
+        "elapsed_seconds": round(elapsed, 3),
+        "ticks_per_sec": round(ticks / elapsed, 1) if elapsed > 0 else None,
+        "max_lag_ms": round(max_lag * 1000, 3),
+        "speed": speed if paced else "max",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a tick journal")
+    parser.add_argument("--dir", default="data/tick_journal", help="Journal directory")
+    parser.add_argument("--date", help="Trading day (YYYY-MM-DD), default today")
+    parser.add_argument("--speed", default="max", help="Replay speed: 1, 10, ... or 'max'")
+    parser.add_argument("--stats", action="store_true", help="Only print journal stats")
+    parser.add_argument(
+        "--aggregate", action="store_true", help="Replay through the tick bus into a bar aggregator"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with TickJournal(journal_path(args.dir, args.date), readonly=True) as journal:
+        print(journal.get_stats())
+        if args.stats:
+            return
+
+        from backend.services.streaming.tick_bus import TickBus
+
+        bus = TickBus()
+        aggregator = None
+        if args.aggregate:
+            from backend.services.streaming.bar_aggregator import BarAggregator
+
+            aggregator = BarAggregator()
+            bus.subscribe(all_instruments=True, callback=aggregator.on_ticks, capacity=262144)
+
+        speed = None if args.speed == "max" else float(args.speed)
+        print(replay(journal, bus.publish, speed=speed))
+        print(bus.get_stats())
+        if aggregator is not None:
+            print(aggregator.get_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -38,11 +38,27 @@ import sqlite3
 import sys
 import time
 import random
+import uuid
 from datetime import datetime
 from typing import Optional, Callable, Dict, List
+from pathlib import Path
 import websocket
 import threading
 
+# Add project root to Python path (go up 3 levels from backend/services/streaming/)
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+sys.path.insert(0, str(_project_root))
+
+from backend.services.streaming.feed_decoder import tick_from_quote
+from backend.services.streaming.order_book import get_order_book_manager
+from backend.services.streaming.quote_store import QuoteStore, load_instrument_ids
+from backend.services.streaming.tick_bus import get_tick_bus
+from backend.services.streaming.tick_history import get_tick_history
+
+
+def _as_int(value: Optional[float]) -> Optional[int]:
+    return int(value) if value is not None else None
+
 
 class WebsocketQuoteStreamer:
     """
@@ -64,12 +80,19 @@ class WebsocketQuoteStreamer:
         self.connected = False
         self.subscribed_symbols = set()
         self.callbacks: Dict[str, List[Callable]] = {}
-        self.current_quotes: Dict[str, Dict] = {}
+        # Latest quote per symbol, updated in place (dict-compatible views)
+        self.current_quotes = QuoteStore(load_instrument_ids(db_path))
         self.tick_count = 0
         self.start_time = None
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 10
         self.reconnect_delay = 5  # seconds
+        self._stop_requested = threading.Event()
+        self.tick_bus = get_tick_bus()
+        # Depth books fed from the bus; answers spread queries without the quote dict
+        self.order_books = get_order_book_manager()
+        # Recent ticks per symbol in memory; the database only serves older history
+        self.tick_history = get_tick_history()
 
         self._init_database()
 
@@ -135,8 +158,9 @@ class WebsocketQuoteStreamer:
             # Store external callback
             self._external_on_open = on_open
 
-            # Run websocket in separate thread
-            self.ws_thread = threading.Thread(target=self.ws.run_forever, daemon=True)
+            # Run websocket in separate thread (reconnects handled by the loop)
+            self._stop_requested.clear()
+            self.ws_thread = threading.Thread(target=self._run_forever_loop, daemon=True)
             self.ws_thread.start()
 
             # Wait for connection
@@ -156,6 +180,7 @@ class WebsocketQuoteStreamer:
         """Handle websocket open event."""
         self.connected = True
         self.start_time = datetime.now()
+        self.reconnect_attempts = 0
         print(
             f"✅ Websocket connected at {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}"
         )
@@ -167,13 +192,15 @@ class WebsocketQuoteStreamer:
 
             if "ltp" in data:
                 symbol = data.get("symbol", "UNKNOWN")
+                data.setdefault("received_ts", time.time())
                 self.current_quotes[symbol] = data
 
                 # Store in database
                 self._store_tick(data)
 
-                # Trigger callbacks
+                # Trigger callbacks; bus subscribers read Tick attributes, never dicts
                 self._trigger_callbacks(symbol, data)
+                self.tick_bus.publish_one(tick_from_quote(data))
 
                 self.tick_count += 1
 
@@ -186,21 +213,30 @@ class WebsocketQuoteStreamer:
         """Handle websocket error."""
         print(f"❌ Websocket error: {error}")
 
-    def _on_close(self, ws, close_status_code, close_msg):
-        """Handle websocket close."""
-        self.connected = False
-        print(f"⚠️  Websocket closed (code: {close_status_code}, msg: {close_msg})")
+    def _run_forever_loop(self):
+        """Run the websocket and reconnect with full-jitter backoff until disconnect()."""
+        while not self._stop_requested.is_set():
+            self.ws.run_forever()
+
+            if self._stop_requested.is_set():
+                break
+            if self.reconnect_attempts >= self.max_reconnect_attempts:
+                print("❌ Max reconnection attempts reached")
+                break
 
-        # Attempt reconnect with exponential backoff + jitter
-        if self.reconnect_attempts < self.max_reconnect_attempts:
             self.reconnect_attempts += 1
-            # Exponential backoff: 2^n seconds, capped at 300s (5 min), with jitter
-            wait_time = min(300, (2**self.reconnect_attempts) + random.uniform(0, 1))
+            # Exponential backoff: up to 2^n seconds, capped at 300s (5 min), full jitter
+            wait_time = random.uniform(0, min(300, 2**self.reconnect_attempts))
             print(
                 f"🔄 Attempting reconnect #{self.reconnect_attempts} in {wait_time:.1f}s..."
             )
-            time.sleep(wait_time)
-            self.connect()
+            if self._stop_requested.wait(wait_time):
+                break
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        """Handle websocket close."""
+        self.connected = False
+        print(f"⚠️  Websocket closed (code: {close_status_code}, msg: {close_msg})")
 
     def subscribe(self, symbols: List[str]) -> bool:
         """
@@ -217,21 +253,23 @@ class WebsocketQuoteStreamer:
             return False
 
         try:
-            for symbol in symbols:
-                if symbol not in self.subscribed_symbols:
-                    subscribe_msg = {
-                        "guid": "clientId-1",
-                        "method": "sub",
-                        "data": {
-                            "mode": "LTP",  # LTP = Last Traded Price
-                            "tokenized": False,
-                        },
-                    }
-
-                    # For Upstox, send subscription request
-                    self.ws.send(json.dumps(subscribe_msg))
-                    self.subscribed_symbols.add(symbol)
-                    print(f"📌 Subscribed to {symbol}")
+            new_symbols = [s for s in symbols if s not in self.subscribed_symbols]
+            if new_symbols:
+                # One batched request per call, each with its own guid
+                subscribe_msg = {
+                    "guid": str(uuid.uuid4()),
+                    "method": "sub",
+                    "data": {
+                        "mode": "LTP",  # LTP = Last Traded Price
+                        "tokenized": False,
+                        "instrumentKeys": new_symbols,
+                    },
+                }
+
+                # For Upstox, send subscription request
+                self.ws.send(json.dumps(subscribe_msg))
+                self.subscribed_symbols.update(new_symbols)
+                print(f"📌 Subscribed to {', '.join(new_symbols)}")
 
             return True
 
@@ -254,17 +292,17 @@ class WebsocketQuoteStreamer:
             return False
 
         try:
-            for symbol in symbols:
-                if symbol in self.subscribed_symbols:
-                    unsubscribe_msg = {
-                        "guid": "clientId-1",
-                        "method": "unsub",
-                        "data": {"mode": "LTP"},
-                    }
-
-                    self.ws.send(json.dumps(unsubscribe_msg))
-                    self.subscribed_symbols.discard(symbol)
-                    print(f"📌 Unsubscribed from {symbol}")
+            subscribed = [s for s in symbols if s in self.subscribed_symbols]
+            if subscribed:
+                unsubscribe_msg = {
+                    "guid": str(uuid.uuid4()),
+                    "method": "unsub",
+                    "data": {"mode": "LTP", "instrumentKeys": subscribed},
+                }
+
+                self.ws.send(json.dumps(unsubscribe_msg))
+                self.subscribed_symbols.difference_update(subscribed)
+                print(f"📌 Unsubscribed from {', '.join(subscribed)}")
 
             return True
 
@@ -343,6 +381,13 @@ class WebsocketQuoteStreamer:
     def get_bid_ask_spread(self, symbol: str) -> Optional[Dict]:
         """Get bid-ask spread for symbol."""
         quote = self.get_quote(symbol)
+        book = self.order_books.get_book(symbol)
+        if book is not None and book.bid_levels and book.ask_levels:
+            ltp = (quote or {}).get("ltp") or book.mid
+            depth = book.to_dict()
+            depth.pop("instrument_key")
+            depth.update(symbol=symbol, ltp=ltp, spread_pct=depth["spread"] / ltp * 100 if ltp else 0)
+            return depth
         if not quote:
             return None
 
@@ -365,29 +410,62 @@ class WebsocketQuoteStreamer:
         }
 
     def get_tick_history(self, symbol: str, limit: int = 100) -> List[Dict]:
-        """Get historical ticks for symbol."""
+        """Get historical ticks for symbol, newest first (memory, then database)."""
+        ticks = [
+            {
+                "timestamp": str(datetime.fromtimestamp(t["ts"])),
+                "symbol": symbol,
+                "ltp": t["ltp"],
+                "bid_price": t["bid"],
+                "bid_qty": _as_int(t["bid_qty"]),
+                "ask_price": t["ask"],
+                "ask_qty": _as_int(t["ask_qty"]),
+                "volume": _as_int(t["volume"]),
+                "oi": _as_int(t["oi"]),
+            }
+            for t in self.tick_history.recent(symbol, limit)
+        ]
+        if len(ticks) >= limit:
+            return ticks
+
+        # Older than the in-memory ring: fall back to the tick table
         try:
             conn = sqlite3.connect(self.db_path)
             conn.row_factory = sqlite3.Row
             c = conn.cursor()
 
-            c.execute(
-                """
-                SELECT * FROM quote_ticks
-                WHERE symbol = ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """,
-                (symbol, limit),
-            )
+            if ticks:
+                c.execute(
+                    """
+                    SELECT * FROM quote_ticks
+                    WHERE symbol = ? AND timestamp < ?
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                """,
+                    (symbol, ticks[-1]["timestamp"], limit - len(ticks)),
+                )
+            else:
+                c.execute(
+                    """
+                    SELECT * FROM quote_ticks
+                    WHERE symbol = ?
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                """,
+                    (symbol, limit),
+                )
 
-            ticks = [dict(row) for row in c.fetchall()]
+            ticks.extend(dict(row) for row in c.fetchall())
             conn.close()
             return ticks
 
         except Exception as e:
             print(f"❌ Error getting tick history: {e}")
-            return []
+            return ticks
+
+    def get_tick_stats(self, symbol: str, window_seconds: float = 60.0) -> Optional[Dict]:
+        """Rolling VWAP, range and tick rate for symbol from in-memory ticks."""
+        return self.tick_history.stats(symbol, window_seconds)
 
     def get_stats(self) -> Dict:
         """Get streaming stats."""
@@ -443,6 +521,7 @@ class WebsocketQuoteStreamer:
 
     def disconnect(self):
         """Disconnect websocket."""
+        self._stop_requested.set()
         if self.ws:
             self.ws.close()
             self.connected = False
@@ -2,12 +2,22 @@
 """
 WebSocket Server for Real-time Market Data
 Provides live updates for option chains, market quotes, and positions
+
+Quotes are pushed from the internal tick stream as they arrive: each client
+gets at most one update per instrument per conflation window (latest value
+wins) within a per-client bandwidth budget. Quote rooms fall back to REST
+polling only while the feed has no recent ticks for the instrument.
+
+This is also the process that runs the live signal engine: it acquires the
+LIVE_SIGNAL_INSTRUMENTS universe upstream and stores signals and indicator
+snapshots for the REST API to read. It also journals the live feed to
+TICK_JOURNAL_DIR (one file per trading day) for replay.
 """
 
 import os
 import sys
 from pathlib import Path
-from typing import Dict, Set
+from typing import Dict, List, Optional, Set
 from datetime import datetime
 import re
 
@@ -22,8 +32,15 @@ from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
 import logging
 
+from config.enhancements import setup_prometheus_metrics
 from backend.services.upstox.live_api import get_upstox_api
 from backend.services.market_data.options_chain import OptionsChainService
+from backend.services.streaming.latency import get_latency_tracker
+from backend.services.streaming.live_signals import get_live_signal_engine
+from backend.services.streaming.push_hub import PushHub
+from backend.services.streaming.subscription_manager import get_subscription_manager
+from backend.services.streaming.tick_bus import get_tick_bus
+from backend.services.streaming.tick_journal import get_tick_journal
 
 # Setup logger
 logging.basicConfig(
@@ -35,6 +52,8 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "upstox-trading-platform-secret"
 CORS(app, resources={r"/*": {"origins": "*"}})
+# /metrics, including per-stage tick latency histograms
+setup_prometheus_metrics(app)
 
 # Socket.IO server
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
@@ -51,6 +70,66 @@ upstox_api = get_upstox_api()
 # Options Service (for Option Chain)
 options_service = OptionsChainService()
 
+# Push settings
+QUOTE_CONFLATION_SECONDS = float(os.getenv("WS_QUOTE_CONFLATION_MS", "250")) / 1000
+CLIENT_BUDGET_BYTES_PER_SEC = int(os.getenv("WS_CLIENT_BUDGET_BYTES", str(64 * 1024)))
+REST_POLL_SECONDS = 5
+
+# Live signal universe: comma-separated instrument keys, each optionally "key=SYMBOL"
+DB_PATH = os.getenv("DATABASE_PATH", "market_data.db")
+LIVE_SIGNAL_INSTRUMENTS = os.getenv(
+    "LIVE_SIGNAL_INSTRUMENTS", "NSE_INDEX|Nifty 50=NIFTY,NSE_INDEX|Nifty Bank=BANKNIFTY"
+)
+
+# Daily tick capture for replay; empty disables it
+TICK_JOURNAL_DIR = os.getenv("TICK_JOURNAL_DIR", "data/tick_journal")
+
+# Upstream feed interest of all connected UI clients (ref-counted, shared)
+UI_CONSUMER = "websocket_server"
+
+
+def _subscribe_upstream(instrument_keys: List[str]):
+    get_subscription_manager().acquire(UI_CONSUMER, instrument_keys, mode="full")
+
+
+def _release_upstream(instrument_keys: List[str]):
+    get_subscription_manager().release(UI_CONSUMER, instrument_keys)
+
+
+push_hub = PushHub(
+    emit=lambda event, data, sid: socketio.emit(event, data, to=sid),
+    window_seconds=QUOTE_CONFLATION_SECONDS,
+    budget_bytes_per_sec=CLIENT_BUDGET_BYTES_PER_SEC,
+    on_new_instruments=_subscribe_upstream,
+    on_released_instruments=_release_upstream,
+    latency_tracker=get_latency_tracker(),
+)
+push_hub.attach(get_tick_bus())
+
+# symbol -> instrument key for quote rooms
+quote_instruments: Dict[str, str] = {}
+
+
+def start_live_signals():
+    """Run the live signal engine here, where ticks are published and bars completed"""
+    symbol_map = {}
+    for entry in LIVE_SIGNAL_INSTRUMENTS.split(","):
+        key, _, symbol = entry.strip().partition("=")
+        if key:
+            symbol_map[key] = symbol or key
+    if not symbol_map:
+        logger.info("Live signals disabled (LIVE_SIGNAL_INSTRUMENTS is empty)")
+        return None
+    return get_live_signal_engine(list(symbol_map), symbol_map=symbol_map, db_path=DB_PATH)
+
+
+def start_tick_journal():
+    """Journal every tick published on the bus in this (the feed) process"""
+    if not TICK_JOURNAL_DIR:
+        logger.info("Tick journal disabled (TICK_JOURNAL_DIR is empty)")
+        return None
+    return get_tick_journal(TICK_JOURNAL_DIR)
+
 
 # Input validation functions
 def validate_symbol(symbol: str) -> bool:
@@ -88,6 +167,7 @@ def handle_disconnect():
     # Remove from all subscriptions
     for subscription_type in active_subscriptions:
         active_subscriptions[subscription_type].discard(request.sid)
+    push_hub.remove_client(request.sid)
 
 
 @socketio.on("subscribe_options")
@@ -178,8 +258,17 @@ def handle_subscribe_quote(data):
     join_room(room)
     active_subscriptions["quotes"].add(request.sid)
 
-    # Send initial quote
-    quote = upstox_api.get_market_quote(symbol)
+    # Push live updates from the tick stream
+    instrument_key = _resolve_instrument_key(symbol)
+    if instrument_key:
+        push_hub.subscribe(request.sid, instrument_key, topic=symbol)
+
+    # Send initial quote: latest streamed tick if we have one, else REST
+    latest = get_tick_bus().get_latest(instrument_key) if instrument_key else None
+    if latest is not None and push_hub.is_live(instrument_key):
+        quote = push_hub.serializer(latest)
+    else:
+        quote = upstox_api.get_market_quote(symbol)
     if quote:
         emit(
             "quote_update",
@@ -187,6 +276,37 @@ def handle_subscribe_quote(data):
         )
 
 
+@socketio.on("unsubscribe_quote")
+def handle_unsubscribe_quote(data):
+    """Unsubscribe from market quote updates"""
+    if not data or not isinstance(data, dict):
+        emit("error", {"message": "Invalid request data"})
+        return
+
+    symbol = data.get("symbol", "NIFTY")
+
+    # Validate symbol
+    if not validate_symbol(symbol):
+        emit("error", {"message": "Invalid symbol format"})
+        return
+
+    leave_room(f"quote_{symbol}")
+    instrument_key = quote_instruments.get(symbol)
+    if instrument_key:
+        push_hub.unsubscribe(request.sid, instrument_key)
+    logger.info(f"Client {request.sid} unsubscribed from quotes: {symbol}")
+
+
+def _resolve_instrument_key(symbol: str) -> Optional[str]:
+    """Instrument key for a quote symbol (cached)"""
+    instrument_key = quote_instruments.get(symbol)
+    if instrument_key is None:
+        instrument_key = upstox_api._get_instrument_key(symbol)
+        if instrument_key:
+            quote_instruments[symbol] = instrument_key
+    return instrument_key
+
+
 @socketio.on("subscribe_positions")
 def handle_subscribe_positions():
     """Subscribe to positions updates"""
@@ -235,10 +355,13 @@ def start_background_updates():
                             room=room,
                         )
 
-            # Update quotes
+            # Update quotes (REST fallback only; live instruments are pushed by push_hub)
             for room in rooms:
                 if room and room.startswith("quote_"):
                     symbol = room.replace("quote_", "")
+                    instrument_key = quote_instruments.get(symbol)
+                    if instrument_key and push_hub.is_live(instrument_key):
+                        continue
                     quote = upstox_api.get_market_quote(symbol)
 
                     if quote:
@@ -261,8 +384,8 @@ def start_background_updates():
                     room="positions",
                 )
 
-            # Wait 5 seconds before next update
-            socketio.sleep(5)
+            # Wait before next update
+            socketio.sleep(REST_POLL_SECONDS)
 
         except Exception as e:
             logger.error(f"Error in background updates: {e}", exc_info=True)
@@ -272,8 +395,11 @@ def start_background_updates():
 if __name__ == "__main__":
     logger.info("Starting WebSocket server on http://localhost:5002")
 
-    # Start background update task
+    # Start background update tasks
     socketio.start_background_task(start_background_updates)
+    socketio.start_background_task(push_hub.run, socketio.sleep)
+    start_tick_journal()
+    start_live_signals()
 
     # Run server
     socketio.run(app, host="0.0.0.0", port=5002, debug=False)
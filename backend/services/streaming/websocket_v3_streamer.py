@@ -39,9 +39,19 @@ _project_root = Path(__file__).resolve().parent.parent.parent.parent
 sys.path.insert(0, str(_project_root))
 
 from backend.utils.auth.manager import AuthManager
-from backend.utils.errors import with_retry, UpstoxAPIError
+from backend.utils.logging.error_handler import with_retry, UpstoxAPIError
 from backend.data.database.database_pool import get_db_pool
 from backend.utils.auth.mixins import AuthHeadersMixin
+from backend.services.streaming.feed_decoder import (
+    FEED_TYPE_MARKET_INFO,
+    FeedDecodeError,
+    Tick,
+    decode_feed_response,
+)
+from backend.services.streaming.feed_replay import FrameRecorder
+from backend.services.streaming.latency import LatencyTracker, get_latency_tracker
+from backend.services.streaming.stream_core import StreamingCore
+from backend.services.streaming.tick_bus import TickBus, get_tick_bus
 import requests
 
 logger = logging.getLogger(__name__)
@@ -55,12 +65,22 @@ class WebSocketV3Streamer(AuthHeadersMixin):
     BASE_URL = "https://api.upstox.com/v2"
     AUTHORIZE_V3 = "/feed/market-data-feed/authorize/v3"
 
-    def __init__(self, db_path: str = "market_data.db"):
+    def __init__(
+        self,
+        db_path: str = "market_data.db",
+        record_path: Optional[str] = None,
+        tick_bus: Optional[TickBus] = None,
+        latency_tracker: Optional[LatencyTracker] = None,
+    ):
         """
         Initialize WebSocket V3 Streamer.
 
         Args:
             db_path: Path to SQLite database
+            record_path: Optional file to record raw binary frames for replay
+            tick_bus: Bus to publish decoded ticks on (defaults to the shared bus)
+            latency_tracker: Per-stage tick latency histograms (defaults to the
+                             shared tracker exported to Prometheus)
         """
         self.auth_manager = AuthManager()
         self.db_path = db_path
@@ -73,6 +93,19 @@ class WebSocketV3Streamer(AuthHeadersMixin):
         self.connected = False
         self.subscribed_symbols: List[str] = []
 
+        # Decoded tick consumers and latest segment status from market_info frames
+        self.tick_callbacks: List[Callable[[List[Tick]], None]] = []
+        self.connection_listeners: List[Callable[[bool, Any], None]] = []
+        self.market_status: Dict[str, str] = {}
+        self.decode_errors = 0
+        self.frame_recorder = FrameRecorder(record_path) if record_path else None
+        self.tick_bus = tick_bus if tick_bus is not None else get_tick_bus()
+        self.latency = latency_tracker if latency_tracker is not None else get_latency_tracker()
+        self._stop_requested = threading.Event()
+
+        # Pipelined streaming (start_streaming); connect() keeps the inline path
+        self.stream_core: Optional[StreamingCore] = None
+
         # Connection metrics
         self.connection_start_time = None
         self.total_messages_received = 0
@@ -171,6 +204,10 @@ class WebSocketV3Streamer(AuthHeadersMixin):
         """
         Connect to v3 websocket.
 
+        The connection is supervised by _run_forever_loop, which reconnects
+        with jittered backoff after a close instead of recursing from the
+        close handler.
+
         Returns:
             True if connection successful
         """
@@ -191,10 +228,10 @@ class WebSocketV3Streamer(AuthHeadersMixin):
                 on_close=self._on_close,
                 on_open=self._on_open,
             )
+            self._stop_requested.clear()
 
             # Run in separate thread
-            wst = threading.Thread(target=self.ws.run_forever)
-            wst.daemon = True
+            wst = threading.Thread(target=self._run_forever_loop, name="ws-v3", daemon=True)
             wst.start()
 
             # Wait for connection
@@ -206,6 +243,34 @@ class WebSocketV3Streamer(AuthHeadersMixin):
             logger.error(f"❌ Connection failed: {e}", exc_info=True)
             return False
 
+    def _run_forever_loop(self):
+        """Run the websocket, reconnecting with full-jitter backoff until disconnect()"""
+        while not self._stop_requested.is_set():
+            self.ws.run_forever()
+
+            if self._stop_requested.is_set():
+                break
+            if self.reconnect_attempts >= self.max_reconnect_attempts:
+                logger.error("❌ Max reconnection attempts reached")
+                break
+
+            self.reconnect_attempts += 1
+            wait_time = random.uniform(0, min(300, 2**self.reconnect_attempts))
+            logger.info(
+                f"🔄 Reconnecting in {wait_time:.1f}s "
+                f"(attempt {self.reconnect_attempts}/{self.max_reconnect_attempts})"
+            )
+            if self._stop_requested.wait(wait_time):
+                break
+
+            # Re-authorize: the authorized URL is single-use
+            try:
+                self.ws.url = self.authorize_v3().get("authorized_redirect_uri") or self.ws.url
+            except Exception as e:
+                logger.error(f"❌ Re-authorization failed: {e}")
+
+        self._update_health_status()
+
     def _on_open(self, ws):
         """Handle websocket open"""
         self.connected = True
@@ -213,20 +278,46 @@ class WebSocketV3Streamer(AuthHeadersMixin):
         self.reconnect_attempts = 0
 
         logger.info("✅ WebSocket v3 connected")
+        self._notify_connection(True)
 
         # Update health status
         self._update_health_status()
 
+    def add_tick_callback(self, callback: Callable[[List[Tick]], None]):
+        """Register a consumer for decoded ticks (called once per frame)"""
+        self.tick_callbacks.append(callback)
+
+    def add_connection_listener(self, listener: Callable[[bool, Any], None]):
+        """
+        Register listener(connected, source) for connects and drops (e.g. gap
+        backfill). source is the connection that changed: a StreamingCore
+        shard, or this streamer for the inline websocket.
+        """
+        self.connection_listeners.append(listener)
+
+    def _notify_connection(self, connected: bool, source: Any = None):
+        source = self if source is None else source
+        for listener in self.connection_listeners:
+            try:
+                listener(connected, source)
+            except Exception as e:
+                logger.error(f"Connection listener failed: {e}")
+
     def _on_message(self, ws, message):
         """Handle incoming websocket message"""
         try:
-            data = json.loads(message)
-
+            received_ts = time.time()
             self.total_messages_received += 1
             self.last_message_time = datetime.now()
 
-            # Process market data
-            self._process_tick_data(data)
+            if isinstance(message, (bytes, bytearray)):
+                # V3 market data feed: protobuf FeedResponse
+                if self.frame_recorder:
+                    self.frame_recorder.record(message)
+                self._process_binary_frame(message, received_ts)
+            else:
+                # Control / legacy JSON messages
+                self._process_tick_data(json.loads(message))
 
             # Update health status
             self._update_health_status()
@@ -234,14 +325,49 @@ class WebSocketV3Streamer(AuthHeadersMixin):
         except Exception as e:
             logger.error(f"Error processing message: {e}", exc_info=True)
 
+    def _process_binary_frame(self, frame: bytes, received_ts: Optional[float] = None):
+        """Decode a binary feed frame and dispatch its ticks"""
+        received_ts = time.time() if received_ts is None else received_ts
+        try:
+            feed = decode_feed_response(frame, received_ts=received_ts)
+        except FeedDecodeError as e:
+            self.decode_errors += 1
+            logger.warning(f"Dropped undecodable feed frame ({len(frame)} bytes): {e}")
+            return
+
+        if feed.current_ts:
+            self.latency.record("exchange", received_ts - feed.current_ts / 1000.0)
+        self.latency.record("decode", time.time() - received_ts)
+
+        if feed.type == FEED_TYPE_MARKET_INFO and feed.market_status:
+            self.market_status.update(feed.market_status)
+            logger.info(f"Market status update: {feed.market_status}")
+
+        if not feed.ticks:
+            return
+
+        self.latency.observe_ticks("dispatch", feed.ticks)
+        self.tick_bus.publish(feed.ticks)
+        for callback in self.tick_callbacks:
+            try:
+                callback(feed.ticks)
+            except Exception as e:
+                logger.error(f"Tick callback failed: {e}")
+
+        self._save_ticks(feed.ticks)
+        self.latency.observe_ticks("persist", feed.ticks)
+
     def _on_error(self, ws, error):
         """Handle websocket error"""
         logger.error(f"❌ WebSocket error: {error}")
         self._update_health_status()
 
     def _on_close(self, ws, close_status_code, close_msg):
-        """Handle websocket close"""
+        """Handle websocket close (reconnects are driven by _run_forever_loop)"""
+        was_connected = self.connected
         self.connected = False
+        if was_connected:
+            self._notify_connection(False)
 
         logger.warning(
             f"⚠️  WebSocket closed (code: {close_status_code}, msg: {close_msg})"
@@ -249,28 +375,6 @@ class WebSocketV3Streamer(AuthHeadersMixin):
 
         # Save metrics
         self._save_connection_metrics(disconnect_reason=close_msg)
-
-        # Attempt reconnect with exponential backoff
-        if self.reconnect_attempts < self.max_reconnect_attempts:
-            self.reconnect_attempts += 1
-
-            # Exponential backoff with jitter
-            wait_time = min(300, (2**self.reconnect_attempts) + random.uniform(0, 1))
-
-            logger.info(
-                f"🔄 Reconnecting in {wait_time:.1f}s "
-                f"(attempt {self.reconnect_attempts}/{self.max_reconnect_attempts})"
-            )
-
-            time.sleep(wait_time)
-
-            # Re-authorize and connect
-            self.ws_url = None
-            self.connect()
-
-        else:
-            logger.error("❌ Max reconnection attempts reached")
-
         self._update_health_status()
 
     def subscribe(
@@ -303,7 +407,7 @@ class WebSocketV3Streamer(AuthHeadersMixin):
                 },
             }
 
-            self.ws.send(json.dumps(sub_message))
+            self._send_request(sub_message)
             self.subscribed_symbols.extend(instrument_keys)
 
             logger.info(f"✅ Subscribed to {len(instrument_keys)} instruments")
@@ -335,7 +439,7 @@ class WebSocketV3Streamer(AuthHeadersMixin):
                 },
             }
 
-            self.ws.send(json.dumps(unsub_message))
+            self._send_request(unsub_message)
 
             for key in instrument_keys:
                 if key in self.subscribed_symbols:
@@ -348,12 +452,92 @@ class WebSocketV3Streamer(AuthHeadersMixin):
             logger.error(f"❌ Unsubscription failed: {e}", exc_info=True)
             return False
 
+    def _send_request(self, message: Dict[str, Any]):
+        """V3 feed expects subscription requests as binary frames"""
+        self.ws.send(
+            json.dumps(message).encode("utf-8"), opcode=websocket.ABNF.OPCODE_BINARY
+        )
+
     def disconnect(self):
         """Disconnect from websocket"""
+        self._stop_requested.set()
         if self.ws:
             self.ws.close()
             self.connected = False
             logger.info("✅ WebSocket disconnected")
+        if self.frame_recorder:
+            self.frame_recorder.close()
+            self.frame_recorder = None
+
+    def start_streaming(
+        self, instrument_keys: List[str], mode: str = "full", **core_options
+    ) -> StreamingCore:
+        """
+        Stream through the asyncio pipeline instead of the inline callbacks.
+
+        Reading, decoding, tick callbacks and DB writes run as separate
+        stages with bounded queues, so a slow consumer cannot stall the
+        socket. Extra keyword arguments are passed to StreamingCore.
+
+        Args:
+            instrument_keys: Instruments to subscribe
+            mode: Subscription mode ('ltpc', 'full', 'option_greeks', 'full_d30')
+
+        Returns:
+            The running StreamingCore
+        """
+        if self.stream_core is None:
+            self.stream_core = self.create_stream_core(**core_options)
+            self.stream_core.start_in_thread()
+
+        self.stream_core.subscribe(instrument_keys, mode)
+        self.subscribed_symbols = list(self.stream_core.subscriptions)
+        return self.stream_core
+
+    def create_stream_core(self, **core_options) -> StreamingCore:
+        """
+        New (not yet started) pipeline sharing this streamer's authorization,
+        tick callbacks, bus publishing and tick storage. Used for extra
+        upstream connections when subscriptions are sharded.
+        """
+        core = StreamingCore(
+            url=self._authorized_url,
+            on_ticks=[self._dispatch_ticks],
+            persist=self._save_ticks,
+            latency_tracker=self.latency,
+            **core_options,
+        )
+        # Tag events with the shard so listeners know whose instruments dropped
+        core.connection_listeners.append(lambda connected: self._notify_connection(connected, core))
+        return core
+
+    def stop_streaming(self):
+        """Stop the pipeline started by start_streaming()"""
+        if self.stream_core is not None:
+            self.stream_core.stop()
+            self.health_status["stream"] = self.stream_core.get_metrics()
+            self.stream_core = None
+            logger.info("✅ Streaming pipeline stopped")
+
+    def _authorized_url(self) -> str:
+        """Fresh authorized URL for every pipeline (re)connect"""
+        if self.ws_url:
+            # Explicit URL (e.g. a local replay server) is reused as-is
+            return self.ws_url
+        url = self.authorize_v3().get("authorized_redirect_uri")
+        self.ws_url = None
+        if not url:
+            raise UpstoxAPIError("No websocket URL in v3 authorization response")
+        return url
+
+    def _dispatch_ticks(self, ticks: List[Tick]):
+        self.last_message_time = datetime.now()
+        self.tick_bus.publish(ticks)
+        for callback in self.tick_callbacks:
+            try:
+                callback(ticks)
+            except Exception as e:
+                logger.error(f"Tick callback failed: {e}")
 
     def get_health_status(self) -> Dict[str, Any]:
         """
@@ -384,8 +568,17 @@ class WebSocketV3Streamer(AuthHeadersMixin):
             "last_message_ago_seconds": last_msg_ago,
             "reconnect_count": self.reconnect_attempts,
             "subscribed_count": len(self.subscribed_symbols),
+            "latency": self.latency.get_stats(),
             "timestamp": datetime.now().isoformat(),
         }
+        if self.stream_core is not None:
+            stream_metrics = self.stream_core.get_metrics()
+            self.health_status.update(
+                connected=stream_metrics["connected"],
+                messages_received=stream_metrics["frames_received"],
+                reconnect_count=stream_metrics["reconnects"],
+                stream=stream_metrics,
+            )
 
     def _process_tick_data(self, data: Dict[str, Any]):
         """Process and save tick data"""
@@ -429,6 +622,39 @@ class WebSocketV3Streamer(AuthHeadersMixin):
         except Exception as e:
             logger.error(f"Failed to save tick: {e}")
 
+    def _save_ticks(self, ticks: List[Tick]):
+        """Save all ticks of one frame in a single transaction"""
+        try:
+            with self.db_pool.get_connection() as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO websocket_ticks_v3 
+                    (instrument_key, ltp, volume, oi, bid_price, ask_price,
+                     bid_qty, ask_qty, high, low, open, close)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    [
+                        (
+                            t.instrument_key,
+                            t.ltp,
+                            t.volume,
+                            t.oi,
+                            t.bid_price,
+                            t.ask_price,
+                            t.bid_qty,
+                            t.ask_qty,
+                            t.high,
+                            t.low,
+                            t.open,
+                            t.close,
+                        )
+                        for t in ticks
+                    ],
+                )
+
+        except Exception as e:
+            logger.error(f"Failed to save ticks: {e}")
+
     def _save_connection_metrics(self, disconnect_reason: Optional[str] = None):
         """Save connection metrics to database"""
         try:
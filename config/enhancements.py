@@ -161,6 +161,14 @@ def setup_prometheus_metrics(app):
 
             return response
 
+        # Per-stage tick latency histograms (exchange -> receive -> ... -> emit)
+        try:
+            from backend.services.streaming.latency import register_prometheus_collector
+
+            register_prometheus_collector()
+        except ImportError as e:
+            logger.debug(f"Tick latency metrics unavailable: {e}")
+
         # Metrics endpoint
         @app.route("/metrics")
         def metrics():
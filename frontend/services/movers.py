@@ -1,4 +1,5 @@
 import sqlite3
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
@@ -11,6 +12,7 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from backend.services.upstox.live_api import get_upstox_api
+from backend.services.streaming.quote_store import QuoteStore, flatten_market_quote
 
 
 class MarketMoversService:
@@ -29,6 +31,8 @@ class MarketMoversService:
         self.api = get_upstox_api()
         self.db_path = Path(__file__).parent.parent.parent / "market_data.db"
         self._cache = {}  # {category_key: {'data': df, 'timestamp': datetime}}
+        # Latest quote per instrument, shared across categories
+        self.quotes = QuoteStore()
 
     @staticmethod
     def get_instance():
@@ -212,7 +216,8 @@ class MarketMoversService:
             return {"gainers": [], "losers": []}
 
         # 4. Process Data
-        processed_data = []
+        # Quotes land in the compact store; change % is computed per column
+        # instead of building a dict per instrument.
 
         # DEBUG: Print sample keys to diagnose mismatch
         if quotes:
@@ -221,6 +226,7 @@ class MarketMoversService:
             if instruments:
                 print(f"DEBUG: DB Key Sample: '{instruments[0][0]}'")
 
+        symbols = []
         for _, q_data in quotes.items():
             if not q_data:
                 continue
@@ -241,46 +247,37 @@ class MarketMoversService:
                 else:
                     info = {}
 
-            ltp = q_data.get("last_price", 0)
-            change = q_data.get("net_change", 0)
-
-            # FIX: Calculate Previous Close from Net Change to ensure correct % accuracy
-            # (OHLC 'close' can sometimes be today's close after market hours)
-            if ltp != 0:
-                prev_close = ltp - change
-            else:
-                # If LTP is 0, try to use OHLC close as fallback
-                ohlc = q_data.get("ohlc") or {}
-                prev_close = ohlc.get("close", 0)
-
-            # Compute Change %
-            if prev_close and prev_close > 0:
-                pct_change = (change / prev_close) * 100
-            else:
-                pct_change = 0.0
+            sym_name = info.get("symbol", "UNKNOWN")
+            self.quotes[token or sym_name] = flatten_market_quote(q_data)
+            symbols.append((token or sym_name, sym_name))
 
-            vol = q_data.get("volume", 0)
+        keys = [key for key, _ in symbols]
+        ltp = np.nan_to_num(self.quotes.column("ltp", keys))
+        change = np.nan_to_num(self.quotes.column("net_change", keys))
+        ohlc_close = np.nan_to_num(self.quotes.column("close", keys))
+        volume = np.nan_to_num(self.quotes.column("volume", keys))
 
-            vol = q_data.get("volume", 0)
+        # FIX: Calculate Previous Close from Net Change to ensure correct % accuracy
+        # (OHLC 'close' can sometimes be today's close after market hours)
+        # If LTP is 0, use OHLC close as fallback
+        prev_close = np.where(ltp != 0, ltp - change, ohlc_close)
 
-            # Get Sector
-            sym_name = info.get("symbol", "UNKNOWN")
-            sec = sector_map.get(sym_name, "-")
-
-            processed_data.append(
-                {
-                    "symbol": sym_name,
-                    "sector": sec,
-                    "price": ltp,
-                    "change": change,
-                    "pct_change": pct_change,
-                    "volume": vol,
-                }
-            )
+        # Compute Change %
+        pct_change = np.zeros(len(keys))
+        np.divide(change * 100, prev_close, out=pct_change, where=prev_close > 0)
 
         # 5. Sort
         # Sort by Pct Change
-        df = pd.DataFrame(processed_data)
+        df = pd.DataFrame(
+            {
+                "symbol": [sym for _, sym in symbols],
+                "sector": [sector_map.get(sym, "-") for _, sym in symbols],
+                "price": ltp,
+                "change": change,
+                "pct_change": pct_change,
+                "volume": volume.astype(np.int64),
+            }
+        )
 
         if df.empty:
             return {"gainers": [], "losers": []}
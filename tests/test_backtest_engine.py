@@ -20,6 +20,8 @@ from backend.core.analytics.backtest_engine import (
     SMAStrategy,
     RSIStrategy,
     BacktestResult,
+    signal_state,
+    simulate_from_signals,
 )
 
 
@@ -270,5 +272,111 @@ class TestStrategyValidation(unittest.TestCase):
         self.assertGreater(strategy_rsi.params["rsi_period"], 0)
 
 
+class TestNativeSimulator(unittest.TestCase):
+    """Test suite for the built-in NumPy portfolio simulator."""
+
+    def setUp(self):
+        self.close = np.array([100.0, 110.0, 121.0, 110.0, 99.0, 108.9])
+        self.open = np.array([100.0, 105.0, 115.0, 120.0, 100.0, 100.0])
+        self.entries = np.array([True, False, False, False, True, False])
+        self.exits = np.array([False, False, True, False, False, False])
+
+    def test_signal_state(self):
+        """Latest signal wins; conflicting bars are ignored."""
+        entries = np.array([0, 1, 1, 0, 1, 0, 0], dtype=bool)
+        exits = np.array([1, 0, 0, 1, 1, 0, 1], dtype=bool)
+        self.assertEqual(
+            signal_state(entries, exits).tolist(),
+            [False, True, True, False, False, False, False],
+        )
+
+    def test_close_fills_without_costs(self):
+        """Round trip at closes compounds into the next trade."""
+        sim = simulate_from_signals(
+            self.open, self.close, self.entries, self.exits,
+            init_cash=1000, commission=0, slippage=0, fill_price="close",
+        )
+        # 100 -> 121 (+21%), flat, then 99 -> 108.9 (+10%) still open
+        self.assertAlmostEqual(sim.equity[2], 1210.0)
+        self.assertAlmostEqual(sim.equity[3], 1210.0)
+        self.assertAlmostEqual(sim.equity[-1], 1331.0)
+        self.assertEqual(sim.metrics["total_trades"], 2)
+        self.assertEqual(sim.metrics["closed_trades"], 1)
+        self.assertEqual(sim.trades["exit_idx"].tolist(), [2, -1])
+        self.assertAlmostEqual(sim.metrics["win_rate"], 1.0)
+
+    def test_next_open_fills(self):
+        """Signals fill at the following bar's open."""
+        sim = simulate_from_signals(
+            self.open, self.close, self.entries, self.exits,
+            init_cash=1000, commission=0, slippage=0, fill_price="next_open",
+        )
+        self.assertEqual(sim.trades["entry_idx"].tolist(), [1, 5])
+        self.assertAlmostEqual(sim.trades["entry_price"][0], 105.0)
+        self.assertAlmostEqual(sim.trades["exit_price"][0], 120.0)
+        self.assertAlmostEqual(sim.equity[3], 1000 * 120 / 105)
+
+    def test_costs(self):
+        """Slippage moves fill prices and commission is charged on both sides."""
+        sim = simulate_from_signals(
+            self.open, self.close, self.entries, self.exits,
+            init_cash=1000, commission=0.001, slippage=0.01, fill_price="close",
+        )
+        buy, sell = 100 * 1.01, 121 * 0.99
+        expected = 1000 / (buy * 1.001) * sell * 0.999
+        self.assertAlmostEqual(sim.equity[2], expected)
+        self.assertAlmostEqual(sim.trades["pnl"][0], expected - 1000)
+        self.assertTrue(np.isnan(sim.trades["pnl"][1]))
+
+    def test_matches_loop_simulation(self):
+        """Vectorized result equals a bar-by-bar reference loop."""
+        rng = np.random.default_rng(3)
+        n = 500
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        entries = rng.random(n) < 0.05
+        exits = rng.random(n) < 0.05
+
+        cash, shares, equity = 1000.0, 0.0, []
+        for t in range(n):
+            if entries[t] and not exits[t] and shares == 0:
+                shares, cash = cash / (close[t] * 1.002 * 1.0005), 0.0
+            elif exits[t] and not entries[t] and shares:
+                cash, shares = shares * close[t] * 0.998 * 0.9995, 0.0
+            equity.append(cash + shares * close[t])
+
+        sim = simulate_from_signals(
+            None, close, entries, exits, init_cash=1000, commission=0.0005, slippage=0.002,
+        )
+        np.testing.assert_allclose(sim.equity, equity)
+
+    def test_metrics(self):
+        """Drawdown and ratios follow the equity curve."""
+        sim = simulate_from_signals(
+            self.open, self.close, self.entries, np.zeros(6, dtype=bool),
+            init_cash=1000, commission=0, slippage=0,
+        )
+        self.assertAlmostEqual(sim.metrics["max_drawdown"], 99 / 121 - 1)
+        self.assertGreater(sim.metrics["sharpe_ratio"], 0)
+        self.assertGreater(sim.metrics["calmar_ratio"], 0)
+
+    def test_run_backtest_without_vectorbt(self):
+        """Engine runs end to end on the native simulator."""
+        index = pd.date_range("2024-01-01", periods=120, freq="D")
+        close = 100 + 10 * np.sin(np.arange(120) / 8)
+        data = pd.DataFrame(
+            {"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1000},
+            index=index,
+        )
+        engine = BacktestEngine({"engine": "native", "fill_price": "next_open"})
+        engine.load_candle_data = lambda *args, **kwargs: data
+
+        result = engine.run_backtest("TEST", SMAStrategy({"fast_period": 5, "slow_period": 15}))
+
+        self.assertIsInstance(result, BacktestResult)
+        self.assertGreater(result.total_trades, 0)
+        self.assertEqual(result.total_trades, len(engine.last_simulation.trades["pnl"]))
+        self.assertAlmostEqual(result.final_value, engine.last_simulation.equity[-1])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Event Backtest
+
+Tests the in-memory paper-trading broker: order validation, intrabar
+fills for each order type, the shared cost model and risk limits.
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics.event_backtest import EventBacktester, EventStream
+from backend.core.trading.paper_trading import calculate_commission, market_fill_price
+
+
+def bars(rows, symbol="INFY", start="2024-01-01 03:45"):
+    """Frame of (open, high, low, close) rows at 1-minute spacing"""
+    index = pd.date_range(start, periods=len(rows), freq="1min")
+    df = pd.DataFrame(rows, columns=["open", "high", "low", "close"], index=index)
+    df["volume"] = 100.0
+    return {symbol: df}
+
+
+class Script:
+    """Places the given orders on the given event indexes"""
+
+    def __init__(self, actions):
+        self.actions = actions
+        self.responses = {}
+        self.fills = []
+
+    def on_bar(self, broker, bar):
+        for args in self.actions.get(bar.index, []):
+            self.responses.setdefault(bar.index, []).append(broker.place_order(bar.symbol, *args))
+
+    def on_fill(self, broker, order):
+        self.fills.append((order.order_type, order.average_fill_price))
+
+
+def run(rows, actions, **kwargs):
+    kwargs.setdefault("commission_per_trade", 0)
+    kwargs.setdefault("commission_percentage", 0)
+    kwargs.setdefault("slippage", 0)
+    strategy = Script(actions)
+    result = EventBacktester(**kwargs).run(EventStream.from_bars(bars(rows)), strategy)
+    return result, strategy
+
+
+class TestEventStream(unittest.TestCase):
+    """Test suite for event construction."""
+
+    def test_bars_merge_in_time_order(self):
+        """Per-symbol bars merge into one time-ordered stream."""
+        frames = {**bars([(1, 1, 1, 1)] * 3, "AAA"), **bars([(2, 2, 2, 2)] * 2, "BBB", start="2024-01-01 03:46")}
+        events = EventStream.from_bars(frames)
+        self.assertEqual(len(events), 5)
+        self.assertEqual(events.symbol_id.tolist(), [0, 0, 1, 0, 1])
+        self.assertTrue(np.all(np.diff(events.ts) >= 0))
+        self.assertEqual(events.ts[0], pd.Timestamp("2024-01-01 03:45").timestamp())
+
+
+class TestOrderMatching(unittest.TestCase):
+    """Test suite for intrabar fills."""
+
+    def test_market_order_uses_paper_trading_costs(self):
+        """Market orders fill at the latest close with the live cost model."""
+        rows = [(100, 101, 99, 100), (100, 102, 99, 101)]
+        result, _ = run(rows, {0: [("BUY", "MARKET", 10)]},
+                        commission_per_trade=20, commission_percentage=0.0003, slippage=0.0005)
+        fill = result.fills.iloc[0]
+        price = market_fill_price(100, "BUY", 0.0005)
+        self.assertAlmostEqual(fill["price"], price)
+        self.assertAlmostEqual(fill["commission"], calculate_commission(10 * price, 20, 0.0003))
+        cash = 100000 - 10 * price - fill["commission"]
+        self.assertAlmostEqual(result.equity.iloc[-1], cash + 10 * 101)
+
+    def test_limit_fills_from_next_bar(self):
+        """A limit below the market waits for the low to reach it; gaps fill at the open."""
+        rows = [(100, 100, 100, 100), (100, 101, 99.5, 100), (99, 99.2, 98, 98.5), (98.5, 99, 98, 98.8)]
+        result, strategy = run(rows, {0: [("BUY", "LIMIT", 5, 99.0)], 1: [("BUY", "LIMIT", 5, 98.2)]})
+        self.assertEqual(strategy.fills, [("LIMIT", 99.0), ("LIMIT", 98.2)])
+
+        gapped, strategy = run(rows, {1: [("BUY", "LIMIT", 5, 99.4)]})
+        self.assertEqual(strategy.fills, [("LIMIT", 99.0)])
+
+    def test_stop_market_and_stop_limit(self):
+        """SL-M fills at the worse of open and stop; SL rests as a limit once triggered."""
+        rows = [(100, 100, 100, 100), (100, 100.5, 99.5, 100), (99, 99, 96, 97), (97, 98, 97, 97.5)]
+        result, strategy = run(rows, {
+            0: [("BUY", "MARKET", 20)],
+            1: [("SELL", "SL-M", 10, None, 99.5), ("SELL", "SL", 10, 98.0, 98.5)],
+        }, slippage=0.001)
+        fills = dict(strategy.fills[1:])
+        self.assertAlmostEqual(fills["SL-M"], 99 * 0.999)
+        self.assertEqual(fills["SL"], 98.0)
+
+    def test_rejections_match_paper_trading(self):
+        """Funds, shares and parameter checks reject with live messages."""
+        rows = [(100, 100, 100, 100)] * 2
+        _, strategy = run(rows, {0: [
+            ("BUY", "MARKET", 2000),
+            ("SELL", "MARKET", 1),
+            ("BUY", "LIMIT", 1),
+            ("BUY", "MARKET", 0),
+        ]})
+        errors = [r["error"] for r in strategy.responses[0]]
+        self.assertTrue(errors[0].startswith("Insufficient funds"))
+        self.assertEqual(errors[1], "Insufficient shares. Required: 1, Available: 0")
+        self.assertEqual(errors[2], "Price must be positive")
+        self.assertEqual(errors[3], "Quantity must be positive")
+
+    def test_cancel_order(self):
+        """Cancelled orders never fill."""
+        rows = [(100, 100, 100, 100), (100, 100, 90, 95)]
+        backtester = EventBacktester(slippage=0)
+        ids = []
+
+        def on_bar(broker, bar):
+            if bar.index == 0:
+                ids.append(broker.place_order(bar.symbol, "BUY", "LIMIT", 1, price=95)["order_id"])
+                self.assertTrue(broker.cancel_order(ids[0]))
+
+        result = backtester.run(EventStream.from_bars(bars(rows)), on_bar)
+        self.assertTrue(result.fills.empty)
+        self.assertEqual(result.orders[0]["status"], "CANCELLED")
+
+
+class TestRiskLimits(unittest.TestCase):
+    """Test suite for RiskManager-style limits."""
+
+    def test_circuit_breaker_blocks_buys_until_next_day(self):
+        """A realized daily loss beyond the limit blocks buys until the day rolls over."""
+        rows = [(100, 100, 100, 100), (90, 90, 90, 90), (90, 90, 90, 90)]
+        frames = bars(rows, start="2024-01-01 18:28")  # Third bar is past IST midnight
+        responses = []
+
+        def on_bar(broker, bar):
+            if bar.index == 0:
+                broker.place_order(bar.symbol, "BUY", "MARKET", 100)
+            elif bar.index == 1:
+                broker.place_order(bar.symbol, "SELL", "MARKET", 100)
+                responses.append(broker.place_order(bar.symbol, "BUY", "MARKET", 1))
+            else:
+                responses.append(broker.place_order(bar.symbol, "BUY", "MARKET", 1))
+
+        backtester = EventBacktester(slippage=0, commission_per_trade=0, commission_percentage=0, max_daily_loss=500)
+        backtester.run(EventStream.from_bars(frames), on_bar)
+        self.assertEqual(responses[0]["status"], "REJECTED")
+        self.assertIn("Circuit breaker", responses[0]["error"])
+        self.assertEqual(responses[1]["status"], "SUCCESS")
+
+    def test_position_value_cap(self):
+        """Buys beyond the per-symbol value cap are rejected."""
+        rows = [(100, 100, 100, 100)] * 2
+        _, strategy = run(rows, {0: [("BUY", "MARKET", 60), ("BUY", "MARKET", 50)]}, max_position_value=10000)
+        self.assertEqual(strategy.responses[0][0]["status"], "SUCCESS")
+        self.assertIn("Position limit", strategy.responses[0][1]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Indicators
+
+Tests batch indicators against pandas references and streaming indicators
+against the batch functions, including partial slot updates and growth.
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics import indicators
+from backend.core.analytics.indicators import (
+    StreamingATR,
+    StreamingBollinger,
+    StreamingEMA,
+    StreamingMACD,
+    StreamingRSI,
+    StreamingSMA,
+    StreamingSuperTrend,
+    StreamingVWAP,
+    atr,
+    bollinger,
+    ema,
+    macd,
+    rsi,
+    sma,
+    supertrend,
+    vwap,
+)
+
+
+def market(bars=300, instruments=4, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (bars, instruments)), axis=0))
+    high = close * (1 + rng.uniform(0, 0.01, close.shape))
+    low = close * (1 - rng.uniform(0, 0.01, close.shape))
+    volume = rng.integers(1, 1000, close.shape).astype(float)
+    return high, low, close, volume
+
+
+def stream(indicator, *arrays, **per_bar):
+    """Update bar by bar; stack outputs (tuples become tuples of stacked arrays)"""
+    outputs = [
+        indicator.update(*(a[t] for a in arrays), **{k: v[t] for k, v in per_bar.items()})
+        for t in range(len(arrays[0]))
+    ]
+    if isinstance(outputs[0], tuple):
+        return tuple(np.stack(parts) for parts in zip(*outputs))
+    return np.stack(outputs)
+
+
+class TestBatchIndicators(unittest.TestCase):
+    """Test suite for vectorized indicators."""
+
+    def setUp(self):
+        self.high, self.low, self.close, self.volume = market(instruments=1)
+        self.series = pd.Series(self.close[:, 0])
+
+    def test_moving_averages_match_pandas(self):
+        """SMA is the rolling mean; after the SMA seed the EMA follows pandas' recursion."""
+        np.testing.assert_allclose(sma(self.close[:, 0], 20), self.series.rolling(20).mean(), rtol=1e-10)
+        seeded = self.series.copy()
+        seeded[:19] = np.nan
+        seeded[19] = self.series[:20].mean()
+        expected = seeded[19:].ewm(span=20, adjust=False).mean()
+        np.testing.assert_allclose(ema(self.close[:, 0], 20)[19:], expected, rtol=1e-10)
+        self.assertTrue(np.isnan(ema(self.close[:, 0], 20)[:19]).all())
+
+    def test_rsi_and_atr_definitions(self):
+        """Wilder RSI starts after `period` changes; ATR smooths the true range."""
+        values = rsi(self.close[:, 0], 14)
+        self.assertTrue(np.isnan(values[:14]).all())
+        delta = np.diff(self.close[:14 + 1, 0])
+        first = 100 - 100 / (1 + np.maximum(delta, 0).mean() / np.maximum(-delta, 0).mean())
+        self.assertAlmostEqual(values[14], first)
+        self.assertTrue(((values[14:] > 0) & (values[14:] < 100)).all())
+        np.testing.assert_allclose(rsi([1, 2, 3, 4], 2, "sma")[2:], [100, 100])
+        with self.assertRaises(ValueError):
+            rsi(self.close, 14, "ema")
+
+        high, low, close = self.high[:, 0], self.low[:, 0], self.close[:, 0]
+        tr = np.concatenate(([high[0] - low[0]], np.max(
+            [high[1:] - low[1:], np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])], axis=0
+        )))
+        values = atr(high, low, close, 14)
+        self.assertAlmostEqual(values[13], tr[:14].mean())
+        self.assertAlmostEqual(values[14], (13 * values[13] + tr[14]) / 14)
+
+    def test_vwap_resets_each_session(self):
+        """Accumulation restarts when the session label changes."""
+        session = np.repeat([0, 1, 2], 100)
+        values = vwap(self.high, self.low, self.close, self.volume, session)
+        typical = (self.high + self.low + self.close)[:, 0] / 3
+        start = 100
+        self.assertAlmostEqual(values[start, 0], typical[start])
+        expected = (typical[100:150] * self.volume[100:150, 0]).sum() / self.volume[100:150, 0].sum()
+        self.assertAlmostEqual(values[149, 0], expected)
+
+    def test_bands_macd_supertrend(self):
+        """Bollinger width is 2k population std; MACD histogram; SuperTrend sides."""
+        middle, upper, lower = bollinger(self.close[:, 0], 20, 2.0)
+        np.testing.assert_allclose((upper - middle)[19:], 2 * self.series.rolling(20).std(ddof=0)[19:], rtol=1e-8)
+        line, signal, hist = macd(self.close[:, 0])
+        self.assertTrue(np.isnan(signal[:33]).all() and not np.isnan(signal[33]))
+        np.testing.assert_allclose(hist, line - signal)
+
+        trend, direction = supertrend(self.high, self.low, self.close, 10, 3.0)
+        up = direction[:, 0] > 0
+        self.assertTrue((trend[up, 0] <= self.close[up, 0]).all())
+        self.assertTrue((trend[direction[:, 0] < 0, 0] >= self.close[direction[:, 0] < 0, 0]).all())
+        self.assertEqual(direction[8, 0], 0)
+
+    def test_recursive_fallback_without_scipy(self):
+        """The loop fallback matches lfilter."""
+        with_scipy = ema(self.close, 10)
+        saved, indicators._lfilter = indicators._lfilter, None
+        try:
+            np.testing.assert_allclose(ema(self.close, 10), with_scipy, rtol=1e-12)
+        finally:
+            indicators._lfilter = saved
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    """Test suite for O(1) streaming state."""
+
+    def setUp(self):
+        self.high, self.low, self.close, self.volume = market()
+        self.size = self.close.shape[1]
+
+    def assert_same(self, streamed, batch):
+        if isinstance(batch, tuple):
+            for s, b in zip(streamed, batch):
+                self.assert_same(s, b)
+            return
+        np.testing.assert_allclose(streamed, batch, rtol=1e-9, atol=1e-9)
+
+    def test_streaming_matches_batch(self):
+        """Bar-by-bar updates reproduce the batch series for every indicator."""
+        hlc = (self.high, self.low, self.close)
+        cases = [
+            (StreamingSMA(20, self.size), (self.close,), sma(self.close, 20)),
+            (StreamingEMA(20, self.size), (self.close,), ema(self.close, 20)),
+            (StreamingRSI(14, self.size), (self.close,), rsi(self.close, 14)),
+            (StreamingRSI(14, self.size, "sma"), (self.close,), rsi(self.close, 14, "sma")),
+            (StreamingATR(14, self.size), hlc, atr(*hlc, 14)),
+            (StreamingBollinger(20, 2.0, self.size), (self.close,), bollinger(self.close, 20, 2.0)),
+            (StreamingMACD(12, 26, 9, self.size), (self.close,), macd(self.close)),
+            (StreamingSuperTrend(10, 3.0, self.size), hlc, supertrend(*hlc, 10, 3.0)),
+        ]
+        for indicator, arrays, expected in cases:
+            with self.subTest(indicator=type(indicator).__name__):
+                self.assert_same(stream(indicator, *arrays), expected)
+
+        session = np.repeat(np.arange(3), 100)
+        streamed = stream(StreamingVWAP(self.size), *hlc, self.volume,
+                          session=np.broadcast_to(session[:, None], self.close.shape))
+        self.assert_same(streamed, vwap(*hlc, self.volume, session))
+
+    def test_warm_then_update_subset_of_slots(self):
+        """Warming from history and updating only some slots keeps each slot's own series."""
+        expected = rsi(self.close, 14)
+        indicator = StreamingRSI(14, self.size).warm(self.close[:200])
+        for t in range(200, 300):
+            latest = indicator.update(self.close[t, [0, 2]], index=[0, 2])
+        np.testing.assert_allclose(latest, expected[299, [0, 2]], rtol=1e-9)
+        np.testing.assert_allclose(indicator.update(self.close[200, [1, 3]], index=[1, 3]),
+                                   expected[200, [1, 3]], rtol=1e-9)
+        np.testing.assert_array_equal(indicator.count, [300, 201, 300, 201])
+
+    def test_resize_adds_empty_slots(self):
+        """Grown slots warm up from scratch while existing slots continue."""
+        indicator = StreamingSMA(3, 1).warm(self.close[:5, 0])
+        indicator.resize(2)
+        values = indicator.update([self.close[5, 0], 1.0], index=[0, 1])
+        self.assertAlmostEqual(values[0], self.close[3:6, 0].mean())
+        self.assertTrue(np.isnan(values[1]))
+        self.assertEqual(indicator.buffer.shape, (3, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
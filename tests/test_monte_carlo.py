@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Monte Carlo Engine
+
+Tests the block-statistics bootstrap against brute-force paths, GBM drift,
+seeding across chunks and workers, and resampling of backtest results.
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics.backtest_engine import SimulationResult
+from backend.core.analytics.monte_carlo import MonteCarloSimulator, simulate_paths
+
+
+def brute_force_paths(returns, n_paths, horizon, seed, block_size):
+    """Explicit circular block-bootstrap equity paths drawn from the same starts"""
+    n = len(returns)
+    starts = np.random.default_rng(seed).integers(0, n, size=(n_paths, -(-horizon // block_size)))
+    index = ((starts[:, :, None] + np.arange(block_size)) % n).reshape(n_paths, -1)[:, :horizon]
+    return returns[index], np.cumprod(1 + returns[index], axis=1)
+
+
+class TestSimulatePaths(unittest.TestCase):
+    """Test suite for per-chunk path simulation."""
+
+    def setUp(self):
+        self.returns = np.random.default_rng(0).normal(0.0004, 0.012, 500)
+
+    def test_bootstrap_matches_explicit_paths(self):
+        """Block statistics reproduce metrics of the materialized paths, including a partial last block."""
+        steps = np.array([0, 19, 20, 250, 309])
+        out = simulate_paths(self.returns, 200, 310, seed=7, block_size=20, init_cash=1000,
+                             periods_per_year=252, ruin_level=0.9, band_steps=steps)
+        sampled, equity = brute_force_paths(self.returns, 200, 310, 7, 20)
+        peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+        np.testing.assert_allclose(out["total_return"], equity[:, -1] - 1)
+        np.testing.assert_allclose(out["max_drawdown"], np.minimum((equity / peak - 1).min(axis=1), 0), atol=1e-12)
+        np.testing.assert_allclose(out["band_equity"], 1000 * equity[:, steps])
+        np.testing.assert_allclose(
+            out["sharpe_ratio"], sampled.mean(axis=1) / sampled.std(axis=1, ddof=1) * np.sqrt(252)
+        )
+        np.testing.assert_array_equal(out["ruined"], equity.min(axis=1) <= 0.9)
+
+    def test_gbm_median_follows_drift(self):
+        """GBM log growth centres on the sample's mean log return."""
+        out = simulate_paths(self.returns, 4000, 252, seed=1, method="gbm")
+        expected = np.log1p(self.returns).mean() * 252
+        self.assertAlmostEqual(float(np.median(np.log1p(out["total_return"]))), expected, delta=0.02)
+        self.assertTrue((out["max_drawdown"] <= 0).all())
+
+    def test_unknown_method(self):
+        """Unsupported methods are rejected."""
+        with self.assertRaises(ValueError):
+            simulate_paths(self.returns, 10, 10, seed=0, method="jackknife")
+
+
+class TestMonteCarloSimulator(unittest.TestCase):
+    """Test suite for the chunked simulator."""
+
+    def setUp(self):
+        self.returns = np.random.default_rng(2).normal(0.0003, 0.01, 750)
+
+    def test_seeded_results_independent_of_workers(self):
+        """Chunk seeds come from one SeedSequence, so a pool gives identical results."""
+        serial = MonteCarloSimulator(n_paths=3000, chunk_size=1000, seed=11).run_returns(self.returns, 1000, 252)
+        pooled = MonteCarloSimulator(n_paths=3000, chunk_size=1000, seed=11, max_workers=2).run_returns(
+            self.returns, 1000, 252
+        )
+        self.assertEqual(serial.percentiles, pooled.percentiles)
+        np.testing.assert_array_equal(serial.bands.to_numpy(), pooled.bands.to_numpy())
+        self.assertEqual(serial.n_paths, 3000)
+
+    def test_bands_and_summary(self):
+        """Bands are ordered across percentiles and end at the horizon."""
+        result = MonteCarloSimulator(n_paths=2000, seed=3, band_points=50).run_returns(self.returns, 1000, 252)
+        bands = result.bands.to_numpy()
+        self.assertEqual(bands.shape, (50, 5))
+        self.assertTrue((np.diff(bands, axis=1) >= 0).all())
+        self.assertEqual(result.bands.index[-1], 750)
+        summary = result.to_dict()
+        self.assertEqual(set(summary["percentiles"]), {"final_value", "total_return", "cagr", "max_drawdown", "sharpe_ratio"})
+        self.assertEqual(len(summary["bands"]["p50"]), 50)
+
+    def test_ruin_probability(self):
+        """Heavy losing returns ruin every path; no ruin level never ruins."""
+        losses = np.full(100, -0.02)
+        self.assertEqual(MonteCarloSimulator(n_paths=100, seed=0).run_returns(losses).ruin_probability, 1.0)
+        self.assertEqual(MonteCarloSimulator(n_paths=100, seed=0, ruin_level=0).run_returns(losses).ruin_probability, 0.0)
+
+    def test_run_simulation_sources(self):
+        """Bar returns or closed trades of a SimulationResult can be resampled."""
+        returns = self.returns
+        equity = 1000 * np.cumprod(1 + returns)
+        trades = {
+            "entry_idx": np.array([0, 100, 300]), "exit_idx": np.array([50, 200, -1]),
+            "return": np.array([0.05, -0.02, 0.01]),
+        }
+        sim = SimulationResult(equity=equity, returns=returns, position=np.ones(len(returns)),
+                               trades=trades, metrics={})
+        mc = MonteCarloSimulator(n_paths=500, seed=4)
+        self.assertEqual(mc.run_simulation(sim, 1000, "1D").horizon, len(returns))
+        by_trades = mc.run_simulation(sim, 1000, "1D", source="trades")
+        self.assertEqual((by_trades.source, by_trades.horizon), ("trades", 2))
+        self.assertAlmostEqual(by_trades.percentiles["total_return"]["p95"], 1.05**2 - 1)
+        with self.assertRaises(ValueError):
+            mc.run_simulation(sim, source="positions")
+
+
+if __name__ == "__main__":
+    unittest.main()
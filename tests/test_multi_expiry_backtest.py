@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Multi-Expiry Backtest
+
+Tests option-price loading from stored candles, the implied-vol fallback,
+the precomputed roll schedule and array-based P&L and Greeks.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics.option_history import fill_implied_vols, load_option_closes
+from backend.core.trading.multi_expiry_strategies import (
+    ActionType,
+    MultiExpiryBacktester,
+    MultiExpiryLeg,
+    MultiExpiryStrategy,
+    OptionType,
+    create_calendar_spread,
+)
+
+
+def make_history(start="2024-01-01", end="2024-03-29", seed=0):
+    dates = pd.bdate_range(start, end)
+    rng = np.random.default_rng(seed)
+    close = 21800 * np.exp(np.cumsum(rng.normal(0, 0.008, len(dates))))
+    return pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "close": close})
+
+
+class TestOptionHistory(unittest.TestCase):
+    """Test suite for stored option closes and vol filling."""
+
+    def test_loads_both_candle_tables(self):
+        """Expired candles join by token, live candles by symbol; expired rows win."""
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "market_data.db")
+            conn = sqlite3.connect(db_path)
+            conn.execute(
+                "CREATE TABLE expired_options (underlying_symbol TEXT, option_type TEXT, strike_price REAL,"
+                " expiry_date TEXT, tradingsymbol TEXT, exchange_token TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE expired_candles (instrument_key TEXT, interval TEXT, timestamp DATETIME, close REAL)"
+            )
+            conn.execute("CREATE TABLE candles_new (symbol TEXT, timeframe TEXT, timestamp INTEGER, close REAL)")
+            conn.execute(
+                "INSERT INTO expired_options VALUES ('NIFTY', 'CE', 21800, '2024-01-25', 'NIFTY24JAN21800CE', '54452')"
+            )
+            conn.executemany(
+                "INSERT INTO expired_candles VALUES ('NSE_FO|54452|25-01-2024', 'day', ?, ?)",
+                [("2024-01-02T00:00:00+05:30", 100.0), ("2024-01-03T00:00:00+05:30", 110.0)],
+            )
+            open_ts = int(pd.Timestamp("2024-01-03 03:45").timestamp())  # 09:15 IST
+            conn.executemany(
+                "INSERT INTO candles_new VALUES ('NIFTY24JAN21800CE', '1d', ?, ?)",
+                [(open_ts, 999.0), (open_ts + 86400, 120.0)],
+            )
+            conn.commit()
+            conn.close()
+
+            prices = load_option_closes("NIFTY", ["2024-01-25"], "2024-01-01", "2024-01-31", db_path=db_path)
+        self.assertEqual(prices["date"].tolist(), ["2024-01-02", "2024-01-03", "2024-01-04"])
+        self.assertEqual(prices["close"].tolist(), [100.0, 110.0, 120.0])
+        self.assertEqual(set(prices["option_type"]), {"CALL"})
+
+    def test_missing_database_is_empty(self):
+        """Absent tables yield no prices rather than an error."""
+        with tempfile.TemporaryDirectory() as tmp:
+            prices = load_option_closes("NIFTY", ["2024-01-25"], "2024-01-01", "2024-01-31",
+                                        db_path=os.path.join(tmp, "empty.db"))
+        self.assertTrue(prices.empty)
+
+    def test_fill_implied_vols(self):
+        """Gaps fill from the day's smile, then the contract's history, then the default."""
+        iv = np.array([[0.10, np.nan, 0.30], [np.nan, np.nan, np.nan]])
+        spot = np.array([100.0, 100.0])
+        strikes = np.array([90.0, 100.0, 110.0])
+        filled = fill_implied_vols(iv, spot, strikes, np.full((2, 3), 0.25), 0.5)
+        self.assertTrue(0.10 < filled[0, 1] < 0.30)
+        np.testing.assert_allclose(filled[1], filled[0])
+        np.testing.assert_allclose(fill_implied_vols(np.full((1, 2), np.nan), spot[:1], strikes[:2],
+                                                     np.ones((1, 2)), [0.2, 0.3]), [[0.2, 0.3]])
+
+
+class TestMultiExpiryBacktester(unittest.TestCase):
+    """Test suite for the array-based backtester."""
+
+    def setUp(self):
+        self.history = make_history()
+        self.backtester = MultiExpiryBacktester(db_path=os.path.join(tempfile.gettempdir(), "missing", "none.db"))
+
+    def test_roll_schedule(self):
+        """Legs roll a few days before expiry to the next weekly expiry beyond the window."""
+        strategy = create_calendar_spread(21800, 21800, "2024-01-25", "2024-02-29")
+        dates = pd.to_datetime(self.history["date"]).to_numpy(dtype="datetime64[D]")
+        schedule = self.backtester.roll_schedule(strategy, dates, roll_days_before=3)
+        near = schedule[schedule["leg"] == 0]
+        self.assertEqual(near["expiry_date"].tolist()[:3], ["2024-01-25", "2024-02-01", "2024-02-08"])
+        self.assertEqual(str(dates[near["end"].iat[0]]), "2024-01-22")
+        self.assertTrue((near["start"].to_numpy()[1:] == near["end"].to_numpy()[:-1]).all())
+
+        held = self.backtester.roll_schedule(strategy, dates, auto_roll=False)
+        self.assertEqual(len(held), 2)
+        self.assertFalse(held["rolled"].any())
+
+    def test_pnl_from_market_prices(self):
+        """With a full price history P&L is the weighted change in option closes."""
+        legs = [MultiExpiryLeg(OptionType.PUT, ActionType.SELL, 21500, "2024-03-28", 150, qty=50)]
+        strategy = MultiExpiryStrategy("Short Put", legs, 21800)
+        closes = np.linspace(150, 40, len(self.history))
+        prices = pd.DataFrame({
+            "date": self.history["date"], "option_type": "PE", "strike": 21500.0,
+            "expiry_date": "2024-03-28", "close": closes,
+        })
+        result = self.backtester.backtest_with_rolling(
+            strategy, self.history, "2024-01-01", "2024-03-29", auto_roll=False, option_prices=prices
+        )
+        pnl = [row["pnl"] for row in result["daily_results"]]
+        np.testing.assert_allclose(pnl[:-1], -50 * (closes[:-1] - 150))
+        self.assertEqual(pnl[-1], pnl[-2])  # Settled at expiry, frozen afterwards
+        self.assertEqual(result["daily_results"][-1]["delta"], 0)
+        self.assertGreater(result["daily_results"][0]["delta"], 0)  # Short put is long delta
+        self.assertAlmostEqual(result["summary"]["market_priced_pct"], 100.0)
+
+    def test_calendar_spread_greeks_and_rolls(self):
+        """Missing prices fall back to the model; the near leg rolls and carries its P&L."""
+        strategy = create_calendar_spread(21800, 21800, "2024-01-25", "2024-02-29")
+        result = self.backtester.backtest_with_rolling(
+            strategy, self.history, "2024-01-01", "2024-03-29", volatility=0.15
+        )
+        first = result["daily_results"][0]
+        self.assertEqual(first["pnl"], 0.0)
+        self.assertGreater(first["vega"], 0)  # Long the far expiry
+        self.assertLess(first["gamma"], 0)  # Short the near expiry
+        self.assertGreater(result["summary"]["num_rolls"], 5)
+        roll = result["roll_history"][0]
+        self.assertEqual((roll["roll_date"], roll["new_expiry"]), ("2024-01-22", "2024-02-01"))
+        self.assertEqual(result["summary"]["market_priced_pct"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
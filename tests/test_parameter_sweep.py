@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Parameter Sweep
+
+Tests vectorized strategy signals, shared-memory arrays and the parallel
+grid search.
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics.backtest_engine import (
+    BaseStrategy,
+    RSIStrategy,
+    SMAStrategy,
+    simulate_from_signals,
+)
+from backend.core.analytics.parameter_sweep import (
+    ParameterSweep,
+    SharedArrays,
+    parse_range,
+)
+
+
+def make_ohlcv(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame(
+        {"open": close * 0.999, "high": close * 1.01, "low": close * 0.99, "close": close, "volume": 1000.0},
+        index=pd.date_range("2020-01-01", periods=n, freq="D"),
+    )
+
+
+def looped_signals(strategy_cls, ohlcv, param_sets):
+    """Reference: one generate_signals call per parameter set"""
+    arrays = {col: ohlcv[col].to_numpy() for col in ohlcv}
+    return BaseStrategy.generate_signal_batch.__func__(strategy_cls, arrays, param_sets)
+
+
+class TestSignalBatch(unittest.TestCase):
+    """Test suite for vectorized signal generation."""
+
+    def setUp(self):
+        self.ohlcv = make_ohlcv()
+        self.arrays = {col: self.ohlcv[col].to_numpy() for col in self.ohlcv}
+
+    def test_sma_batch_matches_generate_signals(self):
+        """Broadcast SMA crossovers equal per-parameter signals."""
+        param_sets = [{"fast_period": f, "slow_period": s} for f in (5, 10, 20) for s in (30, 60)]
+        entries, exits = SMAStrategy.generate_signal_batch(self.arrays, param_sets)
+        ref_entries, ref_exits = looped_signals(SMAStrategy, self.ohlcv, param_sets)
+
+        np.testing.assert_array_equal(entries, ref_entries)
+        np.testing.assert_array_equal(exits, ref_exits)
+        self.assertGreater(entries.sum(), 0)
+
+    def test_rsi_batch_matches_generate_signals(self):
+        """RSI thresholds broadcast across parameter sets."""
+        param_sets = [
+            {"rsi_period": p, "oversold_threshold": o, "overbought_threshold": 70}
+            for p in (7, 14) for o in (25, 30)
+        ]
+        entries, exits = RSIStrategy.generate_signal_batch(self.arrays, param_sets)
+        ref_entries, ref_exits = looped_signals(RSIStrategy, self.ohlcv, param_sets)
+
+        np.testing.assert_array_equal(entries, ref_entries)
+        np.testing.assert_array_equal(exits, ref_exits)
+
+
+class TestSharedArrays(unittest.TestCase):
+    """Test suite for shared-memory price arrays."""
+
+    def test_attach_reads_same_data(self):
+        """Attached views see the owner's data without copying."""
+        shared = SharedArrays({"close": np.arange(5.0), "open": np.ones(3)})
+        try:
+            shm, views = SharedArrays.attach(shared.spec)
+            np.testing.assert_array_equal(views["close"], np.arange(5.0))
+            np.testing.assert_array_equal(views["open"], np.ones(3))
+            self.assertFalse(views["close"].flags.writeable)
+            del views
+            shm.close()
+        finally:
+            shared.close()
+
+
+class TestParameterSweep(unittest.TestCase):
+    """Test suite for the grid search."""
+
+    def setUp(self):
+        self.grid = {"fast_period": [5, 10, 40], "slow_period": [20, 40]}
+        self.data = {"AAA": make_ohlcv(seed=1), "BBB": make_ohlcv(seed=2)}
+
+    def make_sweep(self, **kwargs):
+        sweep = ParameterSweep(SMAStrategy, self.grid, chunk_size=2, **kwargs)
+        for symbol, ohlcv in self.data.items():
+            sweep.add_data(symbol, ohlcv)
+        return sweep
+
+    def test_parse_range(self):
+        """Ranges are inclusive; lists pass through."""
+        self.assertEqual(parse_range("5:20:5"), [5, 10, 15, 20])
+        self.assertEqual(parse_range("10,20,50"), [10, 20, 50])
+        self.assertEqual(parse_range("0.5:1.5:0.5"), [0.5, 1.0, 1.5])
+
+    def test_constraint_skips_invalid_combinations(self):
+        """SMA sweeps skip fast >= slow."""
+        combos = self.make_sweep(max_workers=0).combinations()
+        self.assertEqual(len(combos), 4)
+        self.assertTrue(all(c["fast_period"] < c["slow_period"] for c in combos))
+
+    def test_results_match_single_backtests(self):
+        """Each row equals a direct simulation of that parameter set."""
+        results = self.make_sweep(max_workers=0).run()
+        self.assertEqual(len(results), 8)
+
+        row = results[0]
+        ohlcv = self.data[row["symbol"]]
+        signals = SMAStrategy(row["params"]).generate_signals(ohlcv)
+        sim = simulate_from_signals(
+            ohlcv["open"].to_numpy(), ohlcv["close"].to_numpy(),
+            (signals["trade_signal"] > 0).to_numpy(), (signals["trade_signal"] < 0).to_numpy(),
+        )
+        self.assertAlmostEqual(row["final_value"], sim.metrics["final_value"])
+        self.assertGreaterEqual(row["sharpe_ratio"], results[-1]["sharpe_ratio"])
+
+    def test_process_pool_matches_in_process(self):
+        """Shared-memory workers give the same ranked results."""
+        serial = self.make_sweep(max_workers=0).run()
+        parallel_sweep = self.make_sweep(max_workers=2)
+        parallel = parallel_sweep.run()
+
+        key = lambda r: (r["symbol"], r["params"]["fast_period"], r["params"]["slow_period"])
+        self.assertEqual(
+            sorted((key(r), round(r["final_value"], 6)) for r in serial),
+            sorted((key(r), round(r["final_value"], 6)) for r in parallel),
+        )
+        self.assertEqual(parallel_sweep._shared, {})
+
+    def test_top_n_and_combination_ranking(self):
+        """Bounded top-N equals the head of the full ranking."""
+        sweep = self.make_sweep(max_workers=0, metric="total_return")
+        full = sweep.run()
+        top = sweep.run(top_n=3)
+        self.assertEqual([r["total_return"] for r in top], [r["total_return"] for r in full[:3]])
+
+        ranked = sweep.rank_combinations(full)
+        self.assertEqual(len(ranked), 4)
+        self.assertEqual(ranked[0]["symbols"], 2)
+        self.assertGreaterEqual(ranked[0]["total_return"], ranked[-1]["total_return"])
+
+
+if __name__ == "__main__":
+    unittest.main()
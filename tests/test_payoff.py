@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Payoff Engine
+
+Tests the vectorized Black-Scholes pricer, exact expiry extremes and
+breakevens, T+n curves and the strategy classes that delegate to them.
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics.backtesting_engine import (
+    Backtester,
+    OptionLeg,
+    create_bull_call_spread,
+    create_iron_condor,
+)
+from backend.core.analytics.black_scholes import bs_greeks, bs_price, implied_volatility
+from backend.core.analytics.payoff import analyze_expiry, expiry_pnl, pnl_grid, range_extremes, strategy_legs
+from backend.core.trading.multi_expiry_strategies import create_calendar_spread
+
+
+class TestBlackScholes(unittest.TestCase):
+    """Test suite for the vectorized pricer."""
+
+    def test_put_call_parity_and_expiry(self):
+        """Prices satisfy parity and collapse to intrinsic at expiry."""
+        spot = np.linspace(80, 120, 9)
+        call = bs_price(spot, 100, 0.5, 0.25, 0.06, True)
+        put = bs_price(spot, 100, 0.5, 0.25, 0.06, False)
+        np.testing.assert_allclose(call - put, spot - 100 * np.exp(-0.03))
+        np.testing.assert_allclose(bs_price(spot, 100, 0.0, 0.25, 0.06, True), np.maximum(spot - 100, 0))
+        self.assertAlmostEqual(float(bs_price(100, 100, 1.0, 0.2, 0.05, True)), 10.4506, places=4)
+
+    def test_greeks_match_finite_differences(self):
+        """Delta and gamma agree with bumped prices."""
+        greeks = bs_greeks(100, 105, 0.25, 0.3, 0.06, False)
+        up, mid, down = bs_price([100.01, 100, 99.99], 105, 0.25, 0.3, 0.06, False)
+        self.assertAlmostEqual(float(greeks["delta"]), (up - down) / 0.02, places=5)
+        self.assertAlmostEqual(float(greeks["gamma"]), (up - 2 * mid + down) / 1e-4, places=3)
+
+    def test_implied_volatility_round_trip(self):
+        """Implied volatility recovers the pricing volatility; bad prices are NaN."""
+        sigma = np.array([0.1, 0.25, 0.6])
+        prices = bs_price(100, [90, 100, 115], 0.3, sigma, 0.06, [True, False, True])
+        np.testing.assert_allclose(
+            implied_volatility(prices, 100, [90, 100, 115], 0.3, 0.06, [True, False, True]), sigma, atol=1e-5
+        )
+        self.assertTrue(np.isnan(implied_volatility(5.0, 100, 90, 0.3)))
+
+
+class TestExpiryPayoff(unittest.TestCase):
+    """Test suite for exact expiry analysis."""
+
+    def test_iron_condor_extremes_and_breakevens(self):
+        """Credit at the body, wing width minus credit at the tails, breakevens at short strike +/- credit."""
+        strategy = create_iron_condor(22000)
+        legs = strategy_legs(strategy.legs)
+        credit = -legs.entry_cost / 50
+        result = analyze_expiry(legs)
+        self.assertAlmostEqual(result["max_profit"], credit * 50)
+        self.assertAlmostEqual(result["max_loss"], -(100 - credit) * 50)
+        self.assertEqual(result["breakevens"], [21900 - credit, 22100 + credit])
+
+    def test_unbounded_tails(self):
+        """A short call loses without bound; a long call gains without bound."""
+        short = analyze_expiry(strategy_legs([OptionLeg("CALL", "SELL", 100, 5)]))
+        self.assertEqual(short["max_loss"], -np.inf)
+        self.assertEqual(short["max_profit"], 5)
+        self.assertEqual(short["breakevens"], [105])
+        self.assertEqual(analyze_expiry(strategy_legs([OptionLeg("CALL", "BUY", 100, 5)]))["max_profit"], np.inf)
+
+    def test_strategy_methods_match_loop_pnl(self):
+        """BacktestStrategy results agree with its per-leg calculate_pnl."""
+        strategy = create_bull_call_spread(22000)
+        prices = np.linspace(21000, 23000, 201)
+        expected = [strategy.calculate_pnl(p) for p in prices]
+        np.testing.assert_allclose(strategy.expiry_pnl(prices), expected)
+
+        max_profit, price = strategy.get_max_profit((21000, 23000))
+        self.assertAlmostEqual(max_profit, max(expected))
+        self.assertAlmostEqual(strategy.calculate_pnl(price), max_profit)
+        for breakeven in strategy.find_breakevens((21000, 23000)):
+            self.assertAlmostEqual(strategy.calculate_pnl(breakeven), 0, places=6)
+
+
+class TestCurves(unittest.TestCase):
+    """Test suite for T+n curves."""
+
+    def test_t0_at_spot_is_flat_and_converges_to_expiry(self):
+        """Implied vols reprice the legs at entry; the grid converges to the expiry payoff."""
+        legs = strategy_legs(
+            [{"option_type": "CALL", "action": "SELL", "strike": 100, "premium": 4.0, "expiry_date": "2024-01-31"},
+             {"option_type": "PUT", "action": "SELL", "strike": 95, "premium": 2.0, "expiry_date": "2024-01-31"}],
+            spot=100, valuation_date="2024-01-01",
+        )
+        prices = np.linspace(80, 120, 41)
+        grid = pnl_grid(legs, prices, days=[0, 15, 30])
+        self.assertEqual(grid.shape, (3, 41))
+        self.assertAlmostEqual(float(grid[0, 20]), 0.0, places=4)
+        np.testing.assert_allclose(grid[2], expiry_pnl(legs, prices))
+
+    def test_calendar_spread_keeps_far_leg_time_value(self):
+        """At the near expiry the long far leg still carries time value."""
+        strategy = create_calendar_spread(22000, 22000, "2024-01-25", "2024-02-29")
+        strategy.entry_date = "2024-01-01"
+        curves = strategy.payoff_curves([21500, 22000, 22500], days=(24,))
+        self.assertGreater(curves["T+24"][1], curves["expiry"][1])
+        self.assertEqual(set(curves), {"expiry", "T+24"})
+
+
+class TestRollingBacktest(unittest.TestCase):
+    """Test suite for array-based rolling windows."""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        close = 22000 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+        self.data = pd.DataFrame({
+            "date": pd.bdate_range("2023-01-02", periods=300),
+            "open": close, "high": close * 1.005, "low": close * 0.995, "close": close,
+        })
+        self.strategy = create_iron_condor(22000)
+
+    def test_range_extremes_match_analyze_expiry(self):
+        """Batched range extremes agree with the per-range analysis."""
+        legs = strategy_legs(self.strategy.legs)
+        lows, highs = np.array([21000, 21850, 22050]), np.array([21500, 22150, 23000])
+        batched = range_extremes(legs, lows, highs)
+        for i, (low, high) in enumerate(zip(lows, highs)):
+            single = analyze_expiry(legs, (low, high))
+            for key in batched:
+                self.assertAlmostEqual(batched[key][i], single[key])
+
+    def test_windows_match_single_backtests(self):
+        """Each rolling window reproduces run_backtest over the same dates."""
+        backtester = Backtester()
+        results = backtester.run_multiple_backtests(
+            self.strategy, self.data.copy(), "2023-01-01", "2023-06-30", hold_days=5, step=3
+        )["individual_results"]
+        self.assertEqual(results[1]["entry_date"], "2023-01-05")
+
+        for window in results[::10]:
+            single = backtester.run_backtest(self.strategy, self.data.copy(), window["entry_date"], window["exit_date"])
+            self.assertEqual(set(window), set(single))
+            for key in ("final_pnl", "min_pnl_during_period", "max_pnl_during_period",
+                        "max_profit_possible", "max_loss_at_price", "days_held"):
+                self.assertAlmostEqual(window[key], single[key])
+            self.assertEqual(window["breakeven_points"], single["breakeven_points"])
+            self.assertEqual(window["daily_pnl"], single["daily_pnl"])
+
+    def test_one_day_steps_frame(self):
+        """Overlapping windows come back as one row per entry bar."""
+        frame = Backtester().run_rolling_backtest(
+            self.strategy, self.data, "2023-01-01", "2024-12-31", hold_days=7, step=1
+        )
+        self.assertEqual(len(frame), 300 - 7)
+        pnl = self.strategy.expiry_pnl(self.data["close"].to_numpy())
+        self.assertAlmostEqual(frame["min_pnl_during_period"].iloc[10], pnl[10:18].min())
+        self.assertTrue(Backtester().run_rolling_backtest(
+            self.strategy, self.data, "2023-01-01", "2023-01-05", hold_days=7
+        ).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Portfolio Backtest
+
+Tests shared-cash simulation on time x symbol matrices: allocation,
+rebalancing rules, per-symbol costs and signal-based weights.
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics.portfolio_backtest import (
+    PortfolioBacktester,
+    per_symbol,
+    rebalance_mask,
+    signal_weights,
+    simulate_portfolio,
+)
+
+
+def make_prices(n=120, symbols=("AAA", "BBB", "CCC"), seed=0):
+    rng = np.random.default_rng(seed)
+    data = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n, len(symbols))), axis=0))
+    return pd.DataFrame(data, index=pd.date_range("2021-01-01", periods=n, freq="D"), columns=list(symbols))
+
+
+class TestAllocation(unittest.TestCase):
+    """Test suite for weights, rebalance bars and cost broadcasting."""
+
+    def test_signal_weights_equal_and_limited(self):
+        """Held symbols share weight equally; max_positions keeps the best scores."""
+        entries = np.array([[1, 0, 0], [0, 1, 1], [0, 0, 0], [1, 0, 0]], dtype=bool)
+        exits = np.array([[0, 0, 0], [0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=bool)
+        weights = signal_weights(entries, exits)
+        np.testing.assert_allclose(weights[1], [1 / 3] * 3)
+        np.testing.assert_allclose(weights[2], [0, 0.5, 0.5])
+        np.testing.assert_allclose(weights[3], [0.5, 0, 0.5])
+
+        score = np.tile([1.0, 3.0, 2.0], (4, 1))
+        limited = signal_weights(entries, exits, max_positions=1, score=score)
+        np.testing.assert_allclose(limited[1], [0, 1, 0])
+        np.testing.assert_allclose(signal_weights(entries, exits, max_weight=0.25)[0], [0.25, 0, 0])
+
+    def test_rebalance_rules(self):
+        """Change, calendar and interval rules start at the first target."""
+        index = pd.date_range("2021-01-30", periods=6, freq="D")
+        weights = np.array([[0, 0], [1, 0], [1, 0], [0.5, 0.5], [0.5, 0.5], [0.5, 0.5]])
+        self.assertEqual(rebalance_mask(index, weights, "change").tolist(), [0, 1, 0, 1, 0, 0])
+        self.assertEqual(rebalance_mask(index, weights, "M").tolist(), [0, 0, 1, 0, 0, 0])
+        self.assertEqual(rebalance_mask(index, weights, 2).tolist(), [0, 0, 1, 0, 1, 0])
+
+    def test_per_symbol_costs(self):
+        """Scalars broadcast; mappings fall back to their default."""
+        columns = pd.Index(["AAA", "BBB"])
+        self.assertEqual(per_symbol(0.001, columns).tolist(), [0.001, 0.001])
+        self.assertEqual(per_symbol({"BBB": 0.002, "default": 0.001}, columns).tolist(), [0.001, 0.002])
+
+
+class TestSimulatePortfolio(unittest.TestCase):
+    """Test suite for the shared-cash simulator."""
+
+    def setUp(self):
+        self.close = make_prices()
+
+    def test_fully_invested_single_symbol_tracks_price(self):
+        """Without costs, a 100% weight follows the price from the first fill."""
+        weights = pd.DataFrame(0.0, index=self.close.index, columns=self.close.columns)
+        weights["AAA"] = 1.0
+        result = simulate_portfolio(self.close, weights, init_cash=1000, commission=0, slippage=0)
+        expected = 1000 * self.close["AAA"] / self.close["AAA"].iloc[0]
+        np.testing.assert_allclose(result.equity.to_numpy(), expected.to_numpy())
+        self.assertEqual(result.metrics["rebalances"], 1)
+
+    def test_monthly_rebalance_shares_cash(self):
+        """Equal weights are restored each month from one cash balance."""
+        weights = pd.DataFrame(1 / 3, index=self.close.index, columns=self.close.columns)
+        result = simulate_portfolio(self.close, weights, init_cash=3000, commission=0, slippage=0, rebalance="M")
+        self.assertEqual(result.metrics["rebalances"], 4)
+
+        month_starts = [0, 31, 59, 90]
+        for bar in month_starts:
+            np.testing.assert_allclose(result.weights.iloc[bar].to_numpy(), [1 / 3] * 3)
+        # Between rebalances the shares are held and the weights drift
+        self.assertTrue((result.positions.iloc[1:31].nunique() == 1).all())
+        self.assertAlmostEqual(result.cash.iloc[-1], 0.0, places=6)
+
+    def test_costs_never_overdraw_cash(self):
+        """Per-symbol costs are charged and buys scale down to the cash available."""
+        weights = pd.DataFrame(1 / 3, index=self.close.index, columns=self.close.columns)
+        costs = {"AAA": 0.01, "default": 0.001}
+        result = simulate_portfolio(self.close, weights, commission=costs, slippage=0, rebalance=10)
+        self.assertGreaterEqual(result.cash.min(), -1e-6)
+        fees = result.trades.groupby("symbol")["fees"].sum()
+        self.assertGreater(fees["AAA"], 5 * fees["BBB"])
+        self.assertAlmostEqual(result.metrics["total_fees"], result.trades["fees"].sum())
+
+        pnl = result.symbol_pnl()
+        self.assertAlmostEqual(pnl.sum(), result.equity.iloc[-1] - 100000, places=4)
+
+    def test_next_open_fills_and_missing_prices(self):
+        """Orders fill at the next open; untraded symbols keep their holdings."""
+        close = self.close.copy()
+        close.iloc[:10, 2] = np.nan
+        open_ = close.shift(1)
+        weights = pd.DataFrame(1 / 3, index=close.index, columns=close.columns)
+        result = simulate_portfolio(close, weights, open_=open_, commission=0, slippage=0, fill_price="next_open")
+        first = result.trades[result.trades["time"] == close.index[1]]
+        self.assertEqual(sorted(first["symbol"]), ["AAA", "BBB"])
+        self.assertEqual(result.positions["CCC"].iloc[:11].sum(), 0)
+        self.assertGreater(result.cash.iloc[5], 0)
+
+    def test_drift_threshold_skips_small_resizes(self):
+        """Held symbols within the band are not resized."""
+        weights = pd.DataFrame(1 / 3, index=self.close.index, columns=self.close.columns)
+        always = simulate_portfolio(self.close, weights, rebalance=1)
+        banded = simulate_portfolio(self.close, weights, rebalance=1, drift_threshold=0.05)
+        self.assertLess(banded.metrics["total_trades"], always.metrics["total_trades"] / 10)
+        self.assertLess(banded.metrics["total_fees"], always.metrics["total_fees"])
+
+
+class TestPortfolioBacktester(unittest.TestCase):
+    """Test suite for the backtester wrapper."""
+
+    def test_run_signals_with_position_limit(self):
+        """Signals allocate to at most max_positions symbols."""
+        close = make_prices(symbols=[f"S{i}" for i in range(10)])
+        entries = pd.DataFrame(False, index=close.index, columns=close.columns)
+        exits = entries.copy()
+        entries.iloc[5] = True
+        exits.iloc[60, :5] = True
+
+        backtester = PortfolioBacktester({"max_positions": 3})
+        backtester.set_prices(close)
+        result = backtester.run_signals(entries, exits, score=close.pct_change(5))
+        held = (result.positions > 0).sum(axis=1)
+        self.assertEqual(held.iloc[:5].max(), 0)
+        self.assertEqual(held.iloc[5:].max(), 3)
+        self.assertIs(backtester.last_result, result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Backtest Result Cache
+
+Tests content-addressed keys, cache hits through BacktestEngine and
+recomputation of only the symbols whose candles changed.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics import backtest_engine
+from backend.core.analytics.backtest_engine import BacktestEngine, RSIStrategy, SMAStrategy
+from backend.core.analytics.result_cache import BacktestCache
+
+
+def write_candles(db_path, symbol, n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, n)))
+    timestamps = pd.date_range("2023-01-02", periods=n, freq="D").astype("int64") // 10**9
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS candles_new (symbol TEXT, timeframe TEXT, timestamp INTEGER,"
+        " open REAL, high REAL, low REAL, close REAL, volume INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO candles_new VALUES (?, '1d', ?, ?, ?, ?, ?, 1000)",
+        [(symbol, int(ts), c, c * 1.01, c * 0.99, c) for ts, c in zip(timestamps, close)],
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestBacktestCache(unittest.TestCase):
+    """Test suite for cached engine runs."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "market_data.db")
+        write_candles(self.db_path, "INFY", seed=1)
+        write_candles(self.db_path, "TCS", seed=2)
+        patcher = patch.object(backtest_engine, "DB_PATH", self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = BacktestCache()
+        self.strategy = SMAStrategy({"fast_period": 5, "slow_period": 20})
+
+    def test_repeat_run_served_from_cache(self):
+        """A repeated request returns the stored result and simulation without loading candles."""
+        engine = BacktestEngine(cache=self.cache)
+        first = engine.run_backtest("INFY", self.strategy)
+        computed = engine.last_simulation
+        self.assertFalse(engine.last_cache_hit)
+
+        engine.load_candle_data = lambda *args, **kwargs: self.fail("candles loaded on a cache hit")
+        second = engine.run_backtest("INFY", self.strategy)
+        self.assertTrue(engine.last_cache_hit)
+        self.assertEqual(first, second)
+        np.testing.assert_array_equal(engine.last_simulation.equity, computed.equity)
+        self.assertEqual(set(engine.last_simulation.trades), set(computed.trades))
+        np.testing.assert_array_equal(engine.last_simulation.trades["pnl"], computed.trades["pnl"])
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_key_covers_strategy_engine_and_range(self):
+        """Different params, strategy class, engine params or date range miss the cache."""
+        version = self.cache.data_version("INFY", "1d")
+        key = self.cache.cache_key(version, self.strategy, backtest_engine.DEFAULT_BACKTEST_PARAMS)
+        variants = [
+            self.cache.cache_key(version, SMAStrategy({"fast_period": 5, "slow_period": 30}),
+                                 backtest_engine.DEFAULT_BACKTEST_PARAMS),
+            self.cache.cache_key(version, RSIStrategy(), backtest_engine.DEFAULT_BACKTEST_PARAMS),
+            self.cache.cache_key(version, self.strategy, {**backtest_engine.DEFAULT_BACKTEST_PARAMS, "commission": 0}),
+        ]
+        self.assertEqual(len({key, *variants}), 4)
+        self.assertNotEqual(version, self.cache.data_version("INFY", "1d", "2023-03-01"))
+        self.assertIsNone(self.cache.data_version("WIPRO", "1d"))
+
+    def test_batch_recomputes_only_changed_symbols(self):
+        """A revised or appended bar changes the data version of that symbol only."""
+        BacktestEngine(cache=self.cache).run_backtest_batch(["INFY", "TCS"], self.strategy)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE candles_new SET close = close * 1.02 WHERE symbol = 'TCS' AND rowid % 50 = 0")
+        conn.commit()
+        conn.close()
+
+        engine = BacktestEngine(cache=self.cache)
+        hits = []
+        for symbol in ("INFY", "TCS"):
+            engine.run_backtest(symbol, self.strategy)
+            hits.append(engine.last_cache_hit)
+        self.assertEqual(hits, [True, False])
+        self.assertEqual(self.cache.stats()["entries"], 3)
+
+    def test_invalidate(self):
+        """Entries can be dropped per symbol or entirely."""
+        engine = BacktestEngine(cache=self.cache)
+        engine.run_backtest_batch(["INFY", "TCS"], self.strategy)
+        self.assertEqual(self.cache.invalidate("INFY"), 1)
+        engine.run_backtest("INFY", self.strategy)
+        self.assertFalse(engine.last_cache_hit)
+        self.assertEqual(self.cache.invalidate(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Walk-Forward Optimization
+
+Tests window construction, in-sample scoring on sliced signals and the
+stitched out-of-sample equity curve.
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.analytics.backtest_engine import SMAStrategy, simulate_from_signals
+from backend.core.analytics.walk_forward import WalkForwardOptimizer
+from tests.test_parameter_sweep import make_ohlcv
+
+
+class TestWalkForward(unittest.TestCase):
+    """Test suite for the walk-forward runner."""
+
+    def setUp(self):
+        self.grid = {"fast_period": [5, 10, 20], "slow_period": [30, 50]}
+        self.ohlcv = make_ohlcv(n=700, seed=3)
+
+    def make_optimizer(self, **kwargs):
+        kwargs.setdefault("max_workers", 0)
+        wf = WalkForwardOptimizer(SMAStrategy, self.grid, train_bars=300, test_bars=100, chunk_size=4, **kwargs)
+        wf.add_data("AAA", self.ohlcv)
+        return wf
+
+    def test_rolling_and_anchored_windows(self):
+        """Test windows tile the series; train windows roll or grow."""
+        rolling = self.make_optimizer().windows(750)
+        self.assertEqual(rolling[0], (0, 300, 300, 400))
+        self.assertEqual(rolling[1], (100, 400, 400, 500))
+        self.assertEqual(rolling[-1], (400, 700, 700, 750))
+
+        anchored = self.make_optimizer(anchored=True).windows(750)
+        self.assertEqual([w[0] for w in anchored], [0] * 5)
+        self.assertEqual([w[1] for w in anchored], [300, 400, 500, 600, 700])
+        self.assertEqual(self.make_optimizer().windows(250), [])
+
+    def test_in_sample_choice_is_best_on_window(self):
+        """Each window trades the parameter set with the best in-sample metric."""
+        result = self.make_optimizer().run_walk_forward()["AAA"]
+        self.assertEqual(len(result.windows), 4)
+
+        close, open_ = self.ohlcv["close"].to_numpy(), self.ohlcv["open"].to_numpy()
+        best_score = -np.inf
+        for fast in self.grid["fast_period"]:
+            for slow in self.grid["slow_period"]:
+                signal = SMAStrategy({"fast_period": fast, "slow_period": slow}).generate_signals(self.ohlcv)
+                trade = signal["trade_signal"].to_numpy()[100:400]
+                sim = simulate_from_signals(open_[100:400], close[100:400], trade > 0, trade < 0)
+                best_score = max(best_score, sim.metrics["sharpe_ratio"])
+        self.assertAlmostEqual(result.windows[1]["in_sample"], best_score)
+
+    def test_out_of_sample_equity_is_chained(self):
+        """Segments start from the previous segment's ending value and end flat."""
+        wf = self.make_optimizer()
+        result = wf.run_walk_forward()["AAA"]
+        self.assertEqual(len(result.equity), 400)
+        self.assertEqual(result.equity.index[0], self.ohlcv.index[300])
+        self.assertAlmostEqual(result.metrics["final_value"], result.equity.iloc[-1])
+
+        first = result.windows[0]
+        growth = (1 + first["return"]) * wf.params["init_cash"]
+        self.assertAlmostEqual(result.equity.iloc[99], growth)
+        frame = result.windows_frame()
+        self.assertIn("fast_period", frame.columns)
+
+    def test_process_pool_matches_in_process(self):
+        """Shared-memory workers choose the same parameters."""
+        serial = self.make_optimizer().run_walk_forward()["AAA"]
+        parallel = self.make_optimizer(max_workers=2).run_walk_forward()["AAA"]
+        self.assertEqual([w["params"] for w in serial.windows], [w["params"] for w in parallel.windows])
+        np.testing.assert_allclose(serial.equity.to_numpy(), parallel.equity.to_numpy())
+
+
+if __name__ == "__main__":
+    unittest.main()
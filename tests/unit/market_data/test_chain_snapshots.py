@@ -0,0 +1,142 @@
+"""
+Unit Tests for the Option Chain Snapshot Store
+
+Uses a temporary directory - no database or API access
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.services.market_data.chain_snapshots import (
+    ChainSnapshotStore,
+    ChainSnapshotRecorder,
+    encode_chain,
+    decode_matrix,
+)
+
+START = datetime(2025, 1, 23, 9, 15, 0)
+
+
+def make_chain(step, strikes=None, expiry="2025-01-30"):
+    """Synthetic NIFTY chain whose OI grows with each step"""
+    strikes = strikes or list(range(23000, 24001, 50))
+    rows = []
+    for i, k in enumerate(strikes):
+        rows.append({
+            'strike': float(k),
+            'call': {'ltp': 100.05 + step * 0.05, 'bid': 100.0, 'ask': 100.1,
+                     'oi': 1000 * (i + 1) + step * (i % 3), 'volume': 10 * step,
+                     'iv': 14.25, 'delta': 0.5},
+            'put': {'ltp': 80.0, 'bid': None, 'ask': 80.1,
+                    'oi': 500 * (i + 1) + step, 'volume': 5 * step,
+                    'iv': 15.5, 'delta': -0.5},
+        })
+    return {'symbol': 'NIFTY', 'expiry_date': expiry,
+            'underlying_price': 23500.0 + step, 'strikes': rows}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ChainSnapshotStore(base_dir=str(tmp_path), keyframe_interval=10)
+
+
+class TestEncoding:
+
+    def test_roundtrip_with_missing(self):
+        strikes, matrix = encode_chain(make_chain(3))
+        values = decode_matrix(matrix)
+
+        assert strikes[0] == 2300000
+        assert np.isnan(values[:, 0]).sum() == 1  # put bid is None
+        assert values[0, 0] == pytest.approx(100.2)
+
+
+class TestChainSnapshotStore:
+
+    def test_chain_as_of_timestamp(self, store):
+        for step in range(25):
+            store.append(make_chain(step), ts=START + timedelta(seconds=5 * step))
+
+        chain = store.get_chain_at('NIFTY', '2025-01-30', START + timedelta(seconds=5 * 17 + 2))
+
+        expected = make_chain(17)
+        assert chain['underlying_price'] == expected['underlying_price']
+        assert chain['snapshot_ts'] == (START + timedelta(seconds=85)).timestamp()
+        assert chain['strikes'][4]['call']['oi'] == expected['strikes'][4]['call']['oi']
+        assert chain['strikes'][4]['call']['ltp'] == pytest.approx(expected['strikes'][4]['call']['ltp'])
+        assert chain['strikes'][4]['put']['bid'] is None
+
+    def test_before_first_snapshot_returns_empty(self, store):
+        store.append(make_chain(0), ts=START)
+        assert store.get_chain_at('NIFTY', '2025-01-30', START - timedelta(seconds=1)) == {}
+
+    def test_oi_series(self, store):
+        for step in range(30):
+            store.append(make_chain(step), ts=START + timedelta(seconds=5 * step))
+
+        series = store.get_oi_series('NIFTY', '2025-01-30', 23100, day=START.date())
+
+        assert len(series['timestamps']) == 30
+        assert series['put_oi'] == [float(500 * 3 + s) for s in range(30)]
+        assert series['call_oi'][-1] == 3000 + 29 * 2
+
+    def test_oi_series_window_and_grid_change(self, store):
+        for step in range(12):
+            store.append(make_chain(step), ts=START + timedelta(seconds=5 * step))
+        # Strike grid shifts: 23100 disappears, forcing a keyframe
+        for step in range(12, 15):
+            store.append(make_chain(step, strikes=list(range(23500, 24501, 50))),
+                         ts=START + timedelta(seconds=5 * step))
+
+        series = store.get_oi_series(
+            'NIFTY', '2025-01-30', 23100,
+            start=START + timedelta(seconds=50), end=START + timedelta(seconds=65)
+        )
+
+        assert len(series['put_oi']) == 4
+        assert series['put_oi'][:2] == [1510.0, 1511.0]
+        assert series['put_oi'][2:] == [None, None]
+
+    def test_delta_records_compact(self, store):
+        first = store.append(make_chain(0), ts=START)
+        deltas = [store.append(make_chain(s), ts=START + timedelta(seconds=5 * s))
+                  for s in range(1, 10)]
+
+        assert max(deltas) < first
+        assert max(deltas) < 300
+
+    def test_new_store_instance_reads_existing_file(self, store, tmp_path):
+        for step in range(5):
+            store.append(make_chain(step), ts=START + timedelta(seconds=5 * step))
+
+        reader = ChainSnapshotStore(base_dir=str(tmp_path))
+        assert reader.list_expiries('NIFTY', START.date()) == ['2025-01-30']
+        assert reader.get_chain_at('NIFTY', '2025-01-30', START + timedelta(minutes=1))['underlying_price'] == 23504.0
+
+
+class TestChainSnapshotRecorder:
+
+    def test_record_once_writes_each_symbol(self, store):
+        service = Mock()
+        service.get_option_chain.side_effect = lambda symbol: dict(make_chain(0), symbol=symbol)
+
+        recorder = ChainSnapshotRecorder(symbols=['nifty', 'banknifty'], store=store, service=service)
+
+        assert recorder.record_once() == 2
+        assert recorder.get_stats()['snapshots_written'] == 2
+        assert store.storage_stats()['files'] == 2
+
+    def test_record_once_counts_errors(self, store):
+        service = Mock()
+        service.get_option_chain.side_effect = RuntimeError("boom")
+
+        recorder = ChainSnapshotRecorder(symbols=['NIFTY'], store=store, service=service)
+
+        assert recorder.record_once() == 0
+        assert recorder.errors == 1
@@ -0,0 +1,183 @@
+"""
+Unit Tests for Option Chain Analytics and Multi-Expiry Fetch
+
+All tests use mocking - no real API calls
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.services.market_data.option_analytics import (
+    chain_to_arrays,
+    compute_pcr,
+    compute_max_pain,
+    compute_oi_walls,
+    compute_iv_skew,
+    analyze_chain,
+    aggregate_chains,
+)
+from backend.services.market_data.options_chain import OptionsChainService
+
+
+def make_chain(strikes, call_oi, put_oi, spot=100.0, expiry="2025-01-30"):
+    """Build a processed chain in the OptionsChainService format"""
+    rows = []
+    for k, c_oi, p_oi in zip(strikes, call_oi, put_oi):
+        rows.append({
+            'strike': k,
+            'call': {'ltp': max(spot - k, 0) + 1, 'oi': c_oi, 'volume': c_oi // 2,
+                     'iv': 0.15 + 0.001 * max(k - spot, 0)},
+            'put': {'ltp': max(k - spot, 0) + 1, 'oi': p_oi, 'volume': p_oi // 2,
+                    'iv': 0.15 + 0.002 * max(spot - k, 0)},
+        })
+    return {'symbol': 'NIFTY', 'expiry_date': expiry, 'underlying_price': spot,
+            'strikes': rows}
+
+
+def brute_force_max_pain(strikes, call_oi, put_oi):
+    best, best_pay = None, None
+    for s in strikes:
+        pay = sum(c * max(s - k, 0) + p * max(k - s, 0)
+                  for k, c, p in zip(strikes, call_oi, put_oi))
+        if best_pay is None or pay < best_pay:
+            best, best_pay = s, pay
+    return best
+
+
+class TestOptionAnalytics:
+    """Test vectorized chain analytics"""
+
+    def test_chain_to_arrays_sorted_and_filled(self):
+        chain = make_chain([110, 90, 100], [5, 1, 3], [1, 6, 2])
+        chain['strikes'][0]['call']['oi'] = None
+
+        arrays = chain_to_arrays(chain)
+
+        assert list(arrays['strike']) == [90, 100, 110]
+        assert arrays['call_oi'][2] == 0
+
+    def test_pcr(self):
+        arrays = chain_to_arrays(make_chain([90, 100, 110], [10, 20, 30], [30, 20, 10]))
+        pcr = compute_pcr(arrays)
+        assert pcr['pcr_oi'] == 1.0
+
+    def test_pcr_zero_calls(self):
+        arrays = chain_to_arrays(make_chain([100], [0], [10]))
+        assert compute_pcr(arrays)['pcr_oi'] is None
+
+    def test_max_pain_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        strikes = np.arange(80, 121, 5, dtype=float)
+        call_oi = rng.integers(0, 1000, strikes.size).astype(float)
+        put_oi = rng.integers(0, 1000, strikes.size).astype(float)
+
+        expected = brute_force_max_pain(strikes, call_oi, put_oi)
+        assert compute_max_pain(strikes, call_oi, put_oi) == expected
+
+    def test_oi_walls_ordered(self):
+        strikes = np.array([90., 100., 110., 120.])
+        oi = np.array([5., 50., 20., 0.])
+        walls = compute_oi_walls(strikes, oi, top_n=3)
+        assert [w['strike'] for w in walls] == [100., 110., 90.]
+
+    def test_iv_skew_positive_for_put_skew(self):
+        chain = make_chain(list(range(80, 121, 5)), [1] * 9, [1] * 9)
+        arrays = chain_to_arrays(chain)
+        skew = compute_iv_skew(arrays['strike'], arrays['call_iv'], arrays['put_iv'], 100.0)
+        assert skew['atm_iv'] == pytest.approx(0.15)
+        assert skew['skew'] > 0
+
+    def test_aggregate_sums_oi_across_expiries(self):
+        near = make_chain([90, 100], [10, 20], [5, 5])
+        far = make_chain([100, 110], [30, 40], [5, 5], expiry="2025-02-27")
+
+        agg = aggregate_chains([near, far])
+
+        assert agg['expiry_count'] == 2
+        assert agg['strike_count'] == 3
+        assert agg['total_call_oi'] == 100
+        assert agg['call_oi_walls'][0] == {'strike': 100.0, 'oi': 50.0}
+
+    def test_aggregate_skew_from_earliest_expiry_in_any_order(self):
+        strikes = list(range(80, 121, 5))
+        near = make_chain(strikes, [1] * 9, [1] * 9, expiry="2026-10-30")
+        far = make_chain(strikes, [1] * 9, [1] * 9, expiry="2026-12-31")
+        for row in far['strikes']:
+            row['put']['iv'] = row['call']['iv'] = 0.30
+
+        expected = aggregate_chains([near, far])['iv_skew']
+        assert expected['atm_iv'] == pytest.approx(0.15)
+        assert aggregate_chains([far, near])['iv_skew'] == expected
+
+    def test_analyze_empty_chain(self):
+        result = analyze_chain({'strikes': []})
+        assert result['max_pain'] is None
+        assert result['strike_count'] == 0
+
+
+class TestMultiExpiryChain:
+    """Test concurrent multi-expiry fetch and caching"""
+
+    def setup_method(self):
+        OptionsChainService._chain_cache.clear()
+
+    def _make_service(self):
+        with patch('backend.services.market_data.options_chain.AuthManager') as mock_auth:
+            mock_auth.return_value.get_valid_token.return_value = 'token'
+            service = OptionsChainService(db_path=':memory:')
+        service.session = Mock()
+        service.session.get.return_value = Mock(status_code=200, json=Mock(return_value={}))
+        service._process_upstox_response = Mock(
+            side_effect=lambda data, symbol, market_open: make_chain([90, 100, 110], [1, 2, 3], [3, 2, 1])
+        )
+        service.is_market_open = Mock(return_value=(True, 'open'))
+        return service
+
+    def test_fetches_each_expiry_once(self):
+        service = self._make_service()
+        expiries = ['2025-01-30', '2025-02-27', '2025-03-27']
+
+        result = service.get_multi_expiry_chain('NIFTY', expiry_dates=expiries)
+
+        assert service.session.get.call_count == 3
+        requested = sorted(c.kwargs['params']['expiry_date'] for c in service.session.get.call_args_list)
+        assert requested == expiries
+        assert len(result['expiries']) == 3
+        assert result['aggregate']['expiry_count'] == 3
+        assert result['cached'] is False
+
+    def test_unsorted_expiries_requested_nearest_first(self):
+        service = self._make_service()
+
+        service.get_multi_expiry_chain('NIFTY', expiry_dates=['2026-12-31', '2026-10-30'])
+
+        requested = [c.kwargs['params']['expiry_date'] for c in service.session.get.call_args_list]
+        assert sorted(requested) == ['2026-10-30', '2026-12-31']
+        assert ('NIFTY', ('2026-10-30', '2026-12-31')) in OptionsChainService._chain_cache
+
+    def test_cache_hit_within_ttl(self):
+        service = self._make_service()
+        expiries = ['2025-01-30']
+
+        service.get_multi_expiry_chain('NIFTY', expiry_dates=expiries)
+        result = service.get_multi_expiry_chain('NIFTY', expiry_dates=expiries, include_strikes=False)
+
+        assert service.session.get.call_count == 1
+        assert result['cached'] is True
+        assert 'strikes' not in result['expiries'][0]
+
+    def test_failed_expiry_skipped(self):
+        service = self._make_service()
+        service.session.get.side_effect = [
+            Mock(status_code=200, json=Mock(return_value={})),
+            Mock(status_code=500),
+        ]
+
+        result = service.get_multi_expiry_chain('NIFTY', expiry_dates=['2025-01-30', '2025-02-27'])
+
+        assert len(result['expiries']) == 1
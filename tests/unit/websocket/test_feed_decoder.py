@@ -0,0 +1,162 @@
+"""
+V3 Market Data Feed Decoder Tests
+
+Tests binary feed handling:
+- Wire and protobuf decoders agree for every mode
+- Field mapping into Tick structs
+- Malformed frames
+- Frame recording and replay through a local websocket server
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+import json
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.feed_decoder import (
+    FEED_TYPE_MARKET_INFO,
+    FeedDecodeError,
+    decode_feed_response_protobuf,
+    decode_feed_response_wire,
+)
+from backend.services.streaming.feed_proto import build_sample_frames, encode_feed_response
+from backend.services.streaming.feed_replay import (
+    FeedReplayServer,
+    FrameRecorder,
+    read_frames,
+    write_frames,
+)
+from backend.services.streaming.websocket_v3_streamer import WebSocketV3Streamer
+
+DECODERS = [decode_feed_response_wire, decode_feed_response_protobuf]
+KEYS = ['NSE_FO|43885', 'NSE_FO|43886', 'NSE_INDEX|Nifty 50']
+
+
+def ticks_by_key(message):
+    return {t.instrument_key: t.to_dict() for t in message.ticks}
+
+
+class TestDecoderParity:
+    """Both decoders must produce identical ticks"""
+
+    @pytest.mark.parametrize('mode', ['ltpc', 'option_greeks', 'full', 'full_d30'])
+    def test_modes_match(self, mode):
+        for _, frame in build_sample_frames(5, KEYS, mode=mode):
+            wire = decode_feed_response_wire(frame, received_ts=1.0)
+            proto = decode_feed_response_protobuf(frame, received_ts=1.0)
+            assert ticks_by_key(wire) == ticks_by_key(proto)
+            assert wire.current_ts == proto.current_ts
+
+    def test_index_feed_and_market_info_match(self):
+        frame = encode_feed_response(
+            {'NSE_INDEX|Nifty Bank': {'fullFeed': {'indexFF': {
+                'ltpc': {'ltp': 49000.5, 'cp': 48800.0},
+                'marketOHLC': {'ohlc': [{'interval': '1d', 'open': 48900, 'high': 49100,
+                                         'low': 48700, 'close': 49000.5}]}}}}},
+            feed_type='market_info',
+            market_status={'NSE_FO': 'NORMAL_OPEN', 'NSE_EQ': 'CLOSING_END'},
+        )
+        wire = decode_feed_response_wire(frame, received_ts=1.0)
+        proto = decode_feed_response_protobuf(frame, received_ts=1.0)
+
+        assert ticks_by_key(wire) == ticks_by_key(proto)
+        assert wire.type == proto.type == FEED_TYPE_MARKET_INFO
+        assert wire.market_status == proto.market_status == {
+            'NSE_FO': 'NORMAL_OPEN', 'NSE_EQ': 'CLOSING_END'}
+
+
+@pytest.mark.parametrize('decode', DECODERS)
+class TestTickFields:
+    """Field mapping for each decoder"""
+
+    def test_full_feed_fields(self, decode):
+        frame = build_sample_frames(1, ['NSE_FO|1'], mode='full')[0][1]
+        tick = decode(frame).ticks[0]
+
+        assert tick.mode == 'full'
+        assert tick.ltp == 100.0
+        assert tick.ltq == 75
+        assert tick.volume == 1000
+        assert tick.oi == 125000.0
+        assert len(tick.depth) == 5
+        assert (tick.bid_qty, tick.bid_price, tick.ask_qty, tick.ask_price) == tick.depth[0]
+        assert tick.open == 95.0 and tick.high == 108.0
+        assert tick.delta == 0.51
+
+    def test_ltpc_negative_and_zero_values(self, decode):
+        frame = encode_feed_response({'NSE_EQ|X': {'ltpc': {'ltp': 10.5, 'ltt': '-5'}}})
+        tick = decode(frame).ticks[0]
+
+        assert tick.mode == 'ltpc'
+        assert tick.ltt == -5
+        assert tick.ltq == 0  # proto3 default
+        assert tick.volume is None  # not carried in ltpc mode
+
+    def test_truncated_frame_raises(self, decode):
+        frame = build_sample_frames(1, KEYS, mode='full')[0][1]
+        with pytest.raises(FeedDecodeError):
+            decode(frame[:-3])
+
+
+class TestWireDecoder:
+
+    def test_skips_unknown_fields(self):
+        frame = encode_feed_response({'NSE_EQ|X': {'ltpc': {'ltp': 10.5}}})
+        # Append unknown field 100 (varint) and field 15 (length-delimited)
+        extended = frame + bytes([0xA0, 0x06, 0x2A]) + bytes([0x7A, 0x02, 0x01, 0x02])
+
+        message = decode_feed_response_wire(extended)
+
+        assert message.ticks[0].ltp == 10.5
+
+
+class TestFeedReplay:
+    """Frame files and the local websocket stand-in"""
+
+    def test_frame_file_roundtrip(self, tmp_path):
+        frames = build_sample_frames(10, KEYS, mode='ltpc')
+        path = tmp_path / 'feed.bin'
+
+        assert write_frames(path, frames) == 10
+        assert read_frames(path) == frames
+
+    def test_recorder_output_is_replayable(self, tmp_path):
+        path = tmp_path / 'recorded.bin'
+        recorder = FrameRecorder(path)
+        payloads = [p for _, p in build_sample_frames(3, KEYS)]
+        for payload in payloads:
+            recorder.record(payload)
+        recorder.close()
+
+        assert [p for _, p in read_frames(path)] == payloads
+
+    @patch('backend.services.streaming.websocket_v3_streamer.requests.Session')
+    @patch('backend.services.streaming.websocket_v3_streamer.AuthManager')
+    def test_streamer_decodes_replayed_frames(self, mock_auth, mock_session):
+        frames = build_sample_frames(50, KEYS, mode='full')
+
+        with FeedReplayServer(frames, wait_for_subscribe=True) as server:
+            ws = WebSocketV3Streamer()
+            ws.db_pool = MagicMock()
+            received = []
+            ws.add_tick_callback(received.extend)
+            ws.ws_url = server.url
+
+            assert ws.connect()
+            assert ws.subscribe(KEYS)
+
+            deadline = time.time() + 5
+            while len(received) < 150 and time.time() < deadline:
+                time.sleep(0.05)
+            ws.max_reconnect_attempts = 0
+            ws.disconnect()
+
+        assert len(received) == 150
+        assert ws.total_messages_received == 50
+        assert ws.decode_errors == 0
+        assert {t.instrument_key for t in received} == set(KEYS)
+        assert json.loads(server.received[0])['method'] == 'sub'
@@ -0,0 +1,295 @@
+"""
+Gap Backfill Tests
+
+Tests feed outage repair:
+- Per-instrument gap windows from last-seen exchange time and disconnect
+- Session clipping, tiny gaps and silent instruments
+- Outages tracked per shard connection
+- Merging REST bars into the aggregator and candles_new
+- Rate limiting, retries (including empty fetches) and rate-limit pauses
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.bar_aggregator import IST, BarAggregator, CandleBarStore
+from backend.services.streaming.feed_decoder import Tick
+from backend.services.streaming.gap_backfill import GapBackfiller, candles_to_bars
+from backend.utils.logging.error_handler import RateLimitError
+
+KEY = 'NSE_EQ|INE009A01021'
+OTHER = 'NSE_EQ|INE467B01029'
+# Monday 2024-01-15 09:15:00 IST
+OPEN = int(datetime(2024, 1, 15, 9, 15, tzinfo=IST).timestamp())
+LATER = OPEN + 3600
+
+
+def tick(offset, ltp, volume=None, key=KEY):
+    t = Tick(key)
+    t.ltp = ltp
+    t.ltt = int((OPEN + offset) * 1000)
+    t.volume = volume
+    return t
+
+
+def candle(minute, o, h, l, c, v):
+    ts = datetime.fromtimestamp(OPEN + minute * 60, IST).isoformat()
+    return {'timestamp': ts, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v, 'oi': 0}
+
+
+class FakeFetch:
+    def __init__(self, candles=None, errors=()):
+        self.candles = candles or []
+        self.errors = list(errors)
+        self.calls = []
+
+    def __call__(self, instrument_key, start, end):
+        self.calls.append((instrument_key, start, end))
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.candles
+
+
+class TestGapDetection:
+    """Gap windows per instrument"""
+
+    def test_gap_spans_disconnect_to_first_tick(self):
+        backfiller = GapBackfiller(fetch=FakeFetch())
+        backfiller.on_ticks([tick(100, 10.0), tick(110, 20.0, key=OTHER)])
+        backfiller.on_disconnect(now=OPEN + 130)
+        backfiller.on_reconnect(now=OPEN + 250)
+        backfiller.on_ticks([tick(260, 11.0)])
+
+        job = backfiller._jobs[KEY]
+        # Last tick was before the drop: nothing was lost until the disconnect
+        assert job.start == OPEN + 128
+        assert job.end == OPEN + 260
+        assert (job.first_bar, job.last_bar) == (OPEN + 120, OPEN + 240)
+        assert job.not_before == OPEN + 300 + backfiller.candle_grace_seconds
+        assert OTHER not in backfiller._jobs
+        assert backfiller.get_stats()['awaiting'] == 1
+
+    def test_silent_instrument_settles_at_reconnect(self):
+        backfiller = GapBackfiller(fetch=FakeFetch(), settle_seconds=5)
+        backfiller.on_ticks([tick(100, 10.0)])
+        backfiller.on_disconnect(now=OPEN + 130)
+        backfiller.on_reconnect(now=OPEN + 200)
+        backfiller.process_due(now=OPEN + 203)
+        assert KEY not in backfiller._jobs
+
+        backfiller.process_due(now=OPEN + 206)
+        assert backfiller._jobs[KEY].end == OPEN + 200
+
+    def test_short_gaps_and_other_shards_are_ignored(self):
+        backfiller = GapBackfiller(fetch=FakeFetch(), min_gap_seconds=2)
+        backfiller.on_ticks([tick(100, 10.0)])
+        backfiller.on_disconnect(now=OPEN + 100.5)
+        # Instrument on a healthy connection keeps ticking
+        backfiller.on_ticks([tick(101, 10.5)])
+        assert backfiller.get_stats()['gaps_detected'] == 0
+        assert backfiller.get_stats()['awaiting'] == 0
+
+    def test_gap_clipped_to_session(self):
+        backfiller = GapBackfiller(fetch=FakeFetch())
+        backfiller.on_ticks([tick(-600, 10.0)])  # pre-open tick
+        backfiller.on_disconnect(now=OPEN - 300)
+        backfiller.on_ticks([tick(90, 11.0)])
+        assert backfiller._jobs[KEY].start == OPEN
+
+    def test_repeated_outages_widen_one_job(self):
+        backfiller = GapBackfiller(fetch=FakeFetch())
+        backfiller.on_ticks([tick(100, 10.0)])
+        backfiller.on_disconnect(now=OPEN + 100)
+        backfiller.on_ticks([tick(200, 10.0)])
+        backfiller.on_disconnect(now=OPEN + 400)
+        backfiller.on_ticks([tick(500, 10.0)])
+        job = backfiller._jobs[KEY]
+        assert (job.start, job.end) == (OPEN + 100, OPEN + 500)
+        assert backfiller.get_stats()['gaps_detected'] == 2
+
+
+class FakeShard:
+    """Stands in for a StreamingCore: its subscriptions identify its instruments"""
+
+    def __init__(self, *keys):
+        self.subscriptions = {key: 'full' for key in keys}
+        self.connection_listeners = []
+
+    def set_connected(self, connected):
+        for listener in self.connection_listeners:
+            listener(connected)
+
+
+class TestShards:
+    """Connection events only affect the shard that changed"""
+
+    def test_drop_marks_only_that_shards_instruments(self):
+        backfiller = GapBackfiller(fetch=FakeFetch())
+        shard_a, shard_b = FakeShard(KEY), FakeShard(OTHER)
+        backfiller.on_ticks([tick(100, 10.0), tick(100, 20.0, key=OTHER)])
+        backfiller.on_connection_change(False, shard_a)
+        assert list(backfiller._awaiting) == [KEY]
+
+        # Another shard's reconnect never settles shard A's silent instruments
+        backfiller.on_reconnect(now=OPEN + 150, source=shard_b)
+        backfiller.process_due(now=OPEN + 300)
+        assert list(backfiller._awaiting) == [KEY]
+        assert backfiller._jobs == {}
+
+    def test_each_shard_settles_at_its_own_reconnect(self):
+        backfiller = GapBackfiller(fetch=FakeFetch(), settle_seconds=5)
+        shard_a, shard_b = FakeShard(KEY), FakeShard(OTHER)
+        backfiller.on_ticks([tick(100, 10.0), tick(100, 20.0, key=OTHER)])
+        backfiller.on_disconnect(now=OPEN + 130, source=shard_a)
+        backfiller.on_disconnect(now=OPEN + 140, source=shard_b)
+        backfiller.on_reconnect(now=OPEN + 200, source=shard_a)
+
+        backfiller.process_due(now=OPEN + 206)
+        assert backfiller._jobs[KEY].end == OPEN + 200
+        assert OTHER not in backfiller._jobs
+        assert list(backfiller._awaiting) == [OTHER]
+
+        backfiller.on_reconnect(now=OPEN + 400, source=shard_b)
+        backfiller.process_due(now=OPEN + 406)
+        job = backfiller._jobs[OTHER]
+        assert (job.start, job.end) == (OPEN + 138, OPEN + 400)
+
+    def test_watched_core_reports_itself(self):
+        backfiller = GapBackfiller(fetch=FakeFetch())
+        shard_a = FakeShard(KEY)
+        backfiller.watch(shard_a)
+        backfiller.on_ticks([tick(100, 10.0), tick(100, 20.0, key=OTHER)])
+        shard_a.set_connected(False)
+        assert list(backfiller._awaiting) == [KEY]
+        assert backfiller._awaiting[KEY][2] is shard_a
+
+
+class TestBackfill:
+    """REST bars repair the aggregator and the store"""
+
+    def test_repairs_gap_minutes_and_rebuilds_coarser_bars(self, tmp_path):
+        store = CandleBarStore(str(tmp_path / 'bars.db'))
+        agg = BarAggregator(timeframes=['1m', '5m'], store=store)
+        agg.on_ticks([tick(1, 100.0, volume=1000), tick(30, 101.0, volume=1100), tick(70, 102.0, volume=1150)])
+
+        backfiller = GapBackfiller(fetch=FakeFetch([
+            candle(0, 100.0, 101.0, 100.0, 101.0, 999),   # outside the gap: left alone
+            candle(1, 102.0, 104.0, 102.0, 103.0, 300),
+            candle(2, 103.0, 108.0, 103.0, 107.0, 500),
+            candle(3, 107.0, 107.5, 105.0, 105.5, 400),
+        ]), aggregator=agg)
+        backfiller.on_ticks([tick(70, 102.0)])
+        backfiller.on_disconnect(now=OPEN + 75)
+        backfiller.on_reconnect(now=OPEN + 185)
+        # First tick after the outage carries the whole gap's volume
+        lagged = tick(190, 105.5, volume=2350)
+        agg.on_ticks([lagged])
+        backfiller.on_ticks([lagged])
+
+        assert backfiller.process_due(now=OPEN + 150) == 0  # last minute not closed yet
+        assert backfiller.process_due(now=OPEN + 300) == 1
+
+        minute = {b['timestamp']: b for b in agg.get_bars(KEY, '1m')}
+        assert minute[OPEN]['volume'] == 100  # streamed, untouched
+        assert minute[OPEN + 60]['volume'] == 300
+        assert minute[OPEN + 120]['high'] == 108.0
+        # The open minute is repaired in place and keeps streaming
+        assert minute[OPEN + 180]['volume'] == 400
+        agg.on_ticks([tick(195, 106.0, volume=2360)])
+        assert agg.get_bars(KEY, '1m')[-1]['volume'] == 410
+
+        five = agg.get_bars(KEY, '5m')[-1]
+        assert (five['open'], five['high'], five['low']) == (100.0, 108.0, 100.0)
+        assert five['volume'] == 100 + 300 + 500 + 410
+
+        rows = sqlite3.connect(store.db_path).execute(
+            "SELECT timestamp, high, volume FROM candles_new WHERE timeframe = '1m' ORDER BY timestamp"
+        ).fetchall()
+        assert rows == [(OPEN, 101.0, 100), (OPEN + 60, 104.0, 300), (OPEN + 120, 108.0, 500)]
+        assert backfiller.get_stats()['bars_backfilled'] == 3
+        assert backfiller.get_stats()['pending_jobs'] == 0
+
+    def test_without_aggregator_writes_store(self, tmp_path):
+        store = CandleBarStore(str(tmp_path / 'bars.db'))
+        backfiller = GapBackfiller(fetch=FakeFetch([candle(2, 1, 2, 1, 2, 10)]), store=store)
+        backfiller.on_ticks([tick(60, 1.0)])
+        backfiller.on_disconnect(now=OPEN + 60)
+        backfiller.on_ticks([tick(200, 1.0)])
+        backfiller.process_due(now=LATER)
+        assert store.bars_written == 1
+
+    def test_candles_to_bars_filters_window(self):
+        candles = [candle(m, 1, 2, 0.5, 1.5, 10) for m in range(5)][::-1]
+        bars = candles_to_bars(KEY, candles, OPEN + 60, OPEN + 180)
+        assert [b.start for b in bars] == [OPEN + 60, OPEN + 120, OPEN + 180]
+        assert bars[0].end - bars[0].start == 60
+
+
+class TestScheduling:
+    """Retries, pacing and rate limits"""
+
+    def make(self, fetch, **kwargs):
+        backfiller = GapBackfiller(fetch=fetch, **kwargs)
+        backfiller.on_ticks([tick(100, 1.0)])
+        backfiller.on_disconnect(now=OPEN + 100)
+        backfiller.on_ticks([tick(300, 1.0)])
+        return backfiller
+
+    def test_failures_retry_then_give_up(self):
+        fetch = FakeFetch(errors=[ConnectionError('down')] * 3)
+        backfiller = self.make(fetch, max_attempts=2, retry_delay=0)
+        backfiller.process_due(now=LATER)
+        assert backfiller.get_stats()['pending_jobs'] == 1
+        backfiller._jobs[KEY].not_before = 0
+        backfiller.process_due(now=LATER)
+        stats = backfiller.get_stats()
+        assert stats['backfills_failed'] == 1
+        assert stats['pending_jobs'] == 0
+
+    def test_rate_limit_pauses_all_jobs(self):
+        fetch = FakeFetch(errors=[RateLimitError('429')])
+        backfiller = self.make(fetch)
+        backfiller.process_due(now=LATER)
+        assert backfiller.get_stats()['paused_for_seconds'] > 0
+        assert backfiller._jobs[KEY].attempts == 0
+        assert backfiller.process_due(now=LATER) == 0
+
+    def test_empty_fetch_retries_then_gives_up(self):
+        fetch = FakeFetch()
+        backfiller = self.make(fetch, max_attempts=2, retry_delay=0)
+        assert backfiller.process_due(now=LATER) == 0
+        assert backfiller._jobs[KEY].attempts == 1
+
+        # Candles not published yet: retried, never reported as repaired
+        backfiller._jobs[KEY].not_before = 0
+        backfiller.process_due(now=LATER)
+        stats = backfiller.get_stats()
+        assert (stats['backfills_completed'], stats['backfills_failed']) == (0, 1)
+        assert len(fetch.calls) == 2
+
+    def test_empty_fetch_succeeds_on_retry(self):
+        fetch = FakeFetch()
+        backfiller = self.make(fetch, retry_delay=0)
+        backfiller.process_due(now=LATER)
+        fetch.candles = [candle(2, 1.0, 1.2, 0.9, 1.1, 10)]
+        backfiller._jobs[KEY].not_before = 0
+        assert backfiller.process_due(now=LATER) == 1
+        assert backfiller.get_stats()['bars_backfilled'] == 1
+
+    def test_requests_are_paced(self):
+        fetch = FakeFetch([candle(2, 1.0, 1.2, 0.9, 1.1, 10)])
+        backfiller = GapBackfiller(fetch=fetch, requests_per_second=20)
+        keys = [f'NSE_EQ|{i}' for i in range(25)]
+        backfiller.on_ticks([tick(100, 1.0, key=k) for k in keys])
+        backfiller.on_disconnect(now=OPEN + 100)
+        backfiller.on_ticks([tick(300, 1.0, key=k) for k in keys])
+
+        started = datetime.now()
+        assert backfiller.process_due(now=LATER) == 25
+        # Burst of 20, then 5 more at 20/s
+        assert datetime.now() - started >= timedelta(seconds=0.2)
+        assert len(fetch.calls) == 25
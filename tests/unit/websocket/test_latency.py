@@ -0,0 +1,141 @@
+"""
+Tick Latency Tests
+
+Tests per-stage latency instrumentation:
+- HDR-style bucket math and percentile accuracy
+- Sampled per-tick observation
+- Prometheus export
+- Stage timestamps recorded by the streaming pipeline and push hub
+"""
+
+import pytest
+import random
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+from backend.services.streaming import latency
+from backend.services.streaming.feed_decoder import Tick
+from backend.services.streaming.feed_proto import build_sample_frames
+from backend.services.streaming.feed_replay import FeedReplayServer
+from backend.services.streaming.latency import LatencyHistogram, LatencyTracker, register_prometheus_collector
+from backend.services.streaming.push_hub import PushHub
+from backend.services.streaming.stream_core import StreamingCore, ThreadedWebSocketTransport
+
+KEYS = ['NSE_FO|43885', 'NSE_INDEX|Nifty 50']
+
+
+class TestHistogram:
+    """Bucket math and percentiles"""
+
+    def test_bucket_index_is_monotonic_and_tight(self):
+        previous = -1
+        for value in list(range(0, 5000)) + [2 ** 20 + 17, 59_999_999]:
+            index = latency._index(value)
+            assert index >= previous
+            previous = index
+            low, high = latency._lowest_value(index), latency._highest_value(index)
+            assert low <= value <= high
+            assert high - low <= max(1, value // 100)
+
+    def test_percentiles_within_one_percent(self):
+        rng = random.Random(7)
+        samples = [rng.lognormvariate(-6, 1.2) for _ in range(20000)]
+        histogram = LatencyHistogram()
+        for s in samples:
+            histogram.record(s)
+        samples.sort()
+        for p in (50, 90, 99, 99.9):
+            exact = samples[int(len(samples) * p / 100) - 1]
+            assert histogram.percentile(p) == pytest.approx(exact, rel=0.01, abs=2e-6)
+        assert histogram.count == 20000
+
+    def test_clamps_negative_and_overflow(self):
+        histogram = LatencyHistogram(max_seconds=1.0)
+        histogram.record(-0.5)
+        histogram.record(5.0)
+        stats = histogram.to_dict()
+        assert (stats['negative'], stats['overflow']) == (1, 1)
+        assert stats['max_ms'] == 1000.0
+        assert histogram.percentile(100) == 1.0
+
+    def test_cumulative_counts(self):
+        histogram = LatencyHistogram()
+        for s in (0.0004, 0.002, 0.002, 0.3, 20.0):
+            histogram.record(s)
+        assert histogram.cumulative_counts([0.0005, 0.0025, 0.5, 10.0]) == [1, 3, 4, 4]
+
+
+class TestTracker:
+    """Per-stage observation"""
+
+    def test_observe_ticks_uses_receive_time(self):
+        tracker = LatencyTracker()
+        ticks = [Tick('A', received_ts=100.0), Tick('B', received_ts=100.5), Tick('C')]
+        tracker.observe_ticks('persist', ticks, now=101.0)
+        stats = tracker.get_stats()['persist']
+        assert stats['count'] == 2  # unstamped tick skipped
+        assert stats['max_ms'] == pytest.approx(1000.0, rel=0.01)
+
+    def test_sampling_spans_batches(self):
+        tracker = LatencyTracker(sample_every=4)
+        for _ in range(5):
+            tracker.observe_ticks('dispatch', [Tick('A', received_ts=1.0)] * 3, now=2.0)
+        assert tracker.get_stats()['dispatch']['count'] == 4  # 15 ticks, every 4th
+
+    def test_prometheus_export(self):
+        tracker = LatencyTracker()
+        tracker.record('decode', 0.002)
+        tracker.record('decode', 0.004)
+        registry = CollectorRegistry()
+        register_prometheus_collector(tracker, registry)
+        register_prometheus_collector(tracker, registry)  # idempotent
+
+        text = generate_latest(registry).decode()
+        assert 'tick_latency_seconds_bucket{le="0.0025",stage="decode"} 1.0' in text
+        assert 'tick_latency_seconds_count{stage="decode"} 2.0' in text
+        assert 'tick_latency_quantile_seconds{quantile="0.99",stage="decode"}' in text
+
+
+class TestPipelineStages:
+    """Stages recorded by the streaming core and push hub"""
+
+    def test_streaming_core_records_stages(self):
+        tracker = LatencyTracker()
+        frames = build_sample_frames(20, KEYS, mode='full')
+        persisted = []
+        with FeedReplayServer(frames, wait_for_subscribe=True) as server:
+            core = StreamingCore(server.url, transport_factory=ThreadedWebSocketTransport,
+                                 on_ticks=[lambda ticks: None], persist=persisted.extend,
+                                 persist_interval=0.05, latency_tracker=tracker)
+            core.subscribe(KEYS, mode='full')
+            core.start_in_thread()
+            deadline = time.time() + 5
+            while len(persisted) < 40 and time.time() < deadline:
+                time.sleep(0.02)
+            core.stop()
+
+        stats = tracker.get_stats()
+        assert stats['exchange']['count'] == 20
+        assert stats['decode']['count'] == 20
+        assert stats['dispatch']['count'] >= 1
+        assert stats['persist']['count'] == 40
+        # Ticks carry the socket receive time, so later stages are never younger
+        assert stats['persist']['max_ms'] >= stats['decode']['min_ms']
+        assert all(t.received_ts <= time.time() for t in persisted)
+
+    def test_push_hub_records_emit(self):
+        tracker = LatencyTracker()
+        hub = PushHub(lambda event, payload, sid: None, latency_tracker=tracker)
+        hub.subscribe('c1', 'A')
+        t = Tick('A', received_ts=time.time() - 0.05)
+        t.ltp = 1.0
+        hub.on_ticks([t])
+        hub.flush(now=10.0)
+        stats = tracker.get_stats()['emit']
+        assert stats['count'] == 1
+        assert stats['p50_ms'] >= 50
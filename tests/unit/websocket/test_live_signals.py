@@ -0,0 +1,159 @@
+"""
+Live Signal Engine Tests
+
+Tests streaming strategy signals on completed bars:
+- Indicator values and crossovers identical to the backtest strategies
+- Per-round vectorized updates for many instruments, slot growth
+- Warm-up from stored candles and signal persistence
+- Persisted snapshot read without an engine; upstream subscriptions for the universe
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.core.analytics.backtest_engine import RSIStrategy, SMAStrategy
+from backend.core.analytics.indicators import rsi, sma
+from backend.services.streaming.bar_aggregator import Bar, CandleBarStore
+from backend.services.streaming import live_signals
+from backend.services.streaming.live_signals import LiveSignalEngine, SignalStore, read_live_signals
+
+START = 1705290300  # 2024-01-15 09:15 IST
+SMA_PARAMS = {'fast_period': 5, 'slow_period': 12}
+RSI_PARAMS = {'rsi_period': 6, 'oversold_threshold': 40, 'overbought_threshold': 60}
+
+
+def closes(n, seed):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+def bars_for(key, values, offset=0):
+    bars = []
+    for i, close in enumerate(values):
+        start = START + 60 * (offset + i)
+        bar = Bar(key, '1m', start, start + 60, float(close))
+        bar.update(float(close), 10, None)
+        bars.append(bar)
+    return bars
+
+
+def backtest_crossings(strategy, values):
+    frame = pd.DataFrame({'open': values, 'high': values, 'low': values, 'close': values, 'volume': 1.0})
+    trade = strategy.generate_signals(frame)['trade_signal'].to_numpy()
+    return {i: ('BUY' if trade[i] > 0 else 'SELL') for i in np.flatnonzero(np.nan_to_num(trade))}
+
+
+def make_engine(**kwargs):
+    return LiveSignalEngine(sma_params=SMA_PARAMS, rsi_params=RSI_PARAMS, capacity=2, **kwargs)
+
+
+class TestLiveSignals:
+    """Live values and signals against the backtest strategies"""
+
+    def test_signals_match_backtest_strategies(self):
+        engine = make_engine()
+        series = {f'NSE_EQ|K{i}': closes(150, i) for i in range(5)}  # more instruments than capacity
+        bars = [bar for key, values in series.items() for bar in bars_for(key, values)]
+        signals = engine.process_bars(bars)
+
+        for key, values in series.items():
+            for strategy in (SMAStrategy(SMA_PARAMS), RSIStrategy(RSI_PARAMS)):
+                live = {
+                    (s['generated_at'], s['action']) for s in signals
+                    if s['instrument_key'] == key and s['strategy'] == strategy.name
+                }
+                expected = {
+                    (pd.Timestamp(START + 60 * (i + 1), unit='s').strftime('%Y-%m-%d %H:%M:%S'), action)
+                    for i, action in backtest_crossings(strategy, values).items()
+                }
+                assert live == expected and expected
+
+        row = engine.snapshot(['NSE_EQ|K3'])[0]
+        values = series['NSE_EQ|K3']
+        assert row['sma_slow'] == pytest.approx(sma(values, 12)[-1], abs=1e-4)
+        assert row['rsi'] == pytest.approx(rsi(values, 6, 'sma')[-1], abs=1e-4)
+        assert engine.capacity >= 5
+
+    def test_warm_start_continues_without_signals(self):
+        values = closes(120, 7)
+        warmed = make_engine()
+        warmed.warm({'NSE_EQ|A': values[:80]})
+        assert warmed.signals_generated == 0
+        live = warmed.process_bars(bars_for('NSE_EQ|A', values[80:], offset=80))
+
+        full = make_engine().process_bars(bars_for('NSE_EQ|A', values))
+        assert live == [s for s in full if s['generated_at'] >= live[0]['generated_at']]
+
+    def test_history_from_candles_and_store(self, tmp_path):
+        db_path = str(tmp_path / 'market_data.db')
+        values = closes(60, 3)
+        CandleBarStore(db_path).write_bars(bars_for('NSE_EQ|A', values[:40]))
+
+        engine = make_engine(history_db=db_path, store=SignalStore(db_path), symbol_map={'NSE_EQ|A': 'INFY'})
+        for bar in bars_for('NSE_EQ|A', values[40:], offset=40):
+            engine.on_bar(bar)
+        engine.on_bar(Bar('NSE_EQ|A', '5m', START, START + 300, 1.0))  # other timeframe ignored
+        signals = engine.process()
+
+        expected = make_engine().process_bars(bars_for('NSE_EQ|A', values))
+        assert [s['generated_at'] for s in signals] == [
+            s['generated_at'] for s in expected if s['generated_at'] >= signals[0]['generated_at']
+        ]
+        conn = sqlite3.connect(db_path)
+        stored = conn.execute('SELECT symbol, action, entry_price FROM trading_signals').fetchall()
+        conn.close()
+        assert len(stored) == len(signals)
+        assert {row[0] for row in stored} == {'INFY'}
+        assert engine.get_stats()['bars_processed'] == 60
+
+    def test_persisted_view_read_without_engine(self, tmp_path):
+        db_path = str(tmp_path / 'market_data.db')
+        assert read_live_signals(db_path) == {'instruments': [], 'signals': []}
+
+        engine = make_engine(store=SignalStore(db_path), instruments=['NSE_EQ|A', 'NSE_EQ|B'],
+                             symbol_map={'NSE_EQ|A': 'INFY', 'NSE_EQ|B': 'TCS'})
+        for key, seed in (('NSE_EQ|A', 1), ('NSE_EQ|B', 2), ('NSE_EQ|X', 3)):  # X is outside the universe
+            for bar in bars_for(key, closes(150, seed)):
+                engine.on_bar(bar)
+        signals = engine.process()
+
+        view = read_live_signals(db_path)
+        assert [row['instrument_key'] for row in view['instruments']] == ['NSE_EQ|A', 'NSE_EQ|B']
+        assert [{k: row[k] for k in ('close', 'sma_slow', 'rsi', 'rsi_state')} for row in view['instruments']] == [
+            {k: row[k] for k in ('close', 'sma_slow', 'rsi', 'rsi_state')} for row in engine.snapshot()
+        ]
+        assert len(view['signals']) == min(50, len(signals))
+        assert {row['symbol'] for row in view['signals']} == {'INFY', 'TCS'}
+
+        only_a = read_live_signals(db_path, ['NSE_EQ|A'], limit=500)
+        assert [row['symbol'] for row in only_a['instruments']] == ['INFY']
+        assert len(only_a['signals']) == sum(s['symbol'] == 'INFY' for s in signals)
+        assert read_live_signals(db_path, ['NSE_EQ|X'])['signals'] == []
+
+
+class TestFeedProcessEngine:
+    """Engine wiring in the feed process"""
+
+    def test_acquires_universe_upstream_and_releases_on_stop(self, tmp_path):
+        manager, aggregator = MagicMock(), MagicMock(bar_callbacks=[])
+        keys = ['NSE_INDEX|Nifty 50', 'NSE_INDEX|Nifty Bank']
+        with patch('backend.services.streaming.subscription_manager.get_subscription_manager',
+                   return_value=manager), \
+                patch('backend.services.streaming.bar_aggregator.get_bar_aggregator', return_value=aggregator), \
+                patch.object(live_signals, '_live_signal_engine', None):
+            engine = live_signals.get_live_signal_engine(keys, db_path=str(tmp_path / 'market_data.db'))
+            try:
+                assert live_signals.get_live_signal_engine(keys) is engine
+                manager.acquire.assert_called_once_with('live_signals', sorted(keys), mode='full')
+                assert aggregator.bar_callbacks == [engine.on_bar]
+            finally:
+                engine.stop()
+        manager.release.assert_called_once_with('live_signals')
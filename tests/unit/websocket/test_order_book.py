@@ -0,0 +1,181 @@
+"""
+Order Book Tests
+
+Tests multi-level depth books:
+- Best bid/ask, spread, mid, imbalance and cumulative depth
+- Incremental updates of shallower and deeper messages
+- Fill estimates across levels and beyond visible depth
+- Bus wiring and paper-trading market fills
+"""
+
+import pytest
+import sqlite3
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.feed_decoder import Tick
+from backend.services.streaming.order_book import OrderBookManager
+from backend.services.streaming.tick_bus import TickBus
+
+KEY = 'NSE_FO|43885'
+
+# (bid_qty, bid_price, ask_qty, ask_price), best first
+DEPTH = [
+    (100, 99.5, 50, 100.0),
+    (200, 99.0, 150, 100.5),
+    (300, 98.5, 300, 101.0),
+]
+
+
+def book_with(depth=DEPTH, **kwargs):
+    books = OrderBookManager(**kwargs)
+    books.update(KEY, depth, ts=1.0)
+    return books
+
+
+class TestDepthBook:
+    """O(1) reads"""
+
+    def test_top_of_book(self):
+        book = book_with().get_book(KEY)
+        assert (book.best_bid, book.best_ask) == (99.5, 100.0)
+        assert (book.best_bid_qty, book.best_ask_qty) == (100, 50)
+        assert book.spread == 0.5
+        assert book.mid == 99.75
+        assert book.updated_at == 1.0
+
+    def test_cumulative_depth_and_imbalance(self):
+        book = book_with().get_book(KEY)
+        assert book.cumulative_depth('BUY') == 600
+        assert book.cumulative_depth('SELL', 2) == 200
+        assert book.imbalance(1) == pytest.approx((100 - 50) / 150)
+        assert book.imbalance() == pytest.approx(100 / 1100)
+        assert book.levels()['asks'][1] == (100.5, 150)
+
+    def test_empty_levels_end_the_side(self):
+        books = book_with([(100, 99.5, 50, 100.0), (0, 0.0, 80, 100.5), (10, 98.0, 0, 0.0)])
+        book = books.get_book(KEY)
+        assert (book.bid_levels, book.ask_levels) == (1, 2)
+        assert book.to_dict()['spread_pct'] == pytest.approx(0.5 / 99.75 * 100)
+
+    def test_one_sided_book(self):
+        book = book_with([(100, 99.5, 0, 0.0)]).get_book(KEY)
+        assert book.best_ask is None
+        assert book.spread is None and book.mid is None
+
+
+class TestUpdates:
+    """Incremental level updates"""
+
+    def test_shallow_update_keeps_deeper_levels_behind_it(self):
+        books = book_with()
+        books.update(KEY, [(120, 99.6, 40, 100.0)])
+        book = books.get_book(KEY)
+        assert (book.bid_levels, book.ask_levels) == (3, 3)
+        assert book.cumulative_depth('BID') == 620
+        assert book.cumulative_depth('ASK') == 490
+        assert books.truncations == 0
+
+    def test_shallow_update_drops_crossed_levels(self):
+        books = book_with()
+        # Market moved up through the old levels
+        books.update(KEY, [(80, 100.6, 90, 101.2)])
+        book = books.get_book(KEY)
+        assert book.bid_levels == 3  # level 0 replaced, old deeper bids sit below 100.6
+        assert book.ask_levels == 1  # old asks at/below 101.2 are stale
+        assert book.cumulative_depth('ASK') == 90
+        assert books.truncations == 1
+
+    def test_deeper_snapshot_replaces_side(self):
+        books = book_with([(100, 99.5, 50, 100.0)])
+        books.update(KEY, DEPTH)
+        assert books.get_book(KEY).bid_levels == 3
+
+    def test_capacity_grows(self):
+        books = OrderBookManager(max_levels=5, initial_capacity=2)
+        for i in range(5):
+            books.update(f'K{i}', [(10, 100.0 + i, 10, 101.0 + i)])
+        assert books.capacity == 8
+        assert books.get_book('K0').best_bid == 100.0
+        assert books.spreads() == {f'K{i}': 1.0 for i in range(5)}
+
+    def test_levels_capped(self):
+        books = book_with(max_levels=2)
+        assert books.get_book(KEY).cumulative_depth('BID') == 300
+
+
+class TestFillEstimate:
+    """Walking the book for market orders"""
+
+    def test_fill_inside_first_level(self):
+        fill = book_with().estimate_fill(KEY, 'BUY', 30)
+        assert (fill['filled'], fill['avg_price'], fill['levels']) == (30, 100.0, 1)
+        assert fill['slippage'] == 0
+
+    def test_fill_across_levels(self):
+        fill = book_with().estimate_fill(KEY, 'SELL', 250)
+        # 100 @ 99.5 + 150 @ 99.0
+        assert fill['avg_price'] == pytest.approx((100 * 99.5 + 150 * 99.0) / 250)
+        assert fill['worst_price'] == 99.0
+        assert fill['levels'] == 2
+        assert fill['slippage'] == pytest.approx(99.5 - fill['avg_price'])
+        assert fill['slippage_bps'] == pytest.approx((99.75 - fill['avg_price']) / 99.75 * 10000)
+
+    def test_exact_level_boundary(self):
+        fill = book_with().estimate_fill(KEY, 'BUY', 200)
+        assert (fill['levels'], fill['worst_price']) == (2, 100.5)
+
+    def test_beyond_visible_depth(self):
+        fill = book_with().estimate_fill(KEY, 'BUY', 1000)
+        assert (fill['filled'], fill['unfilled']) == (500, 500)
+        assert fill['worst_price'] == 101.0
+
+    def test_unknown_instrument(self):
+        fill = OrderBookManager().estimate_fill(KEY, 'BUY', 10)
+        assert fill['filled'] == 0 and fill['avg_price'] is None
+
+
+class TestWiring:
+    """Bus feed and paper-trading fills"""
+
+    def test_bus_ticks_and_quote_dicts(self):
+        bus = TickBus()
+        books = OrderBookManager()
+        books.attach(bus)
+        t = Tick(KEY, received_ts=time.time())
+        t.depth = tuple(DEPTH)
+        bus.publish_one(t)
+        bus.publish_one({'symbol': 'NIFTY', 'ltp': 100.0, 'bid_price': 99.0, 'bid_qty': 5,
+                         'ask_price': 101.0, 'ask_qty': 7})
+        deadline = time.time() + 2
+        while books.updates < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        books.stop()
+
+        assert books.get_book(KEY).cumulative_depth('ASK') == 500
+        assert books.best_bid_ask('NIFTY') == (99.0, 101.0)
+
+    def test_paper_market_order_walks_the_book(self, tmp_path):
+        paper_trading = pytest.importorskip('backend.core.trading.paper_trading')
+        db_path = str(tmp_path / 'paper.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE exchange_listings (symbol TEXT, trading_symbol TEXT, instrument_key TEXT)")
+        conn.execute("CREATE TABLE candles (instrument_key TEXT, ts INTEGER, close REAL)")
+        conn.execute("INSERT INTO exchange_listings VALUES ('NIFTYFUT', 'NIFTYFUT', ?)", (KEY,))
+        conn.execute("INSERT INTO candles VALUES (?, 1, 99.75)", (KEY,))
+        conn.commit()
+        conn.close()
+
+        books = OrderBookManager()
+        books.update(KEY, DEPTH)
+        system = paper_trading.PaperTradingSystem(db_path=db_path, order_book=books)
+        estimate = system.estimate_slippage('NIFTYFUT', 'BUY', 600)
+        # 500 visible, remaining 100 priced past the last ask
+        expected = (50 * 100.0 + 150 * 100.5 + 300 * 101.0 + 100 * 101.0 * (1 + system.slippage)) / 600
+        assert estimate['execution_price'] == pytest.approx(expected)
+
+        books.updated_at[:] = time.time() - 60
+        assert system.estimate_slippage('NIFTYFUT', 'BUY', 600) is None
@@ -0,0 +1,194 @@
+"""
+Push Hub Tests
+
+Tests tick-driven client pushes:
+- Per-client conflation (latest value wins per window)
+- Bandwidth budget defers instead of queueing
+- Routing, upstream subscription hook and tick bus wiring
+- Concurrent (un)subscribes keep one bus subscription in sync with the routes
+"""
+
+import threading
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.feed_decoder import Tick
+from backend.services.streaming.push_hub import PushHub, tick_to_quote
+from backend.services.streaming.rate_limit import TokenBucket
+from backend.services.streaming.tick_bus import TickBus
+
+NIFTY = 'NSE_INDEX|Nifty 50'
+BANK = 'NSE_INDEX|Nifty Bank'
+
+
+def tick(key, ltp, cp=100.0):
+    t = Tick(key)
+    t.ltp = ltp
+    t.cp = cp
+    return t
+
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, event, payload, sid):
+        self.sent.append((event, sid, payload))
+
+
+class TestConflation:
+    """Latest value wins within the window"""
+
+    def test_only_latest_tick_per_instrument_is_sent(self):
+        emit = Recorder()
+        hub = PushHub(emit, window_seconds=0.25)
+        hub.subscribe('c1', NIFTY, topic='NIFTY')
+        hub.on_ticks([tick(NIFTY, 101.0), tick(NIFTY, 102.0), tick(NIFTY, 103.0)])
+
+        assert hub.flush(now=10.0) == 1
+        event, sid, payload = emit.sent[0]
+        assert (event, sid, payload['symbol']) == ('quote_update', 'c1', 'NIFTY')
+        assert payload['data']['ltp'] == 103.0
+        assert payload['data']['change'] == 3.0
+        assert hub.get_stats()['per_client']['c1']['conflated'] == 2
+
+    def test_window_limits_flush_rate(self):
+        emit = Recorder()
+        hub = PushHub(emit, window_seconds=0.25)
+        hub.subscribe('c1', NIFTY)
+        hub.on_ticks([tick(NIFTY, 101.0)])
+        hub.flush(now=10.0)
+        hub.on_ticks([tick(NIFTY, 102.0)])
+        assert hub.flush(now=10.1) == 0
+        assert hub.flush(now=10.3) == 1
+        assert [p['data']['ltp'] for _, _, p in emit.sent] == [101.0, 102.0]
+
+    def test_routes_only_to_interested_clients(self):
+        emit = Recorder()
+        hub = PushHub(emit)
+        hub.subscribe('c1', NIFTY)
+        hub.subscribe('c2', BANK)
+        hub.on_ticks([tick(NIFTY, 101.0), tick(BANK, 201.0), tick('NSE_EQ|X', 1.0)])
+        hub.flush(now=10.0)
+        assert sorted((sid, p['data']['instrument_key']) for _, sid, p in emit.sent) == [
+            ('c1', NIFTY), ('c2', BANK)]
+
+    def test_remove_client_and_unsubscribe(self):
+        emit = Recorder()
+        hub = PushHub(emit)
+        hub.subscribe('c1', NIFTY)
+        hub.subscribe('c2', NIFTY)
+        hub.remove_client('c1')
+        hub.unsubscribe('c2', NIFTY)
+        hub.on_ticks([tick(NIFTY, 101.0)])
+        assert hub.flush(now=10.0) == 0
+        assert hub.subscribed_instruments() == []
+
+
+class TestBandwidthBudget:
+    """Per-client budget defers excess updates"""
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=100, burst=100)
+        bucket.updated = 0.0
+        assert bucket.consume(80, now=0.0)
+        assert not bucket.consume(40, now=0.0)
+        assert bucket.consume(40, now=0.3)
+
+    def test_over_budget_updates_stay_pending(self):
+        emit = Recorder()
+        size = len(str(tick_to_quote(tick(NIFTY, 101.0)))) + 60
+        hub = PushHub(emit, budget_bytes_per_sec=size * 1.5)
+        keys = [f'NSE_EQ|{i}' for i in range(4)]
+        for key in keys:
+            hub.subscribe('c1', key)
+        hub.subscribe('c2', NIFTY)
+
+        hub.on_ticks([tick(key, 101.0) for key in keys] + [tick(NIFTY, 101.0)])
+        hub.flush(now=time.monotonic())
+
+        stats = hub.get_stats()['per_client']
+        assert stats['c1']['messages_sent'] == 1
+        assert stats['c1']['pending'] == 3
+        assert stats['c1']['deferred'] == 3
+        # The other client is unaffected
+        assert stats['c2']['messages_sent'] == 1
+
+        # Pending entries keep conflating rather than queueing
+        hub.on_ticks([tick(keys[1], 150.0)])
+        assert hub.get_stats()['per_client']['c1']['pending'] == 3
+
+
+class TestWiring:
+    """Bus subscription and upstream hook"""
+
+    def test_new_instruments_trigger_upstream_and_bus(self):
+        upstream = []
+        emit = Recorder()
+        bus = TickBus()
+        hub = PushHub(emit, on_new_instruments=upstream.extend)
+        hub.attach(bus)
+        hub.subscribe('c1', NIFTY)
+        hub.subscribe('c2', NIFTY)
+        assert upstream == [NIFTY]
+
+        bus.publish_one(tick(NIFTY, 105.0))
+        deadline = time.time() + 2
+        while not hub.ticks_received and time.time() < deadline:
+            time.sleep(0.01)
+        hub.flush(now=time.monotonic())
+        hub.stop()
+
+        assert {sid for _, sid, _ in emit.sent} == {'c1', 'c2'}
+        assert hub.is_live(NIFTY)
+
+    def test_concurrent_subscribes_share_one_bus_subscription(self):
+        class SlowBus(TickBus):
+            def subscribe(self, **kwargs):
+                time.sleep(0.05)  # widen the window between the check and the assignment
+                return super().subscribe(**kwargs)
+
+        bus = SlowBus()
+        hub = PushHub(Recorder())
+        hub.attach(bus)
+        keys = [f'NSE_EQ|K{i}' for i in range(8)]
+        threads = [threading.Thread(target=hub.subscribe, args=(f'c{i}', key)) for i, key in enumerate(keys)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [sub.name for sub in bus._subscriptions] == ['push-hub']
+        assert hub._subscription.instruments == frozenset(keys)
+
+        threads = [threading.Thread(target=hub.remove_client, args=(f'c{i}',)) for i in range(0, 8, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert hub._subscription.instruments == frozenset(keys[1::2]) == frozenset(hub.subscribed_instruments())
+        hub.stop()
+
+    def test_last_release_triggers_upstream_release(self):
+        released = []
+        hub = PushHub(Recorder(), on_released_instruments=released.extend)
+        hub.subscribe('c1', NIFTY)
+        hub.subscribe('c2', NIFTY)
+        hub.subscribe('c2', BANK)
+        hub.remove_client('c1')
+        assert released == []
+        hub.remove_client('c2')
+        assert sorted(released) == sorted([BANK, NIFTY])
+
+    def test_emit_errors_are_counted(self):
+        def broken(event, payload, sid):
+            raise RuntimeError('socket gone')
+
+        hub = PushHub(broken)
+        hub.subscribe('c1', NIFTY)
+        hub.on_ticks([tick(NIFTY, 101.0)])
+        hub.flush(now=10.0)
+        assert hub.emit_errors == 1
@@ -0,0 +1,119 @@
+"""
+Quote Store Tests
+
+Tests compact latest-quote records:
+- In-place updates, replace vs merge semantics
+- Dict-compatible views and snapshots
+- Instrument ids from the instrument master
+- Column reads and market-quote flattening
+"""
+
+import pytest
+import sqlite3
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.quote_store import QuoteStore, flatten_market_quote, load_instrument_ids
+
+INFY = 'NSE_EQ|INE009A01021'
+HDFC = 'NSE_EQ|INE040A01034'
+
+
+class TestQuoteStore:
+    """Storage and dict semantics"""
+
+    def test_view_reads_like_a_dict(self):
+        quotes = QuoteStore()
+        quotes[INFY] = {'symbol': 'INFY', 'ltp': 1520.5, 'volume': 120000, 'ignored': [1]}
+        quote = quotes.get(INFY)
+        assert quote['ltp'] == 1520.5
+        assert quote['volume'] == 120000 and isinstance(quote['volume'], int)
+        assert quote['symbol'] == 'INFY'
+        assert quote.get('bid_price', 0) == 0
+        assert 'ignored' not in quote
+        assert quote['last_price'] == 1520.5  # market-quote alias
+        assert set(quote) == {'ltp', 'volume', 'updated_at', 'symbol'}
+
+    def test_setitem_replaces_update_merges(self):
+        quotes = QuoteStore()
+        quotes[INFY] = {'ltp': 10.0, 'bid_price': 9.9}
+        quotes.update(INFY, {'ltp': 11.0})
+        assert quotes[INFY]['bid_price'] == 9.9
+        quotes[INFY] = {'ltp': 12.0}
+        assert 'bid_price' not in quotes[INFY]
+
+    def test_rows_are_reused_in_place(self):
+        quotes = QuoteStore(initial_capacity=4)
+        for i in range(100):
+            quotes[INFY] = {'ltp': float(i)}
+        assert quotes.get_stats()['ids_assigned'] == 1
+        assert quotes.capacity == 4
+        assert quotes[INFY]['ltp'] == 99.0
+
+    def test_mapping_protocol(self):
+        quotes = QuoteStore(initial_capacity=1)
+        quotes[INFY] = {'ltp': 1.0}
+        quotes[HDFC] = {'ltp': 2.0}
+        assert len(quotes) == 2 and INFY in quotes and 'X' not in quotes
+        assert quotes.capacity == 2
+        snapshot = quotes.copy()
+        assert snapshot[HDFC]['ltp'] == 2.0 and isinstance(snapshot[HDFC], dict)
+        del quotes[INFY]
+        assert quotes.keys() == [HDFC]
+        assert quotes.get(INFY) is None
+        with pytest.raises(KeyError):
+            quotes[INFY]
+
+    def test_columns(self):
+        quotes = QuoteStore()
+        quotes[INFY] = {'ltp': 1.0}
+        quotes[HDFC] = {'ltp': 2.0, 'close': 1.5}
+        assert quotes.column('ltp').tolist() == [1.0, 2.0]
+        closes = quotes.column('close', [HDFC, INFY, 'missing'])
+        assert closes[0] == 1.5
+        assert all(v != v for v in closes[1:])
+
+    def test_ids_from_instrument_master(self, tmp_path):
+        db_path = str(tmp_path / 'master.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE instruments (instrument_key TEXT PRIMARY KEY)")
+        conn.executemany("INSERT INTO instruments VALUES (?)", [(HDFC,), (INFY,)])
+        conn.commit()
+        conn.close()
+
+        quotes = QuoteStore(load_instrument_ids(db_path))
+        assert quotes.instrument_id(HDFC) == 0
+        assert quotes.instrument_id('NEW') == 2
+        assert len(quotes) == 0
+        assert load_instrument_ids(str(tmp_path / 'missing.db')) == []
+
+
+class TestMarketQuotes:
+    """Upstox market-quote entries"""
+
+    def test_flatten_and_store(self):
+        raw = {
+            'instrument_token': INFY, 'symbol': 'INFY', 'last_price': 1500.0, 'net_change': 12.5,
+            'volume': 1000, 'ohlc': {'open': 1490, 'high': 1510, 'low': 1485, 'close': 1499},
+            'depth': {'buy': [{'price': 1499.9, 'quantity': 50}], 'sell': [{'price': 1500.1, 'quantity': 40}]},
+            'upper_circuit_limit': 1650.0,
+        }
+        quotes = QuoteStore()
+        quotes[INFY] = flatten_market_quote(raw)
+        quote = quotes[INFY]
+        assert quote['ltp'] == 1500.0
+        assert quote['ohlc'] == {'open': 1490.0, 'high': 1510.0, 'low': 1485.0, 'close': 1499.0}
+        assert (quote['bid_qty'], quote['ask_price']) == (50, 1500.1)
+        assert quote['upper_circuit_limit'] == 1650.0
+        assert quote['instrument_key'] == INFY
+
+    def test_streamer_current_quotes(self, tmp_path):
+        from backend.services.streaming.websocket_quote_streamer import WebsocketQuoteStreamer
+
+        streamer = WebsocketQuoteStreamer('token', db_path=str(tmp_path / 'ticks.db'))
+        streamer._on_message(None, '{"symbol": "NIFTY", "ltp": 24000, "bid_price": 23999, "ask_price": 24001}')
+        assert streamer.get_quote('NIFTY')['ltp'] == 24000
+        assert streamer.get_bid_ask_spread('NIFTY')['spread'] == 2
+        assert streamer.get_all_quotes()['NIFTY']['symbol'] == 'NIFTY'
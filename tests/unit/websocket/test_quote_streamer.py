@@ -0,0 +1,81 @@
+"""
+Quote Streamer Tests
+
+Tests the legacy JSON quote streamer:
+- Reconnect budget is per outage, not per process lifetime
+- Quotes reach the tick bus as Tick objects
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.bar_aggregator import BarAggregator
+from backend.services.streaming.feed_decoder import Tick, tick_from_quote
+from backend.services.streaming.tick_bus import TickBus
+from backend.services.streaming.websocket_quote_streamer import WebsocketQuoteStreamer
+
+
+@pytest.fixture
+def streamer(tmp_path):
+    return WebsocketQuoteStreamer('token', db_path=str(tmp_path / 'ticks.db'))
+
+
+class TestReconnect:
+    """Supervisor loop in _run_forever_loop"""
+
+    @patch('backend.services.streaming.websocket_quote_streamer.random.uniform', return_value=0)
+    def test_successful_reconnect_resets_attempts(self, _uniform, streamer):
+        drops = []
+
+        def run_forever():
+            streamer._on_open(None)
+            streamer._on_close(None, 1006, 'drop')
+            drops.append(streamer.reconnect_attempts)
+            if len(drops) == 3 * streamer.max_reconnect_attempts:
+                streamer._stop_requested.set()
+
+        streamer.ws = MagicMock(run_forever=run_forever)
+        streamer._run_forever_loop()
+
+        # Every drop after a successful open starts a fresh backoff sequence
+        assert len(drops) == 3 * streamer.max_reconnect_attempts
+        assert set(drops) == {0}
+
+    @patch('backend.services.streaming.websocket_quote_streamer.random.uniform', return_value=0)
+    def test_gives_up_when_connection_never_opens(self, _uniform, streamer):
+        streamer.ws = MagicMock()
+        streamer._run_forever_loop()
+
+        assert streamer.ws.run_forever.call_count == streamer.max_reconnect_attempts + 1
+        assert streamer.reconnect_attempts == streamer.max_reconnect_attempts
+
+
+class TestTickBusPublishing:
+    """Legacy JSON quotes on the shared Tick bus"""
+
+    def test_quote_converted_to_tick(self):
+        tick = tick_from_quote({'symbol': 'NIFTY', 'ltp': 24000, 'bid_price': 23999, 'bid_qty': 50,
+                                'ask_price': 24001, 'ask_qty': 75, 'day_high': 24100, 'open_interest': 10,
+                                'received_ts': 1700000000.0})
+        assert isinstance(tick, Tick)
+        assert (tick.instrument_key, tick.ltp, tick.high, tick.oi) == ('NIFTY', 24000.0, 24100.0, 10.0)
+        assert tick.ltt is None and tick.received_ts == 1700000000.0
+        assert tick.depth == ((50, 23999.0, 75, 24001.0),)
+
+    def test_attribute_consumers_receive_ticks(self, streamer):
+        streamer.tick_bus = TickBus()
+        aggregator = BarAggregator(timeframes=['1m'], session_filter=False)
+        sub = streamer.tick_bus.subscribe(all_instruments=True, name='bars')
+
+        for ltp in (24000, 24010, 23990):
+            streamer._on_message(None, '{"symbol": "NIFTY", "ltp": %d, "volume": 5}' % ltp)
+        ticks = sub.poll()
+        aggregator.on_ticks(ticks)
+
+        assert [type(t) for t in ticks] == [Tick] * 3
+        bar = aggregator.get_bars('NIFTY', '1m')[-1]
+        assert (bar['high'], bar['low'], bar['close']) == (24010.0, 23990.0, 23990.0)
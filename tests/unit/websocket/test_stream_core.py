@@ -0,0 +1,283 @@
+"""
+Asyncio Streaming Core Tests
+
+Tests the staged streaming pipeline:
+- Ring queue overflow policies and lag accounting
+- End-to-end decode, dispatch and batched persist against a replay server
+- Supervisor reconnects (no recursion) and resubscribes
+- Slow consumers do not stall the reader; dispatch drops are counted
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+import asyncio
+import json
+import threading
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.feed_proto import build_sample_frames
+from backend.services.streaming.feed_replay import FeedReplayServer
+from backend.services.streaming.stream_core import (
+    OverflowPolicy,
+    RingQueue,
+    StreamingCore,
+    ThreadedWebSocketTransport,
+)
+from backend.services.streaming.websocket_v3_streamer import WebSocketV3Streamer
+
+KEYS = ['NSE_FO|43885', 'NSE_FO|43886', 'NSE_INDEX|Nifty 50']
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+class TestRingQueue:
+    """Overflow policies and queue statistics"""
+
+    def test_drop_oldest_keeps_latest(self):
+        async def scenario():
+            q = RingQueue(3, OverflowPolicy.DROP_OLDEST)
+            for i in range(5):
+                q.put_nowait(i)
+            return q, await q.get_batch(10)
+
+        q, batch = run(scenario())
+        assert batch == [2, 3, 4]
+        assert q.dropped == 2
+        assert q.stats()['high_watermark'] == 3
+
+    def test_drop_newest_rejects_incoming(self):
+        async def scenario():
+            q = RingQueue(2, OverflowPolicy.DROP_NEWEST)
+            accepted = [q.put_nowait(i) for i in range(4)]
+            return accepted, await q.get_batch(10)
+
+        accepted, batch = run(scenario())
+        assert accepted == [True, True, False, False]
+        assert batch == [0, 1]
+
+    def test_conflate_keeps_latest_per_key_in_first_seen_order(self):
+        async def scenario():
+            q = RingQueue(10, OverflowPolicy.CONFLATE, key_func=lambda item: item[0])
+            for item in [('A', 1), ('B', 1), ('A', 2), ('A', 3)]:
+                q.put_nowait(item)
+            return q, await q.get_batch(10)
+
+        q, batch = run(scenario())
+        assert batch == [('A', 3), ('B', 1)]
+        assert q.conflated == 2
+
+    def test_conflate_requires_key_func(self):
+        with pytest.raises(ValueError):
+            RingQueue(10, OverflowPolicy.CONFLATE)
+
+    def test_block_policy_waits_for_space(self):
+        async def scenario():
+            q = RingQueue(1, OverflowPolicy.BLOCK)
+            await q.put('first')
+            producer = asyncio.ensure_future(q.put('second'))
+            await asyncio.sleep(0.01)
+            blocked = not producer.done()
+            first = await q.get_batch(1)
+            await producer
+            return blocked, first, await q.get_batch(1)
+
+        blocked, first, second = run(scenario())
+        assert blocked
+        assert (first, second) == (['first'], ['second'])
+
+    def test_get_batch_timeout_and_lag(self):
+        async def scenario():
+            q = RingQueue(10)
+            empty = await q.get_batch(10, timeout=0.01)
+            q.put_nowait('x')
+            await asyncio.sleep(0.02)
+            await q.get_batch(10)
+            return empty, q.stats()
+
+        empty, stats = run(scenario())
+        assert empty == []
+        assert stats['lag_last_ms'] >= 15
+        assert stats['lag_max_ms'] >= stats['lag_last_ms']
+
+
+class TestStreamingCore:
+    """Pipeline against a local replay server"""
+
+    def make_core(self, url, **kwargs):
+        kwargs.setdefault('transport_factory', ThreadedWebSocketTransport)
+        kwargs.setdefault('backoff_base', 0.01)
+        kwargs.setdefault('backoff_max', 0.05)
+        return StreamingCore(url, **kwargs)
+
+    def test_dispatch_and_batched_persist(self):
+        frames = build_sample_frames(40, KEYS, mode='full')
+        dispatched, persisted = [], []
+
+        with FeedReplayServer(frames, wait_for_subscribe=True) as server:
+            core = self.make_core(
+                server.url,
+                on_ticks=[dispatched.extend],
+                persist=persisted.append,
+                dispatch_policy=OverflowPolicy.DROP_OLDEST,
+                persist_interval=0.05,
+            )
+            core.subscribe(KEYS, mode='full')
+            core.start_in_thread()
+            assert wait_for(lambda: sum(map(len, persisted)) == 120)
+            core.stop()
+
+        metrics = core.get_metrics()
+        assert len(dispatched) == 120
+        assert metrics['frames_received'] == 40
+        assert metrics['decode_errors'] == 0
+        assert metrics['persist_batches'] == len(persisted) < 40
+        assert set(metrics['queues']) == {'raw', 'dispatch', 'persist'}
+        request = json.loads(server.received[0])
+        assert request['method'] == 'sub'
+        assert request['data'] == {'instrumentKeys': KEYS, 'mode': 'full'}
+
+    def test_reconnects_without_recursion_and_resubscribes(self):
+        frames = build_sample_frames(5, KEYS, mode='ltpc')
+        url_calls = []
+        connection_events = []
+
+        with FeedReplayServer(frames, wait_for_subscribe=True, close_when_done=True) as server:
+            def url_provider():
+                url_calls.append(threading.get_ident())
+                return server.url
+
+            core = self.make_core(url_provider, max_reconnect_attempts=2, stable_after=60,
+                                  on_connection_change=[connection_events.append])
+            core.subscribe(KEYS[:1], mode='ltpc')
+            thread = core.start_in_thread()
+            thread.join(timeout=10)
+
+        assert not thread.is_alive()
+        metrics = core.get_metrics()
+        assert metrics['connections'] == 3
+        assert metrics['reconnects'] == 2
+        assert metrics['frames_received'] == 15
+        assert len(url_calls) == 3
+        assert connection_events == [True, False] * 3
+        assert sum(json.loads(m)['method'] == 'sub' for m in server.received) == 3
+
+    def test_slow_callback_keeps_every_tick_by_default(self):
+        frames = build_sample_frames(200, KEYS, mode='ltpc')
+        seen = []
+
+        def slow_callback(ticks):
+            seen.append(len(ticks))
+            time.sleep(0.05)
+
+        with FeedReplayServer(frames) as server:
+            core = self.make_core(server.url, on_ticks=[slow_callback])
+            core.start_in_thread()
+            assert wait_for(lambda: core.frames_received == 200)
+            assert wait_for(lambda: sum(seen) == 600)
+            core.stop()
+
+        stats = core.get_metrics()['queues']['dispatch']
+        assert stats['policy'] == 'drop_oldest'
+        assert stats['dropped'] == stats['conflated'] == 0
+        assert max(seen) > len(KEYS)
+
+    def test_dispatch_overflow_drops_are_counted(self):
+        frames = build_sample_frames(200, KEYS, mode='ltpc')
+        seen = []
+
+        def slow_callback(ticks):
+            seen.append(len(ticks))
+            time.sleep(0.05)
+
+        with FeedReplayServer(frames) as server:
+            core = self.make_core(server.url, on_ticks=[slow_callback], dispatch_queue_size=50)
+            core.start_in_thread()
+            assert wait_for(lambda: core.frames_received == 200)
+            core.stop()
+
+        stats = core.get_metrics()['queues']['dispatch']
+        assert stats['dropped'] > 0
+        assert sum(seen) + stats['dropped'] <= 600
+
+    def test_slow_callback_is_conflated_when_requested(self):
+        frames = build_sample_frames(200, KEYS, mode='ltpc')
+        seen = []
+
+        def slow_callback(ticks):
+            seen.append(len(ticks))
+            time.sleep(0.05)
+
+        with FeedReplayServer(frames) as server:
+            core = self.make_core(server.url, on_ticks=[slow_callback],
+                                  dispatch_policy=OverflowPolicy.CONFLATE)
+            core.start_in_thread()
+            assert wait_for(lambda: core.frames_received == 200)
+            core.stop()
+
+        stats = core.get_metrics()['queues']['dispatch']
+        # Reader drained everything while the consumer saw only conflated batches
+        assert sum(seen) < 600
+        assert stats['conflated'] > 0
+        assert max(seen) <= len(KEYS)
+
+    def test_stop_before_connect_is_safe(self):
+        core = self.make_core('ws://127.0.0.1:9')
+        core.stop()
+        assert core.get_metrics()['connected'] is False
+
+
+class TestStreamerIntegration:
+    """WebSocketV3Streamer.start_streaming uses the core"""
+
+    @patch('backend.services.streaming.websocket_v3_streamer.requests.Session')
+    @patch('backend.services.streaming.websocket_v3_streamer.AuthManager')
+    def test_start_streaming_dispatches_and_persists(self, mock_auth, mock_session):
+        frames = build_sample_frames(20, KEYS, mode='full')
+
+        with FeedReplayServer(frames, wait_for_subscribe=True) as server:
+            ws = WebSocketV3Streamer()
+            ws.db_pool = MagicMock()
+            ws._save_ticks = MagicMock()
+            received = []
+            ws.add_tick_callback(received.extend)
+            ws.ws_url = server.url
+
+            ws.start_streaming(KEYS, mode='full', transport_factory=ThreadedWebSocketTransport,
+                               persist_interval=0.05)
+            assert wait_for(lambda: ws.stream_core.persisted == 60)
+            status = ws.get_health_status()
+            ws.stop_streaming()
+
+        assert status['connected'] is True
+        assert status['messages_received'] == 20
+        assert status['stream']['items_decoded'] == 60
+        assert received
+        assert ws.stream_core is None
+
+    @patch('backend.services.streaming.websocket_v3_streamer.requests.Session')
+    @patch('backend.services.streaming.websocket_v3_streamer.AuthManager')
+    def test_on_close_does_not_reconnect_inline(self, mock_auth, mock_session):
+        ws = WebSocketV3Streamer()
+        ws.db_pool = MagicMock()
+        ws.connect = MagicMock()
+        ws.connected = True
+
+        started = time.time()
+        ws._on_close(None, 1006, 'Abnormal closure')
+
+        assert time.time() - started < 0.5
+        ws.connect.assert_not_called()
+        assert ws.connected is False
@@ -0,0 +1,218 @@
+"""
+Subscription Manager Tests
+
+Tests shared upstream subscriptions:
+- Reference counting across consumers
+- Batched sub/unsub messages
+- Mode upgrades/downgrades
+- Sharding at per-connection limits and idle connection shutdown
+- Several shard connections publishing to one tick bus
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+import json
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.feed_proto import build_sample_frames
+from backend.services.streaming.feed_replay import FeedReplayServer
+from backend.services.streaming.stream_core import StreamingCore, ThreadedWebSocketTransport
+from backend.services.streaming.subscription_manager import SubscriptionManager
+from backend.services.streaming.tick_bus import TickBus
+from backend.services.streaming.websocket_v3_streamer import WebSocketV3Streamer
+
+
+class FakeCore:
+    """Records subscription calls instead of opening a socket"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = False
+        self.stopped = False
+
+    def subscribe(self, keys, mode):
+        self.calls.append(('sub', sorted(keys), mode))
+
+    def unsubscribe(self, keys):
+        self.calls.append(('unsub', sorted(keys), None))
+
+    def start_in_thread(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+
+def make_manager(**kwargs):
+    cores = []
+
+    def factory():
+        cores.append(FakeCore())
+        return cores[-1]
+
+    kwargs.setdefault('batch_interval', 0.2)
+    return SubscriptionManager(factory, **kwargs), cores
+
+
+class TestRefCounting:
+    """Interest is shared and counted"""
+
+    def test_shared_instrument_subscribed_once(self):
+        manager, cores = make_manager()
+        manager.acquire('ui', ['A', 'B'], mode='ltpc')
+        manager.acquire('movers', ['B', 'C'], mode='ltpc')
+        manager.flush()
+
+        assert len(cores) == 1
+        assert cores[0].calls == [('sub', ['A', 'B', 'C'], 'ltpc')]
+        assert manager.refcount('B') == 2
+
+    def test_unsubscribe_only_after_last_release(self):
+        manager, cores = make_manager()
+        manager.acquire('ui', ['A', 'B'], mode='ltpc')
+        manager.acquire('movers', ['B'], mode='ltpc')
+        manager.flush()
+
+        manager.release('ui')
+        manager.flush()
+        assert cores[0].calls[-1] == ('unsub', ['A'], None)
+
+        manager.release('movers', ['B'])
+        manager.flush()
+        assert manager.get_stats()['instruments'] == 0
+        # Idle connection is closed
+        assert cores[0].stopped
+        assert manager.get_stats()['connections'] == 0
+
+    def test_acquire_release_within_batch_sends_nothing(self):
+        manager, cores = make_manager()
+        manager.acquire('ui', ['A'])
+        manager.release('ui', ['A'])
+        assert manager.flush() == 0
+        assert cores == []
+
+    def test_immediate_mode_without_batching(self):
+        manager, cores = make_manager(batch_interval=0)
+        manager.acquire('ui', ['A'], mode='full')
+        assert cores[0].calls == [('sub', ['A'], 'full')]
+
+    def test_unknown_mode_rejected(self):
+        manager, _ = make_manager()
+        with pytest.raises(ValueError):
+            manager.acquire('ui', ['A'], mode='LTP')
+
+
+class TestModes:
+    """Richest requested mode wins"""
+
+    def test_upgrade_and_downgrade(self):
+        manager, cores = make_manager()
+        manager.acquire('movers', ['A'], mode='ltpc')
+        manager.flush()
+        manager.acquire('ui', ['A'], mode='full')
+        manager.flush()
+        assert cores[0].calls[-1] == ('sub', ['A'], 'full')
+
+        manager.release('ui')
+        manager.flush()
+        assert cores[0].calls[-1] == ('sub', ['A'], 'ltpc')
+        assert manager.desired_mode('A') == 'ltpc'
+
+
+class TestSharding:
+    """Connections are packed up to their limits"""
+
+    def test_shards_at_limit(self):
+        manager, cores = make_manager(mode_limits={'ltpc': 3, 'full': 2})
+        manager.acquire('ui', [f'K{i}' for i in range(7)], mode='ltpc')
+        manager.flush()
+
+        stats = manager.get_stats()
+        assert stats['connections'] == 3
+        assert [s['instruments'] for s in stats['shards']] == [3, 3, 1]
+        assert all(core.started for core in cores)
+        # One batched message per connection
+        assert stats['messages_sent'] == 3
+
+    def test_mixed_modes_share_capacity(self):
+        manager, cores = make_manager(mode_limits={'ltpc': 4, 'full': 2})
+        manager.acquire('ui', ['F1'], mode='full')       # half a connection
+        manager.acquire('ui', ['L1', 'L2'], mode='ltpc')  # another half
+        manager.acquire('ui', ['L3'], mode='ltpc')        # needs a new connection
+        manager.flush()
+        assert [s['instruments'] for s in manager.get_stats()['shards']] == [3, 1]
+
+    def test_released_capacity_is_reused(self):
+        manager, cores = make_manager(mode_limits={'ltpc': 2})
+        manager.acquire('a', ['K1', 'K2'], mode='ltpc')
+        manager.flush()
+        manager.release('a', ['K1'])
+        manager.acquire('b', ['K3'], mode='ltpc')
+        manager.flush()
+        assert len(cores) == 1
+        assert ('sub', ['K3'], 'ltpc') in cores[0].calls
+
+
+class TestWithStreamingCore:
+    """Batched messages reach a real upstream socket"""
+
+    def test_batched_subscription_frames(self):
+        frames = build_sample_frames(3, ['A'], mode='ltpc')
+        with FeedReplayServer(frames, wait_for_subscribe=True) as server:
+            cores = []
+
+            def factory():
+                cores.append(StreamingCore(server.url, transport_factory=ThreadedWebSocketTransport))
+                return cores[-1]
+
+            manager = SubscriptionManager(factory, batch_interval=0.05)
+            manager.start()
+            manager.acquire('ui', ['NSE_EQ|A', 'NSE_EQ|B'], mode='ltpc')
+            manager.acquire('alerts', ['NSE_EQ|B', 'NSE_EQ|C'], mode='full')
+
+            deadline = time.time() + 5
+            while len(server.received) < 2 and time.time() < deadline:
+                time.sleep(0.02)
+            manager.stop()
+
+        requests = sorted((json.loads(m)['data']['mode'], sorted(json.loads(m)['data']['instrumentKeys']))
+                          for m in server.received)
+        assert requests == [('full', ['NSE_EQ|B', 'NSE_EQ|C']), ('ltpc', ['NSE_EQ|A'])]
+
+    @patch('backend.services.streaming.websocket_v3_streamer.requests.Session')
+    @patch('backend.services.streaming.websocket_v3_streamer.AuthManager')
+    def test_shards_publish_to_one_bus(self, mock_auth, mock_session):
+        keys = ['NSE_EQ|A', 'NSE_EQ|B', 'NSE_EQ|C']
+        frames = build_sample_frames(200, keys, mode='ltpc')
+        bus = TickBus()
+        everything = bus.subscribe(all_instruments=True, capacity=10000)
+
+        with FeedReplayServer(frames, wait_for_subscribe=True) as server:
+            streamer = WebSocketV3Streamer(tick_bus=bus)
+            streamer.ws_url = server.url
+            streamer.db_pool = MagicMock()
+
+            def factory():
+                return streamer.create_stream_core(transport_factory=ThreadedWebSocketTransport)
+
+            # One instrument per connection: three shard cores, three dispatch threads
+            manager = SubscriptionManager(factory, mode_limits={'ltpc': 1}, batch_interval=0.05)
+            manager.start()
+            manager.acquire('ui', keys, mode='ltpc')
+
+            expected = len(keys) * len(frames) * len(keys)  # every shard replays every frame
+            deadline = time.time() + 10
+            while bus.published < expected and time.time() < deadline:
+                time.sleep(0.02)
+            connections = manager.get_stats()['connections']
+            manager.stop()
+
+        assert connections == len(keys)
+        assert bus.published == expected
+        received = everything.poll()
+        assert len(received) == expected
+        assert everything.dropped == 0
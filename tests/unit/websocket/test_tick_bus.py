@@ -0,0 +1,194 @@
+"""
+Tick Bus Tests
+
+Tests in-process tick fan-out:
+- Routing by instrument, universe and wildcard
+- Ring buffer overflow accounting
+- Slow consumers do not affect the publisher or other consumers
+- Concurrent publishers (one per shard) lose nothing
+- Streamer publishes decoded ticks
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+import threading
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.feed_decoder import Tick, decode_feed_response
+from backend.services.streaming.feed_proto import build_sample_frames
+from backend.services.streaming.tick_bus import Subscription, TickBus
+from backend.services.streaming.websocket_v3_streamer import WebSocketV3Streamer
+
+
+def tick(key, ltp=100.0):
+    t = Tick(key)
+    t.ltp = ltp
+    return t
+
+
+class TestRouting:
+    """Subscriptions receive only their topics"""
+
+    def test_instrument_universe_and_wildcard(self):
+        bus = TickBus()
+        bus.define_universe('INDICES', ['NSE_INDEX|Nifty 50', 'NSE_INDEX|Nifty Bank'])
+        by_key = bus.subscribe(instruments=['NSE_EQ|INFY'])
+        by_universe = bus.subscribe(universes=['INDICES'])
+        everything = bus.subscribe(all_instruments=True)
+
+        ticks = [tick('NSE_EQ|INFY'), tick('NSE_INDEX|Nifty 50'), tick('NSE_EQ|TCS')]
+        assert bus.publish(ticks) == 1 + 1 + 3
+
+        assert [t.instrument_key for t in by_key.poll()] == ['NSE_EQ|INFY']
+        assert [t.instrument_key for t in by_universe.poll()] == ['NSE_INDEX|Nifty 50']
+        assert everything.poll() == ticks
+
+    def test_fan_out_shares_references(self):
+        bus = TickBus()
+        subs = [bus.subscribe(instruments=['A']) for _ in range(12)]
+        published = tick('A')
+        bus.publish_one(published)
+        assert all(sub.poll()[0] is published for sub in subs)
+
+    def test_universe_redefinition_updates_routes(self):
+        bus = TickBus()
+        bus.define_universe('WATCH', ['A'])
+        sub = bus.subscribe(universes=['WATCH'])
+        bus.define_universe('WATCH', ['B'])
+        bus.publish([tick('A'), tick('B')])
+        assert [t.instrument_key for t in sub.poll()] == ['B']
+
+    def test_unsubscribe_and_unrouted(self):
+        bus = TickBus()
+        sub = bus.subscribe(instruments=['A'])
+        sub.close()
+        bus.publish_one(tick('A'))
+        assert sub.poll() == []
+        assert bus.unrouted == 1
+        assert bus.get_latest('A').instrument_key == 'A'
+
+    def test_dict_quotes_route_by_symbol(self):
+        bus = TickBus()
+        sub = bus.subscribe(instruments=['NIFTY'])
+        bus.publish_one({'symbol': 'NIFTY', 'ltp': 24000})
+        assert sub.poll() == [{'symbol': 'NIFTY', 'ltp': 24000}]
+
+    def test_empty_subscription_rejected(self):
+        with pytest.raises(ValueError):
+            TickBus().subscribe()
+
+
+class TestRingBuffer:
+    """Bounded buffers with overflow accounting"""
+
+    def test_overflow_drops_oldest_and_counts(self):
+        bus = TickBus()
+        sub = bus.subscribe(instruments=['A'], capacity=4)
+        bus.publish([tick('A', float(i)) for i in range(10)])
+
+        assert sub.stats()['dropped'] == 6
+        assert [t.ltp for t in sub.poll()] == [6.0, 7.0, 8.0, 9.0]
+        assert sub.dropped == 6
+        assert sub.delivered == 4
+
+    def test_poll_max_items_and_wraparound(self):
+        bus = TickBus()
+        sub = bus.subscribe(instruments=['A'], capacity=3)
+        bus.publish([tick('A', 1.0), tick('A', 2.0)])
+        assert [t.ltp for t in sub.poll(1)] == [1.0]
+        bus.publish([tick('A', 3.0), tick('A', 4.0)])
+        assert [t.ltp for t in sub.poll()] == [2.0, 3.0, 4.0]
+        assert sub.dropped == 0
+        assert sub.pending == 0
+
+    def test_slow_consumer_does_not_block_others(self):
+        bus = TickBus()
+        release = threading.Event()
+        fast_seen = []
+
+        def slow(batch):
+            release.wait(5)
+
+        bus.subscribe(instruments=['A'], capacity=8, callback=slow, name='slow')
+        fast = bus.subscribe(instruments=['A'], capacity=10000, callback=fast_seen.extend, name='fast')
+
+        started = time.perf_counter()
+        for i in range(2000):
+            bus.publish_one(tick('A', float(i)))
+        elapsed = time.perf_counter() - started
+
+        deadline = time.time() + 5
+        while len(fast_seen) < 2000 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+
+        assert len(fast_seen) == 2000
+        assert elapsed < 1.0
+        slow_stats = next(s for s in bus.get_stats()['subscribers'] if s['name'] == 'slow')
+        assert slow_stats['dropped'] > 0
+        assert fast.dropped == 0
+
+
+class TestConcurrentPublishers:
+    """One dispatch thread per upstream shard publishing at once"""
+
+    def test_no_ticks_lost_or_overwritten(self):
+        bus = TickBus()
+        shards, per_shard = 4, 1000
+        keys = [f'NSE_EQ|S{i}' for i in range(shards)]
+        everything = bus.subscribe(all_instruments=True, capacity=shards * per_shard)
+        routed = bus.subscribe(instruments=keys, capacity=shards * per_shard)
+        start = threading.Barrier(shards)
+
+        def shard(key):
+            start.wait()
+            for i in range(0, per_shard, 50):
+                bus.publish([tick(key, float(j)) for j in range(i, i + 50)])
+
+        def preemptible_push(sub, item):
+            # Same steps as Subscription._push with a thread switch between read and write
+            seq = sub._write_seq
+            time.sleep(0)
+            sub._slots[seq % sub.capacity] = item
+            sub._write_seq = seq + 1
+
+        with patch.object(Subscription, '_push', preemptible_push):
+            threads = [threading.Thread(target=shard, args=(key,)) for key in keys]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        for sub in (everything, routed):
+            received = sub.poll()
+            assert len(received) == shards * per_shard
+            assert sub.dropped == 0
+            for key in keys:
+                # Each shard's ticks arrive complete and in publish order
+                assert [t.ltp for t in received if t.instrument_key == key] == [float(j) for j in range(per_shard)]
+        assert bus.published == shards * per_shard
+
+
+class TestStreamerPublishing:
+    """Decoded feed frames reach bus subscribers"""
+
+    @patch('backend.services.streaming.websocket_v3_streamer.requests.Session')
+    @patch('backend.services.streaming.websocket_v3_streamer.AuthManager')
+    def test_binary_frame_published(self, mock_auth, mock_session):
+        bus = TickBus()
+        ws = WebSocketV3Streamer(tick_bus=bus)
+        ws.db_pool = MagicMock()
+        sub = bus.subscribe(instruments=['NSE_FO|43885'])
+
+        frame = build_sample_frames(1, ['NSE_FO|43885', 'NSE_FO|43886'], mode='ltpc')[0][1]
+        ws._process_binary_frame(frame)
+
+        received = sub.poll()
+        assert [t.instrument_key for t in received] == ['NSE_FO|43885']
+        decoded = {t.instrument_key: t.ltp for t in decode_feed_response(frame).ticks}
+        assert received[0].ltp == decoded['NSE_FO|43885']
+        assert bus.published == 2
@@ -0,0 +1,123 @@
+"""
+Tick History Tests
+
+Tests in-memory tick rings:
+- Ring wrap-around and ordered views
+- Time windows, recent ticks and series
+- Rolling VWAP, range and tick rate
+- Quote streamer history served from memory with database fallback
+"""
+
+import pytest
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming.feed_decoder import Tick
+from backend.services.streaming.tick_bus import TickBus
+from backend.services.streaming.tick_history import TickHistory, TickRing
+
+KEY = 'NSE_FO|43885'
+
+
+def quote(ts, ltp, volume=None, symbol=KEY):
+    return {'symbol': symbol, 'received_ts': ts, 'ltp': ltp, 'volume': volume,
+            'bid_price': ltp - 0.5, 'ask_price': ltp + 0.5}
+
+
+class TestTickRing:
+    """Fixed-capacity ring"""
+
+    def test_wraps_and_stays_ordered(self):
+        ring = TickRing(capacity=4)
+        for i in range(10):
+            ring.append((float(i), 100.0 + i, 0, 0, 0, 0, 0, 0))
+        view = ring.view()
+        assert ring.count == 4
+        assert view['ts'].tolist() == [6.0, 7.0, 8.0, 9.0]
+        assert ring.oldest_ts == 6.0
+
+    def test_partial_ring(self):
+        ring = TickRing(capacity=4)
+        ring.append((1.0, 1, 0, 0, 0, 0, 0, 0))
+        assert ring.view()['ts'].tolist() == [1.0]
+
+
+class TestTickHistory:
+    """Queries and rolling stats"""
+
+    def test_recent_is_newest_first(self):
+        history = TickHistory(capacity=8)
+        history.on_ticks([quote(float(i + 1), 100.0 + i) for i in range(5)])
+        recent = history.recent(KEY, 3)
+        assert [t['ltp'] for t in recent] == [104.0, 103.0, 102.0]
+        assert recent[0]['bid'] == 103.5
+        assert recent[0]['volume'] is None
+
+    def test_window_and_series(self):
+        history = TickHistory(capacity=8)
+        history.on_ticks([quote(float(i + 1), 100.0 + i) for i in range(6)])
+        assert history.window(KEY, seconds=2.5, now=6.0)['ltp'].tolist() == [103.0, 104.0, 105.0]
+        assert history.series(KEY, 'ltp', last=2).tolist() == [104.0, 105.0]
+        assert len(history.window('missing', seconds=10)) == 0
+
+    def test_stats_vwap_range_rate(self):
+        history = TickHistory()
+        # Cumulative volume: 1000 before the window, then +10, +30, +60
+        history.on_ticks([quote(1.0, 99.0, 1000), quote(5.0, 100.0, 1010),
+                          quote(6.0, 102.0, 1040), quote(7.0, 101.0, 1100)])
+        stats = history.stats(KEY, window_seconds=4, now=8.0)
+        assert stats['ticks'] == 3
+        assert stats['vwap'] == pytest.approx((10 * 100 + 30 * 102 + 60 * 101) / 100)
+        assert (stats['high'], stats['low'], stats['range']) == (102.0, 100.0, 2.0)
+        assert stats['tick_rate'] == 0.75
+        assert stats['last'] == 101.0
+
+    def test_stats_without_volume_or_ticks(self):
+        history = TickHistory()
+        history.on_ticks([quote(1.0, 10.0), quote(2.0, 11.0)])
+        assert history.stats(KEY, 60, now=3.0)['vwap'] is None
+        assert history.stats(KEY, 1, now=100.0)['ticks'] == 0
+        assert history.stats('missing') is None
+
+    def test_instrument_limit(self):
+        history = TickHistory(capacity=2, max_instruments=1)
+        history.on_ticks([quote(1.0, 1.0), quote(1.0, 1.0, symbol='OTHER')])
+        assert history.get_stats()['dropped_instruments'] == 1
+
+    def test_bus_ticks(self):
+        bus = TickBus()
+        history = TickHistory()
+        history.attach(bus)
+        t = Tick(KEY, received_ts=time.time())
+        t.ltp = 250.0
+        t.volume = 10
+        bus.publish_one(t)
+        deadline = time.time() + 2
+        while not history.ticks_recorded and time.time() < deadline:
+            time.sleep(0.01)
+        history.stop()
+        assert history.recent(KEY, 1)[0]['ltp'] == 250.0
+
+
+class TestQuoteStreamerHistory:
+    """Memory first, database for older ticks"""
+
+    def test_falls_back_to_database_for_older_ticks(self, tmp_path):
+        from backend.services.streaming.websocket_quote_streamer import WebsocketQuoteStreamer
+
+        streamer = WebsocketQuoteStreamer('token', db_path=str(tmp_path / 'ticks.db'))
+        streamer.tick_history = TickHistory(capacity=3)
+        for ltp in (1.0, 2.0):
+            streamer._store_tick({'symbol': 'NIFTY', 'ltp': ltp})
+            time.sleep(0.002)
+        now = time.time()
+        streamer.tick_history.on_ticks([quote(now + i * 0.001, 10.0 + i, symbol='NIFTY') for i in range(5)])
+
+        assert [t['ltp'] for t in streamer.get_tick_history('NIFTY', 3)] == [14.0, 13.0, 12.0]
+        ticks = streamer.get_tick_history('NIFTY', 10)
+        assert [t['ltp'] for t in ticks] == [14.0, 13.0, 12.0, 2.0, 1.0]
+        assert ticks[0]['bid_price'] == 13.5
+        assert streamer.get_tick_stats('NIFTY', 60)['ticks'] == 3
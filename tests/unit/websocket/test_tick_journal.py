@@ -0,0 +1,214 @@
+"""
+Tick Journal Tests
+
+Tests memory-mapped feed capture and replay:
+- Record round-trip including absent (None) fields
+- Growth past the preallocated size and reopen/append
+- Sparse index seeks and frame grouping
+- Paced and unpaced replay into the tick bus
+- Daily capture from the shared tick bus
+"""
+
+import pytest
+import threading
+import time
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from backend.services.streaming import tick_journal
+from backend.services.streaming.feed_decoder import decode_feed_response
+from backend.services.streaming.feed_proto import build_sample_frames
+from backend.services.streaming.tick_bus import TickBus
+from backend.services.streaming.tick_journal import (
+    INDEX_STRIDE,
+    DailyTickJournal,
+    TickJournal,
+    replay,
+)
+
+KEYS = ['NSE_FO|43885', 'NSE_FO|43886', 'NSE_INDEX|Nifty 50']
+
+
+def sample_frames(count, mode='full', start=1_700_000_000.0, step=0.25):
+    frames = []
+    for i, (_, payload) in enumerate(build_sample_frames(count, KEYS, mode=mode)):
+        frames.append(decode_feed_response(payload, received_ts=start + i * step).ticks)
+    return frames
+
+
+def comparable(t):
+    d = t.to_dict()
+    d.pop('depth')
+    return d
+
+
+class TestRecords:
+    """Write/read round-trip"""
+
+    @pytest.mark.parametrize('mode', ['ltpc', 'full', 'option_greeks'])
+    def test_roundtrip(self, tmp_path, mode):
+        frames = sample_frames(5, mode=mode)
+        with TickJournal(tmp_path / 'day.ticks') as journal:
+            for frame in frames:
+                journal.append(frame)
+            read = journal.read()
+
+        expected = [comparable(t) for frame in frames for t in frame]
+        assert [comparable(t) for t in read] == expected
+
+    def test_columnar_records_match_decoded_ticks(self, tmp_path):
+        frames = sample_frames(4)
+        with TickJournal(tmp_path / 'day.ticks') as journal:
+            for frame in frames:
+                journal.append(frame)
+            records = journal.records(2, 9)
+            ticks = journal.read(2, 9)
+
+        assert len(records) == 7
+        assert [journal.keys[k] for k in records['key_id']] == [t.instrument_key for t in ticks]
+        assert records['received_ts'].tolist() == [t.received_ts for t in ticks]
+        assert records['ltp'].tolist() == [t.ltp for t in ticks]
+        assert all(m & tick_journal.field_bit('ltp') for m in records['mask'])
+
+    def test_reopen_appends_and_truncates_tail(self, tmp_path):
+        path = tmp_path / 'day.ticks'
+        frames = sample_frames(4)
+        with TickJournal(path) as journal:
+            journal.append(frames[0])
+        size = path.stat().st_size
+        with TickJournal(path) as journal:
+            journal.append(frames[1])
+            assert journal.count == 6
+
+        with TickJournal(path, readonly=True) as journal:
+            assert journal.count == 6
+            assert journal.keys == sorted(set(journal.keys), key=journal.keys.index)
+            assert journal.get_stats()['instruments'] == 3
+        assert path.stat().st_size == 64 + 6 * tick_journal.RECORD_SIZE > size
+
+    def test_growth_beyond_preallocation(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tick_journal, 'GROW_BYTES', 4 * tick_journal.RECORD_SIZE)
+        frames = sample_frames(10, mode='ltpc')
+        with TickJournal(tmp_path / 'day.ticks') as journal:
+            for frame in frames:
+                journal.append(frame)
+            assert journal.count == 30
+            assert journal.read(29)[0].instrument_key in KEYS
+
+    def test_readonly_rejects_writes(self, tmp_path):
+        path = tmp_path / 'day.ticks'
+        TickJournal(path).close()
+        with TickJournal(path, readonly=True) as journal:
+            with pytest.raises(PermissionError):
+                journal.append(sample_frames(1)[0])
+
+    def test_live_reader_sees_new_records(self, tmp_path):
+        path = tmp_path / 'day.ticks'
+        writer = TickJournal(path)
+        writer.append(sample_frames(1)[0])
+        reader = TickJournal(path, readonly=True)
+        writer.append(sample_frames(1)[0])
+        assert len(reader.read()) == 6
+        reader.close()
+        writer.close()
+
+
+class TestIndex:
+    """Sparse time index and frame iteration"""
+
+    def test_seek_and_window(self, tmp_path):
+        frames = sample_frames(INDEX_STRIDE, mode='ltpc', step=1.0)
+        start = frames[0][0].received_ts
+        with TickJournal(tmp_path / 'day.ticks') as journal:
+            for frame in frames:
+                journal.append(frame)
+            assert len(journal._index_ts) == 3
+            assert journal.seek(start + 500) == 1500
+            assert journal.seek(start - 1) == 0
+            assert journal.seek(start + 10_000) == journal.count
+
+            window = list(journal.iter_frames(start + 700, start + 710))
+        assert len(window) == 10
+        assert all(len(frame) == 3 for frame in window)
+        assert window[0][0].received_ts == start + 700
+
+
+class TestReplay:
+    """Replay through the streaming pipeline"""
+
+    def test_max_speed_replay_is_deterministic(self, tmp_path):
+        frames = sample_frames(50)
+        with TickJournal(tmp_path / 'day.ticks') as journal:
+            for frame in frames:
+                journal.append(frame)
+
+            runs = []
+            for _ in range(2):
+                bus = TickBus()
+                sub = bus.subscribe(all_instruments=True, capacity=1000)
+                stats = replay(journal, bus.publish, speed=None)
+                runs.append([(t.instrument_key, t.ltp, t.received_ts) for t in sub.poll()])
+
+        assert stats['frames'] == 50
+        assert stats['ticks'] == 150
+        assert stats['speed'] == 'max'
+        assert runs[0] == runs[1]
+        assert len(runs[0]) == 150
+
+    def test_paced_replay_honours_speed(self, tmp_path):
+        frames = sample_frames(5, step=0.1)  # 0.4s of recorded time
+        with TickJournal(tmp_path / 'day.ticks') as journal:
+            for frame in frames:
+                journal.append(frame)
+            started = time.perf_counter()
+            stats = replay(journal, lambda ticks: None, speed=4.0)
+            elapsed = time.perf_counter() - started
+
+        assert stats['frames'] == 5
+        assert 0.09 <= elapsed < 0.5
+
+    def test_stop_event_aborts(self, tmp_path):
+        with TickJournal(tmp_path / 'day.ticks') as journal:
+            for frame in sample_frames(10):
+                journal.append(frame)
+            stop = threading.Event()
+            seen = []
+
+            def sink(ticks):
+                seen.append(ticks)
+                stop.set()
+
+            assert replay(journal, sink, speed=None, stop_event=stop)['frames'] == 1
+
+
+class TestDailyJournal:
+    """Bus-attached daily capture"""
+
+    def test_captures_bus_ticks(self, tmp_path):
+        bus = TickBus()
+        daily = DailyTickJournal(tmp_path)
+        daily.attach(bus)
+        for frame in sample_frames(20):
+            bus.publish(frame)
+        daily.close()
+
+        files = list(tmp_path.glob('*.ticks'))
+        assert len(files) == 1
+        with TickJournal(files[0], readonly=True) as journal:
+            assert journal.count == 60
+
+    def test_process_journal_captures_shared_bus(self, tmp_path, monkeypatch):
+        bus = TickBus()
+        monkeypatch.setattr('backend.services.streaming.tick_bus.get_tick_bus', lambda: bus)
+        monkeypatch.setattr(tick_journal, '_tick_journal', None)
+
+        daily = tick_journal.get_tick_journal(tmp_path)
+        assert tick_journal.get_tick_journal(tmp_path) is daily
+        for frame in sample_frames(10):
+            bus.publish(frame)
+        daily.close()
+
+        with TickJournal(next(tmp_path.glob('*.ticks')), readonly=True) as journal:
+            assert journal.count == 30
@@ -279,6 +279,22 @@ class TestWebSocketReconnection:
         status = ws.get_health_status()
         assert isinstance(status, dict)
 
+    @patch('backend.services.streaming.websocket_v3_streamer.requests.Session')
+    @patch('backend.services.streaming.websocket_v3_streamer.AuthManager')
+    def test_connection_listeners_receive_the_shard(self, mock_auth, mock_session):
+        """Test connection events name the connection that changed"""
+        ws = WebSocketV3Streamer()
+        events = []
+        ws.add_connection_listener(lambda connected, source: events.append((connected, source)))
+
+        shard_a = ws.create_stream_core()
+        shard_b = ws.create_stream_core()
+        shard_b._notify_connection(False)
+        shard_a._notify_connection(True)
+        ws._notify_connection(True)
+
+        assert events == [(False, shard_b), (True, shard_a), (True, ws)]
+
 
 class TestWebSocketHealthMonitoring:
     """Test WebSocket health monitoring"""
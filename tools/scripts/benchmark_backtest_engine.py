@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+benchmark_backtest_engine.py - Native NumPy backtest engine vs vectorbt
+
+Simulates an SMA-crossover portfolio on synthetic bars with the built-in
+engine (simulate_from_signals) and, when installed, vectorbt's
+Portfolio.from_signals with the same costs and fills. Reports wall time
+per engine and the largest equity difference between them.
+
+Usage:
+  python tools/scripts/benchmark_backtest_engine.py
+  python tools/scripts/benchmark_backtest_engine.py --bars 1000000 --fill next_open
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend.core.analytics.backtest_engine import (
+    DEFAULT_BACKTEST_PARAMS,
+    BacktestEngine,
+    _load_vectorbt,
+    simulate_from_signals,
+)
+
+
+def make_bars(n: int, seed: int = 7) -> pd.DataFrame:
+    """Geometric random walk OHLC at 1-minute bars"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.concatenate(([close[0]], close[:-1])) * np.exp(rng.normal(0, 0.0002, n))
+    index = pd.date_range("2020-01-01", periods=n, freq="1min")
+    return pd.DataFrame({"open": open_, "close": close}, index=index)
+
+
+def crossover_signals(close: np.ndarray, fast: int = 500, slow: int = 2000):
+    """SMA crossover entries/exits from cumulative sums"""
+    csum = np.concatenate(([0.0], np.cumsum(close)))
+    sma_fast = np.full(len(close), np.nan)
+    sma_slow = np.full(len(close), np.nan)
+    sma_fast[fast - 1:] = (csum[fast:] - csum[:-fast]) / fast
+    sma_slow[slow - 1:] = (csum[slow:] - csum[:-slow]) / slow
+    above = sma_fast > sma_slow
+    prev = np.concatenate(([False], above[:-1]))
+    return above & ~prev, ~above & prev & ~np.isnan(sma_slow)
+
+
+def _best_of(func, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--fill", choices=["close", "next_open"], default="close")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_bars(args.bars)
+    entries, exits = crossover_signals(data["close"].to_numpy())
+    params = {**DEFAULT_BACKTEST_PARAMS, "fill_price": args.fill, "freq": "1min"}
+    print(f"{args.bars:,} bars, {int(entries.sum()):,} entry signals, fill={args.fill}\n")
+
+    native_time, native = _best_of(
+        lambda: simulate_from_signals(
+            data["open"].to_numpy(), data["close"].to_numpy(), entries, exits,
+            init_cash=params["init_cash"], commission=params["commission"],
+            slippage=params["slippage"], fill_price=args.fill, freq="1min",
+        ),
+        args.repeat,
+    )
+    print(f"{'native':<10} {native_time * 1000:10.1f} ms   final={native.metrics['final_value']:,.2f}"
+          f"   trades={native.metrics['total_trades']:,}")
+
+    if _load_vectorbt() is None:
+        print("\nvectorbt not installed: skipping parity check")
+        return 0
+
+    engine = BacktestEngine({**params, "engine": "vectorbt"})
+    # First call includes numba compilation; report the warm time
+    engine.simulate(data.iloc[:1000], entries[:1000], exits[:1000])
+    vbt_time, accelerated = _best_of(lambda: engine.simulate(data, entries, exits), args.repeat)
+    print(f"{'vectorbt':<10} {vbt_time * 1000:10.1f} ms   final={accelerated.metrics['final_value']:,.2f}"
+          f"   trades={accelerated.metrics['total_trades']:,}")
+
+    diff = np.abs(native.equity - accelerated.equity) / accelerated.equity
+    print(f"\nmax relative equity difference: {diff.max():.2e}")
+    print(f"speedup (vectorbt / native): {vbt_time / native_time:.2f}x")
+    return 0 if diff.max() < 1e-9 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+benchmark_feed_decoder.py - Microbenchmark for the V3 market data feed decoder
+
+Measures decoded frames/sec and ticks/sec for each subscription mode:
+  tick (protobuf)  - protobuf classes + copy into Tick structs
+  tick (wire)      - hand-rolled wire parser into Tick structs
+  parse only       - bare ParseFromString, the lower bound for the protobuf path
+  json (old path)  - json.loads of the equivalent JSON, for reference
+
+Usage:
+  python tools/scripts/benchmark_feed_decoder.py
+  python tools/scripts/benchmark_feed_decoder.py --frames 20000 --instruments 50
+  python tools/scripts/benchmark_feed_decoder.py --frames-file recorded.bin
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from google.protobuf import json_format
+
+from backend.services.streaming.feed_decoder import (
+    DECODER_BACKEND,
+    decode_feed_response_protobuf,
+    decode_feed_response_wire,
+)
+from backend.services.streaming.feed_proto import build_sample_frames, get_message_class
+from backend.services.streaming.feed_replay import read_frames
+
+
+def _time_it(func, payloads, repeat: int = 3) -> float:
+    """Best-of-N wall time for decoding all payloads"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for payload in payloads:
+            func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(payloads, ticks_per_frame: int, label: str):
+    FeedResponse = get_message_class("FeedResponse")
+
+    def protobuf_decode(payload):
+        message = FeedResponse()
+        message.ParseFromString(payload)
+        return message
+
+    json_payloads = [
+        json.dumps(json_format.MessageToDict(protobuf_decode(p))) for p in payloads
+    ]
+
+    results = {
+        "tick (protobuf)": _time_it(decode_feed_response_protobuf, payloads),
+        "tick (wire)": _time_it(decode_feed_response_wire, payloads),
+        "parse only": _time_it(protobuf_decode, payloads),
+        "json (old path)": _time_it(json.loads, json_payloads),
+    }
+
+    n = len(payloads)
+    avg_size = sum(len(p) for p in payloads) / n
+    print(f"\n{label}: {n} frames x {ticks_per_frame} instruments, {avg_size:.0f} B/frame")
+    print(f"  {'decoder':<18} {'frames/sec':>12} {'ticks/sec':>12} {'us/frame':>10}")
+    for name, elapsed in results.items():
+        print(
+            f"  {name:<18} {n / elapsed:>12,.0f} {n * ticks_per_frame / elapsed:>12,.0f} "
+            f"{elapsed / n * 1e6:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark V3 feed decoding")
+    parser.add_argument("--frames", type=int, default=5000, help="Frames per mode")
+    parser.add_argument("--instruments", type=int, default=10, help="Instruments per frame")
+    parser.add_argument("--frames-file", help="Benchmark a recorded frame file instead")
+    args = parser.parse_args()
+
+    print(f"Active decoder: {DECODER_BACKEND}")
+
+    if args.frames_file:
+        frames = read_frames(args.frames_file)
+        payloads = [payload for _, payload in frames]
+        ticks = sum(len(decode_feed_response_wire(p).ticks) for p in payloads) // max(len(payloads), 1)
+        benchmark(payloads, ticks, args.frames_file)
+        return
+
+    keys = [f"NSE_FO|{40000 + i}" for i in range(args.instruments)]
+    for mode in ("ltpc", "option_greeks", "full", "full_d30"):
+        frames = build_sample_frames(args.frames, keys, mode=mode)
+        benchmark([payload for _, payload in frames], len(keys), mode)
+
+
+if __name__ == "__main__":
+    main()